@@ -8,8 +8,9 @@
 
 import sqlite3
 import json
+import sys
 from pathlib import Path
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, TypeVar
 from enum import Enum
 from datetime import datetime
 
@@ -28,6 +29,7 @@ class ConfigCategory(Enum):
     CEC = 'cec'
     MEDIA = 'media'
     UI = 'ui'
+    AMBILIGHT = 'ambilight'
 
 
 class ConfigManager:
@@ -92,14 +94,22 @@ class ConfigManager:
              'Код кнопки LEFT'),
             ('cec_key_right', '4', ConfigType.INT, ConfigCategory.CEC, 
              'Код кнопки RIGHT'),
-            ('cec_key_red', '68', ConfigType.INT, ConfigCategory.CEC, 
+            ('cec_key_red', '114', ConfigType.INT, ConfigCategory.CEC, 
              'Код кнопки RED'),
-            ('cec_key_green', '113', ConfigType.INT, ConfigCategory.CEC, 
+            ('cec_key_green', '115', ConfigType.INT, ConfigCategory.CEC, 
              'Код кнопки GREEN'),
             ('cec_key_yellow', '116', ConfigType.INT, ConfigCategory.CEC, 
              'Код кнопки YELLOW'),
-            ('cec_key_blue', '217', ConfigType.INT, ConfigCategory.CEC, 
+            ('cec_key_blue', '113', ConfigType.INT, ConfigCategory.CEC, 
              'Код кнопки BLUE'),
+            ('cec_key_back', '13', ConfigType.INT, ConfigCategory.CEC, 
+             'Код кнопки BACK (выход)'),
+            ('cec_key_info', '53', ConfigType.INT, ConfigCategory.CEC, 
+             'Код кнопки INFO'),
+            ('cec_key_channel_up', '48', ConfigType.INT, ConfigCategory.CEC, 
+             'Код кнопки CHANNEL UP'),
+            ('cec_key_channel_down', '49', ConfigType.INT, ConfigCategory.CEC, 
+             'Код кнопки CHANNEL DOWN'),
             ('cec_key_0', '32', ConfigType.INT, ConfigCategory.CEC, 
              'Код кнопки 0'),
             ('cec_key_1', '33', ConfigType.INT, ConfigCategory.CEC, 
@@ -120,12 +130,52 @@ class ConfigManager:
              'Код кнопки 8'),
             ('cec_key_9', '41', ConfigType.INT, ConfigCategory.CEC, 
              'Код кнопки 9'),
+            ('cec_seek_acceleration', '5:2,10:4', ConfigType.STRING, ConfigCategory.CEC, 
+             'Удержание кнопки перемотки: с какого повтора:множитель шага через запятую (множитель до 4)'),
             
             # Media settings
             ('media_dir', '/media', ConfigType.PATH, ConfigCategory.MEDIA, 
              'Директория с медиа файлами'),
             ('video_extensions', 'avi,mp4,mkv,mov,wmv,flv', ConfigType.STRING, ConfigCategory.MEDIA, 
              'Расширения видеофайлов'),
+            ('readahead_percent', '80', ConfigType.INT, ConfigCategory.MEDIA, 
+             'Упреждающее чтение следующей серии с % просмотра (0 - выкл)'),
+            ('readahead_head_mb', '32', ConfigType.INT, ConfigCategory.MEDIA, 
+             'Упреждающее чтение: начало файла (МБ)'),
+            ('readahead_tail_mb', '4', ConfigType.INT, ConfigCategory.MEDIA, 
+             'Упреждающее чтение: конец файла - индекс MKV/MP4 (МБ)'),
+            ('readahead_rate_kb', '2048', ConfigType.INT, ConfigCategory.MEDIA, 
+             'Упреждающее чтение: скорость (КБ/с, 0 - без ограничения)'),
+            ('cache_enabled', 'false', ConfigType.BOOL, ConfigCategory.MEDIA, 
+             'Локальный кэш серий на SD/USB (media_cache.py)'),
+            ('cache_dir', '', ConfigType.PATH, ConfigCategory.MEDIA, 
+             'Локальный кэш: папка (пусто - cache/ рядом со скриптами)'),
+            ('cache_budget_mb', '8192', ConfigType.INT, ConfigCategory.MEDIA, 
+             'Локальный кэш: объём (МБ)'),
+            ('cache_ahead', '2', ConfigType.INT, ConfigCategory.MEDIA, 
+             'Локальный кэш: сколько следующих серий копировать'),
+            ('io_max_kb', '4096', ConfigType.INT, ConfigCategory.MEDIA, 
+             'Фоновое чтение по сети: потолок скорости (КБ/с, 0 - без потолка)'),
+            ('io_headroom_percent', '150', ConfigType.INT, ConfigCategory.MEDIA, 
+             'Фоновое чтение по сети: запас канала для VLC (% его потребления)'),
+            ('learned_markers_confidence', '60', ConfigType.INT, ConfigCategory.MEDIA, 
+             'Выученные маркеры intro/credits: порог уверенности для записи (%)'),
+            ('fingerprint_dir', '', ConfigType.PATH, ConfigCategory.MEDIA, 
+             'Хранилище отпечатков звука: папка (пусто - fingerprints/ рядом со скриптами)'),
+            
+            # Ambilight settings
+            ('ambilight_leds', '38,21,38,21', ConfigType.STRING, ConfigCategory.AMBILIGHT, 
+             'Подсветка: светодиодов на краях (верх,право,низ,лево)'),
+            ('ambilight_depth_percent', '12', ConfigType.INT, ConfigCategory.AMBILIGHT, 
+             'Подсветка: глубина зоны светодиода от края кадра (%)'),
+            ('ambilight_fps', '30', ConfigType.INT, ConfigCategory.AMBILIGHT, 
+             'Подсветка: кадров в секунду'),
+            ('ambilight_smoothing_percent', '50', ConfigType.INT, ConfigCategory.AMBILIGHT, 
+             'Подсветка: сглаживание - доля прежнего цвета (%)'),
+            ('ambilight_framebuffer', '/dev/fb0', ConfigType.PATH, ConfigCategory.AMBILIGHT, 
+             'Подсветка: framebuffer экрана'),
+            ('ambilight_device', '', ConfigType.PATH, ConfigCategory.AMBILIGHT, 
+             'Подсветка: порт ленты Arduino/Adalight (пусто - без ленты)'),
             
             # UI settings
             ('menu_height', '20', ConfigType.INT, ConfigCategory.UI, 
@@ -136,6 +186,31 @@ class ConfigManager:
         
         for key, value, type_, category, description in defaults:
             self.set(key, value, type_, category, description, overwrite=False)
+        
+        self._fix_defaults()
+    
+    def _fix_defaults(self) -> None:
+        """Исправление ошибочных значений по умолчанию из прежних версий
+        
+        Меняются только значения, которые пользователь не трогал
+        (совпадают со старым значением по умолчанию).
+        """
+        fixes = [
+            ('cec_key_red', '68', '114'),
+            ('cec_key_green', '113', '115'),
+            ('cec_key_blue', '217', '113'),
+        ]
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                for key, old_value, new_value in fixes:
+                    cursor.execute("""
+                        UPDATE config SET value = ?, modified_at = ?
+                        WHERE key = ? AND value = ?
+                    """, (new_value, datetime.now(), key, old_value))
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"Ошибка исправления настроек: {e}", file=__import__('sys').stderr)
     
     def get(self, key: str, default: Any = None) -> Any:
         """Получить значение по ключу
@@ -350,6 +425,90 @@ class ConfigManager:
             return value_str
 
 
+Settings = TypeVar('Settings', bound=tuple)
+
+
+def _open_config(db_path: Optional[Path]) -> ConfigManager:
+    """ConfigManager на db_path, по умолчанию - на общей БД (vlc_db.DB_PATH)"""
+    if db_path is None:
+        from vlc_db import DB_PATH
+        db_path = DB_PATH
+    return ConfigManager(db_path)
+
+
+def _typed_value(value: Any, default: Any) -> Any:
+    """Привести значение из config к типу значения по умолчанию
+    
+    Пустой PATH читается как Path('.') - это пустая строка; кортеж хранится
+    строкой через запятую ('38,21,38,21') и должен совпасть по длине.
+    """
+    if isinstance(default, bool):
+        return bool(value)
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, tuple):
+        parts = value if isinstance(value, (tuple, list)) else str(value).split(',')
+        items = tuple(type(default[0])(part) for part in parts)
+        if len(items) != len(default):
+            raise ValueError(f"ожидается значений через запятую: {len(default)}, "
+                             f"получено {len(items)}")
+        return items
+    text = '' if value is None else str(value)
+    return '' if text == '.' else text
+
+
+def load_value(key: str, default: Any, db_path: Optional[Path] = None,
+               label: Optional[str] = None) -> Any:
+    """Одна настройка из таблицы config, при ошибке - default
+    
+    Args:
+        key: ключ настройки
+        default: значение по умолчанию (задаёт и тип результата)
+        db_path: путь к БД (None - vlc_db.DB_PATH)
+        label: название для предупреждения в stderr (по умолчанию - key)
+    
+    Returns:
+        Значение типа default
+    """
+    try:
+        return _typed_value(_open_config(db_path).get(key, default), default)
+    except Exception as e:
+        print(f"⚠️  {label or key} по умолчанию: {e}", file=sys.stderr)
+        return default
+
+
+def load_prefixed_settings(defaults: Settings, prefix: str, db_path: Optional[Path] = None,
+                           label: Optional[str] = None,
+                           keys: Optional[Dict[str, str]] = None) -> Settings:
+    """NamedTuple настроек из таблицы config, при любой ошибке - defaults целиком
+    
+    Args:
+        defaults: NamedTuple со значениями по умолчанию (задают и типы полей)
+        prefix: префикс ключей - поле name читается из prefix + name
+        db_path: путь к БД (None - vlc_db.DB_PATH)
+        label: название для предупреждения в stderr (по умолчанию - prefix)
+        keys: ключи полей, названных не по префиксу ({'directory': 'cache_dir'})
+    
+    Returns:
+        Настройки того же типа, что и defaults
+    """
+    keys = keys or {}
+    try:
+        config = _open_config(db_path)
+        values = {}
+        for name in defaults._fields:
+            key = keys.get(name, prefix + name)
+            default = getattr(defaults, name)
+            try:
+                values[name] = _typed_value(config.get(key, default), default)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"{key}: {e}") from e
+        return defaults._replace(**values)
+    except Exception as e:
+        print(f"⚠️  {label or prefix.rstrip('_')} по умолчанию: {e}", file=sys.stderr)
+        return defaults
+
+
 if __name__ == "__main__":
     # Тест
     import sys
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+list_window.py - Оконная (виртуализированная) модель списка файлов для TUI меню
+Версия: 1.0.0
+
+Листинг папки хранит только имена (os.scandir, без stat). Размеры, статусы
+просмотра и агрегаты подпапок загружаются постранично и только для страниц,
+попадающих в видимое окно (+ небольшой запас). Стоимость перерисовки и
+прокрутки не зависит от количества файлов в папке.
+"""
+
+import os
+import sys
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Корень проекта в PYTHONPATH для импорта общего vlc_db
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from vlc_db import format_dir_progress
+
+# Размер страницы ленивой загрузки (строк)
+PAGE_SIZE = 64
+# Запас строк вокруг видимого окна
+WINDOW_MARGIN = 8
+# Сколько загруженных страниц держать в памяти (LRU)
+MAX_CACHED_PAGES = 8
+
+STATUS_ICONS = {
+    'watched': '[X]',
+    'partial': '[T]',
+    'sleep': '[S]',
+}
+
+
+def format_size(size: float) -> str:
+    """Форматирование размера файла"""
+    for unit in ['B', 'K', 'M', 'G', 'T']:
+        if size < 1024.0:
+            return f"{size:.0f}{unit}"
+        size /= 1024.0
+    return f"{size:.0f}P"
+
+
+class WindowedList:
+    """Список элементов папки с ленивой постраничной загрузкой деталей
+
+    Элемент описывается словарём того же формата, что и раньше в get_items():
+    {'name', 'type', 'description', 'path', 'status', 'progress'}
+    но такие словари создаются только для видимых страниц.
+    """
+
+    def __init__(self, db, directory: Path, extensions, show_parent: bool = True,
+                 page_size: int = PAGE_SIZE, max_pages: int = MAX_CACHED_PAGES):
+        self.db = db
+        self.directory = Path(directory)
+        self.extensions = extensions
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.show_parent = show_parent
+
+        self._dirs: List[str] = []
+        self._videos: List[str] = []
+        self._pages: "OrderedDict[int, List[Dict]]" = OrderedDict()
+        self.page_loads = 0  # Счётчик загрузок страниц (диагностика/тесты)
+
+        self._scan()
+
+    # ------------------------------------------------------------------
+    # Листинг
+    # ------------------------------------------------------------------
+
+    def _scan(self) -> None:
+        """Листинг папки: только имена и тип (d_type из readdir, без stat)"""
+        dirs, videos = [], []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        continue
+                    if is_dir:
+                        if not entry.name.startswith('.'):
+                            dirs.append(entry.name)
+                    elif os.path.splitext(entry.name)[1].lower() in self.extensions:
+                        videos.append(entry.name)
+        except (PermissionError, FileNotFoundError):
+            pass
+
+        dirs.sort(key=str.lower)
+        videos.sort(key=str.lower)
+        self._dirs = dirs
+        self._videos = videos
+        self._pages.clear()
+
+        # Количество видеофайлов - для total в агрегатах dir_progress
+        self.db.set_dir_file_count(str(self.directory), len(videos))
+
+    def refresh(self) -> None:
+        """Перечитать папку (например после возврата из плеера)"""
+        self._scan()
+
+    def invalidate(self) -> None:
+        """Сбросить загруженные страницы (статусы будут перечитаны из БД)"""
+        self._pages.clear()
+
+    # ------------------------------------------------------------------
+    # Дешёвый доступ по индексу (без обращения к БД и ФС)
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return int(self.show_parent) + len(self._dirs) + len(self._videos)
+
+    def entry(self, idx: int) -> Tuple[str, str]:
+        """(name, type) элемента по индексу, type = 'DIR' | 'FILE'"""
+        if self.show_parent:
+            if idx == 0:
+                return '..', 'DIR'
+            idx -= 1
+        if idx < len(self._dirs):
+            return self._dirs[idx], 'DIR'
+        return self._videos[idx - len(self._dirs)], 'FILE'
+
+    def index_of(self, name: str) -> Optional[int]:
+        """Индекс элемента по имени (для восстановления курсора)"""
+        for idx in range(len(self)):
+            if self.entry(idx)[0] == name:
+                return idx
+        return None
+
+    # ------------------------------------------------------------------
+    # Ленивая загрузка деталей
+    # ------------------------------------------------------------------
+
+    def rows(self, start: int, stop: int, margin: int = WINDOW_MARGIN) -> List[Dict]:
+        """Элементы [start, stop) с деталями; страницы в пределах margin подгружаются заранее"""
+        start = max(0, start)
+        stop = min(len(self), stop)
+        if start >= stop:
+            return []
+
+        first_page = max(0, start - margin) // self.page_size
+        last_page = (min(len(self), stop + margin) - 1) // self.page_size
+        for page in range(first_page, last_page + 1):
+            self._get_page(page)
+
+        result = []
+        for idx in range(start, stop):
+            page, offset = divmod(idx, self.page_size)
+            result.append(self._get_page(page)[offset])
+        return result
+
+    def row(self, idx: int) -> Dict:
+        """Один элемент с деталями"""
+        page, offset = divmod(idx, self.page_size)
+        return self._get_page(page)[offset]
+
+    def _get_page(self, page: int) -> List[Dict]:
+        """Страница из LRU кеша или загрузка одним пакетом из БД"""
+        rows = self._pages.get(page)
+        if rows is not None:
+            self._pages.move_to_end(page)
+            return rows
+
+        rows = self._load_page(page)
+        self._pages[page] = rows
+        if len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+        return rows
+
+    def _load_page(self, page: int) -> List[Dict]:
+        """Загрузка страницы: 1 запрос статусов + 1 запрос агрегатов подпапок"""
+        self.page_loads += 1
+        start = page * self.page_size
+        stop = min(len(self), start + self.page_size)
+        entries = [self.entry(idx) for idx in range(start, stop)]
+
+        file_names = [name for name, type_ in entries if type_ == 'FILE']
+        dir_names = [name for name, type_ in entries if type_ == 'DIR' and name != '..']
+
+        statuses = self.db.get_playback_batch_status(str(self.directory), file_names) if file_names else {}
+        progress = self.db.get_dir_progress_batch(str(self.directory), dir_names) if dir_names else {}
+
+        rows = []
+        for name, type_ in entries:
+            if name == '..':
+                rows.append({
+                    'name': '..',
+                    'type': 'DIR',
+                    'description': 'Назад',
+                    'path': self.directory.parent,
+                    'status': '',
+                    'progress': ''
+                })
+            elif type_ == 'DIR':
+                text = format_dir_progress(*progress.get(name, (0, 0, 0)))
+                rows.append({
+                    'name': name,
+                    'type': 'DIR',
+                    'description': f"DIR {text}" if text else 'DIR',
+                    'path': self.directory / name,
+                    'status': '',
+                    'progress': text
+                })
+            else:
+                path = self.directory / name
+                try:
+                    size_str = format_size(path.stat().st_size)
+                except OSError:
+                    size_str = '?'
+                status = statuses.get(name, '')
+                rows.append({
+                    'name': name,
+                    'type': 'FILE',
+                    'description': f"{STATUS_ICONS.get(status, '[ ]')} {size_str}",
+                    'path': path,
+                    'status': status,
+                    'progress': ''
+                })
+        return rows
+
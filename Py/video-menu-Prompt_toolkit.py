@@ -14,6 +14,7 @@ from typing import Optional, Dict, List, Tuple
 
 try:
     from prompt_toolkit import Application
+    from prompt_toolkit.application import get_app
     from prompt_toolkit.key_binding import KeyBindings
     from prompt_toolkit.layout import Layout, HSplit, VSplit, Window, FormattedTextControl, Dimension
     from prompt_toolkit.widgets import Frame
@@ -26,12 +27,17 @@ except ImportError as e:
     print(f"Детали: {e}")
     sys.exit(1)
 
+# Корень проекта в PYTHONPATH: общий vlc_db.py (та же БД, что у vlc-cec.sh)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 try:
     from vlc_db import VlcDatabase
 except ImportError:
     print("❌ Ошибка: vlc_db.py не найден!")
     sys.exit(1)
 
+from list_window import WindowedList
+
 # Настройки
 VIDEO_EXTENSIONS = {'.avi', '.mp4', '.mkv', '.mov', '.wmv', '.flv', '.m4v'}
 VLC_SCRIPT = "../vlc-cec.sh"
@@ -497,6 +503,9 @@ class VideoMenu:
         self.selected_file = None
         self.items = []
         self.selected_index = 0
+        self.scroll_offset = 0
+        self.list_window = None
+        self.pending_action = None  # Действие после выхода из Application ('settings')
     
     def __del__(self):
         """Закрытие БД при выходе"""
@@ -506,68 +515,24 @@ class VideoMenu:
             pass
     
     def get_items(self):
-        """Получить список файлов и папок для menu"""
-        items = []
-        
-        try:
-            # Родительская папка
-            if self.current_dir != Path.home():
-                items.append(("..", "Назад", False))
-            
-            # Сортированный список
-            contents = sorted(
-                self.current_dir.iterdir(),
-                key=lambda x: (not x.is_dir(), x.name.lower())
-            )
-            
-            # Директории
-            for item in contents:
-                if item.name.startswith('.'):
-                    continue
-                
-                if item.is_dir():
-                    items.append((item.name, "DIR", True))
-            
-            # Видео файлы
-            video_files = [
-                item for item in contents
-                if item.suffix.lower() in VIDEO_EXTENSIONS
-            ]
-            
-            # Пакетная загрузка статусов
-            if video_files:
-                filenames = [f.name for f in video_files]
-                statuses = self.db.get_playback_batch_status(
-                    str(self.current_dir),
-                    filenames
-                )
-                
-                for video in video_files:
-                    size = video.stat().st_size
-                    size_str = self._format_size(size)
-                    status = statuses.get(video.name, '')
-                    
-                    if status == 'watched':
-                        status_icon = '[X]'
-                    elif status == 'partial':
-                        status_icon = '[T]'
-                    else:
-                        status_icon = '[ ]'
-                    
-                    items.append((video.name, f"{status_icon} {size_str}", False))
-        
-        except PermissionError:
-            pass
-        
-        return items
+        """Получить оконную модель списка файлов и папок для menu
+        
+        Детали (размер, статус) загружаются постранично только для видимых строк
+        """
+        self.scroll_offset = 0
+        return WindowedList(
+            self.db,
+            self.current_dir,
+            VIDEO_EXTENSIONS,
+            show_parent=self.current_dir != Path.home()
+        )
     
-    def _format_size(self, size):
-        """Форматирование размера файла"""
-        for unit in ['B', 'K', 'M', 'G', 'T']:
-            if size < 1024.0:
-                return f"{size:.0f}{unit}"
-            size /= 1024.0
-        return f"{size:.0f}P"
+    def _visible_height(self) -> int:
+        """Высота окна списка (из последней отрисовки или по размеру терминала)"""
+        info = self.list_window.render_info if self.list_window else None
+        if info is not None:
+            return max(1, info.window_height)
+        return max(1, get_app().output.get_size().rows - 10)
     
     def _create_menu_layout(self):
         """Создать layout меню"""
@@ -579,10 +544,19 @@ class VideoMenu:
             status_line = SeriesHelper.format_settings_status(settings)
             title_text = f"{status_line}\n\n{title_text}"
         
-        # Список элементов
+        # Список элементов: форматируются только видимые строки
         def get_menu_items():
+            height = self._visible_height()
+            
+            # Автоскролл за курсором
+            if self.selected_index < self.scroll_offset:
+                self.scroll_offset = self.selected_index
+            elif self.selected_index >= self.scroll_offset + height:
+                self.scroll_offset = self.selected_index - height + 1
+            
             result = []
-            for i, (name, desc, is_dir) in enumerate(self.items):
+            visible = self.items.rows(self.scroll_offset, self.scroll_offset + height)
+            for i, item in enumerate(visible, start=self.scroll_offset):
                 if i == self.selected_index:
                     prefix = '► '
                     style = 'class:selected'
@@ -590,19 +564,21 @@ class VideoMenu:
                     prefix = '  '
                     style = 'class:item'
                 
-                result.append((style, f"{prefix}{name:<50} {desc}\n"))
+                result.append((style, f"{prefix}{item['name']:<50} {item['description']}\n"))
             return FormattedText(result)
         
+        self.list_window = Window(
+            FormattedTextControl(get_menu_items),
+            height=Dimension(min=10)
+        )
+        
         content = HSplit([
             Window(
                 FormattedTextControl(title_text),
                 height=Dimension(min=3, max=5)
             ),
             Window(height=1, char='─'),
-            Window(
-                FormattedTextControl(get_menu_items),
-                height=Dimension(min=10)
-            ),
+            self.list_window,
             Window(height=1, char='─'),
             Window(
                 FormattedTextControl(
@@ -634,18 +610,29 @@ class VideoMenu:
             if self.selected_index < len(self.items) - 1:
                 self.selected_index += 1
         
+        @kb.add('pageup')
+        def _(event):
+            self.selected_index = max(0, self.selected_index - self._visible_height())
+        
+        @kb.add('pagedown')
+        def _(event):
+            self.selected_index = min(len(self.items) - 1, self.selected_index + self._visible_height())
+        
         @kb.add('enter')
         def _(event):
             if not self.items:
                 return
             
-            name, _, is_dir = self.items[self.selected_index]
+            name, type_ = self.items.entry(self.selected_index)
+            is_dir = type_ == 'DIR'
             
             if name == "..":
                 self.last_folder = self.current_dir.name
                 self.current_dir = self.current_dir.parent
-                self.selected_index = 0
                 self.items = self.get_items()
+                # Курсор на папку, из которой вышли
+                idx = self.items.index_of(self.last_folder)
+                self.selected_index = idx if idx is not None else 0
             elif is_dir:
                 self.current_dir = self.current_dir / name
                 self.selected_index = 0
@@ -658,11 +645,9 @@ class VideoMenu:
         @kb.add('s')
         @kb.add('S')
         def _(event):
-            # Открыть настройки сериала
+            # Открыть настройки сериала (после выхода из Application, см. run())
+            self.pending_action = 'settings'
             event.app.exit()
-            self.show_settings()
-            # Перезапустить меню
-            self.run()
         
         @kb.add('q')
         @kb.add('Q')
@@ -691,27 +676,72 @@ class VideoMenu:
         dialog.run()
     
     def run(self):
-        """Главный цикл меню"""
-        self.items = self.get_items()
-        
-        if not self.items:
-            print("\n❌ Директория пуста или нет видео файлов\n")
-            return None
-        
-        layout, style = self._create_menu_layout()
-        kb = self._create_key_bindings()
-        
-        app = Application(
-            layout=layout,
-            key_bindings=kb,
-            style=style,
-            full_screen=True,
-            mouse_support=False
-        )
+        """Цикл меню до выбора файла (None - выход)
         
-        app.run()
-        
-        return self.selected_file
+        Объект живёт между просмотрами: при возврате из плеера листинг
+        папки и позиция курсора сохраняются, перечитываются только статусы.
+        """
+        while True:
+            if not self.items or self.items.directory != self.current_dir:
+                self.items = self.get_items()
+            else:
+                self.items.invalidate()
+            
+            if not self.items:
+                print("\n❌ Директория пуста или нет видео файлов\n")
+                return None
+            
+            self.selected_file = None
+            self.pending_action = None
+            
+            layout, style = self._create_menu_layout()
+            kb = self._create_key_bindings()
+            
+            app = Application(
+                layout=layout,
+                key_bindings=kb,
+                style=style,
+                full_screen=True,
+                mouse_support=False
+            )
+            
+            app.run()
+            
+            if self.pending_action == 'settings':
+                self.show_settings()
+                continue
+            
+            return self.selected_file
+
+
+def play_video(db, selected_file):
+    """Запуск vlc-cec.sh для выбранного файла"""
+    print(f"\n✓ Выбран файл: {selected_file}\n")
+    
+    vlc_script = Path(__file__).parent.parent / "vlc-cec.sh"
+    
+    if not vlc_script.exists():
+        print(f"⚠ VLC скрипт не найден: {vlc_script}")
+        input("\nНажмите Enter для возврата в меню...")
+        return
+    
+    print(f"Запуск VLC через {vlc_script}...\n")
+    
+    # Проверяем сохранённую позицию (подключение меню, без нового пула)
+    command = [str(vlc_script), selected_file]
+    playback = db.get_playback(Path(selected_file).name)
+    if playback:
+        position, duration, percent, _, _ = playback
+        print(f"Найдена сохранённая позиция: {percent}% ({position // 60} мин {position % 60} сек)\n")
+        command = [str(vlc_script), str(position), selected_file]
+    
+    try:
+        subprocess.run(command, check=True)
+    except subprocess.CalledProcessError as e:
+        print(f"Ошибка при запуске VLC: {e}")
+    
+    # Возврат в меню
+    print("\nВозврат в меню...\n")
 
 
 def main():
@@ -725,37 +755,15 @@ def main():
             sys.exit(1)
     
     try:
+        # Один процесс на всё время работы: меню -> VLC -> меню ...
         menu = VideoMenu(start_dir)
-        selected_file = menu.run()
+        while True:
+            selected_file = menu.run()
+            if not selected_file:
+                break
+            play_video(menu.db, selected_file)
         
-        if selected_file:
-            print(f"\n✓ Выбран файл: {selected_file}\n")
-            
-            vlc_script = Path(__file__).parent.parent / "vlc-cec.sh"
-            
-            if vlc_script.exists():
-                print(f"Запуск VLC через {vlc_script}...\n")
-                
-                # Проверяем сохранённую позицию
-                db = VlcDatabase()
-                with db:
-                    basename = Path(selected_file).name
-                    playback = db.get_playback(basename)
-                    
-                    if playback:
-                        position, duration, percent, _, _ = playback
-                        print(f"Найдена сохранённая позиция: {percent}% ({position // 60} мин {position % 60} сек)\n")
-                        subprocess.run([str(vlc_script), str(position), selected_file], check=True)
-                    else:
-                        subprocess.run([str(vlc_script), selected_file], check=True)
-                
-                # Возврат в меню
-                print("\nВозврат в меню...\n")
-                main()
-            else:
-                print(f"⚠ VLC скрипт не найден: {vlc_script}")
-        else:
-            print("\nВыход из меню.")
+        print("\nВыход из меню.")
     
     except KeyboardInterrupt:
         print("\n\nПрервано пользователем")
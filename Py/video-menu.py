@@ -11,17 +11,21 @@ import os
 from pathlib import Path
 import subprocess
 import re
+import time
 
-# Добавляем текущую директорию в PYTHONPATH для импорта vlc_db
-sys.path.insert(0, str(Path(__file__).parent))
+# Добавляем корень проекта в PYTHONPATH для импорта vlc_db
+# (та же БД и пул соединений, что у vlc-cec.sh, включая агрегаты dir_progress)
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
 try:
     from vlc_db import VlcDatabase
 except ImportError:
     print("❌ Ошибка: vlc_db.py не найден!")
-    print("Убедитесь что vlc_db.py находится в той же папке")
+    print("Убедитесь что vlc_db.py находится в корне проекта")
     sys.exit(1)
 
+from list_window import WindowedList
+
 # Настройки
 VIDEO_EXTENSIONS = {'.avi', '.mp4', '.mkv', '.mov', '.wmv', '.flv', '.m4v'}
 VLC_SCRIPT = "../vlc-cec.sh"  # Путь к оригинальному скрипту
@@ -31,6 +35,11 @@ DB_MANAGER_SCRIPT = "./db-manager.sh"  # Для extract_series_prefix/suffix
 BTN_SETTINGS = 0
 BTN_CANCEL = 1
 
+# Состояния долгоживущего процесса меню
+STATE_BROWSE = 'browse'  # Навигация по папкам
+STATE_PLAY = 'play'      # curses приостановлен, играет VLC
+STATE_EXIT = 'exit'
+
 
 class SeriesHelper:
     """Вспомогательный класс для работы с сериалами"""
@@ -375,6 +384,17 @@ class VideoMenu:
         self.last_folder = None  # Для сохранения позиции курсора
         self.focus_mode = 'list'  # 'list' или 'buttons'
         self.active_button = BTN_SETTINGS  # Активная кнопка внизу
+        self.items = None  # Листинг текущей папки (живёт между запусками плеера)
+        
+        # Дифференциальная отрисовка: что сейчас на экране построчно
+        # {y: ((x, text, attr), ...)}; None - экран нужно перерисовать целиком
+        self._screen_lines = None
+        self._screen_size = None
+        self.lines_repainted = 0  # Сколько строк перерисовано последним draw (диагностика)
+        
+        # Настройки сериала текущей папки (кеш, чтобы не читать БД на каждое нажатие)
+        self._settings_dir = None
+        self._settings = None
         
         # База данных
         self.db = VlcDatabase()
@@ -403,119 +423,61 @@ class VideoMenu:
             pass
     
     def get_items(self):
-        """Получить список файлов и папок"""
-        items = []
-        
-        try:
-            # Родительская папка
-            if self.current_dir != Path.home():
-                items.append({
-                    'name': '..',
-                    'type': 'DIR',
-                    'description': 'Назад',
-                    'path': self.current_dir.parent,
-                    'status': ''
-                })
-            
-            # Сортированный список содержимого
-            contents = sorted(
-                self.current_dir.iterdir(),
-                key=lambda x: (not x.is_dir(), x.name.lower())
-            )
-            
-            # Директории
-            for item in contents:
-                if item.name.startswith('.'):
-                    continue
-                
-                if item.is_dir():
-                    items.append({
-                        'name': item.name,
-                        'type': 'DIR',
-                        'description': 'DIR',
-                        'path': item,
-                        'status': ''
-                    })
-            
-            # Видео файлы
-            video_files = [
-                item for item in contents
-                if item.suffix.lower() in VIDEO_EXTENSIONS
-            ]
-            
-            # Пакетная загрузка статусов
-            if video_files:
-                filenames = [f.name for f in video_files]
-                statuses = self.db.get_playback_batch_status(
-                    str(self.current_dir),
-                    filenames
-                )
-                
-                for video in video_files:
-                    size = video.stat().st_size
-                    size_str = self._format_size(size)
-                    status = statuses.get(video.name, '')
-                    
-                    # Форматируем статус
-                    if status == 'watched':
-                        status_icon = '[X]'
-                    elif status == 'partial':
-                        status_icon = '[T]'
-                    else:
-                        status_icon = '[ ]'
-                    
-                    items.append({
-                        'name': video.name,
-                        'type': 'FILE',
-                        'description': f"{status_icon} {size_str}",
-                        'path': video,
-                        'status': status
-                    })
-        
-        except PermissionError:
-            pass
-        
-        return items
+        """Получить оконную модель списка файлов и папок
+        
+        Листинг хранит только имена; размеры и статусы загружаются
+        постранично для видимых строк (см. list_window.WindowedList)
+        """
+        return WindowedList(
+            self.db,
+            self.current_dir,
+            VIDEO_EXTENSIONS,
+            show_parent=self.current_dir != Path.home()
+        )
+    
+    def invalidate_screen(self):
+        """Следующий draw() перерисует экран целиком (после диалогов/справки)"""
+        self._screen_lines = None
     
-    def _format_size(self, size):
-        """Форматирование размера файла"""
-        for unit in ['B', 'K', 'M', 'G', 'T']:
-            if size < 1024.0:
-                return f"{size:.0f}{unit}"
-            size /= 1024.0
-        return f"{size:.0f}P"
+    def _current_settings(self):
+        """Настройки сериала для текущей папки (кешируются до смены папки)"""
+        if self._settings_dir != self.current_dir:
+            self._settings = SeriesHelper.get_series_settings(self.db, self.current_dir)
+            self._settings_dir = self.current_dir
+        return self._settings
     
     def draw(self, items):
-        """Отрисовка меню"""
-        self.stdscr.clear()
+        """Отрисовка меню
+        
+        Кадр собирается построчно и сравнивается с предыдущим: перерисовываются
+        только изменившиеся строки (перемещение курсора - две строки списка),
+        вывод на терминал - одним noutrefresh()/doupdate().
+        """
         height, width = self.stdscr.getmaxyx()
+        frame = {}
+        
+        def put(y, x, text, attr=0):
+            frame.setdefault(y, []).append((x, text, attr))
         
         # Заголовок
         title = f"Выбор видео: {self.current_dir}"
         if len(title) > width - 4:
             title = "..." + title[-(width - 7):]
-        
-        try:
-            self.stdscr.addstr(0, 2, title, curses.color_pair(1) | curses.A_BOLD)
-        except curses.error:
-            pass
+        put(0, 2, title, curses.color_pair(1) | curses.A_BOLD)
         
         # Статус-строка настроек (строка 1)
-        settings = SeriesHelper.get_series_settings(self.db, self.current_dir)
+        settings = self._current_settings()
         if settings:
             status_line = SeriesHelper.format_settings_status(settings)
-            try:
-                # Центрируем
-                x = (width - len(status_line)) // 2
-                self.stdscr.addstr(1, max(2, x), status_line)
-            except curses.error:
-                pass
+            # Центрируем
+            x = (width - len(status_line)) // 2
+            put(1, max(2, x), status_line)
         
         # Список начинается со строки 3
         list_start_y = 3
         
         # Кнопки внизу (последняя строка)
-        self._draw_buttons(height, width)
+        self._draw_buttons(height, width, put)
         
         # Вычисляем видимую область
         max_visible = height - list_start_y - 2  # Место для кнопок
@@ -526,14 +488,9 @@ class VideoMenu:
         elif self.selected_idx >= self.scroll_offset + max_visible:
             self.scroll_offset = self.selected_idx - max_visible + 1
         
-        # Список файлов
-        for idx in range(len(items)):
-            if idx < self.scroll_offset:
-                continue
-            if idx >= self.scroll_offset + max_visible:
-                break
-            
-            item = items[idx]
+        # Список файлов: форматируются только видимые строки
+        visible = items.rows(self.scroll_offset, self.scroll_offset + max_visible)
+        for idx, item in enumerate(visible, start=self.scroll_offset):
             y = list_start_y + idx - self.scroll_offset
             
             if y >= height - 2:
@@ -542,6 +499,8 @@ class VideoMenu:
             # Формируем строку
             if item['type'] == 'DIR':
                 line = f"📁 {item['name']}"
+                if item.get('progress'):
+                    line += f"  [{item['progress']}]"
                 color = curses.color_pair(2)
             else:
                 line = f"{item['description']} {item['name']}"
@@ -563,22 +522,51 @@ class VideoMenu:
             else:
                 attr = color
             
-            try:
-                self.stdscr.addstr(y, 2, line, attr)
-            except curses.error:
-                pass
+            put(y, 2, line, attr)
         
         # Индикатор прокрутки
         if len(items) > max_visible:
+            scroll_info = f"[{self.selected_idx + 1}/{len(items)}]"
+            put(0, width - len(scroll_info) - 2, scroll_info, curses.A_DIM)
+        
+        self._flush_frame(frame, height, width)
+    
+    def _flush_frame(self, frame, height, width):
+        """Вывод кадра: только строки, отличающиеся от уже нарисованных"""
+        if self._screen_lines is None or self._screen_size != (height, width):
+            # Первый кадр, смена размера или экран испорчен диалогом
+            self.stdscr.erase()
+            self._screen_lines = {}
+            self._screen_size = (height, width)
+        
+        new_lines = {y: tuple(segments) for y, segments in frame.items()}
+        repainted = 0
+        
+        for y in set(self._screen_lines) | set(new_lines):
+            segments = new_lines.get(y, ())
+            if self._screen_lines.get(y) == segments:
+                continue
+            
+            repainted += 1
             try:
-                scroll_info = f"[{self.selected_idx + 1}/{len(items)}]"
-                self.stdscr.addstr(0, width - len(scroll_info) - 2, scroll_info, curses.A_DIM)
+                self.stdscr.move(y, 0)
+                self.stdscr.clrtoeol()
             except curses.error:
                 pass
+            for x, text, attr in segments:
+                try:
+                    self.stdscr.addstr(y, x, text, attr)
+                except curses.error:
+                    pass
         
-        self.stdscr.refresh()
+        self._screen_lines = new_lines
+        self.lines_repainted = repainted
+        
+        # Один вывод на терминал за кадр
+        self.stdscr.noutrefresh()
+        curses.doupdate()
     
-    def _draw_buttons(self, height, width):
+    def _draw_buttons(self, height, width, put):
         """Отрисовка кнопок внизу"""
         button_y = height - 1
         
@@ -590,32 +578,31 @@ class VideoMenu:
         cancel_btn = "< Cancel >"
         cancel_x = width - len(cancel_btn) - 5
         
-        try:
-            # Настройки
-            if self.focus_mode == 'buttons' and self.active_button == BTN_SETTINGS:
-                self.stdscr.addstr(button_y, settings_x, settings_btn, curses.color_pair(5) | curses.A_BOLD)
-            else:
-                self.stdscr.addstr(button_y, settings_x, settings_btn)
-            
-            # Cancel
-            if self.focus_mode == 'buttons' and self.active_button == BTN_CANCEL:
-                self.stdscr.addstr(button_y, cancel_x, cancel_btn, curses.color_pair(5) | curses.A_BOLD)
-            else:
-                self.stdscr.addstr(button_y, cancel_x, cancel_btn)
-        except curses.error:
-            pass
+        # Настройки
+        if self.focus_mode == 'buttons' and self.active_button == BTN_SETTINGS:
+            put(button_y, settings_x, settings_btn, curses.color_pair(5) | curses.A_BOLD)
+        else:
+            put(button_y, settings_x, settings_btn)
+        
+        # Cancel
+        if self.focus_mode == 'buttons' and self.active_button == BTN_CANCEL:
+            put(button_y, cancel_x, cancel_btn, curses.color_pair(5) | curses.A_BOLD)
+        else:
+            put(button_y, cancel_x, cancel_btn)
     
     def show_settings(self):
         """Показать окно настроек"""
-        settings = SeriesHelper.get_series_settings(self.db, self.current_dir)
+        settings = self._current_settings()
         
         if not settings:
             # Не сериал
             return
         
-        # Показываем диалог
+        # Показываем диалог (он рисует поверх меню - после него полная перерисовка)
         dialog = SettingsDialog(self.stdscr, settings)
         result = dialog.run()
+        self.invalidate_screen()
+        self._settings_dir = None
         
         if result is not None:
             # Сохраняем в БД (включая времена)
@@ -630,10 +617,25 @@ class VideoMenu:
                 result.get('credits_duration')
             )
     
+    def resume(self):
+        """Возврат из плеера: статусы перечитываются, курсор остаётся на месте
+        
+        Листинг папки и настройки сериала не перечитываются - после VLC
+        меняются только статусы просмотра, страницы с ними сбрасываются.
+        """
+        self.invalidate_screen()
+        if self.items is not None:
+            self.items.invalidate()
+            if len(self.items):
+                self.draw(self.items)
+    
     def run(self):
-        """Главный цикл меню"""
+        """Цикл навигации до выбора файла (None - выход)"""
         while True:
-            items = self.get_items()
+            # Листинг только при смене папки, а не на каждое нажатие
+            if self.items is None or self.items.directory != self.current_dir:
+                self.items = self.get_items()
+            items = self.items
             
             if not items:
                 # Пустая директория
@@ -646,6 +648,7 @@ class VideoMenu:
                 except curses.error:
                     pass
                 self.stdscr.refresh()
+                self.invalidate_screen()
                 
                 key = self.stdscr.getch()
                 if key == ord('q') or key == ord('Q'):
@@ -654,10 +657,9 @@ class VideoMenu:
             
             # Восстановление позиции курсора при возврате
             if self.last_folder:
-                for idx, item in enumerate(items):
-                    if item['name'] == self.last_folder:
-                        self.selected_idx = idx
-                        break
+                idx = items.index_of(self.last_folder)
+                if idx is not None:
+                    self.selected_idx = idx
                 self.last_folder = None
             
             # Проверка границ
@@ -707,7 +709,7 @@ class VideoMenu:
                         return None
                 else:
                     # Фокус на списке - выбор файла/папки
-                    selected = items[self.selected_idx]
+                    selected = items.row(self.selected_idx)
                     
                     if selected['name'] == '..':
                         # Вверх - запоминаем текущую папку
@@ -779,6 +781,93 @@ class VideoMenu:
         
         self.stdscr.refresh()
         self.stdscr.getch()
+        self.invalidate_screen()
+
+
+def play_video(db, selected_file):
+    """Запуск vlc-cec.sh для выбранного файла (curses в это время приостановлен)"""
+    print(f"\n✓ Выбран файл: {selected_file}\n")
+    
+    # Проверяем наличие vlc-cec.sh
+    vlc_script = Path(__file__).parent.parent / "vlc-cec.sh"
+    
+    if not vlc_script.exists():
+        print(f"⚠ VLC скрипт не найден: {vlc_script}")
+        print(f"Для запуска используйте: ./vlc-cec.sh \"{selected_file}\"")
+        input("\nНажмите Enter для возврата в меню...")
+        return
+    
+    print(f"Запуск VLC через {vlc_script}...\n")
+    
+    # Проверяем есть ли сохранённая позиция (подключение меню, без нового пула)
+    command = [str(vlc_script), selected_file]
+    playback = db.get_playback(Path(selected_file).name)
+    if playback:
+        position, duration, percent, _, _ = playback
+        print(f"Найдена сохранённая позиция: {percent}% ({position // 60} мин {position % 60} сек)\n")
+        # Запускаем с позиции
+        command = [str(vlc_script), str(position), selected_file]
+    
+    try:
+        subprocess.run(command, check=True)
+    except subprocess.CalledProcessError as e:
+        print(f"Ошибка при запуске VLC: {e}")
+    except KeyboardInterrupt:
+        print("\nПрервано пользователем")
+    
+    print("\nВозврат в меню...\n")
+
+
+class MenuSession:
+    """Долгоживущий процесс меню: BROWSE -> PLAY -> BROWSE ... -> EXIT
+    
+    Вместо рекурсивного перезапуска main() после каждого просмотра curses
+    приостанавливается на время работы плеера и восстанавливается с тем же
+    VideoMenu: пул БД, листинг папки и позиция курсора сохраняются.
+    """
+    
+    def __init__(self, stdscr, start_dir, player=play_video):
+        self.stdscr = stdscr
+        self.menu = VideoMenu(stdscr, start_dir)
+        self.player = player
+        self.state = STATE_BROWSE
+        self.selected_file = None
+        self.playbacks = 0
+        self.resume_times = []  # Время возврата в меню после плеера (сек)
+    
+    def step(self):
+        """Один переход машины состояний"""
+        if self.state == STATE_BROWSE:
+            self.selected_file = self.menu.run()
+            self.state = STATE_PLAY if self.selected_file else STATE_EXIT
+        
+        elif self.state == STATE_PLAY:
+            self._suspend()
+            try:
+                self.player(self.menu.db, self.selected_file)
+            finally:
+                start = time.perf_counter()
+                self._resume()
+                self.resume_times.append(time.perf_counter() - start)
+            self.playbacks += 1
+            self.state = STATE_BROWSE
+    
+    def run(self):
+        """Главный цикл до выхода из меню"""
+        while self.state != STATE_EXIT:
+            self.step()
+    
+    def _suspend(self):
+        """Отдать терминал плееру"""
+        curses.def_prog_mode()
+        curses.endwin()
+    
+    def _resume(self):
+        """Вернуть терминал curses и сразу показать меню"""
+        curses.reset_prog_mode()
+        curses.curs_set(0)
+        self.stdscr.clear()
+        self.menu.resume()
 
 
 def main():
@@ -793,52 +882,9 @@ def main():
             sys.exit(1)
     
     try:
-        # Запуск curses интерфейса
-        selected_file = curses.wrapper(lambda stdscr: VideoMenu(stdscr, start_dir).run())
-        
-        if selected_file:
-            print(f"\n✓ Выбран файл: {selected_file}\n")
-            
-            # Проверяем наличие vlc-cec.sh
-            vlc_script = Path(__file__).parent.parent / "vlc-cec.sh"
-            
-            if vlc_script.exists():
-                print(f"Запуск VLC через {vlc_script}...\n")
-                
-                # Проверяем есть ли сохранённая позиция
-                db = VlcDatabase()
-                with db:
-                    basename = Path(selected_file).name
-                    playback = db.get_playback(basename)
-                    
-                    if playback:
-                        position, duration, percent, _, _ = playback
-                        print(f"Найдена сохранённая позиция: {percent}% ({position // 60} мин {position % 60} сек)\n")
-                        
-                        # Запускаем с позиции
-                        try:
-                            subprocess.run([str(vlc_script), str(position), selected_file], check=True)
-                        except subprocess.CalledProcessError as e:
-                            print(f"Ошибка при запуске VLC: {e}")
-                        except KeyboardInterrupt:
-                            print("\nПрервано пользователем")
-                    else:
-                        # Запускаем с начала
-                        try:
-                            subprocess.run([str(vlc_script), selected_file], check=True)
-                        except subprocess.CalledProcessError as e:
-                            print(f"Ошибка при запуске VLC: {e}")
-                        except KeyboardInterrupt:
-                            print("\nПрервано пользователем")
-                
-                # После VLC возвращаемся в меню
-                print("\nВозврат в меню...\n")
-                main()  # Рекурсивный вызов для автовозврата
-            else:
-                print(f"⚠ VLC скрипт не найден: {vlc_script}")
-                print(f"Для запуска используйте: ./vlc-cec.sh \"{selected_file}\"")
-        else:
-            print("\nВыход из меню.")
+        # Один процесс и один curses сеанс на всё время работы меню
+        curses.wrapper(lambda stdscr: MenuSession(stdscr, start_dir).run())
+        print("\nВыход из меню.")
     
     except KeyboardInterrupt:
         print("\n\nПрервано пользователем")
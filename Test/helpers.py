@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Общие помощники тестов: временная БД вместо vlc_media.db (глобальный пул
+vlc_db переключается на неё) и запуск тестового модуля как скрипта
+
+    class TestX(TempDbTestCase): ...       - self.temp_dir, self.db_path
+    with temp_database("bench.db") as (temp_dir, db_path): ...   - бенчмарки
+    if __name__ == '__main__': main(bench, int)   - unittest или bench(int(N)) с --bench N
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+
+# Добавляем путь к проекту
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import vlc_db
+from vlc_db import ConnectionPool, VlcDatabase
+
+
+@contextmanager
+def temp_pool(db_path, init=True):
+    """Глобальный пул vlc_db на db_path на время блока; init - создать таблицы"""
+    db_path = Path(db_path)
+    saved_pool = vlc_db._connection_pool
+    vlc_db._connection_pool = ConnectionPool(db_path)
+    try:
+        if init:
+            with VlcDatabase(db_path) as db:
+                db.init_db()
+        yield db_path
+    finally:
+        vlc_db._connection_pool = saved_pool
+
+
+@contextmanager
+def temp_database(name="test.db", init=True):
+    """Временная папка с БД name и пул на ней -> (папка, путь к БД); папка удаляется"""
+    temp_dir = Path(tempfile.mkdtemp())
+    try:
+        with temp_pool(temp_dir / name, init) as db_path:
+            yield temp_dir, db_path
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+class TempDbTestCase(unittest.TestCase):
+    """Временная папка self.temp_dir и БД self.db_path в ней (пул vlc_db на ней)
+
+    Папка и пул восстанавливаются через addCleanup - после tearDown наследника.
+    """
+
+    def setUp(self):
+        super().setUp()
+        context = temp_database()
+        self.temp_dir, self.db_path = context.__enter__()
+        self.addCleanup(context.__exit__, None, None, None)
+
+
+def main(bench=None, *types):
+    """Точка входа тестового модуля: --bench [аргументы] - bench(*аргументы), иначе unittest
+
+    types - преобразование аргументов bench по позиции (int, float, str); аргументов
+    не больше, чем types
+    """
+    if bench is not None and '--bench' in sys.argv:
+        args = [arg for arg in sys.argv[1:] if arg != '--bench']
+        if len(args) > len(types):
+            sys.exit(f"--bench: аргументов не больше {len(types)}, получено {len(args)}")
+        try:
+            args = [convert(arg) for convert, arg in zip(types, args)]
+        except ValueError as e:
+            sys.exit(f"--bench: {e}")
+        bench(*args)
+    else:
+        unittest.main(module='__main__')
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты движка подсветки (ambilight.py): общий буфер кадра, источники,
+цвета зон по краям, форматы пикселей, сглаживание, пакет Adalight,
+захват в отдельном процессе
+
+Запуск как скрипт - кадров/с на синтетических кадрах 1080p (цикл Python,
+numpy с разным шагом уменьшения, захват в отдельном процессе):
+    python3 Test/test_ambilight.py --bench [кадров]
+"""
+
+import io
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Добавляем путь к проекту и к тестам (helpers)
+PROJECT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(PROJECT_DIR))
+
+from ambilight import (AmbilightEngine, FrameBuffer, Layout, StreamSource, SyntheticSource,
+                       adalight_packet, bench, load_settings, np, run)
+from helpers import main
+
+RED, BLUE = (0, 0, 255, 255), (255, 0, 0, 255)      # BGRA
+
+
+def split_frame(width=64, height=36):
+    """Левая половина красная, правая синяя (BGRA)"""
+    frame = np.empty((height, width, 4), dtype=np.uint8)
+    frame[:, :width // 2] = RED
+    frame[:, width // 2:] = BLUE
+    return frame
+
+
+@unittest.skipUnless(np is not None, "нужен numpy")
+class TestFrameBuffer(unittest.TestCase):
+
+    def test_shared_without_copy(self):
+        buffer = FrameBuffer(36, 64, 4)
+        try:
+            other = FrameBuffer(36, 64, 4, name=buffer.name)
+            buffer.pixels[5, 7] = (1, 2, 3, 4)
+            buffer.sequence[0] = 42
+            self.assertEqual(tuple(other.pixels[5, 7]), (1, 2, 3, 4))
+            self.assertEqual(other.sequence[0], 42)
+            other.close()
+        finally:
+            buffer.close()
+
+    def test_stream_reads_into_buffer(self):
+        frames = [split_frame(), split_frame()[:, ::-1].copy()]
+        source = StreamSource(io.BytesIO(b''.join(frame.tobytes() for frame in frames)), 64, 36)
+        buffer = source.make_buffer()
+        try:
+            pixels = buffer.pixels
+            self.assertTrue(source.read_into(buffer))
+            self.assertTrue(np.array_equal(pixels, frames[0]))
+            self.assertTrue(source.read_into(buffer))
+            self.assertTrue(np.array_equal(pixels, frames[1]))   # тот же массив - без копии
+            self.assertFalse(source.read_into(buffer))
+            del pixels
+        finally:
+            buffer.close()
+
+
+@unittest.skipUnless(np is not None, "нужен numpy")
+class TestEngine(unittest.TestCase):
+
+    def test_edge_colours_and_order(self):
+        """По часовой от левого нижнего угла: лево, верх, право, низ"""
+        engine = AmbilightEngine(Layout(4, 2, 4, 2), 64, 36, scale=2)
+        colors = engine.process(split_frame())
+        self.assertEqual(colors.shape, (12, 3))
+        red, blue = [255, 0, 0], [0, 0, 255]
+        expected = [red] * 2 + [red] * 2 + [blue] * 2 + [blue] * 2 + [blue] * 2 + [red] * 2
+        self.assertEqual(colors.tolist(), expected)
+
+    def test_matches_pixel_average(self):
+        """Шаг 1 - точное среднее по пикселям зон; шаг 4 - близко к нему"""
+        frame = SyntheticSource(320, 180, frames=1).frames[0]
+        layout = Layout(8, 5, 8, 5, depth=0.2)
+        exact = AmbilightEngine(layout, 320, 180, scale=1).measure(frame)
+
+        rows, cols = 36, 64
+        left = [frame[180 * k // 5:180 * (k + 1) // 5, :cols].reshape(-1, 4)[:, 2::-1].mean(axis=0)
+                for k in range(5)][::-1]
+        top = [frame[:rows, 320 * k // 8:320 * (k + 1) // 8].reshape(-1, 4)[:, 2::-1].mean(axis=0)
+               for k in range(8)]
+        self.assertTrue(np.allclose(exact[:5], left, atol=0.01))
+        self.assertTrue(np.allclose(exact[5:13], top, atol=0.01))
+
+        approx = AmbilightEngine(layout, 320, 180, scale=4).measure(frame)
+        self.assertLess(np.abs(approx - exact).max(), 8)
+
+    def test_pixel_formats(self):
+        bgra = split_frame()
+        rgb = np.ascontiguousarray(bgra[..., 2::-1])
+        packed = ((rgb[..., 0].astype(np.uint16) >> 3) << 11) | ((rgb[..., 1].astype(np.uint16) >> 2) << 5) \
+            | (rgb[..., 2].astype(np.uint16) >> 3)
+        rgb565 = packed.astype('<u2').view(np.uint8).reshape(36, 64, 2)
+        layout = Layout(4, 2, 4, 2)
+        expected = AmbilightEngine(layout, 64, 36, 'bgra').process(bgra)
+        for pixel_format, frame in (('rgb', rgb), ('rgb565', rgb565)):
+            colors = AmbilightEngine(layout, 64, 36, pixel_format).process(frame)
+            self.assertEqual(colors.tolist(), expected.tolist(), pixel_format)
+
+    def test_row_padding_ignored(self):
+        """Строка framebuffer длиннее кадра - хвост строки не учитывается"""
+        padded = np.zeros((36, 80, 4), dtype=np.uint8)
+        padded[:, :64] = split_frame()
+        padded[:, 64:] = (0, 255, 0, 255)
+        colors = AmbilightEngine(Layout(4, 2, 4, 2), 64, 36).process(padded)
+        self.assertEqual(colors[:, 1].max(), 0)
+
+    def test_smoothing(self):
+        engine = AmbilightEngine(Layout(2, 1, 2, 1), 64, 36, smoothing=0.5)
+        black = np.zeros((36, 64, 4), dtype=np.uint8)
+        white = np.full((36, 64, 4), 255, dtype=np.uint8)
+        self.assertEqual(engine.process(black).max(), 0)
+        steps = [int(engine.process(white)[0, 0]) for _ in range(3)]
+        self.assertEqual(steps, [128, 191, 223])
+
+    def test_too_many_leds(self):
+        with self.assertRaises(ValueError):
+            AmbilightEngine(Layout(100, 2, 4, 2), 64, 36, scale=4)
+
+
+@unittest.skipUnless(np is not None, "нужен numpy")
+class TestOutput(unittest.TestCase):
+
+    def test_adalight_packet(self):
+        colors = np.array([[255, 0, 0], [0, 255, 0]], dtype=np.uint8)
+        self.assertEqual(adalight_packet(colors), b'Ada\x00\x01\x54' + bytes([255, 0, 0, 0, 255, 0]))
+
+    def test_settings_defaults(self):
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            settings = load_settings(temp_dir / "config.db")
+            self.assertEqual(settings.leds, (38, 21, 38, 21))
+            self.assertEqual((settings.fps, settings.device), (30, ''))
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+@unittest.skipUnless(np is not None, "нужен numpy")
+class TestRun(unittest.TestCase):
+
+    def test_in_process(self):
+        source = SyntheticSource(320, 180, frames=2)
+        sent = []
+        stats = run(source, AmbilightEngine(Layout(8, 4, 8, 4), 320, 180), fps=1000,
+                    output=sent.append, frames=10)
+        self.assertEqual(stats.frames, 10)
+        self.assertEqual(len(sent), 10)
+        self.assertEqual(sent[0].shape, (24, 3))
+
+    def test_capture_process(self):
+        """Захват в отдельном процессе пишет в тот же общий буфер"""
+        source = SyntheticSource(frames=1)
+        stats = run(source, AmbilightEngine(Layout(38, 21, 38, 21), source.width, source.height),
+                    fps=200, frames=5, capture=('synthetic', '/dev/fb0'))
+        self.assertEqual(stats.frames, 5)
+
+
+if __name__ == '__main__':
+    main(bench, int)
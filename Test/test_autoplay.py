@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты автопродолжения (autoplay.py): поиск следующей серии и переход в
+работающем VLC без перезапуска супервизора
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Добавляем путь к проекту и к тестам (SupervisorTestCase)
+PROJECT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(PROJECT_DIR))
+
+from autoplay import next_episode
+from vlc_db import VlcDatabase, extract_episode
+from test_playback_supervisor import CecQueue, SupervisorTestCase, VIDEO_NAME
+
+NEXT_NAME = "Show.S01E03.1080p.mkv"
+
+
+class TestNextEpisode(unittest.TestCase):
+    """Следующая серия по ключам сериала"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        for name in ("Show.S01E01.1080p.mkv", "Show.S01E02.1080p.mkv", "Show.S01E03.1080p.mkv",
+                     "Show.S01E10.1080p.mkv", "Show.S02E01.1080p.mkv",
+                     "Show.S01E04.720p.mkv", "Other.S01E03.1080p.mkv", "Show.S01E02.1080p.srt"):
+            (self.temp_dir / name).touch()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def next_name(self, name):
+        path = next_episode(str(self.temp_dir / name))
+        return path.name if path else None
+
+    def test_extract_episode(self):
+        self.assertEqual(extract_episode("Show.S01E05.1080p.mkv"), ('Show', 1, 5))
+        self.assertIsNone(extract_episode("Movie.2020.mkv"))
+
+    def test_order(self):
+        """Серии по номеру (E10 после E03), затем следующий сезон"""
+        self.assertEqual(self.next_name("Show.S01E02.1080p.mkv"), "Show.S01E03.1080p.mkv")
+        self.assertEqual(self.next_name("Show.S01E03.1080p.mkv"), "Show.S01E10.1080p.mkv")
+        self.assertEqual(self.next_name("Show.S01E10.1080p.mkv"), "Show.S02E01.1080p.mkv")
+
+    def test_last_and_not_series(self):
+        self.assertIsNone(self.next_name("Show.S02E01.1080p.mkv"))
+        self.assertIsNone(self.next_name("Movie.2020.mkv"))
+
+
+class TestGaplessSwitch(SupervisorTestCase):
+    """enqueue в начале серии, next на титрах/в конце, состояние новой серии"""
+
+    def setUp(self):
+        super().setUp()
+        self.next_file = self.temp_dir / NEXT_NAME
+        self.next_file.touch()
+
+    def run_to_next(self, supervisor):
+        self.run_until(supervisor, lambda: supervisor.state.filename == NEXT_NAME)
+
+    def test_outro_switches_episode(self):
+        self.series(skip_outro=True, credits=300, autoplay=True)
+        self.vlc.time = 3350
+        supervisor = self.make_supervisor(CecQueue())
+        self.run_to_next(supervisor)
+
+        self.assertEqual(self.vlc.commands('enqueue'), [f"enqueue {self.next_file.resolve()}"])
+        self.assertIn('next', self.vlc.received)
+        self.assertNotIn('pause', self.vlc.received)
+        self.assertNotIn('quit', self.vlc.received)
+        self.assertEqual(self.vlc.current_item, str(self.next_file.resolve()))
+        self.assertEqual(supervisor.stats()['episodes_switched'], 1)
+
+        with VlcDatabase(self.db_path) as db:
+            self.assertEqual(db.get_outro_triggered(VIDEO_NAME), 1)
+            self.assertEqual(db.get_playback(VIDEO_NAME)[2], 100)
+            # Прогресс новой серии - под её именем
+            self.assertIsNotNone(db.get_playback(NEXT_NAME))
+        self.assertFalse(supervisor.state.outro_triggered)
+
+    def test_end_switches_episode(self):
+        """Без skip_outro - переход в конце, предыдущая серия сохранена как 100%"""
+        self.series(autoplay=True)
+        self.vlc.time = 3597
+        supervisor = self.make_supervisor(CecQueue())
+        self.run_to_next(supervisor)
+        self.assertIn('next', self.vlc.received)
+        self.assertEqual(self.playback()[2], 100)
+
+    def test_no_next_episode_exits(self):
+        self.next_file.unlink()
+        self.series(autoplay=True)
+        self.vlc.time = 3597
+        supervisor = self.make_supervisor(CecQueue())
+        self.run_until(supervisor, lambda: 'quit' in self.vlc.received)
+        self.assertEqual(self.vlc.commands('enqueue'), [])
+        self.assertIn('quit', self.vlc.received)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты табличного декодера CEC (cec_decoder.py) и раскладки из таблицы config
+
+Запуск как скрипт - пропускная способность на логе cec-client
+(сгенерированном или записанном: cec-client -d 8 -t r /dev/cec1 > cec.log):
+    python3 Test/test_cec_decoder.py --bench [cec.log]
+"""
+
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# Добавляем путь к проекту и к тестам (helpers)
+PROJECT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(PROJECT_DIR))
+
+from cec_decoder import (CecDecoder, CecFrame, DEFAULT_KEYMAP, RELEASE_KEY, load_keymap,
+                         parse_traffic)
+from Py.config.config_manager import ConfigManager, ConfigType, ConfigCategory
+from helpers import main
+
+# Кнопки, которые проверяла цепочка в vlc-cec.sh до playback_supervisor.py
+LEGACY_CODES = ['00', '01', '02', '03', '04', '0d', '35', '72', '73', '74', '71', '30', '31',
+                '20', '21', '22', '23', '24', '25', '26', '27', '28', '29']
+
+
+def traffic(frame, outgoing=False):
+    return f"TRAFFIC: [{random.randint(1000, 999999):>13}]\t{'<<' if outgoing else '>>'} {frame}"
+
+
+def make_log(lines=20000, key_share=0.05, seed=1, codes=LEGACY_CODES):
+    """Лог cec-client -d 8: опросы, служебные кадры, DEBUG и нажатия кнопок"""
+    rng = random.Random(seed)
+    noise = [
+        lambda: traffic("10", outgoing=True),
+        lambda: traffic("1f", outgoing=True),
+        lambda: traffic("01:8f"),
+        lambda: traffic("10:90:00", outgoing=True),
+        lambda: traffic("0f:87:00:e0:91"),
+        lambda: traffic("01:45"),
+        lambda: traffic("0f:36"),
+        lambda: f"DEBUG:   [{rng.randint(1000, 999999):>13}]\tTV (0): power status changed to 'on'",
+        lambda: f"DEBUG:   [{rng.randint(1000, 999999):>13}]\t>> TV (0) -> Playback 1 (4): give device power status (8F)",
+    ]
+    result = []
+    for _ in range(lines):
+        if rng.random() < key_share:
+            result.append(traffic(f"01:44:{rng.choice(codes)}"))
+        else:
+            result.append(rng.choice(noise)())
+    return result
+
+
+class TestParseTraffic(unittest.TestCase):
+    """Разбор кадров"""
+
+    def test_key_press(self):
+        self.assertEqual(parse_traffic("TRAFFIC: [  431]\t>> 01:44:0D"),
+                         CecFrame(0, 1, 0x44, (0x0D,)))
+
+    def test_filtered_early(self):
+        """Опрос, исходящие кадры и DEBUG - не кадры"""
+        self.assertIsNone(parse_traffic("TRAFFIC: [  431]\t>> 10"))
+        self.assertIsNone(parse_traffic("TRAFFIC: [  431]\t<< 10:44:01"))
+        self.assertIsNone(parse_traffic("DEBUG:   [  431]\tTV (0): power status changed"))
+        self.assertEqual(parse_traffic("TRAFFIC: [  431]\t>> 01:8f").opcode, 0x8F)
+
+
+class TestDecoder(unittest.TestCase):
+    """Кнопки по раскладке"""
+
+    def test_default_keymap(self):
+        decoder = CecDecoder()
+        lines = [traffic(f"01:44:{code}") for code in ('00', '0d', '35', '72', '73', '71', '30', '25')]
+        self.assertEqual(list(decoder.decode_all(lines)),
+                         ['play', 'back', 'info', 'red', 'green', 'blue', 'channel_up', '5'])
+
+    def test_ignores_release_and_unknown(self):
+        decoder = CecDecoder({0x01: 'up'})
+        self.assertIsNone(decoder.decode(traffic("01:45")))
+        self.assertIsNone(decoder.decode(traffic("01:44:02")))
+        self.assertEqual(decoder.decode(traffic("01:44:01")), 'up')
+        self.assertEqual((decoder.lines, decoder.frames, decoder.keys), (3, 3, 1))
+
+    def test_release_on_request(self):
+        """Отпускание кнопки - конец жеста удержания для супервизора"""
+        decoder = CecDecoder(releases=True)
+        lines = [traffic("01:44:01"), traffic("01:44:01"), traffic("01:45")]
+        self.assertEqual(list(decoder.decode_all(lines)), ['up', 'up', RELEASE_KEY])
+        self.assertEqual(decoder.keys, 2)
+
+    def test_same_result_as_legacy_chain(self):
+        """Те же нажатия, что находила цепочка *"44:XX"* (без опросов и исходящих)"""
+        log = make_log(2000)
+        legacy = [line.rsplit(':', 1)[1].lower() for line in log
+                  if '>> 01:44:' in line]
+        decoded = list(CecDecoder().decode_all(log))
+        self.assertEqual(len(decoded), len(legacy))
+        self.assertEqual(decoded, [DEFAULT_KEYMAP[int(code, 16)] for code in legacy])
+
+
+class TestConfigKeymap(unittest.TestCase):
+    """Раскладка из таблицы config"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.db_path = self.temp_dir / "config.db"
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_defaults_match_cec_codes(self):
+        self.assertEqual(load_keymap(self.db_path), DEFAULT_KEYMAP)
+
+    def test_remap_from_config(self):
+        config = ConfigManager(self.db_path)
+        config.set('cec_key_red', 0x46, ConfigType.INT, ConfigCategory.CEC, 'Код кнопки RED')
+        keymap = load_keymap(self.db_path)
+        self.assertEqual(keymap[0x46], 'red')
+        self.assertNotIn(0x72, keymap)
+
+    def test_old_defaults_fixed(self):
+        """Ошибочные значения прежних версий исправляются, изменённые пользователем - нет"""
+        ConfigManager(self.db_path)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("UPDATE config SET value = '68' WHERE key = 'cec_key_red'")
+            conn.execute("UPDATE config SET value = '217' WHERE key = 'cec_key_blue'")
+            conn.execute("UPDATE config SET value = '100' WHERE key = 'cec_key_green'")
+        config = ConfigManager(self.db_path)
+        self.assertEqual(config.get('cec_key_red'), 114)
+        self.assertEqual(config.get('cec_key_blue'), 113)
+        self.assertEqual(config.get('cec_key_green'), 100)
+
+
+def legacy_bash_script(log_file):
+    """Цепочка проверок из vlc-cec.sh 0.9.0 (фильтр опросов + *"44:XX"*)"""
+    checks = "\n".join(f'    if [[ "$line" == *"44:{code}"* ]]; then keys=$((keys+1)); continue; fi'
+                       for code in LEGACY_CODES)
+    return f'''
+keys=0
+while IFS= read -r line; do
+    if [[ "$line" == *"TRAFFIC"* ]] && [[ "$line" == *">>"* ]]; then
+        if [[ "$line" != *"f0"* ]] && \\
+           [[ "$line" != *"<< 10"* ]] && [[ "$line" != *"<< 11"* ]] && \\
+           [[ "$line" != *"01:8f"* ]] && [[ "$line" != *"01:8c"* ]] && \\
+           [[ "$line" != *"01:83"* ]] && [[ "$line" != *"01:46"* ]] && \\
+           [[ "$line" != *"01:87"* ]]; then
+            : # echo "[CEC RAW] $line"
+        fi
+    fi
+{checks}
+done < "{log_file}"
+echo $keys
+'''
+
+
+def bench(log_file=None):
+    if log_file:
+        log = Path(log_file).read_text(encoding='utf-8', errors='replace').splitlines()
+    else:
+        log = make_log(50000)
+
+    decoder = CecDecoder()
+    start = time.perf_counter()
+    keys = sum(1 for _ in decoder.decode_all(log))
+    elapsed = time.perf_counter() - start
+    print(f"Строк: {len(log)}, нажатий: {keys}")
+    print(f"cec_decoder.py: {len(log) / elapsed:,.0f} строк/с "
+          f"({1e6 * elapsed / len(log):.2f} мкс на строку)")
+
+    if shutil.which('bash'):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "cec.log"
+            path.write_text("\n".join(log) + "\n", encoding='utf-8')
+            start = time.perf_counter()
+            result = subprocess.run(['bash', '-c', legacy_bash_script(path)],
+                                    capture_output=True, text=True)
+            elapsed_bash = time.perf_counter() - start
+        print(f"bash цепочка: {len(log) / elapsed_bash:,.0f} строк/с "
+              f"(нажатий: {result.stdout.strip()}), в {elapsed_bash / elapsed:.0f} раз медленнее")
+
+
+if __name__ == '__main__':
+    main(bench, str)
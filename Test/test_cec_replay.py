@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты записи/воспроизведения трафика cec-client (cec_replay.py)
+
+Запись подаётся в PlaybackSupervisor вместо cec-client, VLC - FakeVlc.
+
+Запуск как скрипт - пропускная способность и задержка кнопка -> команда VLC:
+    python3 Test/test_cec_replay.py --bench [запись]
+"""
+
+import asyncio
+import io
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# Добавляем путь к проекту и к тестам (FakeVlc, генератор лога)
+PROJECT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(PROJECT_DIR))
+
+from cec_decoder import DEFAULT_KEYMAP
+from io_scheduler import IoSettings
+from learned_markers import DEFAULT_CONFIDENCE
+from media_cache import CacheSettings
+from playback_supervisor import SEEK_ACCELERATION
+from readahead import ReadaheadSettings
+from cec_replay import CecReplay, parse_recording, record, replay_into_supervisor
+from test_cec_decoder import LEGACY_CODES, make_log
+from test_vlc_rc import FakeVlc
+from helpers import TempDbTestCase, main
+
+VIDEO_NAME = "Show.S01E02.mkv"
+# Кнопки без BACK: выход из сеанса завершил бы воспроизведение записи
+REPLAY_CODES = [code for code in LEGACY_CODES if code != '0d']
+
+
+class TestRecording(unittest.TestCase):
+    """Формат записи"""
+
+    def test_record_and_parse(self):
+        """Запись с отметками времени читается обратно"""
+        ticks = iter([10.0, 10.0, 10.5, 12.25])
+        output = io.StringIO()
+        count = record(output, io.StringIO("TRAFFIC: [ 1]\t>> 01:44:01\nDEBUG: x\twith tab\n\n"),
+                       clock=lambda: next(ticks))
+        self.assertEqual(count, 3)
+        self.assertEqual(parse_recording(output.getvalue().splitlines()),
+                         [(0.0, "TRAFFIC: [ 1]\t>> 01:44:01"), (0.5, "DEBUG: x\twith tab"),
+                          (2.25, "")])
+
+    def test_raw_cec_client_log(self):
+        """Лог cec-client без отметок: время из поля [мс]"""
+        log = ["TRAFFIC: [        1000]\t>> 01:44:01",
+               "key pressed: up (1)",
+               "TRAFFIC: [        1250]\t>> 01:45"]
+        self.assertEqual(parse_recording(log),
+                         [(0.0, log[0]), (0.0, log[1]), (0.25, log[2])])
+
+
+class TestReplay(unittest.TestCase):
+    """Воспроизведение в реальном времени, ускоренно и без пауз"""
+
+    def _run(self, events, speed):
+        replay = CecReplay(events, speed)
+
+        async def consume():
+            return [line async for line in replay.lines()]
+
+        return asyncio.run(consume()), replay
+
+    def test_speed(self):
+        events = [(0.0, 'a'), (0.2, 'b'), (0.4, 'c')]
+        lines, replay = self._run(events, 1.0)
+        self.assertEqual(lines, ['a', 'b', 'c'])
+        self.assertGreaterEqual(replay.elapsed, 0.39)
+
+        _, fast = self._run(events, 4.0)
+        self.assertLess(fast.elapsed, 0.2)
+        self.assertGreaterEqual(fast.elapsed, 0.09)
+
+    def test_no_pauses(self):
+        events = [(float(i), str(i)) for i in range(1000)]
+        lines, replay = self._run(events, 0)
+        self.assertEqual(len(lines), 1000)
+        self.assertLess(replay.elapsed, 1.0)
+
+
+class SupervisorReplayCase(TempDbTestCase):
+    """Временная БД и FakeVlc"""
+
+    def setUp(self):
+        super().setUp()
+        self.video_file = self.temp_dir / VIDEO_NAME
+        self.video_file.touch()
+        self.vlc = FakeVlc()
+        threading.Thread(target=self.vlc.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.vlc.shutdown()
+        self.vlc.server_close()
+
+    def replay(self, events, speed=0):
+        return asyncio.run(replay_into_supervisor(
+            events, str(self.video_file), speed, rc_port=self.vlc.port,
+            keymap=DEFAULT_KEYMAP, output=lambda text: None, trace_file=None,
+            readahead=ReadaheadSettings(percent=0), cache=CacheSettings(),
+            io=IoSettings(), io_status_file=None,
+            markers_confidence=DEFAULT_CONFIDENCE, seek_acceleration=SEEK_ACCELERATION))
+
+
+class TestSupervisorReplay(SupervisorReplayCase):
+    """Запись -> PlaybackSupervisor -> VLC RC"""
+
+    def test_recorded_keys_reach_vlc(self):
+        """Кнопки из записи становятся командами VLC, сеанс завершается с концом записи"""
+        log = ["TRAFFIC: [        1000]\t<< 10",
+               "TRAFFIC: [        1100]\t>> 01:44:01",
+               "TRAFFIC: [        1150]\t>> 01:45",
+               "TRAFFIC: [        1300]\t>> 01:44:03",
+               "TRAFFIC: [        1400]\t>> 01:44:74"]
+        stats = self.replay(parse_recording(log), speed=10)
+        commands = [cmd for cmd in self.vlc.received if cmd.startswith(('seek', 'vol'))]
+        self.assertEqual(commands, ['seek +30', 'seek -10', 'volup 1'])
+        self.assertEqual((stats['events'], stats['keys']), (5, 3))
+
+    def test_throughput(self):
+        """Длинный лог без пауз: все нажатия обработаны"""
+        log = make_log(5000, codes=REPLAY_CODES)
+        expected = sum(1 for line in log if '>> 01:44:' in line)
+        stats = self.replay(parse_recording(log))
+        self.assertEqual(stats['keys'], expected)
+        self.assertGreater(stats['events_per_second'], 1000)
+
+
+def bench(path=None):
+    from cec_replay import load_recording
+    events = load_recording(path) if path else parse_recording(make_log(50000, codes=REPLAY_CODES))
+    case = SupervisorReplayCase('setUp')
+    case.setUp()
+    try:
+        start = time.process_time()
+        stats = case.replay(events)
+        cpu = time.process_time() - start
+    finally:
+        case.tearDown()
+        case.doCleanups()
+    print(f"Событий: {stats['events']} за {stats['elapsed']:.2f} с "
+          f"({stats['events_per_second']:,.0f} событий/с), кнопок: {stats['keys']}")
+    print(f"Кнопка -> ответ VLC: в среднем {stats['key_latency_avg_ms']:.3f} мс, "
+          f"макс {stats['key_latency_max_ms']:.3f} мс")
+    print(f"CPU (супервизор + FakeVlc): {cpu:.2f} с, команд RC: {stats['rc_commands']}")
+
+
+if __name__ == '__main__':
+    main(bench, str)
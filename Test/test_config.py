@@ -13,7 +13,10 @@ from pathlib import Path
 # Добавляем родительскую директорию в path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from Py.config.config_manager import ConfigManager, ConfigType, ConfigCategory
+from typing import NamedTuple
+
+from Py.config.config_manager import (ConfigManager, ConfigType, ConfigCategory,
+                                       load_prefixed_settings, load_value)
 
 
 def test_basic_operations():
@@ -213,6 +216,47 @@ def test_get_all():
         db_path.unlink()
 
 
+class SampleSettings(NamedTuple):
+    enabled: bool = False
+    size: int = 5
+    leds: tuple = (1, 2)
+    directory: str = 'default'
+
+
+def test_prefixed_settings():
+    """Тест чтения NamedTuple настроек по префиксу"""
+    print("\n=== Тест настроек по префиксу ===")
+    
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.db') as f:
+        db_path = Path(f.name)
+    
+    try:
+        config = ConfigManager(db_path)
+        defaults = SampleSettings()
+        assert load_prefixed_settings(defaults, 'sample_', db_path) == defaults, "Нет ключей - не defaults"
+        
+        config.set('sample_enabled', 'true', ConfigType.BOOL, ConfigCategory.GENERAL, '')
+        config.set('sample_size', '7', ConfigType.INT, ConfigCategory.GENERAL, '')
+        config.set('sample_leds', '3,4', ConfigType.STRING, ConfigCategory.GENERAL, '')
+        config.set('sample_dir', '', ConfigType.PATH, ConfigCategory.GENERAL, '')
+        settings = load_prefixed_settings(defaults, 'sample_', db_path,
+                                          keys={'directory': 'sample_dir'})
+        assert settings == SampleSettings(True, 7, (3, 4), ''), f"Получено {settings}"
+        assert load_value('sample_size', 0, db_path) == 7, "load_value"
+        
+        # Ошибка в одном ключе - все значения по умолчанию
+        config.set('sample_leds', '3,4,5', ConfigType.STRING, ConfigCategory.GENERAL, '')
+        assert load_prefixed_settings(defaults, 'sample_', db_path) == defaults, "Длина кортежа"
+        
+        print("✓ Настройки по префиксу: OK")
+        return True
+    except AssertionError as e:
+        print(f"✗ Настройки по префиксу: {e}")
+        return False
+    finally:
+        db_path.unlink()
+
+
 def main():
     """Главная функция"""
     print("Тесты системы конфигурации\n")
@@ -224,6 +268,7 @@ def main():
     results.append(test_export_import())
     results.append(test_delete())
     results.append(test_get_all())
+    results.append(test_prefixed_settings())
     
     print("\n" + "=" * 50)
     passed = sum(results)
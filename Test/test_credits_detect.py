@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты поиска титров по кадрам (credits_detect.py): чтение YUV4MPEG2,
+статистика кадров, начало титров, титры серии в episode_markers и их
+приоритет над значением сериала в супервизоре
+
+Запуск как скрипт - скорость и точность на синтетических сериях 1080p
+(чтение y4m + статистика, векторно и циклом по кадрам):
+    python3 Test/test_credits_detect.py --bench [серий] [секунд]
+"""
+
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# Добавляем путь к проекту и к тестам (SupervisorTestCase)
+PROJECT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(PROJECT_DIR))
+
+from credits_detect import (HEIGHT, WIDTH, Y4mFrames, apply_credits, detect_credits,
+                            detect_episodes, frame_stats, np)
+from vlc_db import VlcDatabase
+from test_playback_supervisor import CecQueue, SupervisorTestCase, VIDEO_NAME
+from helpers import TempDbTestCase, main
+
+FPS = 4
+SIZE = (128, 72)
+
+
+def scene(rng, size, dark=False):
+    """Сцена: крупные блоки (светлые или тёмные), сдвиг на пиксель за кадр"""
+    width, height = size
+    low, high = (10, 60) if dark else (40, 230)
+    blocks = rng.integers(low, high, (9, 16)).astype(np.uint8)
+    image = np.kron(blocks, np.ones((height // 9 + 1, width // 16 + 1), dtype=np.uint8))
+    return image[:height, :width]
+
+
+def credits_frames(seconds, size, fps=FPS):
+    """Титры: белые строки на тёмном фоне, прокрутка вверх"""
+    width, height = size
+    roll = np.full((height * 8, width), 12, dtype=np.uint8)
+    for row in range(0, len(roll), height // 6):
+        roll[row:row + max(2, height // 24), width // 3:width // 3 + width // 4 + row % (width // 4)] = 220
+    frames = []
+    for index in range(int(seconds * fps)):
+        offset = index * height // (4 * fps) % (len(roll) - height)
+        frames.append(roll[offset:offset + height])
+    return frames
+
+
+def episode_frames(content, credits, seed, size=SIZE, fps=FPS, dark_scene=0, black=1.0):
+    """Кадры серии: сцены по 3 сек, тёмная сцена, чёрные кадры, титры"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    while len(frames) < content * fps:
+        image = scene(rng, size)
+        frames += [np.roll(image, shift, axis=1) for shift in range(3 * fps)]
+    frames = frames[:int(content * fps)]
+    if dark_scene:
+        image = scene(rng, size, dark=True)
+        frames += [np.roll(image, shift, axis=1) for shift in range(int(dark_scene * fps))]
+    frames += [np.zeros(size[::-1], dtype=np.uint8)] * int(black * fps)
+    return frames + credits_frames(credits, size, fps)
+
+
+def write_y4m(path, frames, size=SIZE, fps=FPS):
+    """YUV4MPEG2 4:2:0, цветность серая"""
+    width, height = size
+    chroma = bytes([128]) * (width * height // 2)
+    with open(path, 'wb') as stream:
+        stream.write(f"YUV4MPEG2 W{width} H{height} F{fps}:1 Ip A1:1 C420jpeg\n".encode())
+        for frame in frames:
+            stream.write(b"FRAME\n")
+            stream.write(np.ascontiguousarray(frame, dtype=np.uint8).tobytes())
+            stream.write(chroma)
+
+
+@unittest.skipUnless(np is not None, "нужен numpy")
+class CreditsTestCase(TempDbTestCase):
+    """Временные БД и папка серий"""
+
+    def episode(self, name, *args, **kwargs):
+        path = self.temp_dir / name
+        write_y4m(path, episode_frames(*args, **kwargs))
+        return path
+
+
+class TestFrames(CreditsTestCase):
+
+    def test_y4m_source(self):
+        path = self.episode("Show.S01E01.y4m", 20, 10, 1)
+        source = Y4mFrames(str(path))
+        self.assertAlmostEqual(source.duration(), 31.0)
+        frames = source.read(20.0, 5)
+        self.assertEqual(frames.shape, (10, HEIGHT, WIDTH))
+        self.assertTrue(np.all(frames[:2] == 0))          # чёрные кадры 20-21 с
+        self.assertLess(frames[2:].mean(), 60)
+
+    def test_frame_stats(self):
+        frames = np.zeros((3, HEIGHT, WIDTH), dtype=np.float32)
+        frames[1] = 200
+        frames[2, :, :WIDTH // 2] = 200
+        stats = frame_stats(frames)
+        self.assertEqual(list(stats.luma), [0, 200, 100])
+        self.assertEqual(list(stats.dark), [1, 0, 0.5])
+        self.assertEqual(list(stats.diff), [0, 200, 100])
+        self.assertEqual(list(stats.spread), [0, 0, 100])
+
+
+class TestDetect(CreditsTestCase):
+
+    def test_black_before_credits(self):
+        path = self.episode("Show.S01E01.y4m", 120, 45, 1)
+        result = detect_credits(Y4mFrames(str(path)))
+        self.assertAlmostEqual(result.start, 120, delta=1)
+        self.assertAlmostEqual(result.credits, 46, delta=1)
+
+    def test_dark_scene_before_credits(self):
+        """Тёмная сцена перед титрами - не титры: начало по смене сцены"""
+        path = self.episode("Show.S01E02.y4m", 112, 60, 2, dark_scene=8, black=0)
+        result = detect_credits(Y4mFrames(str(path)))
+        self.assertAlmostEqual(result.start, 120, delta=1)
+        self.assertAlmostEqual(result.credits, 60, delta=1)
+
+    def test_no_credits(self):
+        path = self.episode("Show.S01E03.y4m", 120, 0, 3, black=0)
+        self.assertIsNone(detect_credits(Y4mFrames(str(path))))
+
+    def test_episodes_stored(self):
+        paths = [self.episode("Show.S01E01.y4m", 90, 40, 1),
+                 self.episode("Show.S01E02.y4m", 90, 70, 2)]
+        results = detect_episodes(paths, jobs=2)
+        credits = [result.credits for _, result, _ in results]
+        self.assertAlmostEqual(credits[0], 41, delta=1)
+        self.assertAlmostEqual(credits[1], 71, delta=1)
+
+        self.assertTrue(apply_credits(paths[0], credits[0]))
+        with VlcDatabase() as db:
+            self.assertEqual(db.get_episode_credits(paths[0].name), (credits[0], 'detected'))
+            self.assertEqual(db.get_series_episode_credits("Show.S01", "y4m"),
+                             [(paths[0].name, credits[0], 'detected')])
+
+    def test_manual_kept(self):
+        path = self.temp_dir / "Show.S01E01.y4m"
+        with VlcDatabase() as db:
+            db.set_episode_credits(path.name, 50, 'manual', 1.0)
+        self.assertFalse(apply_credits(path, 41))
+        self.assertTrue(apply_credits(path, 41, force=True))
+
+
+class TestSupervisorEpisodeCredits(SupervisorTestCase):
+    """Титры серии важнее credits_duration сериала"""
+
+    def test_episode_credits_preferred(self):
+        self.series(skip_outro=True, credits=60)
+        with VlcDatabase(self.db_path) as db:
+            db.set_episode_credits(VIDEO_NAME, 120, 'detected', 1.0)
+        self.vlc.time = 3490                 # титры серии (3480), не сериала (3540)
+        supervisor = self.make_supervisor(CecQueue())
+        self.run_until(supervisor, lambda: 'pause' in self.vlc.received)
+
+        self.assertEqual(supervisor.state.credits_duration, 120)
+        self.assertIn('pause', self.vlc.received)
+        self.assertTrue(any('✓ Credits: 120s (серия)' in message for message in self.messages))
+
+
+def bench(episodes=3, seconds=180):
+    """Серии 1080p (y4m, 2 кадра/с - иначе гигабайты): последние 3 минуты"""
+    temp_dir = Path(tempfile.mkdtemp())
+    try:
+        size = (1920, 1080)
+        paths, truth = [], []
+        for number in range(episodes):
+            credits = 40 + 15 * number
+            path = temp_dir / f"Show.S01E{number + 1:02d}.y4m"
+            write_y4m(path, episode_frames(seconds - credits - 1, credits, number, size, fps=2), size, 2)
+            paths.append(path)
+            truth.append(credits + 1)
+        size_mb = sum(path.stat().st_size for path in paths) / 1024 / 1024
+        print(f"{episodes} серий 1080p x {seconds // 60} мин (y4m {size_mb:.0f} МБ)")
+
+        source = Y4mFrames(str(paths[0]))
+        start = time.perf_counter()
+        frames = source.read(0, seconds)
+        read = time.perf_counter() - start
+        start = time.perf_counter()
+        frame_stats(frames)
+        vector = time.perf_counter() - start
+        start = time.perf_counter()
+        for index in range(len(frames)):
+            pixels = frames[index].ravel().tolist()
+            sum(pixels) / len(pixels)
+            sum(1 for value in pixels if value < 48) / len(pixels)
+            if index:
+                previous = frames[index - 1].ravel().tolist()
+                sum(abs(a - b) for a, b in zip(pixels, previous)) / len(pixels)
+        loop = time.perf_counter() - start
+        print(f"Чтение и уменьшение {len(frames)} кадров: {read:.2f} с; статистика: numpy "
+              f"{1000 * vector:.1f} мс, цикл {1000 * loop:.0f} мс ({loop / vector:.0f}x)")
+
+        for jobs in (1, None):
+            start = time.perf_counter()
+            results = detect_episodes(paths, jobs)
+            elapsed = time.perf_counter() - start
+            found = [result.credits if result else None for _, result, _ in results]
+            print(f"{'1 процесс' if jobs else 'пул':<10} {elapsed:.2f} с: титры {found}, настоящие {truth}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main(bench, int, int)
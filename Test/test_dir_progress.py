@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты агрегатов прогресса по директориям (dir_progress)
+"""
+
+import os
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Добавляем путь к проекту и к тестам (TempDbTestCase)
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from vlc_db import VlcDatabase, format_dir_progress
+from helpers import TempDbTestCase
+
+
+class TestDirProgress(TempDbTestCase):
+    """Тесты инкрементальных агрегатов watched/partial/total"""
+
+    def _progress(self, directory, dirname):
+        with VlcDatabase(self.db_path) as db:
+            return db.get_dir_progress_batch(directory, [dirname])[dirname]
+
+    def test_rollup_to_ancestors(self):
+        """Статус файла учитывается в папке и во всех предках"""
+        with VlcDatabase(self.db_path) as db:
+            db.save_playback("e01.mkv", 3000, 3000, 100, directory="/tv/Show/S01")
+            db.save_playback("e02.mkv", 600, 3000, 20, directory="/tv/Show/S01")
+            db.save_playback("e01x.mkv", 3000, 3000, 95, directory="/tv/Show/S02")
+
+        self.assertEqual(self._progress("/tv/Show", "S01"), (1, 1, 0))
+        self.assertEqual(self._progress("/tv/Show", "S02"), (1, 0, 0))
+        self.assertEqual(self._progress("/tv", "Show"), (2, 1, 0))
+
+    def test_status_transition(self):
+        """partial -> watched переносит счётчик, повторное сохранение не удваивает"""
+        with VlcDatabase(self.db_path) as db:
+            db.save_playback("e01.mkv", 600, 3000, 20, directory="/tv/Show")
+            db.save_playback("e01.mkv", 1200, 3000, 40, directory="/tv/Show")
+            self.assertEqual(db.get_dir_progress_batch("/tv", ["Show"])["Show"], (0, 1, 0))
+
+            # Без directory - запись остаётся в прежней папке
+            db.save_playback("e01.mkv", 2900, 3000, 97)
+            self.assertEqual(db.get_dir_progress_batch("/tv", ["Show"])["Show"], (1, 0, 0))
+
+    def test_batch_and_file_count(self):
+        """Пакетное сохранение и total из количества файлов в папках"""
+        records = [
+            {'filename': f"e{i:02d}.mkv", 'position': 10, 'duration': 100,
+             'percent': 95 if i < 7 else 30, 'directory': "/tv/Show/S01"}
+            for i in range(8)
+        ]
+        with VlcDatabase(self.db_path) as db:
+            self.assertTrue(db.save_playback_batch(records))
+            db.set_dir_file_count("/tv/Show/S01", 10)
+            db.set_dir_file_count("/tv/Show/S02", 6)
+            self.assertEqual(db.get_dir_progress_batch("/tv", ["Show"])["Show"], (7, 1, 16))
+
+            # Изменение количества файлов применяется как дельта
+            db.set_dir_file_count("/tv/Show/S02", 4)
+            self.assertEqual(db.get_dir_progress_batch("/tv", ["Show"])["Show"], (7, 1, 14))
+
+    def test_rebuild_matches_incremental(self):
+        """Полный пересчёт даёт те же значения, что и инкрементальные обновления"""
+        with VlcDatabase(self.db_path) as db:
+            db.save_playback("a.mkv", 90, 100, 90, directory="/m/A")
+            db.save_playback("b.mkv", 10, 100, 10, directory="/m/B")
+            db.set_dir_file_count("/m/A", 3)
+            before = db.get_dir_progress_batch("/m", ["A", "B"])
+
+            self.assertTrue(db.rebuild_dir_progress())
+            self.assertEqual(db.get_dir_progress_batch("/m", ["A", "B"]), before)
+
+    def test_symlinked_root(self):
+        """Корень через симлинк (~/T7 -> /media/T7): логический и реальный путь - одна папка"""
+        media = self.temp_dir / "media" / "T7"
+        (media / "Show" / "S01").mkdir(parents=True)
+        (media / "Show" / "S02").mkdir()
+        home = self.temp_dir / "home"
+        home.mkdir()
+        (home / "T7").symlink_to(media)
+        logical = home / "T7" / "Show"
+
+        with VlcDatabase(self.db_path) as db:
+            # Супервизор - реальный путь, меню bash - логический
+            db.save_playback("e01.mkv", 3000, 3000, 100, directory=str(media / "Show" / "S01"))
+            db.save_playback("e02.mkv", 600, 3000, 20, directory=str(logical / "S01"))
+            db.set_dir_file_count(str(logical / "S01"), 5)
+            db.set_dir_file_count(str(media / "Show" / "S02"), 3)
+
+            self.assertEqual(db.get_dir_progress_batch(str(logical), ["S01", "S02"]),
+                             {"S01": (1, 1, 5), "S02": (0, 0, 3)})
+            self.assertEqual(db.get_dir_progress_batch(str(home), ["T7"])["T7"], (1, 1, 8))
+            self.assertEqual(db.get_dir_progress_batch(str(media), ["Show"])["Show"], (1, 1, 8))
+
+            # Повторное сохранение по другому пути не переносит счётчики
+            db.save_playback("e02.mkv", 2900, 3000, 97, directory=str(media / "Show" / "S01"))
+            self.assertEqual(db.get_dir_progress_batch(str(logical), ["S01"])["S01"], (2, 0, 5))
+
+    def test_batch_resolves_parent_once(self):
+        """realpath - один раз на папку и для подпапок-симлинков, не для каждой подпапки"""
+        media = self.temp_dir / "media"
+        for number in range(20):
+            (media / f"S{number:02d}").mkdir(parents=True)
+        (media / "Latest").symlink_to(media / "S19")
+        home = self.temp_dir / "home"
+        home.mkdir()
+        (home / "TV").symlink_to(media)
+        dirnames = [f"S{number:02d}" for number in range(20)] + ["Latest"]
+
+        with VlcDatabase(self.db_path) as db:
+            db.set_dir_file_count(str(media / "S03"), 4)
+            db.set_dir_file_count(str(media / "S19"), 7)
+            with mock.patch('vlc_db.os.path.realpath', wraps=os.path.realpath) as realpath:
+                progress = db.get_dir_progress_batch(str(home / "TV"), dirnames)
+            self.assertEqual(realpath.call_count, 2)
+            self.assertEqual((progress["S03"], progress["S19"], progress["Latest"]),
+                             ((0, 0, 4), (0, 0, 7), (0, 0, 7)))
+            self.assertEqual(progress["S00"], (0, 0, 0))
+
+    def test_format_dir_progress(self):
+        """Форматирование строки для меню"""
+        self.assertEqual(format_dir_progress(0, 0, 0), '')
+        self.assertEqual(format_dir_progress(7, 0, 10), '7/10')
+        self.assertEqual(format_dir_progress(7, 2, 10), '7/10 T:2')
+        self.assertEqual(format_dir_progress(3, 0, 0), '3/3')
+
+
+if __name__ == '__main__':
+    unittest.main()
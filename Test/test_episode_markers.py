@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты маркеров серии (vlc_db.py: episode_markers, resolve_markers):
+наследование значений сериала одним запросом, миграция таблицы, CLI
+resolve-markers и загрузка маркеров супервизором
+"""
+
+import asyncio
+import io
+import sqlite3
+import sys
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Добавляем путь к проекту и к тестам (SupervisorTestCase)
+PROJECT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(PROJECT_DIR))
+
+from vlc_db import VlcDatabase, cli_resolve_markers
+from test_playback_supervisor import CecQueue, SupervisorTestCase, VIDEO_NAME
+from helpers import TempDbTestCase, temp_pool
+
+PREFIX, SUFFIX = "Show.S01", "1080p.mkv"
+EPISODE = "Show.S01E02.1080p.mkv"
+
+
+class EpisodeMarkersTestCase(TempDbTestCase):
+    """Временная БД"""
+
+    def resolve(self, filename=EPISODE):
+        with VlcDatabase() as db:
+            return db.resolve_markers(filename)
+
+
+class TestResolve(EpisodeMarkersTestCase):
+
+    def test_defaults_without_settings(self):
+        markers = self.resolve()
+        self.assertEqual((markers['autoplay'], markers['skip_intro'], markers['skip_outro']),
+                         (False, False, False))
+        self.assertIsNone(markers['intro_start'])
+        self.assertIsNone(markers['credits_duration'])
+        self.assertFalse(markers['outro_triggered'])
+
+    def test_series_inherited(self):
+        with VlcDatabase() as db:
+            db.save_series_settings(PREFIX, SUFFIX, True, True, False, 60, 150, 90)
+            db.set_outro_triggered(EPISODE, 1)
+        markers = self.resolve()
+        self.assertEqual((markers['autoplay'], markers['skip_intro'], markers['skip_outro']),
+                         (True, True, False))
+        self.assertEqual((markers['intro_start'], markers['intro_end'], markers['credits_duration']),
+                         (60, 150, 90))
+        self.assertFalse(markers['intro_episode'] or markers['credits_episode'])
+        self.assertTrue(markers['outro_triggered'])
+
+    def test_episode_overrides(self):
+        with VlcDatabase() as db:
+            db.save_series_settings(PREFIX, SUFFIX, True, True, False, 60, 150, 90)
+            db.set_episode_intro(EPISODE, 95, 180, 1.0)
+            db.set_episode_credits(EPISODE, 120, 'detected', 1.0)
+            db.set_episode_flags(EPISODE, None, False, True, 1.0)
+        markers = self.resolve()
+        self.assertEqual((markers['autoplay'], markers['skip_intro'], markers['skip_outro']),
+                         (True, False, True))
+        self.assertEqual((markers['intro_start'], markers['intro_end'], markers['credits_duration']),
+                         (95, 180, 120))
+        self.assertTrue(markers['intro_episode'] and markers['credits_episode'])
+
+        # Другие серии сезона - значения сериала
+        other = self.resolve("Show.S01E03.1080p.mkv")
+        self.assertEqual((other['intro_start'], other['credits_duration'], other['skip_intro']),
+                         (60, 90, True))
+
+    def test_partial_override_keeps_rest(self):
+        """Титры серии не трогают intro; сброс intro серии - снова intro сериала"""
+        with VlcDatabase() as db:
+            db.save_series_settings(PREFIX, SUFFIX, False, True, True, 60, 150, 90)
+            db.set_episode_intro(EPISODE, 95, 180, 1.0)
+            db.set_episode_credits(EPISODE, 120, 'detected', 2.0)
+            self.assertEqual(self.resolve()['intro_start'], 95)
+            db.set_episode_intro(EPISODE, None, None, 3.0)
+        markers = self.resolve()
+        self.assertEqual((markers['intro_start'], markers['intro_end'], markers['credits_duration']),
+                         (60, 150, 120))
+
+        with VlcDatabase() as db:
+            self.assertTrue(db.clear_episode_markers(EPISODE))
+        self.assertEqual(self.resolve()['credits_duration'], 90)
+
+    def test_invalid_intro_rejected(self):
+        with VlcDatabase() as db:
+            self.assertFalse(db.set_episode_intro(EPISODE, 100, 90, 1.0))
+            self.assertFalse(db.set_episode_intro(EPISODE, 100, None, 1.0))
+
+    def test_cli_one_line(self):
+        with VlcDatabase() as db:
+            db.save_series_settings(PREFIX, SUFFIX, True, False, True, None, None, 90)
+            db.set_episode_intro(EPISODE, 95, 180, 1.0)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(cli_resolve_markers([f"/media/{EPISODE}"]), 0)
+        self.assertEqual(output.getvalue().strip(), "1|0|1|95|180|90|0")
+
+
+class TestMigration(TempDbTestCase):
+
+    def test_old_table_migrated(self):
+        """episode_markers только с титрами (credits_detect.py 1.0.0) получает intro и флаги"""
+        conn = sqlite3.connect(self.temp_dir / "old.db")
+        conn.execute("""
+            CREATE TABLE episode_markers (
+                filename TEXT PRIMARY KEY, series_prefix TEXT, series_suffix TEXT,
+                credits_duration INTEGER, credits_source TEXT, updated REAL DEFAULT 0)
+        """)
+        conn.execute("INSERT INTO episode_markers VALUES (?, ?, ?, 75, 'detected', 1.0)",
+                     (EPISODE, PREFIX, SUFFIX))
+        conn.commit()
+        conn.close()
+
+        with temp_pool(self.temp_dir / "old.db", init=False):
+            with VlcDatabase() as db:
+                self.assertTrue(db.init_db())
+                self.assertTrue(db.set_episode_intro(EPISODE, 30, 70, 2.0))
+                markers = db.resolve_markers(EPISODE)
+        self.assertEqual((markers['intro_start'], markers['credits_duration']), (30, 75))
+
+
+class TestSupervisorEpisodeMarkers(SupervisorTestCase):
+    """Супервизор: маркеры серии, RED исправляет intro серии, а не сериала"""
+
+    def test_red_updates_episode_intro(self):
+        self.series(intro=(10, 40))
+        with VlcDatabase(self.db_path) as db:
+            db.set_episode_intro(VIDEO_NAME, 100, 130, 1.0)
+        cec = CecQueue()
+        supervisor = self.make_supervisor(cec, max_poll_interval=60)
+
+        async def scenario():
+            task = asyncio.create_task(supervisor.run())
+            while not supervisor.state.clock.known:
+                await asyncio.sleep(0.01)
+            self.assertEqual((supervisor.state.intro_start, supervisor.state.intro_end), (100, 130))
+            cec.press('72')
+            cec.press('72')
+            while supervisor.stats()['keys'] < 2:
+                await asyncio.sleep(0.01)
+            supervisor.stop()
+            await task
+
+        asyncio.run(scenario())
+        self.assertTrue(any('✓ Intro: 100s - 130s (серия)' in message for message in self.messages))
+        with VlcDatabase(self.db_path) as db:
+            markers = db.resolve_markers(VIDEO_NAME)
+            series = db.get_skip_markers("Show.S01", "1080p.mkv")
+        self.assertEqual((markers['intro_start'], markers['intro_end']), (120, 121))
+        self.assertEqual((series['intro_start'], series['intro_end']), (10, 40))
+
+
+if __name__ == '__main__':
+    unittest.main()
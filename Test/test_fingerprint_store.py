@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты хранилища отпечатков (fingerprint_store.py): memmap-кадры, манифест,
+сегменты инвертированного индекса и их слияние, поиск похожих серий
+
+Запуск как скрипт - библиотека синтетических отпечатков (сезоны по 10 серий
+с общей заставкой): скорость добавления, задержка и пропускная способность
+поиска, размер индекса и пиковая память:
+    python3 Test/test_fingerprint_store.py --bench [серий] [запросов]
+"""
+
+import resource
+import subprocess
+import sys
+import time
+import unittest
+from pathlib import Path
+
+# Добавляем путь к проекту и к тестам (helpers)
+PROJECT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(PROJECT_DIR))
+
+from fingerprint_store import FingerprintStore, np
+from helpers import TempDbTestCase, main, temp_database
+
+FRAMES = 18750            # 10 минут по 32 мс
+INTRO = (1500, 2900)      # Кадры заставки в отпечатке сезона
+BIT_ERRORS = 0.065        # Шум битов серии: между двумя сериями различается ~12% (как в музыке test_intro_detect)
+
+
+def season_prints(seed, episodes=10, frames=FRAMES):
+    """Отпечатки сезона: случайные кадры + общая заставка со сдвигом и шумом битов"""
+    rng = np.random.default_rng(seed)
+    intro = rng.integers(1, 2 ** 32, INTRO[1] - INTRO[0], dtype=np.uint32)
+    prints, offsets = [], []
+    for _ in range(episodes):
+        values = rng.integers(1, 2 ** 32, frames, dtype=np.uint32)
+        offset = int(rng.integers(0, 3000))
+        noise = np.packbits(rng.random((len(intro), 32)) < BIT_ERRORS, axis=1, bitorder='little')
+        values[offset:offset + len(intro)] = intro ^ noise.view('<u4').ravel()
+        prints.append(values)
+        offsets.append(offset)
+    return prints, offsets
+
+
+@unittest.skipUnless(np is not None, "нужен numpy")
+class StoreTestCase(TempDbTestCase):
+    """Временные БД и папка хранилища"""
+
+    def setUp(self):
+        super().setUp()
+        self.store = FingerprintStore(self.temp_dir / "fingerprints")
+
+    def add_season(self, name="Show", seed=1, episodes=4, frames=6000):
+        prints, offsets = season_prints(seed, episodes, frames)
+        ids = [self.store.add(f"/media/{name}.S01E{number:02d}.mkv", values, 100, 1.0, 600, 1)
+               for number, values in enumerate(prints, 1)]
+        return prints, offsets, ids
+
+
+class TestStorage(StoreTestCase):
+
+    def test_get_roundtrip(self):
+        prints, _, _ = self.add_season()
+        stored = self.store.get("/media/Show.S01E02.mkv", 100, 1.0, 600, 1)
+        self.assertIsInstance(stored, np.memmap)
+        self.assertTrue(np.array_equal(stored, prints[1]))
+        self.assertIsNone(self.store.get("/media/Show.S01E02.mkv", 101, 1.0, 600, 1))
+        self.assertIsNone(self.store.get("/media/Show.S01E02.mkv", 100, 1.0, 600, 2))
+
+    def test_segments_merged(self):
+        """Сегменты сливаются: после 64 серий - O(log N) отсортированных сегментов"""
+        rng = np.random.default_rng(0)
+        for number in range(64):
+            self.store.add(f"/media/Show.S01E{number:02d}.mkv",
+                           rng.integers(1, 2 ** 32, 1000, dtype=np.uint32), 1, 1.0, 600, 1)
+            self.assertLessEqual(len(self.store.segments()), 6)
+        self.assertEqual(self.store.stats()['index_entries'], 64000)
+        for _, segment in self.store.segments():
+            self.assertTrue(np.all(segment[0][1:] >= segment[0][:-1]))
+
+    def test_silence_not_indexed(self):
+        values = np.zeros(500, dtype=np.uint32)
+        values[:100] = np.arange(1, 101)
+        self.store.add("/media/Quiet.S01E01.mkv", values, 1, 1.0, 600, 1)
+        self.assertEqual(self.store.stats()['index_entries'], 100)
+
+    def test_replace_and_compact(self):
+        prints, _, ids = self.add_season()
+        new_id = self.store.add("/media/Show.S01E01.mkv", prints[0][::-1].copy(), 200, 2.0, 600, 1)
+        self.assertNotEqual(new_id, ids[0])
+        self.assertEqual(self.store.stats()['dead_frames'], 6000)
+
+        freed = self.store.compact()
+        self.assertEqual(freed, 6000 * 4)
+        stats = self.store.stats()
+        self.assertEqual((stats['dead_frames'], stats['index_entries']), (0, 4 * 6000))
+        self.assertTrue(np.array_equal(self.store.get("/media/Show.S01E02.mkv", 100, 1.0, 600, 1),
+                                       prints[1]))
+
+
+class TestMatch(StoreTestCase):
+
+    def test_finds_season_and_shift(self):
+        prints, offsets, ids = self.add_season()
+        self.add_season("Other", seed=2)
+        matches = self.store.match(prints[0], ("Show.S01", "mkv"), exclude=[ids[0]])
+        self.assertEqual(sorted(match.episode_id for match in matches), ids[1:])
+        for match in matches:
+            other = ids.index(match.episode_id)
+            self.assertEqual(match.shift, offsets[other] - offsets[0])
+            self.assertGreaterEqual(match.votes, 8)
+
+    def test_other_series_filtered(self):
+        prints, _, ids = self.add_season()
+        self.assertEqual(self.store.match(prints[0], ("Other.S01", "mkv")), [])
+
+    def test_unrelated_audio(self):
+        self.add_season()
+        rng = np.random.default_rng(9)
+        self.assertEqual(self.store.match(rng.integers(1, 2 ** 32, 6000, dtype=np.uint32)), [])
+
+    def test_replaced_episode_not_matched(self):
+        prints, _, ids = self.add_season()
+        self.store.add("/media/Show.S01E02.mkv", np.arange(1, 6001, dtype=np.uint32), 200, 2.0, 600, 1)
+        matches = self.store.match(prints[0], exclude=[ids[0]])
+        self.assertNotIn(ids[1], [match.episode_id for match in matches])
+        self.assertEqual(len(matches), 2)
+
+
+@unittest.skipUnless(np is not None, "нужен numpy")
+class TestBench(unittest.TestCase):
+
+    def test_bench_with_arguments(self):
+        """--bench 20 5: аргументы командной строки доходят до bench() числами"""
+        result = subprocess.run([sys.executable, __file__, '--bench', '20', '5'],
+                                capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("Добавлено 20 серий", result.stdout)
+
+
+def bench(episodes=500, queries=50):
+    """Библиотека episodes серий по 10 минут: добавление, поиск по сезону, память"""
+    with temp_database("bench.db") as (temp_dir, _):
+        store = FingerprintStore(temp_dir / "fingerprints")
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        seasons = []
+        for season in range(episodes // 10):
+            prints, offsets = season_prints(season)
+            ids = [store.add(f"/media/Show{season}.S01E{number:02d}.mkv", values, 1, 1.0, 600, 1)
+                   for number, values in enumerate(prints, 1)]
+            seasons.append((prints[0], ids[0], offsets))
+        added = time.perf_counter() - start
+        stats = store.stats()
+        print(f"Добавлено {stats['episodes']} серий ({stats['frames'] / 1e6:.1f} млн кадров) за "
+              f"{added:.1f} с, сегментов {stats['segments']} (слияний {store.merges}), "
+              f"{stats['bytes'] / 1024 / 1024:.0f} МБ на диске")
+
+        found = 0
+        start = time.perf_counter()
+        for number in range(queries):
+            values, episode_id, _ = seasons[number % len(seasons)]
+            matches = store.match(values, (f"Show{number % len(seasons)}.S01", "mkv"),
+                                  exclude=[episode_id], limit=9)
+            found += len(matches)
+        elapsed = time.perf_counter() - start
+        print(f"Поиск по сезону: {1000 * elapsed / queries:.1f} мс на серию, "
+              f"{store.lookups / elapsed / 1e6:.1f} млн ключей/с, найдено {found} из {queries * 9} серий")
+
+        start = time.perf_counter()
+        values, episode_id, _ = seasons[0]
+        store.match(values, exclude=[episode_id])
+        print(f"Поиск по всей библиотеке: {1000 * (time.perf_counter() - start):.1f} мс")
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(f"Пиковая память процесса: +{(rss - rss_before) / 1024:.0f} МБ "
+              f"(кадры и индекс на диске - {stats['bytes'] / 1024 / 1024:.0f} МБ)")
+
+
+if __name__ == '__main__':
+    main(bench, int, int)
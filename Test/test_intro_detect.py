@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты поиска заставки по звуку (intro_detect.py): отпечатки, общий участок
+двух серий, сезон из WAV с кэшем отпечатков, запись маркеров
+
+Запуск как скрипт - время анализа сезона (10 серий по 10 минут) в одном
+процессе, в пуле процессов и повторно из кэша:
+    python3 Test/test_intro_detect.py --bench [серий] [секунд]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+import wave
+from pathlib import Path
+
+# Добавляем путь к проекту и к тестам (helpers)
+PROJECT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(PROJECT_DIR))
+
+from fingerprint_store import FingerprintStore
+from intro_detect import (FRAME_SECONDS, SAMPLE_RATE, apply_markers, detect_season, fingerprint,
+                          match_segment, np, season_episodes)
+from vlc_db import VlcDatabase, split_jobs_option
+from helpers import TempDbTestCase, main, temp_pool
+
+INTRO_SECONDS = 45
+
+
+def music(seconds, seed):
+    """Синтетическая "музыка": ноты 0.2-0.6 с с обертонами, шумом и затуханием"""
+    rng = np.random.default_rng(seed)
+    notes, total = [], 0
+    while total < seconds * SAMPLE_RATE:
+        length = int(rng.uniform(0.2, 0.6) * SAMPLE_RATE)
+        t = np.arange(length) / SAMPLE_RATE
+        pitch = rng.uniform(100, 400)
+        note = sum(np.sin(2 * np.pi * pitch * k * t + rng.uniform(0, 2 * np.pi)) / k
+                   for k in range(1, 16)) * 0.1
+        note += 0.05 * rng.standard_normal(length)
+        notes.append(note * np.exp(-2 * t))
+        total += length
+    return np.concatenate(notes)[:int(seconds * SAMPLE_RATE)].astype(np.float32)
+
+
+def episode_audio(cold_open, seconds, seed, intro):
+    """Вступление cold_open сек, общая заставка, дальше - своя "музыка" серии"""
+    parts = [music(cold_open, seed * 10 + 1)] if cold_open else []
+    parts += [intro, music(seconds - cold_open - INTRO_SECONDS, seed * 10 + 2)]
+    audio = np.concatenate(parts)
+    return audio + 0.01 * np.random.default_rng(seed).standard_normal(len(audio)).astype(np.float32)
+
+
+def write_wav(path, samples):
+    with wave.open(str(path), 'wb') as stream:
+        stream.setnchannels(1)
+        stream.setsampwidth(2)
+        stream.setframerate(SAMPLE_RATE)
+        stream.writeframes((np.clip(samples, -1, 1) * 32767).astype('<i2').tobytes())
+
+
+def write_season(folder, cold_opens, seconds):
+    intro = music(INTRO_SECONDS, 999)
+    paths = []
+    for number, cold_open in enumerate(cold_opens, 1):
+        path = Path(folder) / f"Show.S01E{number:02d}.wav"
+        write_wav(path, episode_audio(cold_open, seconds, number, intro))
+        paths.append(path)
+    return paths
+
+
+@unittest.skipUnless(np is not None, "нужен numpy")
+class TestMatching(unittest.TestCase):
+    """Отпечатки и общий участок двух серий"""
+
+    @classmethod
+    def setUpClass(cls):
+        intro = music(INTRO_SECONDS, 999)
+        cls.a = fingerprint(episode_audio(30.37, 150, 1, intro))
+        cls.b = fingerprint(episode_audio(52.11, 150, 2, intro))
+
+    def test_fingerprint_compact(self):
+        self.assertEqual(self.a.dtype, np.uint32)
+        self.assertAlmostEqual(len(self.a) * FRAME_SECONDS, 150, delta=1)
+
+    def test_silence_is_zero(self):
+        self.assertFalse(fingerprint(np.zeros(SAMPLE_RATE * 5, dtype=np.float32)).any())
+
+    def test_shared_segment(self):
+        segment = match_segment(self.a, self.b)
+        self.assertAlmostEqual(segment.a_start, 30.37, delta=0.5)
+        self.assertAlmostEqual(segment.a_end, 30.37 + INTRO_SECONDS, delta=0.5)
+        self.assertAlmostEqual(segment.b_start, 52.11, delta=0.5)
+        self.assertAlmostEqual(segment.length, INTRO_SECONDS, delta=0.5)
+
+    def test_no_shared_segment(self):
+        other = fingerprint(music(150, 7))
+        self.assertIsNone(match_segment(self.a, other))
+
+
+@unittest.skipUnless(np is not None, "нужен numpy")
+class TestSeason(TempDbTestCase):
+    """Сезон из WAV: маркеры, кэш отпечатков, ручные маркеры"""
+
+    def setUp(self):
+        super().setUp()
+        self.paths = write_season(self.temp_dir, [30, 12, 31, 29], 120)
+        self.store = FingerprintStore(self.temp_dir / "fingerprints")
+
+    def test_season_episodes(self):
+        (self.temp_dir / "Show.S01E05.txt").write_text("")
+        (self.temp_dir / "Other.S02E01.wav").write_bytes(b"")
+        self.assertEqual(season_episodes(self.temp_dir), self.paths)
+        self.assertEqual(season_episodes(self.paths[2]), self.paths)
+
+    def test_detect_and_apply(self):
+        result = detect_season(self.paths, 'wav', 120, jobs=2, store=self.store)
+        self.assertEqual(result.decoded, 4)
+        self.assertEqual(result.markers, (30, 75))
+        self.assertAlmostEqual(result.episodes[1][1].a_start, 12, delta=0.5)
+
+        self.assertTrue(apply_markers(self.paths[0], result.markers))
+        with VlcDatabase() as db:
+            markers = db.get_skip_markers("Show.S01", "wav")
+        self.assertEqual((markers['intro_start'], markers['intro_end']), (30, 75))
+
+    def test_cached_fingerprints(self):
+        detect_season(self.paths, 'wav', 120, jobs=1, store=self.store)
+        self.assertEqual(detect_season(self.paths, 'wav', 120, store=self.store).decoded, 0)
+
+        # Изменился файл - отпечаток считается заново
+        write_wav(self.paths[1], music(120, 5))
+        os.utime(self.paths[1], (time.time() + 10, time.time() + 10))
+        result = detect_season(self.paths, 'wav', 120, store=self.store)
+        self.assertEqual(result.decoded, 1)
+        self.assertIsNone(result.episodes[1][1])
+        self.assertEqual(result.markers, (30, 75))
+
+    def test_manual_markers_kept(self):
+        with VlcDatabase() as db:
+            db.set_intro_markers("Show.S01", "wav", 10, 40)
+        self.assertFalse(apply_markers(self.paths[0], (30, 75)))
+        self.assertTrue(apply_markers(self.paths[0], (30, 75), force=True))
+
+
+class TestJobsOption(unittest.TestCase):
+    """--jobs N в командной строке: значение убирается по позиции, не по тексту"""
+
+    def test_value_removed_by_position(self):
+        for jobs in ('02', '+2', '2'):
+            self.assertEqual(split_jobs_option(['detect', '--jobs', jobs, '2', '--force']),
+                             (['detect', '2'], 2))
+        self.assertEqual(split_jobs_option(['detect', '--jobs=3', 'dir']), (['detect', 'dir'], 3))
+        self.assertEqual(split_jobs_option(['detect', 'dir', '--dry-run']), (['detect', 'dir'], None))
+
+    def test_invalid(self):
+        for argv in (['detect', '--jobs'], ['--jobs', 'x'], ['--jobs', '0']):
+            with self.assertRaises(ValueError):
+                split_jobs_option(argv)
+
+
+def bench(episodes=10, seconds=600):
+    """Сезон WAV: отпечатки в одном процессе, в пуле, повторный анализ из кэша"""
+    temp_dir = Path(tempfile.mkdtemp())
+    try:
+        rng = np.random.default_rng(0)
+        paths = write_season(temp_dir, rng.uniform(0, 120, episodes).round(1), seconds)
+        for jobs in (1, None):
+            with temp_pool(temp_dir / f"bench-{jobs}.db"):
+                store = FingerprintStore(temp_dir / f"fingerprints-{jobs}")
+                # Второй проход пула - отпечатки уже в хранилище
+                runs = ("1 процесс",) if jobs else (f"пул {os.cpu_count()}", "кэш")
+                for name in runs:
+                    result = detect_season(paths, 'wav', seconds, jobs=jobs, store=store)
+                    print(f"{name:<10} {episodes} серий x {seconds // 60} мин: {result.elapsed:6.2f} с, "
+                          f"декодировано {result.decoded}, маркеры {result.markers}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main(bench, int, int)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты планировщика фонового чтения (io_scheduler.py): token bucket, оценка
+канала и потребления VLC, паузы после перемотки и при просадке
+
+Запуск как скрипт - общий канал VLC и копирования в кэш: просадки VLC без
+планировщика и с ним (модель канала с раздачей пропускной способности):
+    python3 Test/test_io_scheduler.py --bench [секунд] [канал Б/с] [битрейт Б/с] [буфер Б]
+"""
+
+import json
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# Добавляем путь к проекту и к тестам (SupervisorTestCase)
+PROJECT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(PROJECT_DIR))
+
+from io_scheduler import (IO_SEEK_PAUSE, IO_STALL_PAUSE, KB, PROBE_RATE, IoScheduler, IoSettings,
+                          TokenBucket)
+from test_playback_supervisor import CecQueue, SupervisorTestCase
+from helpers import main
+
+MB = 1024 * KB
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_debt_paid_at_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(1 * MB, 0, clock)
+        self.assertEqual(bucket.delay(), 0)
+        bucket.take(512 * KB)
+        self.assertAlmostEqual(bucket.delay(), 0.5)
+        clock.now += 0.5
+        self.assertEqual(bucket.delay(), 0)
+
+    def test_burst_limits_saved_tokens(self):
+        clock = FakeClock()
+        bucket = TokenBucket(1 * MB, 256 * KB, clock)
+        clock.now += 10
+        bucket.take(1 * MB)
+        self.assertAlmostEqual(bucket.delay(), 0.75)
+
+    def test_unlimited(self):
+        bucket = TokenBucket(None)
+        bucket.take(100 * MB)
+        self.assertEqual(bucket.delay(), 0)
+
+
+class TestIoScheduler(unittest.TestCase):
+    """Решения по замерам VLC и заданий"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.io = IoScheduler(IoSettings(max_kb=4096, headroom_percent=150), clock=self.clock)
+        self.vlc_bytes = 0
+
+    def vlc_reads(self, rate, seconds=1, playing=True):
+        """VLC читал rate байт/с в течение seconds"""
+        self.io.sample(self.vlc_bytes, playing)
+        for _ in range(seconds):
+            self.clock.now += 1
+            self.vlc_bytes += int(rate)
+            self.io.sample(self.vlc_bytes, playing)
+
+    def test_no_measurements_uses_ceiling(self):
+        self.io.sample(None, True)
+        self.assertEqual(self.io.allowed_rate, 4 * MB)
+        self.assertEqual(self.io.diagnostics()['decision'], 'run')
+
+    def test_spare_bandwidth(self):
+        """Канал 3 МБ/с (задание 2 + VLC 1), запас VLC 150% - заданиям 1.5 МБ/с"""
+        self.vlc_reads(1 * MB)
+        self.io.record(1 * MB, 0.5)
+        self.vlc_reads(1 * MB)
+        self.assertEqual(self.io.link_rate, 3 * MB)
+        self.assertEqual(self.io.allowed_rate, 1.5 * MB)
+        status = self.io.diagnostics()
+        self.assertEqual((status['decision'], status['allowed_kb'], status['playback_kb']),
+                         ('throttle', 1536.0, 1024.0))
+
+    def test_probe_rate_floor(self):
+        """Канал занят VLC - задания не останавливаются совсем (замер канала)"""
+        self.vlc_reads(2 * MB)
+        self.io.record(64 * KB, 1.0)
+        self.vlc_reads(2 * MB)
+        self.assertEqual(self.io.allowed_rate, PROBE_RATE)
+
+    def test_page_cache_read_not_link_sample(self):
+        self.io.record(1 * MB, 0.0001)
+        self.assertIsNone(self.io.link_rate)
+
+    def test_seek_pauses_jobs(self):
+        self.io.on_seek()
+        self.assertTrue(self.io.paused())
+        self.assertEqual(self.io.diagnostics()['pause_reason'], 'seek')
+        self.clock.now += IO_SEEK_PAUSE
+        self.io.sample(None, True)
+        self.assertFalse(self.io.paused())
+        self.assertEqual([d[1] for d in self.io.decisions], ['pause', 'run'])
+
+    def test_stall_pauses_jobs(self):
+        """Чтение VLC упало ниже 30% среднего во время воспроизведения"""
+        self.vlc_reads(1 * MB, seconds=5)
+        self.vlc_reads(100 * KB)
+        self.assertTrue(self.io.paused())
+        self.assertEqual(self.io.stalls, 1)
+        self.assertEqual(self.io.playback_rate, 1 * MB)
+        self.clock.now += IO_STALL_PAUSE
+        self.assertFalse(self.io.paused())
+
+    def test_vlc_pause_is_not_stall(self):
+        self.vlc_reads(1 * MB, seconds=5)
+        self.vlc_reads(0, playing=False)
+        self.assertFalse(self.io.paused())
+        self.assertEqual(self.io.stalls, 0)
+
+    def test_acquire_blocked_while_paused(self):
+        self.io.on_seek()
+        stop = threading.Event()
+        threading.Timer(0.2, stop.set).start()
+        self.assertFalse(self.io.acquire('cache', 64 * KB, stop))
+        self.assertEqual(self.io.job_bytes, {})
+
+    def test_acquire_rate(self):
+        """Реальные часы: 1 МБ кусками по 64 КБ при 4 МБ/с - около 0.25 с"""
+        io = IoScheduler(IoSettings(max_kb=4096))
+        stop = threading.Event()
+        start = time.monotonic()
+        for _ in range(16):
+            self.assertTrue(io.acquire('readahead', 64 * KB, stop))
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+        self.assertEqual(io.job_bytes, {'readahead': 1 * MB})
+
+    def test_dump(self):
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            self.io.on_seek()
+            self.io.dump(temp_dir / "io_status.json")
+            status = json.loads((temp_dir / "io_status.json").read_text(encoding='utf-8'))
+            self.assertEqual((status['decision'], status['seeks']), ('pause', 1))
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+class TestSupervisorIo(SupervisorTestCase):
+    """Перемотка с пульта останавливает фоновое чтение"""
+
+    def test_seek_key_pauses_io(self):
+        cec = CecQueue()
+        supervisor = self.make_supervisor(cec, max_poll_interval=60)
+        cec.press('25')
+        self.run_until(supervisor, lambda: 'seek 1800' in self.vlc.received)
+        self.assertEqual(supervisor.stats()['io_seeks'], 1)
+        self.assertTrue(supervisor.io.paused())
+
+
+def bench(seconds=120, link=3 * MB, bitrate=1 * MB, buffer=2 * MB):
+    """Модель: канал делится поровну между читающими; VLC читает, пока буфер не полон
+
+    Просадка - секунда, в которую буфер VLC пуст (картинка останавливается).
+    Канал падает до 40% на 30-60 с (помехи WiFi).
+    """
+    def simulate(scheduler):
+        clock = FakeClock()
+        io = IoScheduler(IoSettings(max_kb=0), clock=clock) if scheduler else None
+        level, vlc_total, copied, stalls = buffer, 0, 0, 0
+        for second in range(seconds):
+            capacity = link * (0.4 if 30 <= second < 60 else 1.0)
+            want_vlc = max(0, buffer - level + bitrate)
+            if io is None:
+                job = capacity / 2
+            else:
+                io.sample(vlc_total, True)
+                job = capacity / 2 if not io.paused() else 0
+                if io.allowed_rate is not None:
+                    job = min(job, io.allowed_rate)
+            vlc = min(want_vlc, capacity - job)
+            job = min(job, capacity - vlc)
+            if io is not None and job:
+                io.record(int(job), job / (capacity - vlc))
+            level += vlc - bitrate
+            if level < 0:
+                stalls += 1
+                level = 0
+            vlc_total += int(vlc)
+            copied += job
+            clock.now += 1
+        return stalls, copied / MB
+
+    for name, scheduler in (("без планировщика", False), ("с планировщиком", True)):
+        stalls, copied = simulate(scheduler)
+        print(f"{name:<18} просадок VLC: {stalls:>3} с, скопировано в фоне: {copied:.0f} МБ")
+
+
+if __name__ == '__main__':
+    main(bench, int, int, int, int)
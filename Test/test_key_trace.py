@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты трассировки задержки кнопок (key_trace.py): буфер, отметки RC, отчёт
+
+Запуск как скрипт - стоимость трассировки на одну кнопку:
+    python3 Test/test_key_trace.py --bench [нажатий]
+"""
+
+import asyncio
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# Добавляем путь к проекту и к тестам (helpers)
+PROJECT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(PROJECT_DIR))
+
+from key_trace import KeyTracer, load_records, percentile, summarize
+from vlc_rc import AsyncVlcRc
+from vlc_rc_mock import MockVlc
+from helpers import main
+
+
+class TestTracer(unittest.TestCase):
+    """Кольцевой буфер и отметки этапов"""
+
+    def test_ring_buffer(self):
+        tracer = KeyTracer(capacity=3)
+        for index in range(5):
+            with tracer.trace(str(index), 0.0, 0.001):
+                pass
+        self.assertEqual([record['key'] for record in tracer.records()], ['2', '3', '4'])
+        self.assertEqual(tracer.total, 5)
+
+    def test_rc_marks_only_inside_trace(self):
+        """Команда кнопки отмечает send/ack, фоновый опрос - нет"""
+        vlc = MockVlc(port=0, speed=0)
+        threading.Thread(target=vlc.serve_forever, daemon=True).start()
+        vlc.slow_commands['pause'] = 0.05
+        tracer = KeyTracer()
+
+        async def scenario():
+            rc = AsyncVlcRc(port=vlc.port, timeout=1.0)
+            await rc.get_time()
+            start = time.perf_counter()
+            with tracer.trace('play', start, start):
+                await rc.pause()
+            await rc.get_time()
+            await rc.close()
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            vlc.shutdown()
+            vlc.server_close()
+        record, = tracer.records()
+        self.assertLess(record['send'], 50)
+        self.assertGreaterEqual(record['ack'], 50)
+
+
+class TestReport(unittest.TestCase):
+    """Перцентили по кнопкам и файл трассировки"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.path = self.temp_dir / "key_trace.jsonl"
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_percentiles(self):
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual([percentile(values, p) for p in (50, 95, 99)], [50.0, 95.0, 99.0])
+        records = [{'key': 'play', 'decode': 0.01, 'send': 0.1, 'ack': float(ms)} for ms in range(1, 21)]
+        records.append({'key': 'up', 'decode': 0.02})
+        summary = summarize(records)
+        self.assertEqual(summary['play']['ack'], (20, 10.0, 19.0, 20.0))
+        self.assertEqual(set(summary['up']), {'decode'})
+
+    def test_dump_appends_with_limit(self):
+        for session in range(3):
+            tracer = KeyTracer()
+            for _ in range(4):
+                with tracer.trace(f"s{session}", 0.0, 0.0):
+                    pass
+            tracer.dump(self.path, limit=10)
+        records = load_records(self.path)
+        self.assertEqual(len(records), 10)
+        self.assertEqual(records[-1]['key'], 's2')
+
+    def test_report_cli(self):
+        tracer = KeyTracer()
+        with tracer.trace('play', 0.0, 0.0005) as trace:
+            trace.sent, trace.acked = 0.001, 0.004
+        tracer.dump(self.path)
+        result = subprocess.run([sys.executable, str(PROJECT_DIR / "key_trace.py"), "report", str(self.path)],
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("play", result.stdout)
+        self.assertIn("4.00", result.stdout)
+
+
+def bench(keys=100000):
+    tracer = KeyTracer()
+    start = time.perf_counter()
+    for _ in range(keys):
+        with tracer.trace('play', time.perf_counter(), time.perf_counter()):
+            pass
+    elapsed = time.perf_counter() - start
+    print(f"Трасса кнопки: {1e6 * elapsed / keys:.2f} мкс (буфер {len(tracer.buffer)} записей)")
+
+    start = time.perf_counter()
+    summarize(tracer.records())
+    print(f"Отчёт по {len(tracer.buffer)} записям: {1000 * (time.perf_counter() - start):.2f} мс")
+
+
+if __name__ == '__main__':
+    main(bench, int)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты выученных маркеров (learned_markers.py): гистограммы перемоток и
+выходов, предложения с уверенностью, применение по порогу
+
+Запуск как скрипт - точность выученных маркеров на модели сезона (зритель
+перематывает заставку с задержкой реакции и случайным шагом):
+    python3 Test/test_learned_markers.py --bench [серий]
+"""
+
+import asyncio
+import random
+import sys
+import unittest
+from pathlib import Path
+
+# Добавляем путь к проекту и к тестам (SupervisorTestCase)
+PROJECT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(PROJECT_DIR))
+
+from learned_markers import (DECAY_TOTAL, SeriesMarkers, StreamingHistogram, learn_session,
+                             session_observations)
+from vlc_db import VlcDatabase
+from test_playback_supervisor import CecQueue, SupervisorTestCase, VIDEO_NAME
+from helpers import TempDbTestCase, main, temp_database
+
+PREFIX, SUFFIX = "Show.S01", "1080p.mkv"
+DURATION = 2700
+
+
+def skip_session(origin, target, exit_remaining=None):
+    """События сеанса: перемотка заставки и выход за exit_remaining до конца"""
+    events = [(0.0, 'start', 0, None), (origin, 'seek', origin, target)]
+    end = DURATION - exit_remaining if exit_remaining is not None else DURATION
+    events.append((origin + 100, 'end', end, None))
+    return events
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_peak_and_quantile(self):
+        histogram = StreamingHistogram(100)
+        for value in (60, 62, 64, 66, 300):
+            histogram.add(value)
+        first, last, count = histogram.peak()
+        self.assertEqual(count, 4)
+        self.assertLessEqual(first * 5, 60)
+        self.assertEqual(histogram.quantile(first, last, 0.5), 62)
+        self.assertAlmostEqual(histogram.confidence(), 0.8)
+
+    def test_out_of_range_dropped(self):
+        histogram = StreamingHistogram(10)
+        self.assertFalse(histogram.add(50))
+        self.assertFalse(histogram.add(-1))
+        self.assertEqual(histogram.total, 0)
+
+    def test_decay_bounds_counts(self):
+        histogram = StreamingHistogram(10)
+        for _ in range(DECAY_TOTAL * 3):
+            histogram.add(12)
+        self.assertLessEqual(histogram.total, DECAY_TOTAL)
+
+    def test_constant_memory(self):
+        markers = SeriesMarkers()
+        size = len(markers.to_bytes())
+        for episode in range(500):
+            markers.observe_skip(60 + episode % 7, 150)
+            markers.observe_exit(DURATION - 100, DURATION)
+        self.assertEqual(len(markers.to_bytes()), size)
+        self.assertEqual(SeriesMarkers(markers.to_bytes()).propose(), markers.propose())
+
+
+class TestObservations(unittest.TestCase):
+
+    def test_seek_chain_is_one_skip(self):
+        """Три нажатия подряд - одна перемотка от начала до конца цепочки"""
+        events = [(10.0, 'seek', 60, 90), (11.0, 'seek', 91, 120), (12.5, 'seek', 121, 150),
+                  (300.0, 'seek', 400, 300), (900.0, 'end', 2600, None)]
+        skips, exit_position = session_observations(events, DURATION)
+        self.assertEqual(skips, [(60, 150)])
+        self.assertEqual(exit_position, 2600)
+
+    def test_automatic_skip_ignored(self):
+        events = [(10.0, 'skip_intro', 60, 150), (900.0, 'end', 2600, None)]
+        self.assertEqual(session_observations(events, DURATION), ([], None))
+
+
+class LearnTestCase(TempDbTestCase):
+    """Временная БД"""
+
+    def markers(self):
+        with VlcDatabase() as db:
+            return db.get_skip_markers(PREFIX, SUFFIX)
+
+
+class TestLearnSession(LearnTestCase):
+
+    def test_applied_above_threshold(self):
+        proposal, applied = learn_session(PREFIX, SUFFIX, skip_session(63, 150, 95), DURATION)
+        self.assertEqual(applied, [])
+        self.assertLess(proposal.intro_confidence, 0.6)
+        self.assertIsNone(self.markers())
+
+        for origin, target, remaining in ((61, 152, 92), (66, 148, 98)):
+            proposal, applied = learn_session(PREFIX, SUFFIX, skip_session(origin, target, remaining),
+                                              DURATION)
+        self.assertEqual(applied, ['intro', 'credits'])
+        self.assertGreaterEqual(proposal.intro_confidence, 0.6)
+        markers = self.markers()
+        self.assertTrue(60 <= markers['intro_start'] <= 67)
+        self.assertTrue(145 <= markers['intro_end'] <= 155)
+        self.assertTrue(90 <= markers['credits_duration'] <= 100)
+
+    def test_learned_markers_follow_new_sessions(self):
+        for _ in range(3):
+            learn_session(PREFIX, SUFFIX, skip_session(63, 150), DURATION)
+        for _ in range(6):
+            _, applied = learn_session(PREFIX, SUFFIX, skip_session(93, 180), DURATION)
+        self.assertEqual(self.markers()['intro_end'], 182)
+
+    def test_manual_markers_kept(self):
+        with VlcDatabase() as db:
+            db.set_intro_markers(PREFIX, SUFFIX, 30, 100)
+        for _ in range(4):
+            proposal, applied = learn_session(PREFIX, SUFFIX, skip_session(63, 150), DURATION)
+        self.assertEqual(applied, [])
+        self.assertGreaterEqual(proposal.intro_confidence, 0.6)
+        self.assertEqual((self.markers()['intro_start'], self.markers()['intro_end']), (30, 100))
+
+    def test_scattered_seeks_low_confidence(self):
+        for origin in (20, 200, 400, 600, 800):
+            proposal, applied = learn_session(PREFIX, SUFFIX, skip_session(origin, origin + 60), DURATION)
+        self.assertLess(proposal.intro_confidence, 0.6)
+        self.assertEqual(applied, [])
+
+
+class TestSupervisorSeekEvents(SupervisorTestCase):
+    """Перемотка пишется в историю как origin -> цель"""
+
+    def test_seek_origin_and_target(self):
+        cec = CecQueue()
+        supervisor = self.make_supervisor(cec, max_poll_interval=60)
+
+        async def scenario():
+            run = asyncio.create_task(supervisor.run())
+            while not supervisor.state.clock.known:
+                await asyncio.sleep(0.01)
+            cec.press('25')            # 50%
+            cec.press('0d')            # BACK
+            return await asyncio.wait_for(run, 5)
+
+        asyncio.run(scenario())
+        with VlcDatabase(self.db_path) as db:
+            (row,) = db.get_playback_sessions(VIDEO_NAME)
+            seeks = [event for event in db.get_playback_events(row[0]) if event[1] == 'seek']
+        self.assertEqual(len(seeks), 1)
+        self.assertTrue(125 <= seeks[0][2] <= 127)
+        self.assertEqual(seeks[0][3], 1800)
+
+
+def bench(episodes=10, intro=(62, 152), credits=95, seed=3):
+    """Сезон: зритель замечает заставку через 2-8 с, жмёт +30/+60 до её конца"""
+    rng = random.Random(seed)
+    with temp_database("bench.db"):
+        for episode in range(1, episodes + 1):
+            origin = intro[0] + rng.randint(2, 8)
+            target = origin
+            while target < intro[1]:
+                target += rng.choice((30, 60))
+            events = [(0.0, 'start', 0, None), (float(origin), 'seek', origin, target)]
+            exit_at = DURATION - credits + rng.randint(3, 20)
+            events.append((float(exit_at), 'end', exit_at, None))
+            proposal, applied = learn_session(PREFIX, SUFFIX, events, DURATION)
+            print(f"Серия {episode:>2}: intro {proposal.intro_start}-{proposal.intro_end} "
+                  f"({proposal.intro_confidence:.0%}), credits {proposal.credits_duration} "
+                  f"({proposal.credits_confidence:.0%}){' -> ' + ', '.join(applied) if applied else ''}")
+        print(f"Настоящие: intro {intro[0]}-{intro[1]}, credits {credits} "
+              f"(начало заставки позже на время реакции зрителя)")
+
+
+if __name__ == '__main__':
+    main(bench, int)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты оконной модели списка (Py/list_window.py)
+
+Проверяет, что стоимость отрисовки окна не зависит от размера папки:
+детали загружаются только для видимых страниц.
+"""
+
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# Добавляем путь к Py/ (list_window сам подключает корень проекта)
+sys.path.insert(0, str(Path(__file__).parent.parent / "Py"))
+
+from list_window import WindowedList, PAGE_SIZE
+
+VIDEO_EXTENSIONS = {'.mkv', '.mp4'}
+
+
+class FakeDb:
+    """Заглушка VlcDatabase: считает пакетные запросы"""
+
+    def __init__(self):
+        self.status_calls = []
+        self.progress_calls = []
+        self.file_counts = {}
+
+    def set_dir_file_count(self, directory, count):
+        self.file_counts[directory] = count
+        return True
+
+    def get_playback_batch_status(self, directory, filenames):
+        self.status_calls.append(len(filenames))
+        return {name: ('watched' if name.endswith('0.mkv') else '') for name in filenames}
+
+    def get_dir_progress_batch(self, directory, dirnames):
+        self.progress_calls.append(len(dirnames))
+        return {name: (1, 0, 2) for name in dirnames}
+
+
+class TestWindowedList(unittest.TestCase):
+    """Тесты WindowedList"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.root = Path(cls.tmp.name)
+        for i in range(3):
+            (cls.root / f"Season {i}").mkdir()
+        (cls.root / ".hidden").mkdir()
+        for i in range(5000):
+            (cls.root / f"ep{i:05d}.mkv").touch()
+        (cls.root / "notes.txt").touch()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_listing_is_names_only(self):
+        """Листинг не загружает статусы, порядок: '..', папки, видео"""
+        db = FakeDb()
+        items = WindowedList(db, self.root, VIDEO_EXTENSIONS)
+
+        self.assertEqual(len(items), 1 + 3 + 5000)
+        self.assertEqual(items.entry(0), ('..', 'DIR'))
+        self.assertEqual(items.entry(1), ('Season 0', 'DIR'))
+        self.assertEqual(items.entry(4), ('ep00000.mkv', 'FILE'))
+        self.assertEqual(db.status_calls, [])
+        self.assertEqual(db.file_counts[str(self.root)], 5000)
+
+    def test_visible_window_loads_only_its_pages(self):
+        """Окно из 20 строк загружает одну страницу, а не 5000 записей"""
+        db = FakeDb()
+        items = WindowedList(db, self.root, VIDEO_EXTENSIONS)
+
+        rows = items.rows(0, 20)
+        self.assertEqual(len(rows), 20)
+        self.assertEqual(items.page_loads, 1)
+        self.assertEqual(rows[1]['description'], 'DIR 1/2')
+        self.assertEqual(rows[4]['description'][:3], '[X]')
+
+        # Повторная отрисовка - без запросов
+        items.rows(1, 21)
+        self.assertEqual(items.page_loads, 1)
+
+    def test_scroll_cost_is_constant(self):
+        """Прокрутка через всю папку держит ограниченное число страниц в памяти"""
+        db = FakeDb()
+        items = WindowedList(db, self.root, VIDEO_EXTENSIONS, max_pages=4)
+
+        for offset in range(0, len(items), 20):
+            items.rows(offset, offset + 20)
+            self.assertLessEqual(len(items._pages), 4)
+
+        # Каждая страница загружена один раз и одним пакетным запросом
+        self.assertEqual(items.page_loads, (len(items) + PAGE_SIZE - 1) // PAGE_SIZE)
+        self.assertTrue(all(n <= PAGE_SIZE for n in db.status_calls))
+
+    def test_redraw_time_independent_of_size(self):
+        """Время отрисовки окна в конце большой папки ~ как в начале"""
+        items = WindowedList(FakeDb(), self.root, VIDEO_EXTENSIONS)
+        items.rows(0, 40)
+
+        start = time.perf_counter()
+        for _ in range(200):
+            items.rows(0, 40)
+        head = time.perf_counter() - start
+
+        items.rows(4960, 5000)
+        start = time.perf_counter()
+        for _ in range(200):
+            items.rows(4960, 5000)
+        tail = time.perf_counter() - start
+
+        self.assertLess(tail, head * 5 + 0.01)
+
+    def test_index_of(self):
+        """Поиск элемента для восстановления курсора"""
+        items = WindowedList(FakeDb(), self.root, VIDEO_EXTENSIONS, show_parent=False)
+        self.assertEqual(items.index_of('Season 2'), 2)
+        self.assertIsNone(items.index_of('missing'))
+
+
+if __name__ == '__main__':
+    unittest.main()
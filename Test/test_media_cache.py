@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты локального кэша серий (media_cache.py): докачка, бюджет с
+вытеснением просмотренных/давно открытых, поиск копии, супервизор, cvlc.sh
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+# Добавляем путь к проекту и к тестам (SupervisorTestCase)
+PROJECT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(PROJECT_DIR))
+
+from Py.config.config_manager import ConfigManager, ConfigType, ConfigCategory
+from media_cache import CacheSettings, MediaCache, load_settings
+from vlc_db import VlcDatabase
+from test_playback_supervisor import CecQueue, SupervisorTestCase
+from helpers import TempDbTestCase
+
+KB = 1024
+NEXT_NAME = "Show.S01E03.1080p.mkv"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+class TestMediaCache(TempDbTestCase):
+    """Копирование, докачка, LRU"""
+
+    def setUp(self):
+        super().setUp()
+        self.source_dir = self.temp_dir / "remote"
+        self.source_dir.mkdir()
+        self.clock = FakeClock()
+
+    def source(self, name, size=100 * KB):
+        path = self.source_dir / name
+        path.write_bytes(os.urandom(size))
+        return path
+
+    def make_cache(self, budget=1024 * KB, chunk_size=16 * KB):
+        return MediaCache(self.temp_dir / "cache", budget, chunk_size, clock=self.clock)
+
+    def test_copy_and_lookup(self):
+        cache = self.make_cache()
+        path = self.source("Show.S01E01.1080p.mkv")
+        self.assertIsNone(cache.lookup(path))
+        self.assertTrue(cache.copy(path))
+
+        local = cache.lookup(path)
+        self.assertEqual(local.read_bytes(), path.read_bytes())
+        self.assertFalse(local.with_name(local.name + ".part").exists())
+        self.assertEqual(cache.bytes_copied, 100 * KB)
+        # Повторное копирование полной копии - без чтения источника
+        self.assertTrue(cache.copy(path))
+        self.assertEqual(cache.bytes_copied, 100 * KB)
+
+    def test_resume_after_interrupt(self):
+        """Обрыв: .part и прогресс в БД - докачивается только остаток"""
+        cache = self.make_cache()
+        path = self.source("Show.S01E01.1080p.mkv")
+        target = cache.cache_path(path)
+        target.parent.mkdir(parents=True)
+        part = target.with_name(target.name + ".part")
+        part.write_bytes(path.read_bytes()[:40 * KB])
+        with VlcDatabase() as db:
+            db.save_cache_entry(str(path.resolve()), str(target), 100 * KB, 32 * KB, False, 1.0)
+
+        self.assertTrue(cache.copy(path))
+        self.assertEqual(cache.bytes_copied, 68 * KB)
+        self.assertEqual(target.read_bytes(), path.read_bytes())
+
+    def test_cancelled_copy_keeps_progress(self):
+        cache = self.make_cache()
+        path = self.source("Show.S01E01.1080p.mkv")
+        cache.cancel()
+        self.assertEqual(cache.fill(path, 0), [])
+        self.assertIsNone(cache.lookup(path))
+
+    def test_evicts_watched_first(self):
+        """Просмотренная серия вытесняется раньше давно не открытой"""
+        cache = self.make_cache(budget=250 * KB)
+        old = self.source("Show.S01E01.1080p.mkv")
+        watched = self.source("Show.S01E02.1080p.mkv")
+        cache.copy(old)
+        cache.copy(watched)
+        with VlcDatabase() as db:
+            db.save_playback(watched.name, 3600, 3600, 100)
+
+        cache.copy(self.source("Show.S01E03.1080p.mkv"))
+        self.assertEqual(cache.evicted, [str(watched.resolve())])
+        self.assertIsNotNone(cache.lookup(old))
+        self.assertFalse(cache.cache_path(watched).exists())
+
+    def test_evicts_least_recently_opened(self):
+        cache = self.make_cache(budget=250 * KB)
+        first = self.source("Show.S01E01.1080p.mkv")
+        second = self.source("Show.S01E02.1080p.mkv")
+        cache.copy(first)
+        cache.copy(second)
+        cache.lookup(first)            # first открыт позже second
+
+        cache.copy(self.source("Show.S01E03.1080p.mkv"))
+        self.assertEqual(cache.evicted, [str(second.resolve())])
+        self.assertLessEqual(cache.used(), 250 * KB)
+
+    def test_protected_not_evicted(self):
+        """Текущая серия и очередь не вытесняются - копия не помещается"""
+        cache = self.make_cache(budget=150 * KB)
+        current = self.source("Show.S01E01.1080p.mkv")
+        cache.copy(current)
+        following = self.source("Show.S01E02.1080p.mkv")
+        self.assertFalse(cache.copy(following, {str(current.resolve())}))
+        self.assertIsNotNone(cache.lookup(current))
+        self.assertIsNone(cache.lookup(following))
+
+    def test_fill_current_and_next(self):
+        cache = self.make_cache()
+        paths = [self.source(f"Show.S01E0{n}.1080p.mkv") for n in (1, 2, 3)]
+        done = cache.fill(paths[0], 1)
+        self.assertEqual(done, [cache.cache_path(p) for p in paths[:2]])
+        self.assertIsNone(cache.lookup(paths[2]))
+
+    def test_settings_from_config(self):
+        db_path = self.temp_dir / "config.db"
+        config = ConfigManager(db_path)
+        self.assertEqual(load_settings(db_path), CacheSettings())
+        config.set('cache_enabled', True, ConfigType.BOOL, ConfigCategory.MEDIA, '')
+        config.set('cache_ahead', 3, ConfigType.INT, ConfigCategory.MEDIA, '')
+        self.assertEqual(load_settings(db_path), CacheSettings(enabled=True, ahead=3))
+
+
+@unittest.skipUnless(shutil.which('sqlite3'), "нужен sqlite3")
+class TestCvlcWrapper(TempDbTestCase):
+    """cvlc.sh: копия из кэша; при выключенном кэше python не запускается"""
+
+    def run_cvlc(self, path):
+        """cvlc.sh с vlc-заглушкой (печатает аргументы) -> (файл для VLC, запускался ли python)"""
+        bin_dir = self.temp_dir / "bin"
+        bin_dir.mkdir(exist_ok=True)
+        marker = self.temp_dir / "python-started"
+        marker.unlink(missing_ok=True)
+        (bin_dir / "vlc").write_text('#!/bin/bash\necho "$@"\n')
+        (bin_dir / "python3").write_text(f'#!/bin/bash\ntouch "{marker}"\nexec "{sys.executable}" "$@"\n')
+        for tool in bin_dir.iterdir():
+            tool.chmod(0o755)
+        env = dict(os.environ, PATH=f"{bin_dir}:{os.environ['PATH']}", VLC_DB_PATH=str(self.db_path))
+        result = subprocess.run(['bash', str(PROJECT_DIR / "cvlc.sh"), str(path)],
+                                capture_output=True, text=True, env=env, timeout=30)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout.split()[-1], marker.exists()
+
+    def test_lookup_only_when_enabled(self):
+        path = self.temp_dir / NEXT_NAME
+        path.write_bytes(os.urandom(64 * KB))
+        config = ConfigManager(self.db_path)
+        self.assertEqual(self.run_cvlc(path), (str(path), False))
+
+        config.set('cache_enabled', True, ConfigType.BOOL, ConfigCategory.MEDIA, '')
+        config.set('cache_dir', str(self.temp_dir / "cache"), ConfigType.PATH, ConfigCategory.MEDIA, '')
+        cache = MediaCache.from_settings(load_settings(self.db_path))
+        self.assertTrue(cache.copy(path))
+        self.assertEqual(self.run_cvlc(path), (str(cache.cache_path(path)), True))
+
+
+class TestSupervisorCache(SupervisorTestCase):
+    """Супервизор копирует серию и следующую; автопродолжение - из кэша"""
+
+    def test_fill_and_enqueue_local_copy(self):
+        next_file = self.temp_dir / NEXT_NAME
+        next_file.write_bytes(os.urandom(64 * KB))
+        self.video_file.write_bytes(os.urandom(64 * KB))
+        settings = CacheSettings(True, str(self.temp_dir / "cache"), 1, 1)
+        cache = MediaCache.from_settings(settings)
+        cache.copy(next_file)
+        self.series(autoplay=True)
+
+        supervisor = self.make_supervisor(CecQueue(), cache=settings)
+        self.run_until(supervisor, lambda: supervisor.cache_bytes > 0)
+        self.assertEqual(supervisor.stats()['cache_bytes'], 64 * KB)
+        self.assertEqual(self.vlc.commands('enqueue'),
+                         [f"enqueue {cache.cache_path(next_file).resolve()}"])
+        self.assertIsNotNone(cache.lookup(self.video_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
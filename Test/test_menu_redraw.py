@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бенчмарк перерисовки curses меню (Py/video-menu.py) в псевдотерминале
+
+Меню запускается в pty, получает скриптованную последовательность клавиш,
+а тест считает байты, которые curses вывел на терминал после каждого нажатия.
+При дифференциальной отрисовке перемещение курсора - это пара строк,
+а не весь экран.
+
+Запуск как скрипт печатает статистику:
+    python3 Test/test_menu_redraw.py --bench
+"""
+
+import os
+import select
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# Путь к тестам (helpers)
+sys.path.insert(0, str(Path(__file__).parent))
+
+from helpers import main
+
+PROJECT_DIR = Path(__file__).parent.parent
+MENU_SCRIPT = PROJECT_DIR / "Py" / "video-menu.py"
+
+ROWS, COLS = 40, 120
+FILE_COUNT = 300
+QUIET_TIMEOUT = 0.15  # Сколько ждать тишины после вывода кадра (сек)
+
+
+def _set_winsize(fd, rows, cols):
+    """Размер псевдотерминала"""
+    import fcntl
+    import struct
+    import termios
+    fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack('HHHH', rows, cols, 0, 0))
+
+
+class MenuPty:
+    """Меню, запущенное в псевдотерминале"""
+
+    def __init__(self, video_dir, db_file):
+        import pty
+        self.pid, self.fd = pty.fork()
+        if self.pid == 0:
+            # VLC_DB_PATH - временная БД и для меню, и для db-manager.sh (SeriesHelper)
+            env = dict(os.environ, TERM='xterm', HOME=str(video_dir), VLC_DB_PATH=str(db_file),
+                       LINES=str(ROWS), COLUMNS=str(COLS))
+            os.execvpe(sys.executable, [sys.executable, str(MENU_SCRIPT), str(video_dir)], env)
+        _set_winsize(self.fd, ROWS, COLS)
+
+    def read_frame(self, timeout=5.0, quiet=QUIET_TIMEOUT):
+        """Прочитать вывод до наступления тишины, вернуть количество байт"""
+        total = 0
+        deadline = time.monotonic() + timeout
+        wait = timeout
+        while True:
+            ready, _, _ = select.select([self.fd], [], [], wait)
+            if not ready:
+                break
+            try:
+                data = os.read(self.fd, 65536)
+            except OSError:
+                break
+            if not data:
+                break
+            total += len(data)
+            wait = min(quiet, max(0.0, deadline - time.monotonic()))
+        return total
+
+    def press(self, keys):
+        """Нажатие клавиши: (байты вывода, время до тишины)"""
+        start = time.monotonic()
+        os.write(self.fd, keys)
+        written = self.read_frame()
+        return written, time.monotonic() - start - QUIET_TIMEOUT
+
+    def close(self):
+        try:
+            os.write(self.fd, b'q')
+            self.read_frame(timeout=2.0)
+        except OSError:
+            pass
+        try:
+            os.waitpid(self.pid, 0)
+        except ChildProcessError:
+            pass
+        os.close(self.fd)
+
+
+def run_benchmark(moves=20):
+    """Скриптованная последовательность: вниз moves раз, затем вверх moves раз"""
+    temp_dir = Path(tempfile.mkdtemp())
+    video_dir = temp_dir / "video"
+    try:
+        video_dir.mkdir()
+        for i in range(FILE_COUNT):
+            (video_dir / f"Show.S01E{i:03d}.mkv").touch()
+
+        menu = MenuPty(video_dir, temp_dir / "test.db")
+        try:
+            # Запуск (импорт, БД) дольше кадра - ждём тишины подольше
+            initial = menu.read_frame(quiet=1.0)
+            per_key = [menu.press(b'j') for _ in range(moves)]
+            per_key += [menu.press(b'k') for _ in range(moves)]
+        finally:
+            menu.close()
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return initial, per_key
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), "нужен pty")
+class TestMenuRedraw(unittest.TestCase):
+    """Стоимость перерисовки при перемещении курсора"""
+
+    def test_cursor_move_repaints_few_lines(self):
+        initial, per_key = run_benchmark(moves=10)
+
+        self.assertGreater(initial, 0, "меню не отрисовалось")
+        avg = sum(written for written, _ in per_key) / len(per_key)
+
+        # Полный экран 40x120 - несколько килобайт; две строки списка
+        # и счётчик [n/N] в заголовке - сотни байт
+        self.assertLess(avg, initial / 3)
+        self.assertLess(avg, 3 * COLS * 2)
+
+
+def bench():
+    initial, per_key = run_benchmark()
+    sizes = [written for written, _ in per_key]
+    times = [elapsed for _, elapsed in per_key]
+    print(f"Терминал {COLS}x{ROWS}, файлов: {FILE_COUNT}")
+    print(f"Первый кадр: {initial} байт")
+    print(f"Нажатие: в среднем {sum(sizes) / len(sizes):.0f} байт, "
+          f"макс {max(sizes)} байт, {1000 * sum(times) / len(times):.1f} мс")
+
+
+if __name__ == '__main__':
+    main(bench)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тест долгоживущего процесса меню (Py/video-menu.py, MenuSession)
+
+Меню запускается в псевдотерминале с фиктивным плеером и проходит 500
+циклов "выбор файла -> плеер -> возврат в меню". Проверяется, что:
+- процесс один и стек не растёт (нет рекурсии main());
+- память не растёт от просмотра к просмотру;
+- возврат в меню быстрый, курсор остаётся на просмотренном файле.
+
+Запуск как скрипт печатает статистику:
+    python3 Test/test_menu_session.py --bench
+"""
+
+import importlib.util
+import json
+import os
+import select
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# Путь к тестам (helpers)
+sys.path.insert(0, str(Path(__file__).parent))
+
+from helpers import main
+
+PROJECT_DIR = Path(__file__).parent.parent
+MENU_SCRIPT = PROJECT_DIR / "Py" / "video-menu.py"
+
+ROWS, COLS = 40, 120
+FILE_COUNT = 600
+PLAYBACKS = 500
+WARMUP = 50  # Просмотры до замера памяти (прогрев кешей/пула)
+
+
+def child_main(video_dir, db_file, playbacks):
+    """Процесс в pty: меню с фиктивным плеером, в конце печатает JSON со статистикой"""
+    import curses
+    import tracemalloc
+
+    # Корень проекта раньше Py/ - там устаревшая копия vlc_db.py
+    sys.path.insert(0, str(PROJECT_DIR / "Py"))
+    sys.path.insert(0, str(PROJECT_DIR))
+    import vlc_db
+    vlc_db._connection_pool = vlc_db.ConnectionPool(Path(db_file))
+    with vlc_db.VlcDatabase(Path(db_file)) as db:
+        db.init_db()
+
+    spec = importlib.util.spec_from_file_location("video_menu", MENU_SCRIPT)
+    video_menu = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(video_menu)
+
+    # Без db-manager.sh: тот же разбор имени в vlc_db, БД оболочки не трогается
+    video_menu.SeriesHelper.extract_series_prefix = staticmethod(vlc_db.extract_series_prefix)
+    video_menu.SeriesHelper.extract_series_suffix = staticmethod(vlc_db.extract_series_suffix)
+
+    stats = {'played': [], 'memory': {}, 'depth': set()}
+
+    def fake_player(db, path):
+        """Просмотр до конца: статус файла меняется на watched"""
+        stats['played'].append(Path(path).name)
+        stats['depth'].add(len(_stack()))
+        db.save_playback(Path(path).name, 100, 100, 100, directory=str(video_dir))
+        count = len(stats['played'])
+        if count == WARMUP:
+            stats['memory']['warm'] = tracemalloc.get_traced_memory()[0]
+        elif count == playbacks:
+            stats['memory']['end'] = tracemalloc.get_traced_memory()[0]
+
+    def _stack():
+        import inspect
+        return inspect.stack(0)
+
+    tracemalloc.start()
+    session_box = {}
+
+    def run(stdscr):
+        session = video_menu.MenuSession(stdscr, video_dir, player=fake_player)
+        session_box['session'] = session
+        session.run()
+
+    curses.wrapper(run)
+    session = session_box['session']
+
+    print(json.dumps({
+        'playbacks': session.playbacks,
+        'last_played': stats['played'][-1] if stats['played'] else None,
+        'selected_idx': session.menu.selected_idx,
+        'stack_depths': sorted(stats['depth']),
+        'memory_warm': stats['memory'].get('warm', 0),
+        'memory_end': stats['memory'].get('end', 0),
+        'resume_avg_ms': 1000 * sum(session.resume_times) / max(1, len(session.resume_times)),
+        'resume_max_ms': 1000 * max(session.resume_times, default=0),
+    }))
+
+
+def run_session(playbacks=PLAYBACKS):
+    """Запуск меню в pty со скриптом клавиш 'j' + Enter на каждый просмотр"""
+    import fcntl
+    import pty
+    import struct
+    import termios
+
+    temp_dir = Path(tempfile.mkdtemp())
+    video_dir = temp_dir / "video"
+    db_file = temp_dir / "test.db"
+    try:
+        video_dir.mkdir()
+        for i in range(FILE_COUNT):
+            (video_dir / f"Show.S01E{i:03d}.mkv").touch()
+
+        pid, fd = pty.fork()
+        if pid == 0:
+            # VLC_DB_PATH - на случай вызовов db-manager.sh/vlc_db.py из меню
+            env = dict(os.environ, TERM='xterm', HOME=str(video_dir), VLC_DB_PATH=str(db_file))
+            os.execvpe(sys.executable, [sys.executable, __file__, '--child',
+                                        str(video_dir), str(db_file), str(playbacks)], env)
+        fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack('HHHH', ROWS, COLS, 0, 0))
+
+        output = bytearray()
+
+        def drain(timeout):
+            ready, _, _ = select.select([fd], [], [], timeout)
+            if not ready:
+                return False
+            try:
+                data = os.read(fd, 65536)
+            except OSError:
+                return None
+            if not data:
+                return None
+            output.extend(data)
+            return True
+
+        # Ждём первый кадр: клавиши до initscr() ушли бы в эхо терминала
+        drain(10.0)
+        while drain(1.0) is True:
+            pass
+
+        start = time.monotonic()
+        for _ in range(playbacks):
+            os.write(fd, b'j\n')
+            while drain(0) is True:
+                pass
+        os.write(fd, b'q')
+
+        deadline = time.monotonic() + 120
+        while time.monotonic() < deadline:
+            if drain(1.0) is None:
+                break
+        elapsed = time.monotonic() - start
+
+        os.waitpid(pid, 0)
+        os.close(fd)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    # JSON печатается после endwin() - в конце вывода, после управляющих последовательностей
+    text = output.decode('utf-8', 'replace')
+    pos = text.rfind('{"playbacks"')
+    if pos >= 0:
+        result = json.loads(text[pos:].splitlines()[0])
+        result['elapsed'] = elapsed
+        return result
+    raise AssertionError("меню не вернуло статистику:\n" + output.decode('utf-8', 'replace')[-2000:])
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), "нужен pty")
+class TestMenuSession(unittest.TestCase):
+    """500 просмотров в одном процессе меню"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.result = run_session()
+
+    def test_all_playbacks_in_one_process(self):
+        """Все просмотры в одном процессе, курсор на последнем просмотренном"""
+        self.assertEqual(self.result['playbacks'], PLAYBACKS)
+        # Перед каждым просмотром курсор сдвигается на 'j' (с нулевой позиции)
+        self.assertEqual(self.result['last_played'], f"Show.S01E{PLAYBACKS:03d}.mkv")
+        self.assertEqual(self.result['selected_idx'], PLAYBACKS)
+
+    def test_stack_does_not_grow(self):
+        """Глубина стека при запуске плеера одинакова для всех просмотров"""
+        self.assertEqual(len(self.result['stack_depths']), 1)
+
+    def test_memory_is_flat(self):
+        """После прогрева память не растёт с количеством просмотров"""
+        growth = self.result['memory_end'] - self.result['memory_warm']
+        self.assertLess(growth, 512 * 1024)
+
+    def test_resume_latency(self):
+        """Возврат в меню после плеера - без перезапуска процесса"""
+        self.assertLess(self.result['resume_avg_ms'], 50)
+
+
+def bench():
+    result = run_session()
+    print(f"Просмотров: {result['playbacks']} за {result['elapsed']:.1f} с")
+    print(f"Память после прогрева: {result['memory_warm'] / 1024:.0f} KiB, "
+          f"в конце: {result['memory_end'] / 1024:.0f} KiB")
+    print(f"Возврат в меню: в среднем {result['resume_avg_ms']:.2f} мс, "
+          f"макс {result['resume_max_ms']:.2f} мс")
+    print(f"Глубина стека при запуске плеера: {result['stack_depths']}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child_main(Path(sys.argv[2]), sys.argv[3], int(sys.argv[4]))
+    else:
+        main(bench)
@@ -0,0 +1,557 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты супервизора воспроизведения (playback_supervisor.py)
+
+VLC имитируется FakeVlc из test_vlc_rc.py, поток cec-client - очередью строк,
+БД - временный файл с отдельным пулом соединений.
+
+Запуск как скрипт печатает потребление CPU, задержку кнопок и число опросов:
+    python3 Test/test_playback_supervisor.py --bench [секунд] [нажатий/с]
+"""
+
+import asyncio
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# Добавляем путь к проекту и к тестам (FakeVlc)
+PROJECT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(PROJECT_DIR))
+
+from vlc_db import VlcDatabase
+from vlc_rc import AsyncVlcRc
+from cec_decoder import DEFAULT_KEYMAP
+from playback_supervisor import (PlaybackSupervisor, PlaybackClock, SeekGesture, next_poll_delay,
+                                 load_seek_acceleration, parse_seek_acceleration, seek_step,
+                                 POLL_TIGHT, SEEK_ACCELERATION, SEEK_MAX_FACTOR)
+from Py.config.config_manager import ConfigCategory, ConfigManager, ConfigType
+from io_scheduler import IoSettings
+from learned_markers import DEFAULT_CONFIDENCE
+from media_cache import CacheSettings
+from readahead import ReadaheadSettings
+from test_vlc_rc import FakeVlc
+from vlc_rc_mock import MockVlc
+from helpers import TempDbTestCase, main
+
+VIDEO_NAME = "Show.S01E02.1080p.mkv"
+PREFIX, SUFFIX = "Show.S01", "1080p.mkv"
+
+
+def key_line(code):
+    """Строка cec-client с нажатием кнопки"""
+    return f"TRAFFIC: [  1234]\t>> 01:44:{code}"
+
+
+class CecQueue:
+    """Поток строк cec-client, управляемый из теста"""
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+
+    def press(self, code):
+        self.queue.put_nowait(key_line(code))
+
+    def release(self):
+        self.queue.put_nowait("TRAFFIC: [  1234]\t>> 01:45")
+
+    async def lines(self):
+        while True:
+            yield await self.queue.get()
+
+
+class SupervisorTestCase(TempDbTestCase):
+    """Временная БД, FakeVlc и фабрика супервизора"""
+
+    def setUp(self):
+        super().setUp()
+        self.video_file = self.temp_dir / VIDEO_NAME
+        self.video_file.touch()
+
+        self.vlc = FakeVlc()
+        threading.Thread(target=self.vlc.serve_forever, daemon=True).start()
+        self.messages = []
+
+    def tearDown(self):
+        self.vlc.shutdown()
+        self.vlc.server_close()
+
+    def make_supervisor(self, cec, **kwargs):
+        kwargs.setdefault('progress_interval', 60)
+        kwargs.setdefault('max_poll_interval', 0.05)
+        kwargs.setdefault('trace_file', self.temp_dir / "key_trace.jsonl")
+        kwargs.setdefault('readahead', ReadaheadSettings(percent=0))
+        kwargs.setdefault('cache', CacheSettings())
+        kwargs.setdefault('io', IoSettings())
+        kwargs.setdefault('io_status_file', None)
+        kwargs.setdefault('markers_confidence', DEFAULT_CONFIDENCE)
+        kwargs.setdefault('seek_acceleration', SEEK_ACCELERATION)
+        return PlaybackSupervisor(str(self.video_file),
+                                  rc=AsyncVlcRc(port=self.vlc.port, timeout=1.0),
+                                  cec_lines=cec.lines(), shim_port=None, keymap=DEFAULT_KEYMAP,
+                                  output=self.messages.append, **kwargs)
+
+    def run_until(self, supervisor, condition, timeout=5.0):
+        """Запуск супервизора, остановка когда condition() истинно"""
+
+        async def scenario():
+            task = asyncio.create_task(supervisor.run())
+            deadline = time.monotonic() + timeout
+            while not task.done() and not condition() and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            supervisor.stop()
+            return await asyncio.wait_for(task, timeout)
+
+        return asyncio.run(scenario())
+
+    def playback(self):
+        with VlcDatabase(self.db_path) as db:
+            return db.get_playback(VIDEO_NAME)
+
+    def series(self, skip_intro=False, skip_outro=False, intro=None, credits=None, autoplay=False):
+        intro_start, intro_end = intro or (None, None)
+        with VlcDatabase(self.db_path) as db:
+            db.save_series_settings(PREFIX, SUFFIX, autoplay, skip_intro, skip_outro,
+                                    intro_start, intro_end, credits)
+
+
+class TestPlaybackClock(unittest.TestCase):
+    """Модель позиции между запросами к VLC"""
+
+    def setUp(self):
+        self.now = 0.0
+        self.clock = PlaybackClock(now=lambda: self.now)
+
+    def test_interpolation(self):
+        """Позиция идёт по часам, замер внутри [p, p+1) не сдвигает модель"""
+        self.assertIsNone(self.clock.position())
+        self.clock.sample(100)
+        self.now = 10.0
+        self.assertAlmostEqual(self.clock.position(), 110.5)
+        self.assertEqual(self.clock.sample(110), 0.0)
+        self.assertAlmostEqual(self.clock.position(), 110.5)
+
+    def test_commands_move_clock(self):
+        """seek/pause сдвигают модель без запроса к VLC"""
+        self.clock.sample(100)
+        self.clock.seek_relative(30)
+        self.assertAlmostEqual(self.clock.position(), 130.5)
+        self.clock.toggle_pause()
+        self.now = 20.0
+        self.assertAlmostEqual(self.clock.position(), 130.5)
+        self.clock.toggle_pause()
+        self.clock.seek(600)
+        self.now = 21.0
+        self.assertAlmostEqual(self.clock.position(), 601.0)
+
+    def test_drift_bounded_and_reported(self):
+        """Пауза мимо супервизора: расхождение видно при замере и не копится"""
+        self.clock.sample(100)
+        self.now = 5.0
+        drift = self.clock.sample(100)
+        self.assertAlmostEqual(drift, 4.5)
+        self.assertLess(self.clock.position() - 100, 1.0)
+        self.now = 10.0
+        self.clock.sample(100)
+        self.assertEqual(self.clock.rate, 0.0)
+        self.now = 60.0
+        self.assertLess(self.clock.position() - 100, 1.0)
+        self.assertAlmostEqual(self.clock.max_drift, 4.5)
+
+
+class TestKeys(SupervisorTestCase):
+    """Кнопки пульта -> команды VLC на одном соединении"""
+
+    def test_seek_and_exit(self):
+        """UP -> seek +30, BACK -> финальное сохранение и quit"""
+        cec = CecQueue()
+        supervisor = self.make_supervisor(cec, max_poll_interval=60)
+
+        async def scenario():
+            cec.press('01')
+            cec.press('0d')
+            return await asyncio.wait_for(supervisor.run(), 5)
+
+        asyncio.run(scenario())
+
+        self.assertIn('seek +30', self.vlc.received)
+        self.assertEqual(self.vlc.received[-1], 'quit')
+        self.assertEqual(self.vlc.connections, 1)
+        position, duration, percent = self.playback()[:3]
+        self.assertEqual((position, duration), (155, 3600))
+        self.assertEqual(supervisor.stats()['keys'], 2)
+
+        # Трассы кнопок: UP без команды (жест), BACK досылает seek - с отправкой и ответом
+        up, back = supervisor.tracer.records()
+        self.assertEqual((up['key'], set(up)), ('up', {'key', 'decode'}))
+        self.assertEqual(back['key'], 'back')
+        self.assertLessEqual(back['decode'], back['send'])
+        self.assertLessEqual(back['send'], back['ack'])
+        self.assertTrue((self.temp_dir / "key_trace.jsonl").exists())
+
+    def test_percent_jump(self):
+        """Цифра 5 -> 50% длительности"""
+        cec = CecQueue()
+        supervisor = self.make_supervisor(cec, max_poll_interval=60)
+        cec.press('25')
+        self.run_until(supervisor, lambda: 'seek 1800' in self.vlc.received)
+        self.assertIn('seek 1800', self.vlc.received)
+
+
+    def test_keys_read_clock(self):
+        """INFO, цифры и RED берут позицию из часов, а не из get_time/get_length"""
+        cec = CecQueue()
+        supervisor = self.make_supervisor(cec, max_poll_interval=60)
+
+        async def scenario():
+            task = asyncio.create_task(supervisor.run())
+            while supervisor.position_polls == 0:
+                await asyncio.sleep(0.01)
+            queries = len(self.vlc.received)
+            for code in ('35', '25', '72', '35'):
+                cec.press(code)
+            while supervisor.stats()['keys'] < 4:
+                await asyncio.sleep(0.01)
+            sent = self.vlc.received[queries:]
+            supervisor.stop()
+            await task
+            return sent
+
+        sent = asyncio.run(scenario())
+        self.assertNotIn('get_length', sent)
+        self.assertNotIn('get_time', sent)
+        self.assertIn('seek 1800', sent)
+        self.assertEqual(supervisor.stats()['rc_reads'], 0)
+        self.assertEqual(supervisor.stats()['clock_reads'], 4)
+        self.assertTrue(any('00:02:05 / 01:00:00' in m for m in self.messages))
+
+
+class TestSeekGesture(unittest.TestCase):
+    """Накопление повторов перемотки"""
+
+    def test_step_accelerates(self):
+        self.assertEqual([seek_step(10, repeat) for repeat in (0, 2, 4, 5, 9, 10, 50)],
+                         [10, 10, 10, 20, 20, 40, 40])
+
+    def test_long_hold_bounded(self):
+        """Удержание CH+ (шаг 60 с): 20 повторов - не больше 20 x 60 x SEEK_MAX_FACTOR"""
+        acceleration = parse_seek_acceleration('2:3,4:8,6:100')
+        self.assertEqual(acceleration, ((6, SEEK_MAX_FACTOR), (4, SEEK_MAX_FACTOR), (2, 3)))
+        for table in (SEEK_ACCELERATION, acceleration):
+            gesture = SeekGesture(origin=0.0, duration=100000, acceleration=table)
+            for _ in range(20):
+                gesture.press('channel_up', 60)
+            self.assertLessEqual(gesture.offset, 20 * 60 * SEEK_MAX_FACTOR)
+        gesture = SeekGesture(origin=0.0, duration=100000)
+        for _ in range(20):
+            gesture.press('channel_up', 60)
+        self.assertEqual(gesture.offset, 5 * 60 + 5 * 120 + 10 * 240)
+
+    def test_acceleration_from_config(self):
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            db_path = temp_dir / "config.db"
+            config = ConfigManager(db_path)
+            self.assertEqual(load_seek_acceleration(db_path), SEEK_ACCELERATION)
+            config.set('cec_seek_acceleration', '3:2', ConfigType.STRING, ConfigCategory.CEC, '')
+            self.assertEqual(load_seek_acceleration(db_path), ((3, 2),))
+            config.set('cec_seek_acceleration', '3:x', ConfigType.STRING, ConfigCategory.CEC, '')
+            self.assertEqual(load_seek_acceleration(db_path), SEEK_ACCELERATION)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def test_clamped_presses_dropped(self):
+        gesture = SeekGesture(origin=35.0, duration=3600)
+        results = [gesture.press('down', -30) for _ in range(4)]
+        self.assertEqual(results, [True, True, False, False])
+        self.assertEqual((gesture.target(), gesture.presses, gesture.dropped), (0, 2, 2))
+
+    def test_direction_change_resets_acceleration(self):
+        gesture = SeekGesture(origin=1000.0, duration=3600)
+        for _ in range(6):
+            gesture.press('right', 10)             # 5 x 10 + 20
+        gesture.press('left', -10)
+        self.assertEqual(gesture.target(), 1060)
+
+    def test_single_press_relative(self):
+        """Одиночное нажатие и неизвестная позиция - относительный seek"""
+        gesture = SeekGesture(origin=500.0, duration=3600)
+        gesture.press('up', 30)
+        self.assertIsNone(gesture.target())
+        gesture = SeekGesture(origin=None, duration=None)
+        gesture.press('up', 30)
+        gesture.press('up', 30)
+        self.assertIsNone(gesture.target())
+        self.assertEqual(gesture.offset, 60)
+
+
+class TestKeyRepeat(SupervisorTestCase):
+    """Удержание кнопки: одна абсолютная перемотка на жест"""
+
+    def hold(self, code, repeats, release=True, **kwargs):
+        cec = CecQueue()
+        supervisor = self.make_supervisor(cec, max_poll_interval=60, **kwargs)
+
+        async def scenario():
+            task = asyncio.create_task(supervisor.run())
+            while supervisor.position_polls == 0:
+                await asyncio.sleep(0.01)
+            for _ in range(repeats):
+                cec.press(code)
+            if release:
+                cec.release()
+            deadline = time.monotonic() + 5
+            while not self.vlc.seeks() and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.1)
+            supervisor.stop()
+            await task
+
+        asyncio.run(scenario())
+        return supervisor
+
+    def test_hold_one_seek(self):
+        """20 повторов UP -> один seek на 125 + 1650 (шаг растёт до x4)"""
+        supervisor = self.hold('01', 20)
+        (target, _), = self.vlc.seeks()
+        self.assertAlmostEqual(int(target), 125 + 1650, delta=1)
+        stats = supervisor.stats()
+        self.assertEqual((stats['seek_presses'], stats['seek_commands']), (20, 1))
+
+    def test_window_without_release(self):
+        """Телевизор без кадров отпускания: жест завершается паузой повторов"""
+        supervisor = self.hold('04', 3, release=False, seek_window=0.1)
+        (target, _), = self.vlc.seeks()
+        self.assertAlmostEqual(int(target), 155, delta=1)
+        self.assertEqual(supervisor.stats()['seek_commands'], 1)
+
+    def test_presses_past_start_dropped(self):
+        supervisor = self.hold('02', 10)
+        self.assertEqual(self.vlc.seeks()[0][0], '0')
+        self.assertEqual(supervisor.stats()['seek_dropped'], 5)   # 125 -> 0 за 5 нажатий по 30
+        self.assertEqual(self.vlc.time, 0)
+
+
+class TestMarkers(SupervisorTestCase):
+    """Intro/outro с общим состоянием сеанса"""
+
+    def test_intro_skip_once(self):
+        """Intro пропускается один раз"""
+        self.series(skip_intro=True, intro=(100, 130))
+        self.vlc.time = 110
+        supervisor = self.make_supervisor(CecQueue())
+        self.run_until(supervisor, lambda: 'seek 130' in self.vlc.received)
+
+        self.assertEqual(self.vlc.received.count('seek 130'), 1)
+        self.assertTrue(supervisor.state.intro_skipped)
+
+    def test_outro_pause_keeps_watched(self):
+        """Outro: pause, флаг и 100% в БД; финальное сохранение их не затирает"""
+        self.series(skip_outro=True, credits=60)
+        self.vlc.time = 3550
+        supervisor = self.make_supervisor(CecQueue())
+        self.run_until(supervisor, lambda: 'pause' in self.vlc.received)
+
+        self.assertEqual(self.vlc.received.count('pause'), 1)
+        with VlcDatabase(self.db_path) as db:
+            self.assertEqual(db.get_outro_triggered(VIDEO_NAME), 1)
+        self.assertEqual(self.playback()[2], 100)
+
+    def test_outro_reset_on_rewind(self):
+        """Перемотка назад за начало титров сбрасывает флаг outro"""
+        self.series(skip_outro=True, credits=60)
+        supervisor = self.make_supervisor(CecQueue())
+        state = supervisor.state
+        state.duration = 3600
+
+        async def scenario():
+            await supervisor.rc.connect()
+            await supervisor.check_markers(3545)
+            await supervisor.check_markers(1000)
+            await supervisor.rc.close()
+
+        asyncio.run(scenario())
+        self.assertFalse(state.outro_triggered)
+        with VlcDatabase(self.db_path) as db:
+            self.assertEqual(db.get_outro_triggered(VIDEO_NAME), 0)
+
+    def test_finalize_saves_position(self):
+        """Остановка сеанса сохраняет текущую позицию"""
+        self.vlc.time = 777
+        supervisor = self.make_supervisor(CecQueue(), max_poll_interval=60)
+        self.run_until(supervisor, lambda: True)
+        self.assertEqual(self.playback()[:3], (777, 3600, 21))
+
+
+def simulate_polls(duration, boundaries, rate=1.0, max_interval=30, start=0.37):
+    """Опросы по next_poll_delay за серию: (число опросов, опоздание на каждую границу)
+
+    start - сдвиг первого опроса относительно целой секунды (get_time округляет вниз).
+    """
+    now, polls = start, 0
+    lateness = {}
+    while now < duration:
+        position = int(now * rate)
+        polls += 1
+        for boundary in boundaries:
+            if boundary not in lateness and position >= boundary:
+                lateness[boundary] = now - boundary / rate
+        now += next_poll_delay(position, rate, [b for b in boundaries if b not in lateness],
+                               max_interval)
+    return polls, lateness
+
+
+class TestPollSchedule(unittest.TestCase):
+    """Адаптивный опрос позиции"""
+
+    def test_delay_rules(self):
+        self.assertEqual(next_poll_delay(100, 1.0, [200]), 30)
+        self.assertEqual(next_poll_delay(100, 1.0, [120]), 18.5)
+        self.assertEqual(next_poll_delay(100, 1.0, [101]), POLL_TIGHT)
+        self.assertEqual(next_poll_delay(100, 2.0, [110]), 3.5)
+        self.assertEqual(next_poll_delay(100, 1.0, [50]), 30)
+        self.assertEqual(next_poll_delay(100, 0.0, [101]), 5)
+
+    def test_fewer_queries_same_accuracy(self):
+        """Серия 45 мин: опоздание меньше секунды, опросов в 10 раз меньше чем раз в 2 сек"""
+        duration = 2700
+        boundaries = [95, 2580, duration - 5]
+        polls, lateness = simulate_polls(duration, boundaries)
+        self.assertEqual(sorted(lateness), boundaries)
+        self.assertLess(max(lateness.values()), 1.0)
+        self.assertLessEqual(polls * 10, duration // 2)
+
+
+class TestAdaptivePolling(SupervisorTestCase):
+    """Опрос реального времени воспроизведения"""
+
+    def setUp(self):
+        super().setUp()
+        self.vlc.shutdown()
+        self.vlc.server_close()
+        self.vlc = MockVlc(port=0, speed=1.0)
+        threading.Thread(target=self.vlc.serve_forever, daemon=True).start()
+
+    def test_intro_skip_on_time(self):
+        """Пропуск intro менее чем через секунду после intro_start"""
+        self.series(skip_intro=True, intro=(2, 60))
+        supervisor = self.make_supervisor(CecQueue(), max_poll_interval=30)
+        self.run_until(supervisor, lambda: self.vlc.seeks())
+
+        (target, at), = self.vlc.seeks()
+        self.assertEqual(target, '60')
+        self.assertLess(at - 2, 1.0)
+        self.assertLess(supervisor.position_polls, 15)
+
+    def test_resync_after_seek(self):
+        """Перемотка кнопкой к intro - расписание пересчитывается"""
+        self.series(skip_intro=True, intro=(300, 360))
+        cec = CecQueue()
+        supervisor = self.make_supervisor(cec, max_poll_interval=30)
+
+        async def scenario():
+            task = asyncio.create_task(supervisor.run())
+            await asyncio.sleep(0.5)
+            self.vlc.time = 289  # Без resync следующий опрос был бы через 30 сек
+            cec.press('04')      # RIGHT: seek +10 -> 299
+            deadline = time.monotonic() + 5
+            while not any(t == '360' for t, _ in self.vlc.seeks()) and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            supervisor.stop()
+            await task
+
+        asyncio.run(scenario())
+        skips = [at for t, at in self.vlc.seeks() if t == '360']
+        self.assertEqual(len(skips), 1)
+        self.assertLess(skips[0] - 300, 1.0)
+
+
+def bench(seconds=10.0, presses_per_second=2):
+    """CPU супервизора за сеанс с реальными интервалами опроса и нажатиями"""
+    case = SupervisorTestCase('setUp')
+    case.setUp()
+    try:
+        cec = CecQueue()
+        supervisor = case.make_supervisor(cec, max_poll_interval=30)
+
+        async def scenario():
+            task = asyncio.create_task(supervisor.run())
+            end = time.monotonic() + seconds
+            while time.monotonic() < end:
+                cec.press('04')
+                await asyncio.sleep(1 / presses_per_second)
+            supervisor.stop()
+            await task
+
+        cpu_start = time.process_time()
+        asyncio.run(scenario())
+        cpu = time.process_time() - cpu_start
+        stats = supervisor.stats()
+    finally:
+        case.tearDown()
+        case.doCleanups()
+
+    print(f"Сеанс {seconds:.0f} с, {stats['keys']} нажатий")
+    print(f"CPU процесса (супервизор + FakeVlc): {1000 * cpu:.1f} мс "
+          f"({100 * cpu / seconds:.2f}%)")
+    print(f"Команд RC: {stats['rc_commands']}, соединений: {stats['rc_connects']}")
+    print(f"Задержка кнопки: в среднем {stats['key_latency_avg_ms']:.2f} мс, "
+          f"макс {stats['key_latency_max_ms']:.2f} мс")
+    print(f"Позиция по часам: {stats['clock_reads']}, запросом к VLC: {stats['rc_reads']}, "
+          f"макс. расхождение часов {stats['clock_max_drift']:.2f} с")
+
+    # Удержание RIGHT: 20 повторов CEC (~10/с) -> команды seek
+    case = SupervisorTestCase('setUp')
+    case.setUp()
+    try:
+        cec = CecQueue()
+        supervisor = case.make_supervisor(cec, max_poll_interval=60)
+
+        async def hold():
+            task = asyncio.create_task(supervisor.run())
+            while supervisor.position_polls == 0:
+                await asyncio.sleep(0.01)
+            for _ in range(20):
+                cec.press('04')
+                await asyncio.sleep(0.1)
+            cec.release()
+            await asyncio.sleep(0.2)
+            supervisor.stop()
+            await task
+
+        asyncio.run(hold())
+        seeks = case.vlc.seeks()
+    finally:
+        case.tearDown()
+        case.doCleanups()
+    print(f"Удержание RIGHT, 20 повторов: {len(seeks)} seek (раньше 20 x seek +10), "
+          f"перемотка на {int(seeks[-1][0]) - 125 if seeks else 0} с")
+
+    polls, lateness = simulate_polls(2700, [95, 2580, 2695])
+    print(f"Опрос позиции за серию 45 мин: {polls} запросов (раз в 2 сек - 1350), "
+          f"опоздание на границу до {1000 * max(lateness.values()):.0f} мс")
+
+    # Старая схема: отдельный nc на каждую команду
+    if shutil.which('nc'):
+        vlc = FakeVlc()
+        threading.Thread(target=vlc.serve_forever, daemon=True).start()
+        start = time.perf_counter()
+        for _ in range(10):
+            subprocess.run(f"echo 'seek +10' | nc -w 1 127.0.0.1 {vlc.port}",
+                           shell=True, capture_output=True)
+        print(f"echo | nc -w 1: {100 * (time.perf_counter() - start):.1f} мс на команду")
+        vlc.shutdown()
+        vlc.server_close()
+    else:
+        print("nc не найден - сравнение со старой схемой пропущено")
+
+
+if __name__ == '__main__':
+    main(bench, float, float)
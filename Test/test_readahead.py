@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты упреждающего чтения следующей серии (readahead.py)
+
+Запуск как скрипт - открытие "следующей серии" по медленной файловой системе
+с упреждающим чтением и без (задержка имитируется на чтении с диска):
+    python3 Test/test_readahead.py --bench [МБ] [задержка с]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# Добавляем путь к проекту и к тестам (SupervisorTestCase)
+PROJECT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(PROJECT_DIR))
+
+from Py.config.config_manager import ConfigManager, ConfigType, ConfigCategory
+from readahead import MB, Readahead, ReadaheadSettings, load_settings, readahead_ranges
+from test_playback_supervisor import CecQueue, SupervisorTestCase
+from helpers import main
+
+NEXT_NAME = "Show.S01E03.1080p.mkv"
+
+
+class TestRanges(unittest.TestCase):
+    """Начало и конец файла"""
+
+    def test_head_and_tail(self):
+        self.assertEqual(readahead_ranges(100 * MB, 32 * MB, 4 * MB),
+                         [(0, 32 * MB), (96 * MB, 4 * MB)])
+
+    def test_small_file_read_once(self):
+        self.assertEqual(readahead_ranges(10 * MB, 32 * MB, 4 * MB), [(0, 10 * MB)])
+        self.assertEqual(readahead_ranges(34 * MB, 32 * MB, 4 * MB), [(0, 34 * MB)])
+        self.assertEqual(readahead_ranges(100, 0, 10), [(90, 10)])
+
+
+class TestReadahead(unittest.TestCase):
+    """Чтение, ограничение скорости, отмена"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.path = self.temp_dir / "video.mkv"
+        self.path.write_bytes(os.urandom(3 * MB))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_reads_head_and_tail(self):
+        job = Readahead(self.path, 1 * MB, MB // 2)
+        self.assertEqual(job.run(), MB + MB // 2)
+        self.assertTrue(job.done)
+
+    def test_rate_limit(self):
+        job = Readahead(self.path, 1 * MB, 0, rate=4 * MB, chunk_size=64 * 1024)
+        job.run()
+        self.assertGreaterEqual(job.elapsed, 0.2)
+
+    def test_cancel(self):
+        job = Readahead(self.path, 3 * MB, 0, rate=MB, chunk_size=64 * 1024)
+        thread = threading.Thread(target=job.run)
+        thread.start()
+        time.sleep(0.1)
+        job.cancel()
+        thread.join(1.0)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(job.done)
+        self.assertLess(job.bytes_read, 3 * MB)
+
+    def test_missing_file(self):
+        job = Readahead(self.temp_dir / "missing.mkv", MB, MB)
+        self.assertEqual(job.run(), 0)
+        self.assertIsNotNone(job.error)
+
+    def test_settings_from_config(self):
+        db_path = self.temp_dir / "config.db"
+        ConfigManager(db_path).set('readahead_percent', 90, ConfigType.INT, ConfigCategory.MEDIA, '')
+        self.assertEqual(load_settings(db_path), ReadaheadSettings(percent=90))
+
+
+class TestSupervisorReadahead(SupervisorTestCase):
+    """Супервизор читает следующую серию после readahead_percent"""
+
+    def test_starts_after_percent(self):
+        next_file = self.temp_dir / NEXT_NAME
+        next_file.write_bytes(os.urandom(MB))
+        self.vlc.time = 3000           # 83% из 3600
+        supervisor = self.make_supervisor(CecQueue(), readahead=ReadaheadSettings(percent=80))
+        self.run_until(supervisor, lambda: supervisor.readahead_bytes > 0)
+        self.assertEqual(supervisor.stats()['readahead_bytes'], MB)
+        self.assertTrue(any(NEXT_NAME in m for m in self.messages))
+
+    def test_not_before_percent(self):
+        (self.temp_dir / NEXT_NAME).write_bytes(b"x" * 1024)
+        supervisor = self.make_supervisor(CecQueue(), readahead=ReadaheadSettings(percent=80))
+        self.run_until(supervisor, lambda: supervisor.position_polls >= 3)
+        self.assertEqual(supervisor.readahead_bytes, 0)
+
+
+class SlowFile:
+    """Файл "по сети": чтение, не попавшее в прочитанные ранее блоки, - с задержкой"""
+
+    def __init__(self, path, latency, block=MB):
+        self.path = path
+        self.latency = latency
+        self.block = block
+        self.cached = set()
+
+    def read(self, offset, length):
+        with open(self.path, 'rb') as stream:
+            stream.seek(offset)
+            data = stream.read(length)
+        for block in range(offset // self.block, (offset + length - 1) // self.block + 1):
+            if block not in self.cached:
+                time.sleep(self.latency)
+                self.cached.add(block)
+        return data
+
+
+def bench(size_mb=64, latency=0.05):
+    """Открытие: VLC читает заголовок, индекс в конце и первые секунды видео"""
+    temp_dir = Path(tempfile.mkdtemp())
+    try:
+        path = temp_dir / "next.mkv"
+        with open(path, 'wb') as stream:
+            stream.truncate(size_mb * MB)
+
+        def open_like_vlc(slow):
+            start = time.perf_counter()
+            slow.read(0, 64 * 1024)                        # EBML/Segment заголовок
+            slow.read((size_mb - 2) * MB, 2 * MB)           # Cues в конце файла
+            slow.read(64 * 1024, 8 * MB)                    # Начало потока (буфер VLC)
+            return time.perf_counter() - start
+
+        cold = open_like_vlc(SlowFile(path, latency))
+        warm_file = SlowFile(path, latency)
+        ranges = readahead_ranges(size_mb * MB, 32 * MB, 4 * MB)
+        for offset, length in ranges:
+            warm_file.read(offset, length)                  # Фоновое чтение во время серии
+        warm = open_like_vlc(warm_file)
+        print(f"Открытие следующей серии ({latency * 1000:.0f} мс на МБ блок): "
+              f"без упреждения {cold:.2f} с, с упреждением {warm:.3f} с")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main(bench, int, float)
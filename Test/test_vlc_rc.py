@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты клиента VLC RC (vlc_rc.py) и shim сервера для bash
+
+Вместо VLC - заглушка vlc_rc_mock.py с тем же протоколом: приветствие,
+приглашение "> " после каждого ответа.
+
+Запуск как скрипт - время до старта мониторинга: проба готовности против sleep 3:
+    python3 Test/test_vlc_rc.py --bench
+"""
+
+import asyncio
+import socket
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# Добавляем путь к проекту и к тестам (helpers)
+PROJECT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(PROJECT_DIR))
+
+from vlc_rc import (AsyncVlcRc, VlcRc, VlcRcError, LEGACY_START_DELAY, shim_request, start_async_shim,
+                    wait_ready)
+from vlc_rc_mock import MockVlc
+from helpers import main
+
+
+class FakeVlc(MockVlc):
+    """Заглушка VLC на свободном порту: позиция меняется только командой seek"""
+
+    def __init__(self):
+        super().__init__(port=0, position=125, speed=0)
+
+
+class TestVlcRc(unittest.TestCase):
+    """Тесты постоянного соединения и разбора ответов"""
+
+    def setUp(self):
+        self.vlc = FakeVlc()
+        threading.Thread(target=self.vlc.serve_forever, daemon=True).start()
+        self.rc = VlcRc(port=self.vlc.port, timeout=1.0)
+
+    def tearDown(self):
+        self.rc.close()
+        self.vlc.shutdown()
+        self.vlc.server_close()
+
+    def test_typed_queries_share_one_connection(self):
+        """Много запросов - одно соединение"""
+        for _ in range(50):
+            self.assertEqual(self.rc.get_time(), 125)
+            self.assertEqual(self.rc.get_length(), 3600)
+        self.assertEqual(self.vlc.connections, 1)
+        self.assertEqual(self.rc.connects, 1)
+
+    def test_seek(self):
+        """Абсолютная и относительная перемотка"""
+        self.rc.seek(600)
+        self.rc.seek('+30')
+        self.assertEqual(self.rc.get_time(), 630)
+        self.assertIn('seek +30', self.vlc.received)
+
+    def test_subtitles_cycle(self):
+        """Переключение субтитров по кругу по реальному списку дорожек"""
+        self.assertEqual(self.rc.strack(), -1)
+        self.assertEqual(self.rc.next_subtitle(), 2)
+        self.assertEqual(self.rc.next_subtitle(), 3)
+        self.assertEqual(self.rc.next_subtitle(), -1)
+
+    def test_reconnect_after_drop(self):
+        """Запрос повторяется после обрыва соединения"""
+        self.assertEqual(self.rc.get_time(), 125)
+        self.vlc.drop_after = len(self.vlc.received) + 1
+        self.assertEqual(self.rc.get_time(), 125)
+        self.assertEqual(self.rc.connects, 2)
+
+    def test_relative_command_not_repeated(self):
+        """Относительная команда после обрыва не выполняется дважды"""
+        self.rc.get_time()
+        self.vlc.drop_after = len(self.vlc.received) + 1
+        with self.assertRaises(VlcRcError):
+            self.rc.seek('+30')
+        self.assertEqual(self.vlc.received.count('seek +30'), 1)
+
+    def test_no_vlc(self):
+        """Нет VLC - VlcRcError, а не исключение сокета"""
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            free_port = sock.getsockname()[1]
+        with self.assertRaises(VlcRcError):
+            VlcRc(port=free_port, timeout=0.5).get_time()
+
+
+class TestRcShim(unittest.TestCase):
+    """Тесты shim сервера (как в супервизоре - event loop) и bash клиента vlc-rc.sh"""
+
+    def setUp(self):
+        self.vlc = FakeVlc()
+        threading.Thread(target=self.vlc.serve_forever, daemon=True).start()
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.loop_thread.start()
+        self.rc = AsyncVlcRc(port=self.vlc.port, timeout=1.0)
+        self.shim = self._await(start_async_shim(self.rc, port=0))
+        self.shim_address = self.shim.sockets[0].getsockname()
+
+    def tearDown(self):
+        self.shim.close()
+        self._await(self.rc.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join(5)
+        self.loop.close()
+        self.vlc.shutdown()
+        self.vlc.server_close()
+
+    def _await(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(5)
+
+    def _ask(self, *requests):
+        with socket.create_connection(self.shim_address) as sock:
+            stream = sock.makefile('rw')
+            replies = []
+            for request in requests:
+                stream.write(request + '\n')
+                stream.flush()
+                replies.append(stream.readline().rstrip('\n'))
+            return replies
+
+    def test_framed_replies(self):
+        """Одна строка ответа на запрос"""
+        self.assertEqual(self._ask('ping', 'get_time', 'seek 10', 'get_time', 'strack'),
+                         ['OK pong', 'OK 125', 'OK', 'OK 10', 'OK -1'])
+
+    def test_bash_client(self):
+        """vlc-rc.sh: запросы через /dev/tcp к shim"""
+        script = (f'source "{PROJECT_DIR}/vlc-rc.sh"; VLC_RC_SHIM_PORT={self.shim_address[1]}; '
+                  'vlc_rc_get_time; vlc_rc_request "seek +5" >/dev/null; vlc_rc_get_time; '
+                  'vlc_rc_request strack_next')
+        result = subprocess.run(['bash', '-c', script], capture_output=True, text=True, timeout=10)
+        self.assertEqual(result.stdout.split(), ['125', '130', '2'])
+        self.assertEqual(self.vlc.connections, 1)
+
+    def test_python_client(self):
+        """shim_request (vlc_rc.py <команда>): через shim, None - shim не запущен"""
+        port = self.shim_address[1]
+        self.assertEqual(shim_request('get_time', port=port), '125')
+        self.assertEqual(shim_request('seek +5', port=port), '')
+        self.assertEqual(shim_request('get_time', port=port), '130')
+        self.assertIsNone(shim_request('get_time', port=free_port()))
+        self.assertEqual(self.vlc.connections, 1)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class TestWaitReady(unittest.TestCase):
+    """Проба готовности VLC вместо sleep 3"""
+
+    def test_waits_for_port_and_length(self):
+        """RC ещё не слушает, затем get_length = 0 (файл открывается), затем готов"""
+        port = free_port()
+        servers = []
+
+        def start_vlc():
+            vlc = MockVlc(port=port, length=0, speed=0)
+            servers.append(vlc)
+            threading.Thread(target=vlc.serve_forever, daemon=True).start()
+            threading.Timer(0.2, lambda: setattr(vlc, 'length', 600)).start()
+
+        threading.Timer(0.2, start_vlc).start()
+        try:
+            with VlcRc(port=port, timeout=1.0) as rc:
+                waited, length = wait_ready(rc, timeout=5)
+        finally:
+            for vlc in servers:
+                vlc.shutdown()
+                vlc.server_close()
+        self.assertEqual(length, 600)
+        self.assertGreaterEqual(waited, 0.4)
+        self.assertLess(waited, 1.5)
+
+    def test_vlc_exited(self):
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+        start = time.monotonic()
+        with VlcRc(port=free_port()) as rc:
+            with self.assertRaises(VlcRcError):
+                wait_ready(rc, timeout=5, pid=process.pid)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_timeout_with_backoff(self):
+        """Паузы растут до 0.25 сек, общее время ограничено timeout"""
+        now = [0.0]
+        pauses = []
+
+        def sleep(delay):
+            pauses.append(delay)
+            now[0] += delay
+
+        with VlcRc(port=free_port()) as rc:
+            with self.assertRaises(VlcRcError):
+                wait_ready(rc, timeout=3, sleep=sleep, clock=lambda: now[0])
+        self.assertEqual(pauses[:5], [0.05, 0.1, 0.2, 0.25, 0.25])
+        self.assertAlmostEqual(sum(pauses), 3.0)
+
+    def test_cli(self):
+        vlc = FakeVlc()
+        threading.Thread(target=vlc.serve_forever, daemon=True).start()
+        try:
+            result = subprocess.run([sys.executable, str(PROJECT_DIR / "vlc_rc.py"),
+                                     "wait", "5", "", str(vlc.port)],
+                                    capture_output=True, text=True, timeout=10)
+        finally:
+            vlc.shutdown()
+            vlc.server_close()
+        self.assertEqual(result.returncode, 0)
+        status, seconds, length = result.stdout.split()
+        self.assertEqual((status, length), ("OK", "3600"))
+
+
+def bench():
+    """Старт мониторинга после запуска VLC: проба готовности и прежний sleep 3"""
+    print(f"{'Открытие файла':>16} {'проба':>8} {'sleep 3':>8}")
+    for ready_at in (0.4, 0.8, 1.5, 2.5, 4.0, 6.0):
+        port = free_port()
+        servers = []
+
+        def start_vlc():
+            vlc = MockVlc(port=port, length=0, speed=0)
+            servers.append(vlc)
+            threading.Thread(target=vlc.serve_forever, daemon=True).start()
+            threading.Timer(ready_at - 0.2, lambda: setattr(vlc, 'length', 2700)).start()
+
+        threading.Timer(0.2, start_vlc).start()
+        with VlcRc(port=port, timeout=1.0) as rc:
+            waited, _ = wait_ready(rc, timeout=10)
+        for vlc in servers:
+            vlc.shutdown()
+            vlc.server_close()
+        legacy = (f"{LEGACY_START_DELAY:.2f}" if ready_at <= LEGACY_START_DELAY
+                  else "нет длительности")
+        print(f"{ready_at:>15.1f}с {waited:>7.2f}с {legacy:>8}")
+
+
+if __name__ == '__main__':
+    main(bench)
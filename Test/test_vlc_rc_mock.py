@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты заглушки VLC RC (vlc_rc_mock.py): модель воспроизведения, отказы, журнал команд
+"""
+
+import socket
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# Добавляем путь к проекту
+PROJECT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
+
+from vlc_rc import VlcRc, VlcRcError
+from vlc_rc_mock import MockVlc
+
+
+class MockTestCase(unittest.TestCase):
+
+    def start(self, **kwargs):
+        self.vlc = MockVlc(port=0, **kwargs)
+        threading.Thread(target=self.vlc.serve_forever, daemon=True).start()
+        self.rc = VlcRc(port=self.vlc.port, timeout=1.0)
+
+    def tearDown(self):
+        self.rc.close()
+        self.vlc.shutdown()
+        self.vlc.server_close()
+
+
+class TestPlaybackModel(MockTestCase):
+    """Позиция по часам, seek, pause, субтитры, громкость"""
+
+    def test_clock_and_commands(self):
+        self.start(length=600, position=100, speed=50)
+        time.sleep(0.1)
+        self.assertGreaterEqual(self.rc.get_time(), 105)
+        self.rc.seek(300)
+        self.rc.pause()
+        paused_at = self.rc.get_time()
+        self.assertFalse(self.rc.is_playing())
+        time.sleep(0.1)
+        self.assertEqual(self.rc.get_time(), paused_at)
+        self.rc.seek('-30')
+        self.assertEqual(self.rc.get_time(), paused_at - 30)
+        self.rc.seek(10000)
+        self.assertEqual(self.rc.get_time(), 600)
+        self.assertEqual(self.rc.get_length(), 600)
+
+    def test_subtitles_and_volume(self):
+        self.start(speed=0)
+        self.assertEqual(self.rc.next_subtitle(), 2)
+        self.assertEqual(self.vlc.strack, 2)
+        self.rc.volup(2)
+        self.rc.voldown(1)
+        self.assertEqual(self.vlc.volume, 268)
+
+    def test_bad_arguments(self):
+        """Нечисловой аргумент - ответ об ошибке, как у VLC, а не исключение в mock"""
+        self.start(speed=0)
+        self.assertEqual(self.rc.command('strack abc'), "Error in `strack'\n")
+        self.assertEqual(self.rc.command('volup x'), "Error in `volup'\n")
+        self.assertEqual(self.rc.command('voldown x'), "Error in `voldown'\n")
+        self.assertEqual(self.vlc.volume, 256)
+        self.assertEqual(self.rc.get_length(), self.vlc.length)
+
+    def test_command_log(self):
+        """Журнал: команды и позиция в момент команды"""
+        self.start(position=42, speed=0)
+        self.rc.seek('+8')
+        self.rc.seek(0)
+        self.assertEqual(self.vlc.commands('seek'), ['seek +8', 'seek 0'])
+        self.assertEqual(self.vlc.seeks(), [('+8', 42.0), ('0', 50.0)])
+
+
+class TestFaults(MockTestCase):
+    """Медленные ответы и обрывы соединения"""
+
+    def test_slow_reply_times_out(self):
+        self.start(speed=0)
+        self.rc.timeout = 0.2
+        self.vlc.slow_commands['get_length'] = 0.5
+        self.assertEqual(self.rc.get_time(), 0)
+        with self.assertRaises(VlcRcError):
+            self.rc.get_length()
+
+    def test_dropped_connection_reconnects(self):
+        self.start(speed=0)
+        self.vlc.drop_commands.add('get_length')
+        with self.assertRaises(VlcRcError):
+            self.rc.get_length()
+        self.vlc.drop_commands.clear()
+        self.assertEqual(self.rc.get_length(), 3600)
+        self.assertEqual(self.vlc.connections, 3)
+
+
+class TestCli(unittest.TestCase):
+    """vlc_rc_mock.py [порт]: quit завершает сервер"""
+
+    def test_quit_stops_server(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        process = subprocess.Popen([sys.executable, str(PROJECT_DIR / "vlc_rc_mock.py"), str(port), "120"],
+                                   stdout=subprocess.PIPE, text=True)
+        try:
+            self.assertTrue(process.stdout.readline().startswith("OK"))
+            rc = VlcRc(port=port, timeout=1.0)
+            self.assertEqual(rc.get_length(), 120)
+            rc.quit()
+            self.assertEqual(process.wait(timeout=5), 0)
+        finally:
+            process.kill()
+            process.stdout.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
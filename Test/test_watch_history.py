@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты истории просмотра (watch_history.py): дельта-кодирование шкалы,
+кольцевой буфер и пакетная запись, события супервизора
+
+Запуск как скрипт - сжатие шкалы двухчасового сеанса и скорость записи
+истории пакетами и по одному событию:
+    python3 Test/test_watch_history.py --bench [часов] [интервал с]
+"""
+
+import asyncio
+import random
+import sys
+import time
+import unittest
+from pathlib import Path
+
+# Добавляем путь к проекту и к тестам (SupervisorTestCase)
+PROJECT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(PROJECT_DIR))
+
+from vlc_db import VlcDatabase
+from watch_history import (RAW_SAMPLE_BYTES, TimelineEncoder, WatchHistory, decode_timeline,
+                           encode_timeline)
+from test_playback_supervisor import CecQueue, SupervisorTestCase, VIDEO_NAME
+from helpers import TempDbTestCase, main, temp_database
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTimeline(unittest.TestCase):
+    """Дельта-кодирование замеров позиции"""
+
+    def test_roundtrip(self):
+        samples = [(0.0, 120), (1.5, 121), (31.2, 151), (32.0, 600), (40.0, 590), (45.3, 590)]
+        self.assertEqual(decode_timeline(encode_timeline(samples)), samples)
+
+    def test_playback_two_bytes_per_sample(self):
+        """Обычное воспроизведение: приращение времени + нулевое отклонение"""
+        encoder = TimelineEncoder()
+        for second in range(1, 601):
+            encoder.add(second * 5.0, 100 + second * 5)
+        self.assertLessEqual(len(encoder.data), 2 * 600 + 2)
+        self.assertGreater(encoder.ratio(), 7.5)
+        self.assertEqual(encoder.raw_bytes, 600 * RAW_SAMPLE_BYTES)
+
+    def test_same_moment_skipped(self):
+        encoder = TimelineEncoder()
+        self.assertTrue(encoder.add(1.0, 10))
+        self.assertFalse(encoder.add(1.0, 10))
+        self.assertEqual(encoder.samples, 1)
+
+    def test_empty(self):
+        self.assertEqual(decode_timeline(b''), [])
+
+
+class HistoryTestCase(TempDbTestCase):
+    """Временная БД"""
+
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock()
+
+
+class TestWatchHistory(HistoryTestCase):
+    """Кольцевой буфер событий и запись пакетами"""
+
+    def test_session_written(self):
+        history = WatchHistory(clock=self.clock)
+        session_id = history.start(VIDEO_NAME, "Show.S01", "1080p.mkv", 120, 3600)
+        for step in range(1, 11):
+            self.clock.now += 5
+            history.sample(120 + step * 5)
+        history.event('seek', 400)
+        self.clock.now += 5
+        history.end(405)
+
+        with VlcDatabase() as db:
+            (row,) = db.get_playback_sessions(VIDEO_NAME)
+            events = db.get_playback_events(session_id)
+            timeline = decode_timeline(db.get_session_timeline(session_id))
+        self.assertEqual(row[4:8], (120, 405, 3600, 12))
+        self.assertEqual(row[10], 3)
+        self.assertEqual([event[1] for event in events], ['start', 'seek', 'end'])
+        self.assertEqual(timeline[0], (0.0, 120))
+        self.assertEqual(timeline[-1], (55.0, 405))
+        self.assertIsNone(history.session_id)
+        self.assertGreater(history.session_ratios[0], 1)
+
+    def test_batches(self):
+        """Событие не пишется сразу - пакет по batch событий"""
+        history = WatchHistory(clock=self.clock, batch=4)
+        session_id = history.start(VIDEO_NAME, None, None, 0, 3600)
+        for position in range(1, 7):
+            history.event('seek', position)
+        with VlcDatabase() as db:
+            self.assertEqual(len(db.get_playback_events(session_id)), 4)
+        self.assertEqual((history.batches, history.pending), (1, 3))
+        history.flush()
+        self.assertEqual(history.events_written, 7)
+        self.assertEqual(history.stats()['history_batches'], 2)
+
+    def test_ring_bounded(self):
+        history = WatchHistory(clock=self.clock, ring=8, batch=4)
+        history.start(VIDEO_NAME, None, None, 0, 3600)
+        for position in range(20):
+            history.event('seek', position)
+        self.assertEqual(len(history.ring), 8)
+        self.assertEqual(history.recent('seek')[-1][2], 19)
+        self.assertEqual(history.dropped, 0)
+
+    def test_inactive_ignored(self):
+        history = WatchHistory(clock=self.clock)
+        history.event('seek', 10)
+        history.sample(10)
+        self.assertTrue(history.flush())
+        self.assertEqual(len(history.ring), 0)
+
+
+class TestSupervisorHistory(SupervisorTestCase):
+    """Супервизор: сеанс, перемотка, пауза и конец в истории"""
+
+    def test_session_events(self):
+        cec = CecQueue()
+        supervisor = self.make_supervisor(cec, max_poll_interval=60)
+
+        async def scenario():
+            run = asyncio.create_task(supervisor.run())
+            while not supervisor.state.clock.known:
+                await asyncio.sleep(0.01)
+            cec.press('00')            # OK - PLAY/PAUSE
+            cec.press('25')            # 50%
+            cec.press('0d')            # BACK
+            return await asyncio.wait_for(run, 5)
+
+        asyncio.run(scenario())
+        with VlcDatabase(self.db_path) as db:
+            (row,) = db.get_playback_sessions(VIDEO_NAME)
+            kinds = [event[1] for event in db.get_playback_events(row[0])]
+        self.assertEqual(kinds[0], 'start')
+        self.assertIn('seek', kinds)
+        self.assertIn('pause', kinds)
+        self.assertEqual(kinds[-1], 'end')
+        self.assertIsNotNone(row[3])
+        self.assertGreaterEqual(row[7], 1)
+        self.assertEqual(supervisor.stats()['history_sessions'], 1)
+
+
+def bench(hours=2, interval=1.0):
+    """Шкала двухчасового сеанса с замером раз в секунду и случайными перемотками"""
+    rng = random.Random(1)
+    encoder = TimelineEncoder()
+    position, elapsed = 0, 0.0
+    while elapsed < hours * 3600:
+        elapsed += interval + rng.choice((0, 0, 0, 0.1))
+        position += round(interval)
+        if rng.random() < 0.002:
+            position = max(0, position + rng.choice((-30, 30, 60, -10)))
+        encoder.add(elapsed, position)
+    print(f"Шкала {hours} ч: {encoder.samples} замеров, {len(encoder.data)} Б "
+          f"вместо {encoder.raw_bytes} Б (x{encoder.ratio():.1f})")
+
+    with temp_database("bench.db"):
+        for batch in (1, 32):
+            history = WatchHistory(batch=batch)
+            history.start(VIDEO_NAME, None, None, 0, 3600)
+            start = time.perf_counter()
+            for position in range(1000):
+                history.event('seek', position)
+            history.end(1000)
+            elapsed = time.perf_counter() - start
+            print(f"Пакет {batch:>2}: 1000 событий за {elapsed:.3f} с "
+                  f"({history.events_written / elapsed:,.0f} событий/с, {history.batches} транзакций)")
+
+
+if __name__ == '__main__':
+    main(bench, float, float)
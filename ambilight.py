@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ambilight.py - Цвета светодиодов подсветки по краям кадра (Ambilight)
+Версия: 1.0.0
+
+Движок из DOCS/future_features/ambilight_concept.md: кадр экрана -> средний
+цвет зоны у края кадра для каждого светодиода -> лента (Arduino, протокол
+Adalight). Цикл Python по пикселям не успевает и за 5 кадрами/с, поэтому:
+
+  - кадр лежит в одном общем буфере (multiprocessing.shared_memory), его
+    заполняет источник без промежуточных копий: framebuffer - os.preadv,
+    pipe ffmpeg и raw-файл - readinto прямо в буфер; захват может идти в
+    отдельном процессе (--capture-process), движок видит тот же буфер;
+  - уменьшение кадра - срез с шагом SCALE (numpy view, без копии), из
+    него берутся только полосы у краёв глубиной depth;
+  - полоса суммируется поперёк края (uint32), зоны светодиодов вдоль края -
+    np.add.reduceat по заранее посчитанным границам; порядок каналов
+    (BGRA у framebuffer) меняется уже у цветов светодиодов, не у кадра;
+  - сглаживание во времени - экспоненциальное: цвет = цвет + (1 -
+    smoothing) * (новый - цвет), мерцание на сменах сцены гасится.
+
+Светодиоды нумеруются по часовой стрелке от левого нижнего угла: левый
+край снизу вверх, верх слева направо, правый край сверху вниз, низ справа
+налево. Число светодиодов на краях, глубина зон, частота, сглаживание,
+framebuffer и порт ленты - таблица config (ambilight_*). Кадр без
+блокировки: захват может перезаписывать буфер во время расчёта - цвета
+полукадров смешиваются и сглаживаются, для подсветки это не заметно.
+Нужен numpy (pip install numpy) - только подсветке.
+
+Использование:
+    ambilight.py run [--source fb[:/dev/fbN]|ffmpeg:<файл>|raw:<файл>|synthetic]
+                     [--capture-process] [--frames N]   - подсветка
+    ambilight.py bench [--frames N]   - кадров/с на синтетических кадрах 1080p
+"""
+
+import multiprocessing
+import os
+import subprocess
+import sys
+import termios
+import time
+from abc import ABC, abstractmethod
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, NamedTuple, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:       # Приставке без подсветки numpy не нужен
+    np = None
+
+from Py.config.config_manager import load_prefixed_settings
+
+# Константы
+SCALE = 4                 # Шаг уменьшения кадра (1080p -> 270x480)
+WIDTH, HEIGHT = 1920, 1080
+HEADER = 64               # Байт заголовка общего буфера (номер кадра), выравнивание кадра
+ADALIGHT_BAUD = 115200
+BAUD_RATES = {115200: termios.B115200, 230400: termios.B230400, 500000: getattr(termios, 'B500000', 0)}
+
+# Байты на пиксель и номера каналов R, G, B
+FORMATS: Dict[str, Tuple[int, Tuple[int, int, int]]] = {
+    'bgra': (4, (2, 1, 0)),
+    'rgba': (4, (0, 1, 2)),
+    'bgr': (3, (2, 1, 0)),
+    'rgb': (3, (0, 1, 2)),
+    'rgb565': (2, (0, 1, 2)),
+}
+
+
+class AmbilightSettings(NamedTuple):
+    """Настройки из таблицы config (категория ambilight)"""
+    leds: Tuple[int, int, int, int] = (38, 21, 38, 21)   # Верх, право, низ, лево
+    depth_percent: int = 12         # Глубина зоны от края (% кадра)
+    fps: int = 30
+    smoothing_percent: int = 50     # Доля прежнего цвета в новом (%)
+    framebuffer: str = '/dev/fb0'
+    device: str = ''                # Порт ленты (Adalight), пусто - без ленты
+
+
+def load_settings(db_path: Optional[Path] = None) -> AmbilightSettings:
+    """Настройки ambilight_* из таблицы config, при ошибке - по умолчанию"""
+    return load_prefixed_settings(AmbilightSettings(), 'ambilight_', db_path, "Ambilight")
+
+
+# ============================================================================
+# ОБЩИЙ БУФЕР КАДРА
+# ============================================================================
+
+class FrameBuffer:
+    """Кадр в общей памяти: заголовок (номер кадра) и пиксели (height, row_pixels, bpp)"""
+
+    def __init__(self, height: int, row_pixels: int, bytes_per_pixel: int,
+                 name: Optional[str] = None):
+        size = HEADER + height * row_pixels * bytes_per_pixel
+        self.shape = (height, row_pixels, bytes_per_pixel)
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self.sequence = np.ndarray((1,), dtype=np.uint64, buffer=self.shm.buf[:8])
+        self.pixels = np.ndarray(self.shape, dtype=np.uint8, buffer=self.shm.buf[HEADER:size])
+        self.view = self.shm.buf[HEADER:size]
+        if self.owner:
+            self.sequence[0] = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self) -> None:
+        """Отсоединение (создатель буфера ещё и удаляет его)"""
+        # Представления numpy и memoryview держат буфер - сначала они
+        self.sequence = self.pixels = None
+        self.view.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# ============================================================================
+# ИСТОЧНИКИ КАДРОВ
+# ============================================================================
+
+class FrameSource(ABC):
+    """Источник кадров: read_into(buffer) пишет кадр прямо в общий буфер"""
+
+    pixel_format = 'bgra'
+
+    def __init__(self, width: int, height: int, row_pixels: Optional[int] = None):
+        self.width = width
+        self.height = height
+        self.row_pixels = row_pixels or width    # С выравниванием строки (framebuffer)
+
+    @property
+    def bytes_per_pixel(self) -> int:
+        return FORMATS[self.pixel_format][0]
+
+    def make_buffer(self) -> FrameBuffer:
+        return FrameBuffer(self.height, self.row_pixels, self.bytes_per_pixel)
+
+    @abstractmethod
+    def read_into(self, buffer: FrameBuffer) -> bool:
+        """Следующий кадр в buffer; False - кадров больше нет"""
+
+    def close(self) -> None:
+        pass
+
+
+class FramebufferSource(FrameSource):
+    """Экран из /dev/fbN: то, что показывает VLC, без второго потока видео по WiFi"""
+
+    def __init__(self, device: str = '/dev/fb0'):
+        sysfs = Path('/sys/class/graphics') / Path(device).name
+        try:
+            width, height = (int(value) for value in (sysfs / 'virtual_size').read_text().split(','))
+            bits = int((sysfs / 'bits_per_pixel').read_text())
+            stride = int((sysfs / 'stride').read_text())
+        except (OSError, ValueError) as e:
+            raise RuntimeError(f"{device}: параметры framebuffer недоступны ({e})")
+        if bits not in (16, 32):
+            raise RuntimeError(f"{device}: {bits} бит на пиксель не поддерживается")
+        self.pixel_format = 'bgra' if bits == 32 else 'rgb565'
+        super().__init__(width, height, stride // (bits // 8))
+        self.fd = os.open(device, os.O_RDONLY)
+
+    def read_into(self, buffer: FrameBuffer) -> bool:
+        os.preadv(self.fd, [buffer.view], 0)
+        return True
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class StreamSource(FrameSource):
+    """Кадры подряд из потока (pipe ffmpeg, raw-файл) - readinto в общий буфер"""
+
+    def __init__(self, stream: BinaryIO, width: int, height: int, pixel_format: str = 'bgra',
+                 process: Optional[subprocess.Popen] = None):
+        self.pixel_format = pixel_format
+        super().__init__(width, height)
+        self.stream = stream
+        self.process = process
+
+    def read_into(self, buffer: FrameBuffer) -> bool:
+        view, filled = buffer.view, 0
+        while filled < len(view):
+            count = self.stream.readinto(view[filled:])
+            if not count:
+                return False
+            filled += count
+        return True
+
+    def close(self) -> None:
+        self.stream.close()
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+
+
+def ffmpeg_source(path: str, width: int = WIDTH, height: int = HEIGHT) -> StreamSource:
+    """Видеофайл через ffmpeg (проверка без framebuffer): BGRA width x height"""
+    process = subprocess.Popen(
+        ['ffmpeg', '-nostdin', '-v', 'error', '-re', '-i', path, '-an', '-sn',
+         '-vf', f"scale={width}:{height}", '-pix_fmt', 'bgra', '-f', 'rawvideo', '-'],
+        stdout=subprocess.PIPE)
+    return StreamSource(process.stdout, width, height, 'bgra', process)
+
+
+class SyntheticSource(FrameSource):
+    """Синтетические кадры BGRA: цветные градиенты с движением и шумом (тесты, bench)"""
+
+    def __init__(self, width: int = WIDTH, height: int = HEIGHT, frames: int = 8, seed: int = 0):
+        super().__init__(width, height)
+        rng = np.random.default_rng(seed)
+        x = np.linspace(0, 1, width, dtype=np.float32)
+        y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+        self.frames = []
+        for index in range(frames):
+            phase = index / frames
+            frame = np.empty((height, width, 4), dtype=np.uint8)
+            frame[..., 0] = 255 * (0.5 + 0.5 * np.sin(2 * np.pi * (x + phase)))
+            frame[..., 1] = 255 * y * (1 - phase) + 40 * phase
+            frame[..., 2] = 255 * (x * y) ** 0.5
+            frame[..., :3] ^= rng.integers(0, 16, (height, width, 3), dtype=np.uint8)
+            frame[..., 3] = 255
+            self.frames.append(frame)
+        self.index = 0
+
+    def read_into(self, buffer: FrameBuffer) -> bool:
+        np.copyto(buffer.pixels, self.frames[self.index % len(self.frames)])
+        self.index += 1
+        return True
+
+
+def open_source(spec: str, framebuffer: str = '/dev/fb0') -> FrameSource:
+    """Источник по описанию: fb[:/dev/fbN], ffmpeg:<файл>, raw:<файл>[:WxH], synthetic"""
+    kind, _, argument = spec.partition(':')
+    if kind == 'fb':
+        return FramebufferSource(argument or framebuffer)
+    if kind == 'ffmpeg':
+        return ffmpeg_source(argument)
+    if kind == 'raw':
+        path, _, size = argument.partition(':')
+        width, height = (int(value) for value in size.split('x')) if size else (WIDTH, HEIGHT)
+        return StreamSource(open(path, 'rb'), width, height)
+    if kind == 'synthetic':
+        return SyntheticSource()
+    raise ValueError(f"неизвестный источник кадров: {spec}")
+
+
+# ============================================================================
+# ДВИЖОК
+# ============================================================================
+
+class Layout(NamedTuple):
+    """Светодиоды на краях экрана и глубина зоны (доля кадра)"""
+    top: int
+    right: int
+    bottom: int
+    left: int
+    depth: float = 0.12
+
+    @property
+    def count(self) -> int:
+        return self.top + self.right + self.bottom + self.left
+
+
+def zone_edges(length: int, zones: int) -> 'np.ndarray':
+    """Начала zones равных зон на отрезке length (для np.add.reduceat)"""
+    if zones > length:
+        raise ValueError(f"{zones} светодиодов на {length} точек уменьшенного кадра")
+    return np.linspace(0, length, zones + 1).astype(np.intp)
+
+
+class AmbilightEngine:
+    """Цвета светодиодов по кадру (RGB uint8, по часовой стрелке от левого нижнего угла)"""
+
+    def __init__(self, layout: Layout, width: int, height: int, pixel_format: str = 'bgra',
+                 scale: int = SCALE, smoothing: float = 0.5):
+        if pixel_format not in FORMATS:
+            raise ValueError(f"формат пикселей {pixel_format} не поддерживается")
+        self.layout = layout
+        self.width, self.height = width, height
+        self.pixel_format = pixel_format
+        self.order = list(FORMATS[pixel_format][1])
+        self.scale = scale
+        self.smoothing = smoothing
+        self.colors: Optional['np.ndarray'] = None
+
+        rows, cols = -(-height // scale), -(-width // scale)     # Размер среза с шагом scale
+        self.depth_rows = max(1, int(round(rows * layout.depth)))
+        self.depth_cols = max(1, int(round(cols * layout.depth)))
+        # Начала зон и число точек в каждой - в порядке светодиодов (левый
+        # край и низ - в обратном порядке)
+        self.edges, counts = {}, []
+        for side, zones, length, depth in (('left', layout.left, rows, self.depth_cols),
+                                           ('top', layout.top, cols, self.depth_rows),
+                                           ('right', layout.right, rows, self.depth_cols),
+                                           ('bottom', layout.bottom, cols, self.depth_rows)):
+            if zones:
+                edges = zone_edges(length, zones)
+                self.edges[side] = edges[:-1]
+                sizes = np.diff(edges) * depth
+                counts.append(sizes[::-1] if side in ('left', 'bottom') else sizes)
+        if not counts:
+            raise ValueError("нет светодиодов")
+        self.counts = np.concatenate(counts).astype(np.float32)[:, None]
+
+    def small(self, frame: 'np.ndarray') -> 'np.ndarray':
+        """Уменьшенный кадр: срез с шагом scale (view, для rgb565 - распаковка в RGB)"""
+        view = frame[:self.height, :self.width]
+        if self.pixel_format != 'rgb565':
+            return view[::self.scale, ::self.scale, :3]
+        packed = view[::self.scale, ::self.scale].copy().view('<u2')[..., 0]
+        rgb = np.empty(packed.shape + (3,), dtype=np.uint8)
+        rgb[..., 0] = (packed >> 11) * 255 // 31
+        rgb[..., 1] = ((packed >> 5) & 63) * 255 // 63
+        rgb[..., 2] = (packed & 31) * 255 // 31
+        return rgb
+
+    def measure(self, frame: 'np.ndarray') -> 'np.ndarray':
+        """Средние цвета зон светодиодов без сглаживания (N, 3) float32 RGB"""
+        small = self.small(frame)
+        sums = []
+        # Полоса у края - сумма поперёк края, зоны вдоль края - reduceat
+        if 'left' in self.edges:
+            strip = small[:, :self.depth_cols].sum(axis=1, dtype=np.uint32)
+            sums.append(np.add.reduceat(strip, self.edges['left'], axis=0)[::-1])
+        if 'top' in self.edges:
+            strip = small[:self.depth_rows].sum(axis=0, dtype=np.uint32)
+            sums.append(np.add.reduceat(strip, self.edges['top'], axis=0))
+        if 'right' in self.edges:
+            strip = small[:, -self.depth_cols:].sum(axis=1, dtype=np.uint32)
+            sums.append(np.add.reduceat(strip, self.edges['right'], axis=0))
+        if 'bottom' in self.edges:
+            strip = small[-self.depth_rows:].sum(axis=0, dtype=np.uint32)
+            sums.append(np.add.reduceat(strip, self.edges['bottom'], axis=0)[::-1])
+        colors = np.concatenate(sums).astype(np.float32) / self.counts
+        return colors[:, self.order]
+
+    def process(self, frame: 'np.ndarray') -> 'np.ndarray':
+        """Цвета светодиодов со сглаживанием во времени (N, 3) uint8 RGB"""
+        target = self.measure(frame)
+        if self.colors is None:
+            self.colors = target
+        else:
+            self.colors += (1 - self.smoothing) * (target - self.colors)
+        return np.rint(self.colors).astype(np.uint8)
+
+
+# ============================================================================
+# ЛЕНТА
+# ============================================================================
+
+def adalight_packet(colors: 'np.ndarray') -> bytes:
+    """Пакет Adalight: 'Ada', число светодиодов - 1 (hi, lo), контрольная сумма, RGB"""
+    count = len(colors) - 1
+    hi, lo = count >> 8, count & 0xFF
+    return b'Ada' + bytes((hi, lo, hi ^ lo ^ 0x55)) + np.ascontiguousarray(colors, np.uint8).tobytes()
+
+
+class AdalightOutput:
+    """Лента через Arduino (скетч Adalight) на последовательном порту"""
+
+    def __init__(self, device: str, baud: int = ADALIGHT_BAUD):
+        self.stream = open(device, 'wb', buffering=0)
+        if os.isatty(self.stream.fileno()):
+            attributes = termios.tcgetattr(self.stream.fileno())
+            speed = BAUD_RATES.get(baud) or termios.B115200
+            attributes[4] = attributes[5] = speed               # ispeed, ospeed
+            attributes[3] = 0                                   # raw: без эха и canonical
+            attributes[1] &= ~termios.OPOST
+            termios.tcsetattr(self.stream.fileno(), termios.TCSANOW, attributes)
+
+    def write(self, colors: 'np.ndarray') -> None:
+        self.stream.write(adalight_packet(colors))
+
+    def close(self) -> None:
+        self.stream.close()
+
+
+# ============================================================================
+# ЦИКЛ
+# ============================================================================
+
+def _capture_loop(spec: str, framebuffer: str, name: str, fps: float, stop) -> None:
+    """Процесс захвата: кадры источника в общий буфер, номер кадра - в заголовок"""
+    source = open_source(spec, framebuffer)
+    buffer = FrameBuffer(source.height, source.row_pixels, source.bytes_per_pixel, name=name)
+    period = 1.0 / fps
+    try:
+        deadline = time.monotonic()
+        while not stop.is_set() and source.read_into(buffer):
+            buffer.sequence[0] += 1
+            deadline += period
+            time.sleep(max(0.0, deadline - time.monotonic()))
+    finally:
+        buffer.close()
+        source.close()
+
+
+class RunStats(NamedTuple):
+    frames: int
+    elapsed: float
+    process_time: float        # Сек на расчёт цветов (без ожидания кадров)
+
+
+def run(source: FrameSource, engine: AmbilightEngine, fps: float,
+        output: Optional[Callable[['np.ndarray'], None]] = None, frames: Optional[int] = None,
+        capture: Optional[Tuple[str, str]] = None) -> RunStats:
+    """Подсветка: кадр -> цвета -> лента с частотой fps; capture - (источник, fb) для
+    захвата в отдельном процессе (source тогда только задаёт размер буфера)"""
+    buffer = source.make_buffer()
+    worker, stop = None, None
+    if capture is not None:
+        stop = multiprocessing.Event()
+        worker = multiprocessing.Process(target=_capture_loop,
+                                         args=(capture[0], capture[1], buffer.name, fps, stop),
+                                         daemon=True)
+        worker.start()
+    period = 1.0 / fps
+    count, busy, last = 0, 0.0, 0
+    start = deadline = time.monotonic()
+    try:
+        while frames is None or count < frames:
+            if worker is None:
+                if not source.read_into(buffer):
+                    break
+            else:
+                # Новый кадр от процесса захвата; пока его нет - ждём
+                while buffer.sequence[0] == last and worker.is_alive():
+                    time.sleep(period / 10)
+                if buffer.sequence[0] == last:
+                    break
+                last = int(buffer.sequence[0])
+            began = time.monotonic()
+            colors = engine.process(buffer.pixels)
+            if output is not None:
+                output(colors)
+            busy += time.monotonic() - began
+            count += 1
+            deadline += period
+            time.sleep(max(0.0, deadline - time.monotonic()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if worker is not None:
+            stop.set()
+            worker.join(5)
+        buffer.close()
+    return RunStats(count, time.monotonic() - start, busy)
+
+
+def bench(frames: int = 300) -> None:
+    """Кадров/с движка на синтетических кадрах 1080p BGRA (без ожидания по fps)"""
+    settings = AmbilightSettings()
+    layout = Layout(*settings.leds, depth=settings.depth_percent / 100)
+    source = SyntheticSource()
+    buffer = source.make_buffer()
+    try:
+        print(f"Кадр {source.width}x{source.height} BGRA в общей памяти, {layout.count} светодиодов, "
+              f"зона {settings.depth_percent}% от края")
+
+        # Цикл Python по пикселям зон (как в прототипе концепции) - на 1 кадре
+        source.read_into(buffer)
+        engine = AmbilightEngine(layout, source.width, source.height, scale=1)
+        started = time.perf_counter()
+        pixels = buffer.pixels
+        rows = engine.depth_rows
+        for x0, x1 in zip(engine.edges['top'], list(engine.edges['top'][1:]) + [source.width]):
+            total = [0, 0, 0]
+            for y in range(rows):
+                for x in range(x0, x1):
+                    pixel = pixels[y, x]
+                    total[0] += int(pixel[2])
+                    total[1] += int(pixel[1])
+                    total[2] += int(pixel[0])
+        loop = (time.perf_counter() - started) * layout.count / layout.top
+        print(f"{'цикл Python':<24} {1 / loop:8.2f} кадров/с (оценка по верхнему краю)")
+
+        for scale in (1, 2, SCALE, 8):
+            engine = AmbilightEngine(layout, source.width, source.height, scale=scale)
+            fill = compute = 0.0
+            for _ in range(frames):
+                started = time.perf_counter()
+                source.read_into(buffer)
+                filled = time.perf_counter()
+                engine.process(buffer.pixels)
+                fill += filled - started
+                compute += time.perf_counter() - filled
+            print(f"{f'numpy, шаг {scale}':<24} {frames / compute:8.0f} кадров/с "
+                  f"({1000 * compute / frames:.2f} мс на кадр; запись кадра в буфер "
+                  f"{1000 * fill / frames:.2f} мс)")
+
+        # Точность уменьшения: отличие от среднего по всем пикселям зон
+        exact = AmbilightEngine(layout, source.width, source.height, scale=1).measure(buffer.pixels)
+        approx = AmbilightEngine(layout, source.width, source.height).measure(buffer.pixels)
+        print(f"Отличие шага {SCALE} от всех пикселей: до {np.abs(exact - approx).max():.1f} из 255")
+    finally:
+        buffer.close()
+
+    source = SyntheticSource()
+    engine = AmbilightEngine(layout, source.width, source.height)
+    stats = run(source, engine, fps=1000, frames=frames, capture=('synthetic', settings.framebuffer))
+    print(f"{'захват в процессе':<24} {stats.frames / stats.elapsed:8.0f} кадров/с "
+          f"(расчёт {1000 * stats.process_time / max(1, stats.frames):.2f} мс на кадр)")
+
+
+def main() -> int:
+    """Главная функция CLI"""
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if not args or args[0] not in ('run', 'bench'):
+        print("Использование: ambilight.py run [--source fb[:/dev/fbN]|ffmpeg:<файл>|raw:<файл>|synthetic]"
+              " [--capture-process] [--frames N] | bench [--frames N]", file=sys.stderr)
+        return 1
+    if np is None:
+        print("❌ Ошибка: numpy не установлен!", file=sys.stderr)
+        print("Установите: pip install numpy", file=sys.stderr)
+        return 1
+
+    frames, spec = None, 'fb'
+    try:
+        if '--frames' in sys.argv:
+            frames = int(sys.argv[sys.argv.index('--frames') + 1])
+        if '--source' in sys.argv:
+            spec = sys.argv[sys.argv.index('--source') + 1]
+    except (IndexError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+
+    if args[0] == 'bench':
+        bench(frames or 300)
+        return 0
+
+    settings = load_settings()
+    output = None
+    try:
+        source = open_source(spec, settings.framebuffer)
+        if settings.device:
+            output = AdalightOutput(settings.device)
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    try:
+        engine = AmbilightEngine(Layout(*settings.leds, depth=settings.depth_percent / 100),
+                                 source.width, source.height, source.pixel_format,
+                                 smoothing=settings.smoothing_percent / 100)
+        capture = (spec, settings.framebuffer) if '--capture-process' in sys.argv else None
+        print(f"💡 Ambilight: {source.width}x{source.height} {source.pixel_format}, "
+              f"{engine.layout.count} светодиодов, {settings.fps} кадров/с"
+              f"{', лента ' + settings.device if output else ' (без ленты)'}")
+        stats = run(source, engine, settings.fps, output.write if output else None, frames, capture)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    finally:
+        source.close()
+        if output is not None:
+            output.close()
+    print(f"Кадров: {stats.frames} за {stats.elapsed:.1f} с, расчёт "
+          f"{1000 * stats.process_time / max(1, stats.frames):.2f} мс на кадр")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
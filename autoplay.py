@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+autoplay.py - Автопродолжение: следующая серия в уже запущенном VLC
+Версия: 1.1.0
+
+Следующая серия ищется в папке текущей по ключам сериала из имени файла
+(название до .SxxEyy, сезон, серия и series_suffix - качество/расширение):
+сначала следующая серия того же сезона, затем первая серия следующего.
+Файлы другого качества (другой series_suffix) не подходят.
+
+Супервизор ставит найденный файл в плейлист VLC командой RC `enqueue` в
+начале серии и переключает `next` на титрах/в конце - без перезапуска VLC,
+cec-client и супервизора (флаг autoplay в series_settings). Если серия уже
+целиком в локальном кэше (media_cache.py), в плейлист ставится копия.
+
+Использование:
+    autoplay.py next <видеофайл>   - путь следующей серии
+"""
+
+import sys
+from pathlib import Path
+from typing import Callable, Optional
+
+from vlc_db import extract_episode, extract_series_suffix
+
+
+def next_episode(video_file: str) -> Optional[Path]:
+    """Следующая серия в папке video_file или None (не сериал / последняя серия)"""
+    path = Path(video_file)
+    current = extract_episode(path.name)
+    if current is None:
+        return None
+    show, season, episode = current
+    suffix = extract_series_suffix(path.name)
+
+    best = None
+    try:
+        entries = list(path.parent.iterdir())
+    except OSError:
+        return None
+    for entry in entries:
+        key = extract_episode(entry.name)
+        if key is None or key[0] != show or extract_series_suffix(entry.name) != suffix:
+            continue
+        number = key[1:]
+        if number > (season, episode) and entry.is_file():
+            if best is None or number < best[0]:
+                best = (number, entry)
+    return best[1] if best else None
+
+
+class Autoplay:
+    """Следующая серия в плейлисте VLC для PlaybackSupervisor"""
+
+    def __init__(self, rc, resolve: Callable[[str], Optional[Path]] = next_episode,
+                 locate: Optional[Callable[[Path], Optional[Path]]] = None):
+        self.rc = rc
+        self.resolve = resolve
+        self.locate = locate      # Исходный путь -> локальная копия или None
+        self.queued: Optional[Path] = None
+        self.switches = 0
+
+    async def prepare(self, video_file: str) -> Optional[Path]:
+        """Поставить следующую серию в плейлист VLC (enqueue один раз на серию)"""
+        if self.queued is not None:
+            return self.queued
+        path = self.resolve(video_file)
+        if path is not None:
+            local = self.locate(path) if self.locate is not None else None
+            await self.rc.enqueue(str((local or path).resolve()))
+            self.queued = path
+        return path
+
+    async def advance(self) -> Optional[Path]:
+        """Переключить VLC на поставленную серию; путь новой серии или None"""
+        path = self.queued
+        if path is None:
+            return None
+        self.queued = None
+        await self.rc.next()
+        self.switches += 1
+        return path
+
+
+def main() -> int:
+    """Главная функция CLI"""
+    if len(sys.argv) < 3 or sys.argv[1] != 'next':
+        print("Использование: autoplay.py next <видеофайл>", file=sys.stderr)
+        return 1
+    path = next_episode(sys.argv[2])
+    if path is None:
+        print("ERROR: следующая серия не найдена", file=sys.stderr)
+        return 1
+    print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+cec_decoder.py - Табличный декодер событий cec-client
+Версия: 1.1.0
+
+Строка `cec-client -d 8` разбирается один раз в кадр CEC (инициатор,
+получатель, опкод, операнды) вместо цепочки из ~30 проверок подстрок
+`*"44:XX"*` в bash. Опрос устройств (кадр из одного заголовка) и исходящий
+трафик отбрасываются до разбора. Нажатие кнопки (User Control Pressed, 0x44)
+переводится в имя действия по словарю код -> имя, который загружается из
+таблицы config (ключи cec_key_*). Отпускание кнопки (User Control Released,
+0x45) по запросу возвращается как RELEASE_KEY - по нему супервизор
+завершает жест удержания.
+
+Использование:
+    cec_decoder.py keymap            - текущая раскладка кнопок
+    cec_decoder.py decode [файл]     - разбор лога cec-client (stdin по умолчанию)
+"""
+
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+# Константы
+USER_CONTROL_PRESSED = 0x44
+USER_CONTROL_RELEASED = 0x45
+CONFIG_KEY_PREFIX = "cec_key_"
+RELEASE_KEY = "release"   # Имя для User Control Released (CecDecoder(releases=True))
+
+# Раскладка по умолчанию: имя кнопки (cec_key_<имя>) -> код User Control (CEC 1.4, таблица 30)
+DEFAULT_KEY_CODES: Dict[str, int] = {
+    'play': 0x00,           # OK (Select)
+    'up': 0x01,
+    'down': 0x02,
+    'left': 0x03,
+    'right': 0x04,
+    'back': 0x0D,           # Exit
+    'channel_up': 0x30,
+    'channel_down': 0x31,
+    'info': 0x35,           # Display Information
+    'blue': 0x71,           # F1
+    'red': 0x72,            # F2
+    'green': 0x73,          # F3
+    'yellow': 0x74,         # F4
+}
+DEFAULT_KEY_CODES.update({str(digit): 0x20 + digit for digit in range(10)})
+
+
+class CecFrame(NamedTuple):
+    """Входящий кадр CEC"""
+    initiator: int
+    destination: int
+    opcode: int
+    operands: Tuple[int, ...]
+
+
+def parse_traffic(line: str) -> Optional[CecFrame]:
+    """Кадр из строки TRAFFIC ">> 01:44:01" или None (исходящий, опрос, не кадр)"""
+    pos = line.find('>>')
+    if pos < 0:
+        return None
+    # Кадр без опкода (только заголовок) - опрос устройства
+    fields = line[pos + 2:].split(None, 1)
+    if not fields or ':' not in fields[0]:
+        return None
+    try:
+        data = [int(part, 16) for part in fields[0].split(':')]
+    except ValueError:
+        return None
+    header = data[0]
+    return CecFrame(header >> 4, header & 0x0F, data[1], tuple(data[2:]))
+
+
+def keymap_from_codes(codes: Dict[str, int]) -> Dict[int, str]:
+    """{имя: код} -> {код: имя}; при совпадении кодов побеждает первое имя"""
+    keymap: Dict[int, str] = {}
+    for name, code in codes.items():
+        keymap.setdefault(code, name)
+    return keymap
+
+
+DEFAULT_KEYMAP: Dict[int, str] = keymap_from_codes(DEFAULT_KEY_CODES)
+
+
+def load_keymap(db_path: Optional[Path] = None) -> Dict[int, str]:
+    """Раскладка кнопок из таблицы config (cec_key_*), при ошибке - по умолчанию"""
+    try:
+        from Py.config.config_manager import ConfigManager, ConfigCategory
+        if db_path is None:
+            from vlc_db import DB_PATH
+            db_path = DB_PATH
+        settings = ConfigManager(db_path).get_category(ConfigCategory.CEC)
+    except Exception as e:
+        print(f"⚠️  Раскладка CEC по умолчанию: {e}", file=sys.stderr)
+        return dict(DEFAULT_KEYMAP)
+
+    codes = {key[len(CONFIG_KEY_PREFIX):]: value for key, value in settings.items()
+             if key.startswith(CONFIG_KEY_PREFIX) and isinstance(value, int)}
+    # 'play' раньше 'pause' при общем коде
+    ordered = {name: codes[name] for name in DEFAULT_KEY_CODES if name in codes}
+    ordered.update(codes)
+    return keymap_from_codes(ordered) if ordered else dict(DEFAULT_KEYMAP)
+
+
+class CecDecoder:
+    """Строка cec-client -> имя кнопки по раскладке"""
+
+    def __init__(self, keymap: Optional[Dict[int, str]] = None, releases: bool = False):
+        self.keymap = dict(DEFAULT_KEYMAP if keymap is None else keymap)
+        self.releases = releases
+        self.lines = 0
+        self.frames = 0
+        self.keys = 0
+
+    def decode(self, line: str) -> Optional[str]:
+        """Имя нажатой кнопки или None"""
+        self.lines += 1
+        frame = parse_traffic(line)
+        if frame is None:
+            return None
+        self.frames += 1
+        if frame.opcode == USER_CONTROL_RELEASED:
+            return RELEASE_KEY if self.releases else None
+        if frame.opcode != USER_CONTROL_PRESSED or not frame.operands:
+            return None
+        name = self.keymap.get(frame.operands[0])
+        if name is not None:
+            self.keys += 1
+        return name
+
+    def decode_all(self, lines: Iterable[str]) -> Iterable[str]:
+        """Имена кнопок из потока строк"""
+        for line in lines:
+            name = self.decode(line)
+            if name is not None:
+                yield name
+
+
+def main() -> int:
+    """Главная функция CLI"""
+    if len(sys.argv) < 2:
+        print("Использование: cec_decoder.py keymap | decode [файл]", file=sys.stderr)
+        return 1
+
+    command = sys.argv[1]
+    if command == 'keymap':
+        for code, name in sorted(load_keymap().items()):
+            print(f"{code:3d} (0x{code:02x}) {name}")
+        return 0
+    if command == 'decode':
+        decoder = CecDecoder(load_keymap())
+        if len(sys.argv) > 2:
+            with open(sys.argv[2], encoding='utf-8', errors='replace') as stream:
+                for name in decoder.decode_all(stream):
+                    print(name)
+        else:
+            for name in decoder.decode_all(sys.stdin):
+                print(name)
+        return 0
+
+    print(f"ERROR: неизвестная команда {command}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+cec_replay.py - Запись и воспроизведение трафика cec-client
+Версия: 1.0.0
+
+Без телевизора и /dev/cec1 путь пульта (cec-client -> playback_supervisor ->
+VLC RC) можно проверить и измерить по записи:
+
+    cec_replay.py record <файл> [cec_device]     - запись cec-client -d 8 с отметками времени
+    cec-client -d 8 -t r /dev/cec1 | cec_replay.py record <файл> -
+    cec_replay.py replay <файл> <видеофайл> [скорость] [rc_port]
+
+Формат записи: "<секунды от начала>\\t<строка cec-client>". Обычный лог
+cec-client без отметок тоже читается - время берётся из поля [   мс]
+строк TRAFFIC/DEBUG.
+
+Скорость воспроизведения: 1 - реальное время, 10 - в 10 раз быстрее,
+0 - без пауз (пропускная способность). Воспроизведённые строки подаются в
+PlaybackSupervisor вместо живого cec-client; VLC - настоящий или
+vlc_rc_mock.py на порту rc_port.
+"""
+
+import asyncio
+import re
+import subprocess
+import sys
+import time
+from typing import AsyncIterator, Callable, IO, List, Optional, Tuple
+
+# Константы
+CEC_DEVICE = "/dev/cec1"
+
+# Отметка времени cec-client: "TRAFFIC: [      12345]\t>> 01:44:01" (мс от запуска)
+_CEC_TIMESTAMP_RE = re.compile(r'^\w+:\s*\[\s*(\d+)\]')
+
+Event = Tuple[float, str]  # (секунды от начала записи, строка)
+
+
+def record(output: IO[str], source: IO[str], clock: Callable[[], float] = time.monotonic) -> int:
+    """Запись строк source с отметками времени; возвращает количество строк"""
+    start = clock()
+    count = 0
+    for raw in source:
+        line = raw.rstrip('\n')
+        output.write(f"{clock() - start:.6f}\t{line}\n")
+        output.flush()
+        count += 1
+    return count
+
+
+def parse_recording(lines: List[str]) -> List[Event]:
+    """События из записи cec_replay или лога cec-client"""
+    events: List[Event] = []
+    last = 0.0
+    for raw in lines:
+        line = raw.rstrip('\n')
+        if not line:
+            continue
+        stamp, sep, rest = line.partition('\t')
+        if sep:
+            try:
+                last = float(stamp)
+                events.append((last, rest))
+                continue
+            except ValueError:
+                pass
+        # Лог cec-client: время из поля [мс], строки без отметки - время предыдущей
+        match = _CEC_TIMESTAMP_RE.match(line)
+        if match:
+            last = int(match.group(1)) / 1000
+        events.append((last, line))
+
+    if events:
+        base = events[0][0]
+        events = [(max(0.0, stamp - base), line) for stamp, line in events]
+    return events
+
+
+def load_recording(path: str) -> List[Event]:
+    with open(path, encoding='utf-8', errors='replace') as stream:
+        return parse_recording(stream.readlines())
+
+
+class CecReplay:
+    """Источник строк для PlaybackSupervisor(cec_lines=...) из записи"""
+
+    def __init__(self, events: List[Event], speed: float = 1.0,
+                 on_finish: Optional[Callable[[], None]] = None):
+        self.events = events
+        self.speed = speed
+        self.on_finish = on_finish
+        self.emitted = 0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    async def lines(self) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        self.started = loop.time()
+        try:
+            for stamp, line in self.events:
+                if self.speed > 0:
+                    delay = self.started + stamp / self.speed - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                else:
+                    # Без пауз, но даём поработать остальным задачам
+                    await asyncio.sleep(0)
+                self.emitted += 1
+                yield line
+        finally:
+            self.finished = loop.time()
+            if self.on_finish is not None:
+                self.on_finish()
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+    def events_per_second(self) -> float:
+        return self.emitted / self.elapsed if self.elapsed > 0 else 0.0
+
+
+async def replay_into_supervisor(events: List[Event], video_file: str, speed: float = 1.0,
+                                 rc_port: Optional[int] = None, **kwargs) -> dict:
+    """Воспроизведение записи в PlaybackSupervisor; статистика по окончании записи"""
+    from playback_supervisor import PlaybackSupervisor
+    from vlc_rc import AsyncVlcRc
+
+    holder = {}
+    replay = CecReplay(events, speed, on_finish=lambda: holder['supervisor'].stop())
+    rc = AsyncVlcRc(port=rc_port) if rc_port else None
+    supervisor = PlaybackSupervisor(video_file, rc=rc, cec_lines=replay.lines(),
+                                    shim_port=None, **kwargs)
+    holder['supervisor'] = supervisor
+    await supervisor.run()
+
+    stats = supervisor.stats()
+    stats.update({
+        'events': replay.emitted,
+        'elapsed': replay.elapsed,
+        'events_per_second': replay.events_per_second(),
+    })
+    return stats
+
+
+def main() -> int:
+    """Главная функция CLI"""
+    if len(sys.argv) < 3 or sys.argv[1] not in ('record', 'replay'):
+        print("Использование:\n"
+              "  cec_replay.py record <файл> [cec_device|-]\n"
+              "  cec_replay.py replay <файл> <видеофайл> [скорость] [rc_port]", file=sys.stderr)
+        return 1
+
+    if sys.argv[1] == 'record':
+        source_arg = sys.argv[3] if len(sys.argv) > 3 else CEC_DEVICE
+        with open(sys.argv[2], 'w', encoding='utf-8') as output:
+            try:
+                if source_arg == '-':
+                    count = record(output, sys.stdin)
+                else:
+                    process = subprocess.Popen(['cec-client', '-d', '8', '-t', 'r', source_arg],
+                                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                               text=True, errors='replace')
+                    try:
+                        count = record(output, process.stdout)
+                    finally:
+                        process.terminate()
+            except KeyboardInterrupt:
+                count = None
+            except FileNotFoundError as e:
+                print(f"ERROR: cec-client не найден: {e}", file=sys.stderr)
+                return 1
+        print(f"OK {count if count is not None else ''}".rstrip())
+        return 0
+
+    if len(sys.argv) < 4:
+        print("ERROR: укажите видеофайл", file=sys.stderr)
+        return 1
+    events = load_recording(sys.argv[2])
+    speed = float(sys.argv[4]) if len(sys.argv) > 4 else 1.0
+    rc_port = int(sys.argv[5]) if len(sys.argv) > 5 else None
+    stats = asyncio.run(replay_into_supervisor(events, sys.argv[3], speed, rc_port))
+    print(f"Событий: {stats['events']} за {stats['elapsed']:.2f} с "
+          f"({stats['events_per_second']:,.0f}/с), кнопок: {stats['keys']}")
+    print(f"Кнопка -> команда VLC: в среднем {stats['key_latency_avg_ms']:.2f} мс, "
+          f"макс {stats['key_latency_max_ms']:.2f} мс")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+credits_detect.py - Поиск титров серии по кадрам
+Версия: 1.0.0
+
+credits_duration в series_settings - одно число на сериал, а длина титров
+у серий разная: на одних супервизор ставит паузу посреди последней сцены,
+на других пропускает титры. Детектор смотрит последние ANALYSIS_WINDOW сек
+каждой серии и записывает её собственную длительность титров в
+episode_markers - супервизор (проверка маркеров, бывший monitor_skip_markers)
+берёт её вместо значения сериала.
+
+Кадры берутся из подключаемого источника с частотой SAMPLE_FPS в низком
+разрешении (WIDTH x HEIGHT, только яркость): ffmpeg (если установлен)
+отдаёт их через pipe уже уменьшенными, файлы YUV4MPEG2 (.y4m, тесты)
+читаются напрямую - плоскость Y, уменьшение усреднением блоков.
+
+Статистика считается сразу для всех кадров (numpy, без цикла по
+пикселям): средняя яркость и разброс, доля тёмных пикселей, смена сцены -
+всплеск средней разности с предыдущим кадром (ровная прокрутка титров и
+движение в кадре дают ровную разность, смена сцены - пик):
+
+  - кадр "как титры" - тёмный фон (доля тёмных пикселей от CREDITS_DARK),
+    чёрные кадры тоже сюда;
+  - окно SMOOTH сек - титры, если таких кадров от CREDITS_DENSITY и смен
+    сцены не больше MAX_CUTS (текст титров меняется плавно, у сцен - резко);
+  - титры - последний участок таких окон, доходящий до конца файла, не
+    короче MIN_CREDITS; начало уточняется по последней смене сцены в
+    первые SNAP сек (тёмная сцена перед титрами - ещё не титры) и
+    переносится на чёрные кадры перед ней (затемнение - начало титров).
+
+Значения, поставленные вручную (RED на титрах серии), не перезаписываются
+без --force. Серии анализируются в пуле процессов (по ядру на серию). Нужен
+numpy (pip install numpy) - только детектору, приставке при
+воспроизведении он не нужен.
+
+Использование:
+    credits_detect.py detect <папка|серия> [--force] [--dry-run] [--jobs N]
+                                               - титры серий -> episode_markers
+    credits_detect.py show <папка|серия>       - титры серий и сериала
+"""
+
+import json
+import shutil
+import subprocess
+import sys
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple, Type
+
+try:
+    import numpy as np
+except ImportError:       # Приставке без детектора numpy не нужен
+    np = None
+
+from vlc_db import VlcDatabase, extract_series_prefix, extract_series_suffix, split_jobs_option
+
+# Константы
+SAMPLE_FPS = 2            # Кадров в секунду для анализа
+WIDTH, HEIGHT = 64, 36    # Разрешение анализа (16:9)
+ANALYSIS_WINDOW = 300     # Сек конца серии
+DARK_LEVEL = 48           # Яркость пикселя ниже - тёмный
+BLACK_LEVEL = 16          # Средняя яркость кадра ниже - чёрный кадр
+CREDITS_DARK = 0.7        # Доля тёмных пикселей кадра титров
+CUT_LEVEL = 25.0          # Средняя разность соседних кадров выше - смена сцены,
+CUT_PEAK = 2.0            # если ещё и в CUT_PEAK раз больше, чем у соседних пар кадров
+SMOOTH = 10               # Окно сглаживания (сек)
+CREDITS_DENSITY = 0.8     # Доля кадров "как титры" в окне титров
+MAX_CUTS = 1              # Смен сцены в окне титров не больше
+MIN_CREDITS = 10          # Титры короче - не титры (сек)
+SNAP = 10                 # Сек начала титров, где ищется последняя смена сцены
+BLOCK = 64                # Кадров источника за одно чтение y4m (память на Pi)
+VIDEO_EXTENSIONS = {'.avi', '.mp4', '.mkv', '.mov', '.wmv', '.flv', '.m4v', '.y4m'}
+
+
+class FrameStats(NamedTuple):
+    """Статистика кадров (массивы по кадру)"""
+    luma: 'np.ndarray'        # Средняя яркость
+    spread: 'np.ndarray'      # Среднеквадратичное отклонение яркости
+    dark: 'np.ndarray'        # Доля тёмных пикселей
+    diff: 'np.ndarray'        # Средняя разность с предыдущим кадром (у первого 0)
+
+
+class CreditsResult(NamedTuple):
+    """Найденные титры серии"""
+    start: float              # Начало титров (сек от начала файла)
+    duration: float           # Длительность файла (сек)
+    frames: int               # Проанализировано кадров
+
+    @property
+    def credits(self) -> int:
+        """credits_duration: от начала титров до конца файла"""
+        return int(round(self.duration - self.start))
+
+
+# ============================================================================
+# ИСТОЧНИКИ КАДРОВ
+# ============================================================================
+
+def downscale(frames: 'np.ndarray', width: int = WIDTH, height: int = HEIGHT) -> 'np.ndarray':
+    """Кадры (N, H, W) -> (N, height, width) float32 усреднением блоков"""
+    count, rows, cols = frames.shape
+    block_rows, block_cols = max(1, rows // height), max(1, cols // width)
+    rows, cols = rows // block_rows, cols // block_cols
+    blocks = frames[:, :rows * block_rows, :cols * block_cols].reshape(
+        count, rows, block_rows, cols, block_cols)
+    return blocks.mean(axis=(2, 4), dtype=np.float32)
+
+
+class FrameSource(ABC):
+    """Источник кадров файла: яркость (N, HEIGHT, WIDTH) с шагом 1/fps сек"""
+
+    def __init__(self, path: str, fps: float = SAMPLE_FPS):
+        self.path = path
+        self.fps = fps
+
+    @abstractmethod
+    def duration(self) -> float:
+        """Длительность файла (сек)"""
+
+    @abstractmethod
+    def read(self, start: float, seconds: float) -> 'np.ndarray':
+        """Кадры участка [start, start + seconds)"""
+
+
+class FfmpegFrames(FrameSource):
+    """Кадры через ffmpeg: уменьшение и выборка кадров - в ffmpeg, в pipe - gray"""
+
+    def duration(self) -> float:
+        result = subprocess.run(
+            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'json', self.path],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=60)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.decode('utf-8', 'replace').strip() or 'ffprobe')
+        try:
+            return float(json.loads(result.stdout)['format']['duration'])
+        except (ValueError, KeyError) as e:
+            raise RuntimeError(f"ffprobe: нет длительности ({e})")
+
+    def read(self, start: float, seconds: float) -> 'np.ndarray':
+        result = subprocess.run(
+            ['ffmpeg', '-nostdin', '-v', 'error', '-ss', f"{start:.3f}", '-t', f"{seconds:.3f}",
+             '-i', self.path, '-an', '-sn',
+             '-vf', f"fps={self.fps},scale={WIDTH}:{HEIGHT}", '-pix_fmt', 'gray', '-f', 'rawvideo', '-'],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=max(120.0, seconds))
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.decode('utf-8', 'replace').strip() or 'ffmpeg')
+        frames = np.frombuffer(result.stdout, dtype=np.uint8)
+        frames = frames[:len(frames) // (WIDTH * HEIGHT) * WIDTH * HEIGHT]
+        return frames.reshape(-1, HEIGHT, WIDTH).astype(np.float32)
+
+
+class Y4mFrames(FrameSource):
+    """Кадры YUV4MPEG2: плоскость Y каждого n-го кадра, уменьшение усреднением"""
+
+    # Байт цветности на байт яркости по тегу C
+    CHROMA = {'420': 0.5, '422': 1.0, '444': 2.0, 'mono': 0.0}
+
+    def __init__(self, path: str, fps: float = SAMPLE_FPS):
+        super().__init__(path, fps)
+        with open(path, 'rb') as stream:
+            header = stream.readline()
+            frame_header = stream.readline(256)
+        if not header.startswith(b'YUV4MPEG2 ') or not frame_header.startswith(b'FRAME'):
+            raise RuntimeError(f"{Path(path).name}: не YUV4MPEG2")
+        tags = {token[:1]: token[1:] for token in header.decode('ascii', 'replace').split()[1:]}
+        try:
+            self.width, self.height = int(tags['W']), int(tags['H'])
+            numerator, denominator = tags.get('F', '25:1').split(':')
+            self.source_fps = int(numerator) / int(denominator)
+        except (KeyError, ValueError, ZeroDivisionError) as e:
+            raise RuntimeError(f"{Path(path).name}: заголовок YUV4MPEG2 ({e})")
+        chroma = tags.get('C', '420')
+        ratio = next((value for key, value in self.CHROMA.items() if chroma.startswith(key)), None)
+        if ratio is None:
+            raise RuntimeError(f"{Path(path).name}: цветность {chroma} не поддерживается")
+        self.luma_bytes = self.width * self.height
+        # Заголовки кадров без параметров - одинаковой длины, кадр n ищется без чтения
+        self.offset = len(header)
+        self.stride = len(frame_header) + self.luma_bytes + int(self.luma_bytes * ratio)
+        self.count = (Path(path).stat().st_size - self.offset) // self.stride
+
+    def duration(self) -> float:
+        return self.count / self.source_fps
+
+    def read(self, start: float, seconds: float) -> 'np.ndarray':
+        step = max(1, int(round(self.source_fps / self.fps)))
+        first = max(0, int(round(start * self.source_fps)))
+        last = min(self.count, int(round((start + seconds) * self.source_fps)))
+        indices = list(range(first, last, step))
+        blocks = []
+        with open(self.path, 'rb') as stream:
+            for block_start in range(0, len(indices), BLOCK):
+                planes = np.empty((len(indices[block_start:block_start + BLOCK]),
+                                   self.height, self.width), dtype=np.uint8)
+                for row, index in enumerate(indices[block_start:block_start + BLOCK]):
+                    stream.seek(self.offset + index * self.stride)
+                    if not stream.readline(256).startswith(b'FRAME'):
+                        raise RuntimeError(f"{Path(self.path).name}: кадр {index} повреждён")
+                    stream.readinto(memoryview(planes[row]).cast('B'))
+                blocks.append(downscale(planes))
+        if not blocks:
+            return np.empty((0, HEIGHT, WIDTH), dtype=np.float32)
+        return np.concatenate(blocks)
+
+
+SOURCES: Dict[str, Type[FrameSource]] = {'ffmpeg': FfmpegFrames, 'y4m': Y4mFrames}
+
+
+def open_source(path: str, fps: float = SAMPLE_FPS) -> FrameSource:
+    """Источник по файлу: .y4m читается напрямую, остальное - через ffmpeg"""
+    if Path(path).suffix.lower() == '.y4m':
+        return Y4mFrames(path, fps)
+    if not shutil.which('ffmpeg'):
+        raise RuntimeError("ffmpeg не установлен")
+    return FfmpegFrames(path, fps)
+
+
+# ============================================================================
+# АНАЛИЗ
+# ============================================================================
+
+def frame_stats(frames: 'np.ndarray') -> FrameStats:
+    """Яркость, разброс, доля тёмных пикселей и смена сцены - для всех кадров сразу"""
+    flat = frames.reshape(len(frames), -1)
+    diff = np.zeros(len(frames), dtype=np.float32)
+    if len(frames) > 1:
+        diff[1:] = np.abs(np.diff(flat, axis=0)).mean(axis=1)
+    return FrameStats(flat.mean(axis=1), flat.std(axis=1), (flat < DARK_LEVEL).mean(axis=1), diff)
+
+
+def scene_cuts(diff: 'np.ndarray') -> 'np.ndarray':
+    """Смены сцены: разность выше CUT_LEVEL и в CUT_PEAK раз выше, чем у соседей"""
+    padded = np.concatenate(([np.inf], diff, [np.inf]))
+    neighbours = np.minimum(padded[:-2], padded[2:])
+    cuts = (diff > CUT_LEVEL) & (diff > CUT_PEAK * neighbours)
+    cuts[0] = False
+    return cuts
+
+
+def find_credits(stats: FrameStats, fps: float = SAMPLE_FPS) -> Optional[int]:
+    """Номер первого кадра титров или None (титры должны доходить до конца)"""
+    count = len(stats.dark)
+    window = int(SMOOTH * fps)
+    if count < window:
+        return None
+    like = stats.dark >= CREDITS_DARK
+    cuts = scene_cuts(stats.diff)
+    # Окна [k, k + window): доля кадров "как титры" и число смен сцены
+    kernel = np.ones(window)
+    density = np.convolve(like, kernel, 'valid') / window
+    cut_count = np.convolve(cuts, kernel, 'valid')
+    good = (density >= CREDITS_DENSITY) & (cut_count <= MAX_CUTS)
+    if not good[-1]:
+        return None
+    bad = np.flatnonzero(~good)
+    first_window = bad[-1] + 1 if len(bad) else 0
+    # Первый кадр титров в окне; тёмная сцена до смены сцены - ещё не титры
+    start = first_window + int(np.argmax(like[first_window:]))
+    snap = np.flatnonzero(cuts[start:start + int(SNAP * fps)])
+    if len(snap):
+        start += int(snap[-1])
+    # Чёрные кадры перед титрами - уже титры
+    content = np.flatnonzero(stats.luma[:start] >= BLACK_LEVEL)
+    start = int(content[-1]) + 1 if len(content) else 0
+    if (count - start) < MIN_CREDITS * fps:
+        return None
+    return start
+
+
+def detect_credits(source: FrameSource, window: float = ANALYSIS_WINDOW) -> Optional[CreditsResult]:
+    """Титры в последних window сек файла"""
+    duration = source.duration()
+    start = max(0.0, duration - window)
+    frames = source.read(start, duration - start)
+    index = find_credits(frame_stats(frames), source.fps)
+    if index is None:
+        return None
+    return CreditsResult(start + index / source.fps, duration, len(frames))
+
+
+def _detect_file(path: str) -> Tuple[Optional[CreditsResult], Optional[str]]:
+    """Титры одного файла в процессе пула: (результат, ошибка)"""
+    try:
+        return detect_credits(open_source(path)), None
+    except (OSError, RuntimeError, subprocess.SubprocessError) as e:
+        return None, str(e)
+
+
+def detect_episodes(episodes: List[Path], jobs: Optional[int] = None
+                    ) -> List[Tuple[Path, Optional[CreditsResult], Optional[str]]]:
+    """Титры серий в пуле процессов: [(серия, результат, ошибка)]"""
+    paths = [str(path) for path in episodes]
+    if jobs == 1 or len(paths) < 2:
+        results = [_detect_file(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_detect_file, paths))
+    return [(path, result, error) for path, (result, error) in zip(episodes, results)]
+
+
+def apply_credits(episode: Path, credits: int, force: bool = False) -> bool:
+    """Титры серии в episode_markers; False - поставлены вручную (без force) или ошибка"""
+    with VlcDatabase() as db:
+        current = db.get_episode_credits(episode.name)
+        if current and current[1] == 'manual' and not force:
+            return False
+        return db.set_episode_credits(episode.name, credits, 'detected', time.time())
+
+
+def video_files(path: Path) -> List[Path]:
+    """Серия или все видеофайлы папки"""
+    if not path.is_dir():
+        return [path]
+    return sorted(entry for entry in path.iterdir()
+                  if entry.suffix.lower() in VIDEO_EXTENSIONS and entry.is_file())
+
+
+def show(episodes: List[Path]) -> None:
+    """Титры серий (episode_markers) и сериала (series_settings)"""
+    series = {}
+    with VlcDatabase() as db:
+        for path in episodes:
+            key = (extract_series_prefix(path.name), extract_series_suffix(path.name))
+            if key not in series:
+                series[key] = db.get_credits_duration(*key)
+            episode = db.get_episode_credits(path.name)
+            value = f"{episode[0]:>5}s {episode[1]:<8}" if episode else f"{'-':>6} {'сериал':<8}"
+            print(f"{value}  {path.name}")
+    for (prefix, suffix), credits in series.items():
+        if prefix:
+            print(f"Сериал {prefix} [{suffix}]: credits {credits if credits is not None else '-'}")
+
+
+def main() -> int:
+    """Главная функция CLI"""
+    try:
+        args, jobs = split_jobs_option(sys.argv[1:])
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    if len(args) < 2 or args[0] not in ('detect', 'show'):
+        print("Использование: credits_detect.py detect <папка|серия> [--force] [--dry-run] [--jobs N]"
+              " | show <папка|серия>", file=sys.stderr)
+        return 1
+
+    with VlcDatabase() as db:
+        db.init_db()
+
+    episodes = video_files(Path(args[1]).resolve())
+    if not episodes:
+        print("ERROR: видеофайлы не найдены", file=sys.stderr)
+        return 1
+    if args[0] == 'show':
+        show(episodes)
+        return 0
+    if np is None:
+        print("❌ Ошибка: numpy не установлен!", file=sys.stderr)
+        print("Установите: pip install numpy", file=sys.stderr)
+        return 1
+
+    start = time.monotonic()
+    found = 0
+    for path, result, error in detect_episodes(episodes, jobs):
+        if error:
+            print(f"{'ошибка':>8}  {path.name}: {error}", file=sys.stderr)
+            continue
+        if result is None:
+            print(f"{'-':>8}  {path.name}")
+            continue
+        found += 1
+        note = ""
+        if '--dry-run' not in sys.argv and not apply_credits(path, result.credits, '--force' in sys.argv):
+            note = " (поставлены вручную, --force - перезаписать)"
+        print(f"{result.credits:>7}s  {path.name} (с {result.start:.1f}s){note}")
+    print(f"Серий: {len(episodes)}, титры найдены в {found}, {time.monotonic() - start:.1f} с"
+          f"{' (не записано)' if '--dry-run' in sys.argv else ''}")
+    return 0 if found else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
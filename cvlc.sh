@@ -13,6 +13,33 @@ if [ -z "$VLC_PATH" ]; then
     exit 1
 fi
 
+# Локальный кэш (media_cache.py): файл, полностью скопированный на SD/USB,
+# открываем с локального диска вместо sshfs. Кэш выключен или копии нет -
+# аргумент не меняется
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+DB_PATH="${VLC_DB_PATH:-${SCRIPT_DIR}/vlc_media.db}"
+
+# Кэш выключен по умолчанию: cache_enabled - одним запросом sqlite3, python
+# (импорт vlc_db, config) запускается только для включённого кэша; без
+# sqlite3 решает media_cache.py lookup
+CACHE_ENABLED=1
+if command -v sqlite3 >/dev/null 2>&1; then
+    CACHE_ENABLED=$(sqlite3 -readonly "$DB_PATH" \
+        "SELECT 1 FROM config WHERE key = 'cache_enabled' AND lower(value) IN ('true', '1', 'yes');" 2>/dev/null)
+fi
+
+if [ -n "$CACHE_ENABLED" ] && [ -f "$SCRIPT_DIR/media_cache.py" ]; then
+    CACHED_ARGS=()
+    for ARG in "$@"; do
+        if [ -f "$ARG" ] && LOCAL=$(python3 "$SCRIPT_DIR/media_cache.py" lookup "$ARG" 2>/dev/null); then
+            CACHED_ARGS+=("$LOCAL")
+        else
+            CACHED_ARGS+=("$ARG")
+        fi
+    done
+    set -- "${CACHED_ARGS[@]}"
+fi
+
 # Определяем ОС
 OS_TYPE=$(uname -s)
 
@@ -1,13 +1,14 @@
 #!/bin/bash
 
 # db-manager.sh - Библиотека для работы с SQLite БД (через Python vlc_db.py)
-# Версия: 0.3.0
-# Дата: 04.12.2025
-# Изменения: Рефакторинг для защиты от SQL injection - все SQL операции через vlc_db.py
+# Версия: 0.4.0
+# Дата: 19.10.2026
+# Изменения: db_resolve_markers - маркеры серии с наследованием от сериала одним вызовом
+#   0.3.0 (04.12.2025) - Рефакторинг для защиты от SQL injection - все SQL операции через vlc_db.py
 
 # Константы
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
-DB_PATH="${SCRIPT_DIR}/vlc_media.db"
+DB_PATH="${VLC_DB_PATH:-${SCRIPT_DIR}/vlc_media.db}"   # VLC_DB_PATH передаётся и в vlc_db.py
 PYTHON_DB="${SCRIPT_DIR}/vlc_db.py"
 
 # ============================================================================
@@ -129,7 +130,8 @@ extract_series_key() {
 
 # Сохранение прогресса воспроизведения
 # Параметры: $1 - filename, $2 - position, $3 - duration, $4 - percent, 
-#            $5 - series_prefix (optional), $6 - series_suffix (optional)
+#            $5 - series_prefix (optional), $6 - series_suffix (optional),
+#            $7 - directory (optional, для агрегатов прогресса папок)
 db_save_playback() {
     local filename="$1"
     local position="$2"
@@ -137,8 +139,9 @@ db_save_playback() {
     local percent="$4"
     local series_prefix="${5:-}"
     local series_suffix="${6:-}"
+    local directory="${7:-}"
     
-    python3 "$PYTHON_DB" save_playback "$filename" "$position" "$duration" "$percent" "$series_prefix" "$series_suffix" > /dev/null 2>&1
+    python3 "$PYTHON_DB" save_playback "$filename" "$position" "$duration" "$percent" "$series_prefix" "$series_suffix" "$directory" > /dev/null 2>&1
 }
 
 # Получение данных воспроизведения
@@ -175,6 +178,16 @@ db_get_playback_batch_status() {
     python3 "$PYTHON_DB" get_batch_status "$directory" "${filenames[@]}"
 }
 
+# Агрегаты прогресса подпапок + обновление количества файлов текущей папки (1 вызов)
+# Параметры: $1 - directory, $2 - file_count (или "-"), $3+ - имена подпапок
+# Возвращает: dirname|watched|partial|total (по строке на подпапку)
+db_get_dir_progress() {
+    local directory="$1"
+    local file_count="$2"
+    shift 2
+    python3 "$PYTHON_DB" dir_progress "$directory" "$file_count" "$@"
+}
+
 # ============================================================================
 # SERIES SETTINGS ФУНКЦИИ
 # ============================================================================
@@ -244,6 +257,16 @@ db_get_skip_markers() {
     python3 "$PYTHON_DB" get-skip-markers "$series_prefix" "$series_suffix"
 }
 
+# Действующие маркеры и флаги серии (серия важнее сериала) - один вызов
+# вместо get_settings + get-skip-markers + get-credits-duration
+# Параметры: $1 - имя или путь файла серии
+# Возвращает: autoplay|skip_intro|skip_outro|intro_start|intro_end|credits_duration|outro_triggered
+db_resolve_markers() {
+    local filename=$(basename "$1")
+    
+    python3 "$PYTHON_DB" resolve-markers "$filename"
+}
+
 # Установка intro markers (начало и конец)
 # Параметры: $1 - series_prefix, $2 - series_suffix, $3 - start (секунды), $4 - end (секунды)
 # Возвращает: 0 при успехе, 1 при ошибке
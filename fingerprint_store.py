@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+fingerprint_store.py - Хранилище отпечатков звука с инвертированным индексом
+Версия: 1.0.0
+
+Поиск заставки и титров сравнивает отпечатки тысяч серий (intro_detect.py:
+uint32 на кадр 32 мс, 75 КБ на 10 минут). BLOB на серию в SQLite при
+каждом чтении копируется в память, а перебор пар серий - FFT с каждой.
+Хранилище в папке fingerprint_dir:
+
+  - frames.u32        - отпечатки всех серий подряд (uint32, только
+                        дописывается), читаются через np.memmap;
+  - index-NNNNNN.npy  - сегменты инвертированного индекса: массив 2 x N
+                        (значение отпечатка по возрастанию, позиция кадра
+                        в frames.u32), np.load(mmap_mode='r');
+  - манифест - таблица fingerprint_manifest в vlc_media.db: файл, размер и
+    время изменения, сериал (series_prefix/suffix), начало и длина в
+    frames.u32.
+
+Добавление серии дописывает кадры и новый сегмент индекса; последние
+сегменты сливаются, пока новый не меньше половины предыдущего (как в
+LSM-дереве: O(log N) сегментов, запись переписывается O(log N) раз), но
+не больше MAX_SEGMENT записей. В памяти - только сливаемые сегменты и
+страницы memmap, которые читает поиск.
+
+Поиск: значение каждого кадра запроса и значения с одним изменённым битом
+(PROBE_BITS) ищутся в сегментах (searchsorted), совпадения голосуют за
+(серия, сдвиг = кадр серии - кадр запроса). У общей заставки - десятки
+голосов на одном сдвиге (±1 кадр), случайные совпадения 32-битных значений
+редки. Значения с числом позиций больше MAX_POSTINGS (повторяющийся звук)
+пропускаются.
+
+Изменённые серии заменяются в манифесте; старые кадры и позиции в индексе
+остаются до compact.
+
+Использование:
+    fingerprint_store.py status              - серии, кадры, сегменты, размер
+    fingerprint_store.py match <серия>       - похожие серии сериала (из хранилища)
+    fingerprint_store.py compact             - переписать без заменённых серий
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:       # Приставке без анализатора numpy не нужен
+    np = None
+
+from Py.config.config_manager import load_value
+from vlc_db import SCRIPT_DIR, VlcDatabase, extract_series_prefix, extract_series_suffix
+
+# Константы
+FRAMES_FILE = "frames.u32"
+SEGMENT_GLOB = "index-*.npy"
+DEFAULT_STORE_DIR = SCRIPT_DIR / "fingerprints"
+PROBE_BITS = 0            # 1 - искать и значения с одним изменённым битом (шумный звук, x33 поиска)
+MAX_POSTINGS = 64         # Значение встречается чаще - не используется для поиска
+MIN_VOTES = 8             # Меньше голосов за сдвиг - случайные совпадения
+SHIFT_SLACK = 1           # Голоса соседних сдвигов (± кадр) складываются
+MAX_SEGMENT = 1 << 22     # Записей в сегменте: больше не сливаются (память слияния ~64 МБ)
+
+
+class Match(NamedTuple):
+    """Серия хранилища, похожая на запрос"""
+    episode_id: int
+    path: str
+    shift: int            # Кадр серии = кадр запроса + shift
+    votes: int
+
+
+def load_directory(db_path: Optional[Path] = None) -> Path:
+    """Папка хранилища fingerprint_dir из таблицы config (пусто - DEFAULT_STORE_DIR)"""
+    directory = load_value('fingerprint_dir', '', db_path, "Хранилище отпечатков")
+    return Path(directory) if directory else DEFAULT_STORE_DIR
+
+
+class FingerprintStore:
+    """Отпечатки серий в memmap-файлах и инвертированный индекс значение -> позиции"""
+
+    def __init__(self, directory: Path, probe_bits: int = PROBE_BITS):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.frames_path = self.directory / FRAMES_FILE
+        self.probe_bits = probe_bits
+        self._frames: Optional['np.ndarray'] = None
+        self._segments: Optional[List[Tuple[Path, 'np.ndarray']]] = None
+        self._live: Optional[Tuple['np.ndarray', ...]] = None
+
+        # Счётчики поиска
+        self.queries = 0
+        self.lookups = 0
+        self.postings = 0
+        self.query_seconds = 0.0
+        self.merges = 0
+
+    # ------------------------------------------------------------------
+    # Чтение
+    # ------------------------------------------------------------------
+
+    def _frames_array(self) -> 'np.ndarray':
+        count = self.frames_path.stat().st_size // 4 if self.frames_path.exists() else 0
+        if self._frames is None or len(self._frames) != count:
+            self._frames = (np.memmap(self.frames_path, dtype=np.uint32, mode='r', shape=(count,))
+                            if count else np.zeros(0, dtype=np.uint32))
+        return self._frames
+
+    def segments(self) -> List[Tuple[Path, 'np.ndarray']]:
+        if self._segments is None:
+            self._segments = [(path, np.load(path, mmap_mode='r'))
+                              for path in sorted(self.directory.glob(SEGMENT_GLOB))]
+        return self._segments
+
+    def get(self, path: str, size: int, mtime: float, seconds: int,
+            version: int) -> Optional['np.ndarray']:
+        """Отпечаток файла, если он не изменился (memmap, без копирования)"""
+        with VlcDatabase() as db:
+            entry = db.get_fingerprint_entry(path)
+        if entry is None or tuple(entry[1:5]) != (size, mtime, seconds, version):
+            return None
+        start, frames = entry[5:7]
+        return self._frames_array()[start:start + frames]
+
+    def fingerprint(self, episode_id: int) -> Optional['np.ndarray']:
+        for entry_id, _, start, frames, _, _ in self._entries():
+            if entry_id == episode_id:
+                return self._frames_array()[start:start + frames]
+        return None
+
+    def _entries(self) -> List[Tuple[int, str, int, int, str, str]]:
+        with VlcDatabase() as db:
+            return db.get_fingerprint_entries()
+
+    def _live_ranges(self) -> Tuple['np.ndarray', ...]:
+        """Серии манифеста по началу в frames.u32: (начала, концы, id, пути, сериалы)"""
+        if self._live is None:
+            entries = sorted(self._entries(), key=lambda entry: entry[2])
+            starts = np.array([entry[2] for entry in entries], dtype=np.int64)
+            ends = starts + np.array([entry[3] for entry in entries], dtype=np.int64)
+            ids = np.array([entry[0] for entry in entries], dtype=np.int64)
+            paths = [entry[1] for entry in entries]
+            series = [(entry[4], entry[5]) for entry in entries]
+            self._live = (starts, ends, ids, paths, series)
+        return self._live
+
+    # ------------------------------------------------------------------
+    # Запись
+    # ------------------------------------------------------------------
+
+    def add(self, path: str, values: 'np.ndarray', size: int, mtime: float, seconds: int,
+            version: int) -> Optional[int]:
+        """Дописать отпечаток серии (замена прежнего отпечатка файла); id в манифесте"""
+        values = np.ascontiguousarray(values, dtype=np.uint32)
+        count = self.frames_path.stat().st_size if self.frames_path.exists() else 0
+        with open(self.frames_path, 'ab') as stream:
+            if count % 4:
+                stream.truncate(count - count % 4)   # Недописанный кадр после сбоя
+            start = stream.seek(0, os.SEEK_END) // 4
+            stream.write(values.tobytes())
+        self._write_segment(values, start)
+
+        name = Path(path).name
+        with VlcDatabase() as db:
+            episode_id = db.add_fingerprint_entry(
+                path, size, mtime, seconds, version,
+                extract_series_prefix(name), extract_series_suffix(name),
+                start, len(values), time.time())
+        self._live = None
+        self._merge()
+        return episode_id
+
+    def _next_segment(self) -> Path:
+        names = [path.stem for path, _ in self.segments()]
+        number = max((int(name.split('-')[1]) for name in names), default=0) + 1
+        return self.directory / f"index-{number:06d}.npy"
+
+    def _write_segment(self, values: 'np.ndarray', start: int) -> None:
+        keep = np.flatnonzero(values)                # Тишина (0) не индексируется
+        if not len(keep):
+            return
+        order = np.argsort(values[keep], kind='stable')
+        segment = np.empty((2, len(keep)), dtype=np.uint32)
+        segment[0] = values[keep][order]
+        segment[1] = keep[order] + start
+        self._save_segment(segment)
+
+    def _save_segment(self, segment: 'np.ndarray') -> None:
+        path = self._next_segment()
+        temp = path.with_suffix('.tmp')
+        with open(temp, 'wb') as stream:
+            np.save(stream, segment)
+        os.replace(temp, path)
+        self._segments = None
+
+    def _merge(self) -> None:
+        """Слить последние сегменты, пока новый не меньше половины предыдущего"""
+        segments = self.segments()
+        while (len(segments) >= 2 and segments[-1][1].shape[1] * 2 >= segments[-2][1].shape[1]
+               and segments[-1][1].shape[1] + segments[-2][1].shape[1] <= MAX_SEGMENT):
+            (old_path, old), (new_path, new) = segments[-2], segments[-1]
+            merged = np.concatenate((old, new), axis=1)
+            merged = merged[:, np.argsort(merged[0], kind='stable')]
+            self._save_segment(merged)
+            old_path.unlink()
+            new_path.unlink()
+            self._segments = None
+            self.merges += 1
+            segments = self.segments()
+
+    def compact(self) -> int:
+        """Переписать кадры без заменённых серий, индекс - заново; освобождено байт"""
+        before = self.frames_path.stat().st_size if self.frames_path.exists() else 0
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        temp = self.frames_path.with_suffix('.tmp')
+        frames = self._frames_array()
+        starts = []
+        with open(temp, 'wb') as stream:
+            for _, _, start, count, _, _ in entries:
+                starts.append(stream.tell() // 4)
+                stream.write(np.asarray(frames[start:start + count]).tobytes())
+        self._frames = None
+        for path, _ in self.segments():
+            path.unlink()
+        self._segments = None
+        os.replace(temp, self.frames_path)
+        with VlcDatabase() as db:
+            for entry, start in zip(entries, starts):
+                db.update_fingerprint_start(entry[0], start)
+        for entry, start in zip(entries, starts):
+            self._write_segment(np.asarray(self._frames_array()[start:start + entry[3]]), start)
+            self._merge()
+        self._live = None
+        return before - self.frames_path.stat().st_size
+
+    # ------------------------------------------------------------------
+    # Поиск
+    # ------------------------------------------------------------------
+
+    def match(self, values: 'np.ndarray', series: Optional[Tuple[str, str]] = None,
+              exclude: Iterable[int] = (), limit: int = 3,
+              min_votes: int = MIN_VOTES) -> List[Match]:
+        """Серии с общим звуком: лучший сдвиг каждой, по убыванию голосов"""
+        started = time.perf_counter()
+        starts, ends, ids, paths, names = self._live_ranges()
+        if not len(ids):
+            return []
+        excluded = set(exclude)
+        allowed = np.array([(series is None or name == series) and episode_id not in excluded
+                            for episode_id, name in zip(ids.tolist(), names)])
+
+        # Запрос: значение кадра и (PROBE_BITS = 1) значения с одним изменённым битом
+        frames = np.flatnonzero(values)
+        keys = np.asarray(values, dtype=np.uint32)[frames]
+        if self.probe_bits:
+            flips = np.uint32(1) << np.arange(32, dtype=np.uint32)
+            keys = np.concatenate((keys, (keys[:, None] ^ flips).ravel()))
+            frames = np.concatenate((frames, np.repeat(frames, 32)))
+        order = np.argsort(keys, kind='stable')     # Поиск по возрастанию - ближе в кэше CPU
+        keys, frames = keys[order], frames[order]
+        self.queries += 1
+        self.lookups += len(keys)
+
+        hit_episodes, hit_shifts = [], []
+        for _, segment in self.segments():
+            low = np.searchsorted(segment[0], keys, 'left')
+            counts = np.searchsorted(segment[0], keys, 'right') - low
+            counts[counts > MAX_POSTINGS] = 0
+            total = int(counts.sum())
+            if not total:
+                continue
+            self.postings += total
+            offsets = np.repeat(low - np.cumsum(counts) + counts, counts) + np.arange(total)
+            positions = segment[1][offsets].astype(np.int64)
+            query_frames = np.repeat(frames, counts)
+            # Позиция -> серия манифеста (заменённые серии - вне диапазонов)
+            index = np.searchsorted(starts, positions, 'right') - 1
+            valid = (index >= 0) & (positions < ends[np.maximum(index, 0)])
+            valid &= allowed[np.maximum(index, 0)]
+            hit_episodes.append(index[valid])
+            hit_shifts.append(positions[valid] - starts[index[valid]] - query_frames[valid])
+
+        results: List[Match] = []
+        if hit_episodes:
+            episodes = np.concatenate(hit_episodes)
+            shifts = np.concatenate(hit_shifts)
+            if len(episodes):
+                results = self._best_shifts(episodes, shifts, ids, paths, min_votes)
+        self.query_seconds += time.perf_counter() - started
+        return results[:limit]
+
+    @staticmethod
+    def _best_shifts(episodes: 'np.ndarray', shifts: 'np.ndarray', ids: 'np.ndarray',
+                     paths: List[str], min_votes: int) -> List[Match]:
+        """Лучший сдвиг каждой серии: голоса сдвига и соседних (± SHIFT_SLACK)"""
+        base = int(shifts.min()) - SHIFT_SLACK
+        span = int(shifts.max()) - base + 1 + SHIFT_SLACK
+        keys = episodes * span + (shifts - base)
+        unique, votes = np.unique(keys, return_counts=True)
+        total = votes.copy()
+        for step in range(1, SHIFT_SLACK + 1):
+            for neighbour in (unique - step, unique + step):
+                position = np.searchsorted(unique, neighbour)
+                found = (position < len(unique)) & (unique[np.minimum(position, len(unique) - 1)] == neighbour)
+                total[found] += votes[position[found]]
+        episode_of, shift_of = np.divmod(unique, span)
+        # Первый в каждой серии после сортировки по голосам - лучший сдвиг
+        order = np.lexsort((-total, episode_of))
+        first = order[np.concatenate(([True], episode_of[order][1:] != episode_of[order][:-1]))]
+        first = first[total[first] >= min_votes]
+        first = first[np.argsort(-total[first], kind='stable')]
+        return [Match(int(ids[episode_of[i]]), paths[episode_of[i]], int(shift_of[i]) + base,
+                      int(total[i])) for i in first]
+
+    def stats(self) -> Dict[str, float]:
+        starts, ends, _, _, _ = self._live_ranges()
+        frames = len(self._frames_array())
+        return {
+            'episodes': len(starts),
+            'frames': frames,
+            'dead_frames': frames - int((ends - starts).sum()),
+            'segments': len(self.segments()),
+            'index_entries': sum(segment.shape[1] for _, segment in self.segments()),
+            'bytes': sum(path.stat().st_size for path in self.directory.iterdir() if path.is_file()),
+            'query_ms': 1000 * self.query_seconds / self.queries if self.queries else 0.0,
+        }
+
+
+def main() -> int:
+    """Главная функция CLI"""
+    if len(sys.argv) < 2 or sys.argv[1] not in ('status', 'match', 'compact') or (
+            sys.argv[1] == 'match' and len(sys.argv) < 3):
+        print("Использование: fingerprint_store.py status | match <серия> | compact", file=sys.stderr)
+        return 1
+    if np is None:
+        print("❌ Ошибка: numpy не установлен!", file=sys.stderr)
+        print("Установите: pip install numpy", file=sys.stderr)
+        return 1
+
+    with VlcDatabase() as db:
+        db.init_db()
+    store = FingerprintStore(load_directory())
+
+    if sys.argv[1] == 'status':
+        stats = store.stats()
+        print(f"Серий: {stats['episodes']}, кадров: {stats['frames']} "
+              f"(заменённых {stats['dead_frames']}), сегментов индекса: {stats['segments']}, "
+              f"{stats['bytes'] / 1024 / 1024:.1f} МБ ({store.directory})")
+        return 0
+    if sys.argv[1] == 'compact':
+        print(f"OK {store.compact()}")
+        return 0
+
+    path = str(Path(sys.argv[2]).resolve())
+    with VlcDatabase() as db:
+        entry = db.get_fingerprint_entry(path)
+    if entry is None:
+        print(f"ERROR: отпечатка нет (intro_detect.py detect): {path}", file=sys.stderr)
+        return 1
+    name = Path(path).name
+    values = np.asarray(store.fingerprint(entry[0]))
+    matches = store.match(values, (extract_series_prefix(name), extract_series_suffix(name)),
+                          exclude=[entry[0]], limit=10)
+    from intro_detect import FRAME_SECONDS
+    for match in matches:
+        print(f"{match.votes:>5} голосов, сдвиг {match.shift * FRAME_SECONDS:>+8.1f} с  "
+              f"{Path(match.path).name}")
+    print(f"Поиск: {store.stats()['query_ms']:.1f} мс")
+    return 0 if matches else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+intro_detect.py - Поиск заставки по звуку серий сезона
+Версия: 1.1.0
+
+Заставка сериала - один и тот же звук в каждой серии, но после разного по
+длине вступления (cold open). Анализатор декодирует начало каждой серии
+(ANALYSIS_WINDOW сек, моно SAMPLE_RATE Гц), строит компактный отпечаток и
+ищет общий участок у соседних серий:
+
+  - отпечаток кадра (FRAME отсчётов, шаг HOP) - 32 бита: знак изменения во
+    времени разности энергий соседних полос (33 полосы 300-2000 Гц, как
+    у Haitsma-Kalker); тишина - 0; 10 мин звука - 75 КБ (uint32);
+  - сдвиг между сериями - максимум взаимной корреляции битов (±1) через FFT
+    по всем сдвигам сразу;
+  - при лучших сдвигах кадры сравниваются побитово (не больше MATCH_BITS
+    различий из 32); участок, где совпадений заметно больше MIN_DENSITY,
+    длиной от MIN_INTRO сек - заставка в обеих сериях.
+
+Маркеры сериала (series_settings: одни на prefix/suffix) - медиана начала и
+конца заставки по сериям, записываются через set_intro_markers. Маркеры,
+уже стоящие в series_settings, не перезаписываются без --force.
+
+Декодер подключаемый: ffmpeg (если установлен) или WAV (wave, тесты).
+Отпечатки считаются в пуле процессов (по ядру на серию) и хранятся в
+fingerprint_store.py - повторный анализ сезона не декодирует серии, у
+которых не изменились размер и время изменения. Пары серий с общим звуком
+и их сдвиг находит инвертированный индекс хранилища за миллисекунды; FFT
+по всем сдвигам соседних серий - только если индекс ничего не нашёл. Нужен
+numpy (pip install numpy) - только анализатору, приставке при
+воспроизведении он не нужен.
+
+Использование:
+    intro_detect.py detect <папка|серия> [--force] [--dry-run] [--jobs N]
+                                               - заставка сезона -> маркеры
+    intro_detect.py compare <серия1> <серия2>  - общий участок двух серий
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:       # Приставке без анализатора numpy не нужен
+    np = None
+
+from fingerprint_store import FingerprintStore, load_directory
+from vlc_db import (VlcDatabase, extract_episode, extract_series_prefix, extract_series_suffix,
+                    split_jobs_option)
+
+# Константы
+SAMPLE_RATE = 8000        # Гц после декодирования (моно)
+FRAME = 2048              # Отсчётов в кадре спектра (0.256 с)
+HOP = 256                 # Шаг кадров (32 мс) - перекрытие 7/8 для устойчивости битов
+BAND_LOW, BAND_HIGH = 300, 2000
+BITS = 32                 # Бит отпечатка кадра (BITS + 1 полос)
+BLOCK_FRAMES = 1024       # Кадров в одном блоке FFT (память на Pi)
+SILENCE_RMS = 1e-3        # Кадр тише - тишина (отпечаток 0)
+ANALYSIS_WINDOW = 600     # Сек начала серии для поиска заставки
+MIN_INTRO = 15.0          # Общий участок короче - не заставка (сек)
+MATCH_BITS = 10           # Различий битов кадра не больше - кадры совпадают
+MIN_DENSITY = 0.2         # Доля совпадающих кадров выше - общий участок
+PEAKS = 3                 # Проверяемых сдвигов с наибольшей корреляцией
+FINGERPRINT_VERSION = 1   # Меняется с алгоритмом - старый кэш не используется
+FRAME_SECONDS = HOP / SAMPLE_RATE
+VIDEO_EXTENSIONS = {'.avi', '.mp4', '.mkv', '.mov', '.wmv', '.flv', '.m4v', '.wav'}
+
+Decoder = Callable[[str, float, int], 'np.ndarray']
+
+
+class Segment(NamedTuple):
+    """Общий участок двух серий (сек от начала каждой)"""
+    a_start: float
+    a_end: float
+    b_start: float
+    b_end: float
+
+    @property
+    def length(self) -> float:
+        return self.a_end - self.a_start
+
+
+class SeasonResult(NamedTuple):
+    episodes: List[Tuple[Path, Optional[Segment]]]   # Серия и её заставка (a_* - в этой серии)
+    markers: Optional[Tuple[int, int]]               # Маркеры сериала (медиана)
+    decoded: int                                     # Серий декодировано (остальные - из кэша)
+    elapsed: float
+
+
+# ============================================================================
+# ДЕКОДЕРЫ
+# ============================================================================
+
+def ffmpeg_decoder(path: str, seconds: float, rate: int = SAMPLE_RATE) -> 'np.ndarray':
+    """Звук начала файла через ffmpeg: моно float32 [-1, 1]"""
+    result = subprocess.run(
+        ['ffmpeg', '-nostdin', '-v', 'error', '-t', str(seconds), '-i', path,
+         '-vn', '-ac', '1', '-ar', str(rate), '-f', 's16le', '-'],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=max(60.0, seconds))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode('utf-8', 'replace').strip() or 'ffmpeg')
+    return np.frombuffer(result.stdout, dtype='<i2').astype(np.float32) / 32768
+
+
+def wav_decoder(path: str, seconds: float, rate: int = SAMPLE_RATE) -> 'np.ndarray':
+    """Звук начала WAV (PCM 16 бит): моно float32, частота приводится к rate"""
+    with wave.open(path, 'rb') as stream:
+        if stream.getsampwidth() != 2:
+            raise RuntimeError(f"WAV {stream.getsampwidth() * 8} бит не поддерживается")
+        source_rate = stream.getframerate()
+        channels = stream.getnchannels()
+        data = stream.readframes(int(seconds * source_rate))
+    samples = np.frombuffer(data, dtype='<i2').astype(np.float32) / 32768
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if source_rate != rate and len(samples):
+        positions = np.arange(0, len(samples) * rate / source_rate) * source_rate / rate
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+    return samples
+
+
+DECODERS: Dict[str, Decoder] = {'ffmpeg': ffmpeg_decoder, 'wav': wav_decoder}
+
+
+def default_decoder() -> str:
+    return 'ffmpeg' if shutil.which('ffmpeg') else 'wav'
+
+
+# ============================================================================
+# ОТПЕЧАТКИ
+# ============================================================================
+
+def _band_edges() -> 'np.ndarray':
+    """Границы BITS + 1 полос (номера бинов rfft) - логарифмически"""
+    hz = np.geomspace(BAND_LOW, BAND_HIGH, BITS + 2)
+    return np.round(hz * FRAME / SAMPLE_RATE).astype(np.intp)
+
+
+def fingerprint(samples: 'np.ndarray') -> 'np.ndarray':
+    """uint32 на кадр (шаг HOP); 0 - тишина"""
+    frames = (len(samples) - FRAME) // HOP + 1
+    if frames < 2:
+        return np.zeros(0, dtype=np.uint32)
+    edges = _band_edges()
+    window = np.hanning(FRAME).astype(np.float32)
+    energies = np.empty((frames, BITS + 1), dtype=np.float32)
+    silent = np.empty(frames, dtype=bool)
+    views = np.lib.stride_tricks.sliding_window_view(samples, FRAME)[::HOP]
+    # Блоками - спектр всех кадров 10 минут сразу занял бы сотни МБ
+    for first in range(0, frames, BLOCK_FRAMES):
+        block = views[first:first + BLOCK_FRAMES]
+        power = np.abs(np.fft.rfft(block * window, axis=1)) ** 2
+        energies[first:first + len(block)] = np.add.reduceat(power[:, :edges[-1]], edges[:-1], axis=1)
+        silent[first:first + len(block)] = np.sqrt((block ** 2).mean(axis=1)) < SILENCE_RMS
+
+    spread = energies[:, :-1] - energies[:, 1:]
+    bits = (spread[1:] - spread[:-1]) > 0
+    values = (bits.astype(np.uint32) << np.arange(BITS, dtype=np.uint32)).sum(axis=1, dtype=np.uint32)
+    values[values == 0] = 1          # 0 зарезервирован за тишиной
+    values[silent[1:] | silent[:-1]] = 0
+    return values
+
+
+def fingerprint_file(path: str, decoder: str = 'ffmpeg',
+                     seconds: float = ANALYSIS_WINDOW) -> bytes:
+    """Отпечаток начала файла (для пула процессов - результат в байтах)"""
+    return fingerprint(DECODERS[decoder](path, seconds, SAMPLE_RATE)).tobytes()
+
+
+def _bit_matrix(values: 'np.ndarray') -> 'np.ndarray':
+    """Кадры x биты: +1/-1, у тишины - 0 (не влияет на корреляцию)"""
+    bits = (values[:, None] >> np.arange(BITS, dtype=np.uint32)) & 1
+    return (bits.astype(np.float32) * 2 - 1) * (values != 0)[:, None]
+
+
+def _best_lags(a: 'np.ndarray', b: 'np.ndarray', peaks: int = PEAKS) -> List[int]:
+    """Сдвиги (кадр a = кадр b + сдвиг) с наибольшей корреляцией битов"""
+    size = 1 << int(len(a) + len(b) - 1).bit_length()
+    spectrum = np.fft.rfft(_bit_matrix(a), size, axis=0) * np.conj(np.fft.rfft(_bit_matrix(b), size, axis=0))
+    correlation = np.fft.irfft(spectrum, size, axis=0).sum(axis=1)
+    separation = int(MIN_INTRO / FRAME_SECONDS)
+    lags: List[int] = []
+    for index in np.argsort(correlation)[::-1]:
+        lag = int(index) if index < size // 2 else int(index) - size
+        if -len(b) < lag < len(a) and all(abs(lag - other) >= separation for other in lags):
+            lags.append(lag)
+            if len(lags) == peaks:
+                break
+    return lags
+
+
+def _best_run(matches: 'np.ndarray') -> Tuple[int, int]:
+    """Участок с наибольшим перевесом совпадений: (первый, последний+1)
+
+    Отдельные кадры заставки не совпадают (шум, тихие места), поэтому кадр
+    даёт +(1 - MIN_DENSITY) при совпадении и -MIN_DENSITY без него (случайно
+    совпадает ~3% кадров, внутри заставки - около половины); участок с
+    максимальной суммой (Kadane через накопленную сумму) точно ложится на
+    границы заставки и переживает провалы внутри неё.
+    """
+    if not len(matches):
+        return 0, 0
+    total = np.concatenate(([0.0], np.cumsum(matches - MIN_DENSITY)))
+    lowest = np.minimum.accumulate(total)
+    end = int(np.argmax(total - lowest))
+    start = int(np.flatnonzero(total[:end + 1] == lowest[end])[-1])
+    return start, end
+
+
+def match_segment(a: 'np.ndarray', b: 'np.ndarray', min_length: float = MIN_INTRO,
+                  lags: Optional[List[int]] = None) -> Optional[Segment]:
+    """Самый длинный общий участок двух отпечатков или None
+
+    lags - проверяемые сдвиги (кадр a = кадр b + сдвиг), по умолчанию - лучшие
+    по взаимной корреляции.
+    """
+    if not len(a) or not len(b):
+        return None
+    best: Optional[Tuple[int, int, int]] = None
+    for lag in (lags if lags is not None else _best_lags(a, b)):
+        a_offset, b_offset = max(lag, 0), max(-lag, 0)
+        length = min(len(a) - a_offset, len(b) - b_offset)
+        a_part, b_part = a[a_offset:a_offset + length], b[b_offset:b_offset + length]
+        differing = np.unpackbits((a_part ^ b_part).view(np.uint8).reshape(-1, 4), axis=1).sum(axis=1)
+        first, last = _best_run((differing <= MATCH_BITS) & (a_part != 0) & (b_part != 0))
+        if best is None or last - first > best[1] - best[0]:
+            best = (first, last, lag)
+    if best is None:
+        return None
+    first, last, lag = best
+    if (last - first) * FRAME_SECONDS < min_length:
+        return None
+    # Отпечаток i - окна спектра i и i + 1 (шаг HOP): время - середина окон
+    centre = FRAME_SECONDS / 2 + FRAME / SAMPLE_RATE / 2
+    a_shift, b_shift = max(lag, 0) * FRAME_SECONDS, max(-lag, 0) * FRAME_SECONDS
+    start, end = first * FRAME_SECONDS + centre, (last - 1) * FRAME_SECONDS + centre
+    return Segment(round(a_shift + start, 2), round(a_shift + end, 2),
+                   round(b_shift + start, 2), round(b_shift + end, 2))
+
+
+# ============================================================================
+# СЕЗОН
+# ============================================================================
+
+def season_episodes(path: Path) -> List[Path]:
+    """Серии сезона по папке или одной серии: тот же сериал, сезон и качество"""
+    path = Path(path)
+    folder = path if path.is_dir() else path.parent
+    groups: Dict[Tuple[str, str], List[Tuple[int, Path]]] = {}
+    for entry in folder.iterdir():
+        key = extract_episode(entry.name)
+        if key is None or entry.suffix.lower() not in VIDEO_EXTENSIONS or not entry.is_file():
+            continue
+        group = (extract_series_prefix(entry.name), extract_series_suffix(entry.name))
+        groups.setdefault(group, []).append((key[2], entry))
+    if path.is_dir():
+        if not groups:
+            return []
+        # Папка с несколькими сезонами/качествами - самая большая группа
+        episodes = max(groups.values(), key=len)
+    else:
+        episodes = groups.get((extract_series_prefix(path.name), extract_series_suffix(path.name)), [])
+    return [entry for _, entry in sorted(episodes)]
+
+
+def load_fingerprints(episodes: List[Path], store: FingerprintStore, decoder: str = 'ffmpeg',
+                      seconds: float = ANALYSIS_WINDOW, jobs: Optional[int] = None
+                      ) -> Tuple[List['np.ndarray'], List[int], int]:
+    """Отпечатки серий: из хранилища или в пуле процессов; (отпечатки, id, декодировано)"""
+    prints: Dict[int, 'np.ndarray'] = {}
+    ids: Dict[int, int] = {}
+    missing: List[Tuple[int, os.stat_result]] = []
+    for index, path in enumerate(episodes):
+        stat = path.stat()
+        stored = store.get(str(path), stat.st_size, stat.st_mtime, int(seconds), FINGERPRINT_VERSION)
+        if stored is not None:
+            prints[index] = stored
+        else:
+            missing.append((index, stat))
+
+    if missing:
+        # Декодирование и FFT - в процессах (GIL), запись в хранилище - только здесь
+        workers = min(jobs or os.cpu_count() or 1, len(missing))
+        paths = [str(episodes[index]) for index, _ in missing]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(fingerprint_file, paths, [decoder] * len(paths),
+                                        [seconds] * len(paths)))
+        else:
+            results = [fingerprint_file(path, decoder, seconds) for path in paths]
+        for (index, stat), data in zip(missing, results):
+            prints[index] = np.frombuffer(data, dtype=np.uint32)
+            store.add(str(episodes[index]), prints[index], stat.st_size, stat.st_mtime,
+                      int(seconds), FINGERPRINT_VERSION)
+
+    with VlcDatabase() as db:
+        for index, path in enumerate(episodes):
+            entry = db.get_fingerprint_entry(str(path))
+            ids[index] = entry[0] if entry else -1
+    return ([prints[index] for index in range(len(episodes))],
+            [ids[index] for index in range(len(episodes))], len(missing))
+
+
+def detect_season(episodes: List[Path], decoder: str = 'ffmpeg', seconds: float = ANALYSIS_WINDOW,
+                  jobs: Optional[int] = None, store: Optional[FingerprintStore] = None
+                  ) -> SeasonResult:
+    """Заставка каждой серии (по похожим сериям сезона) и маркеры сериала"""
+    start = time.monotonic()
+    if store is None:
+        store = FingerprintStore(load_directory())
+    prints, ids, decoded = load_fingerprints(episodes, store, decoder, seconds, jobs)
+    positions = {episode_id: index for index, episode_id in enumerate(ids)}
+    pairs: Dict[Tuple[int, int], Optional[Segment]] = {}
+
+    def pair(i: int, j: int, lags: Optional[List[int]] = None) -> Optional[Segment]:
+        if (i, j) not in pairs:
+            pairs[(i, j)] = match_segment(prints[i], prints[j], lags=lags)
+        return pairs[(i, j)]
+
+    results: List[Tuple[Path, Optional[Segment]]] = []
+    for index, path in enumerate(episodes):
+        best = None
+        # Кандидаты и сдвиг - из индекса хранилища (без FFT по всем сдвигам)
+        series = (extract_series_prefix(path.name), extract_series_suffix(path.name))
+        for match in store.match(prints[index], series, exclude=[ids[index]], limit=2):
+            other = positions.get(match.episode_id)
+            if other is not None:
+                segment = pair(index, other, [-match.shift])
+                if segment and (best is None or segment.length > best.length):
+                    best = segment
+        # Индекс ничего не нашёл (шумный звук) - соседние серии, затем через одну
+        for distance in (1, 2):
+            if best:
+                break
+            for other in (index - distance, index + distance):
+                if 0 <= other < len(episodes):
+                    segment = pair(index, other)
+                    if segment and (best is None or segment.length > best.length):
+                        best = segment
+        results.append((path, best))
+
+    found = [segment for _, segment in results if segment]
+    markers = None
+    if len(found) >= 2:
+        starts = sorted(segment.a_start for segment in found)
+        ends = sorted(segment.a_end for segment in found)
+        markers = (int(round(starts[len(starts) // 2])), int(round(ends[len(ends) // 2])))
+    return SeasonResult(results, markers, decoded, time.monotonic() - start)
+
+
+def apply_markers(episode: Path, markers: Tuple[int, int], force: bool = False) -> bool:
+    """Маркеры заставки сериала серии; False - уже стоят (без force) или ошибка"""
+    prefix, suffix = extract_series_prefix(episode.name), extract_series_suffix(episode.name)
+    with VlcDatabase() as db:
+        current = db.get_skip_markers(prefix, suffix) or {}
+        if current.get('intro_start') is not None and not force:
+            return False
+        return db.set_intro_markers(prefix, suffix, markers[0], markers[1])
+
+
+def main() -> int:
+    """Главная функция CLI"""
+    try:
+        args, jobs = split_jobs_option(sys.argv[1:])
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    if not args or args[0] not in ('detect', 'compare') or len(args) < (3 if args[0] == 'compare' else 2):
+        print("Использование: intro_detect.py detect <папка|серия> [--force] [--dry-run] [--jobs N]"
+              " | compare <серия1> <серия2>", file=sys.stderr)
+        return 1
+    if np is None:
+        print("❌ Ошибка: numpy не установлен!", file=sys.stderr)
+        print("Установите: pip install numpy", file=sys.stderr)
+        return 1
+    decoder = default_decoder()
+
+    with VlcDatabase() as db:
+        db.init_db()
+
+    try:
+        if args[0] == 'compare':
+            a, b = (np.frombuffer(fingerprint_file(path, decoder), dtype=np.uint32) for path in args[1:3])
+            segment = match_segment(a, b)
+            if segment is None:
+                print("ERROR: общий участок не найден", file=sys.stderr)
+                return 1
+            print(f"{segment.a_start:.1f}-{segment.a_end:.1f} {segment.b_start:.1f}-{segment.b_end:.1f}")
+            return 0
+
+        episodes = season_episodes(Path(args[1]).resolve())
+        if len(episodes) < 2:
+            print("ERROR: для поиска заставки нужно хотя бы две серии сезона", file=sys.stderr)
+            return 1
+        result = detect_season(episodes, decoder, jobs=jobs)
+    except (OSError, RuntimeError, subprocess.SubprocessError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+
+    for path, segment in result.episodes:
+        span = f"{segment.a_start:>7.1f}s - {segment.a_end:>7.1f}s" if segment else f"{'-':>20}"
+        print(f"{span}  {path.name}")
+    print(f"Серий: {len(episodes)}, декодировано {result.decoded} ({decoder}), "
+          f"{result.elapsed:.1f} с")
+    if result.markers is None:
+        print("ERROR: заставка не найдена", file=sys.stderr)
+        return 1
+    start, end = result.markers
+    if '--dry-run' in sys.argv:
+        print(f"intro {start}s - {end}s (не записано)")
+        return 0
+    if not apply_markers(episodes[0], result.markers, '--force' in sys.argv):
+        print(f"intro {start}s - {end}s: маркеры уже стоят (--force - перезаписать)", file=sys.stderr)
+        return 1
+    print(f"OK {start} {end}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
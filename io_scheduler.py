@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+io_scheduler.py - Планировщик фонового чтения по sshfs: канал WiFi - VLC
+Версия: 1.0.0
+
+Фоновые задания (readahead.py, media_cache.py) читают по тому же каналу,
+что и VLC. Планировщик выдаёт им байты через token bucket со скоростью
+
+    разрешено = оценка канала - потребление VLC * io_headroom_percent / 100
+
+(не больше io_max_kb). Оценка канала - скользящее среднее скорости чтения
+самих заданий, потребление VLC - приращение rchar в /proc/<pid>/io
+(супервизор опрашивает раз в секунду). Задания останавливаются:
+  - seek  - после перемотки VLC заново заполняет буфер (IO_SEEK_PAUSE);
+  - stall - чтение VLC во время воспроизведения упало ниже
+            IO_STALL_FRACTION среднего (канал не успевает, IO_STALL_PAUSE).
+
+Решения (run/throttle/pause) и скорости сохраняются в кольцевой буфер, а
+супервизор записывает их в io_status.json для диагностики.
+
+Использование:
+    io_scheduler.py status [файл]   - последние решения и скорости
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, Dict, NamedTuple, Optional, Tuple
+
+from Py.config.config_manager import load_prefixed_settings
+
+# Константы
+SCRIPT_DIR = Path(__file__).parent
+STATUS_FILE = SCRIPT_DIR / "io_status.json"
+KB = 1024
+RATE_ALPHA = 0.3          # Вес нового замера в скользящем среднем
+MIN_LINK_SAMPLE = 0.005   # Чтение быстрее (сек) - из page cache, не замер канала
+IO_SEEK_PAUSE = 3.0       # Пауза заданий после перемотки (сек)
+IO_STALL_PAUSE = 5.0      # Пауза заданий, когда VLC недополучает данные (сек)
+IO_STALL_FRACTION = 0.3   # Чтение VLC ниже этой доли среднего - stall
+STALL_MIN_RATE = 64 * KB  # Меньшее среднее потребление - не видео по сети
+PROBE_RATE = 64 * KB      # Минимальная скорость заданий: замер канала не прекращается
+WAIT_STEP = 0.1           # Шаг ожидания задания на паузе (сек)
+DECISIONS = 64            # Решений в кольцевом буфере
+
+
+class IoSettings(NamedTuple):
+    """Настройки из таблицы config (категория media)"""
+    max_kb: int = 4096              # Потолок фонового чтения (КБ/с, 0 - без потолка)
+    headroom_percent: int = 150     # Запас канала для VLC (% потребления)
+
+
+def load_settings(db_path: Optional[Path] = None) -> IoSettings:
+    """Настройки io_* из таблицы config, при ошибке - по умолчанию"""
+    return load_prefixed_settings(IoSettings(), 'io_', db_path, "Планировщик I/O")
+
+
+def vlc_read_bytes(pid: int) -> Optional[int]:
+    """Прочитано процессом VLC (rchar из /proc/<pid>/io) или None"""
+    try:
+        with open(f"/proc/{pid}/io") as stream:
+            for line in stream:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def ewma(average: Optional[float], value: float, alpha: float = RATE_ALPHA) -> float:
+    return value if average is None else average + alpha * (value - average)
+
+
+class TokenBucket:
+    """Скорость rate байт/с с запасом burst байт (rate None - без ограничения)
+
+    Запас может уйти в минус на размер чтения - следующее чтение ждёт,
+    пока долг не покроется: средняя скорость равна rate при любом куске.
+    """
+
+    def __init__(self, rate: Optional[float], burst: float = 0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self.tokens = 0.0
+        self.updated = clock()
+
+    def _refill(self, now: float) -> None:
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def set_rate(self, rate: Optional[float], burst: float = 0) -> None:
+        self._refill(self._clock())
+        self.rate = rate
+        self.burst = burst
+
+    def delay(self) -> float:
+        """Сколько ждать следующего чтения (0 - можно сейчас)"""
+        if self.rate is None:
+            return 0.0
+        self._refill(self._clock())
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def take(self, nbytes: int) -> None:
+        self._refill(self._clock())
+        self.tokens -= nbytes
+
+
+class IoScheduler:
+    """Выдача канала фоновым заданиям с оглядкой на потребление VLC
+
+    acquire()/record() вызываются из потоков заданий, sample()/on_seek() -
+    из event loop супервизора.
+    """
+
+    def __init__(self, settings: IoSettings = IoSettings(),
+                 clock: Callable[[], float] = time.monotonic):
+        self.settings = settings
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.max_rate = settings.max_kb * KB    # 0 - без потолка
+        self.bucket = TokenBucket(self.max_rate or None, self.max_rate / 2, clock)
+
+        self.link_rate: Optional[float] = None      # Оценка канала (байт/с)
+        self.playback_rate: Optional[float] = None  # Среднее потребление VLC
+        self.playback_now = 0.0                     # Последний замер потребления
+        self.allowed_rate: Optional[float] = self.max_rate or None
+        self.paused_until = 0.0
+        self.pause_reason = ''
+        self.seeks = 0
+        self.stalls = 0
+        self.job_bytes: Dict[str, int] = {}
+        self.waited = 0.0                           # Суммарное ожидание заданий (сек)
+        self.decisions: Deque[Tuple[float, str, str]] = deque(maxlen=DECISIONS)
+        self.decision = ''
+        self._last_read: Optional[Tuple[float, int]] = None
+
+    # ------------------------------------------------------------------
+    # События воспроизведения (event loop)
+    # ------------------------------------------------------------------
+
+    def on_seek(self) -> None:
+        """Перемотка: VLC заполняет буфер с новой позиции - задания ждут"""
+        with self._lock:
+            self.seeks += 1
+            self._pause(IO_SEEK_PAUSE, 'seek')
+
+    def sample(self, read_bytes: Optional[int], playing: bool) -> None:
+        """Замер чтения VLC (счётчик rchar) и пересчёт разрешённой скорости"""
+        now = self._clock()
+        with self._lock:
+            if read_bytes is not None:
+                previous, self._last_read = self._last_read, (now, read_bytes)
+                if previous is not None and now > previous[0] and read_bytes >= previous[1]:
+                    self._playback_sample((read_bytes - previous[1]) / (now - previous[0]), playing)
+            self._update_rate(now)
+
+    def _playback_sample(self, rate: float, playing: bool) -> None:
+        self.playback_now = rate
+        if not playing:
+            return   # Пауза VLC: не читает - это не просадка канала
+        average = self.playback_rate
+        if (average is not None and average >= STALL_MIN_RATE
+                and rate < average * IO_STALL_FRACTION):
+            self.stalls += 1
+            self._pause(IO_STALL_PAUSE, 'stall')
+            return   # Просадку не вносим в среднее - это не битрейт видео
+        self.playback_rate = ewma(average, rate)
+
+    def _pause(self, seconds: float, reason: str) -> None:
+        self.paused_until = max(self.paused_until, self._clock() + seconds)
+        self.pause_reason = reason
+        self._decide('pause', reason)
+
+    def _update_rate(self, now: float) -> None:
+        """Разрешённая скорость: канал минус запас VLC, не больше потолка"""
+        if now < self.paused_until:
+            return
+        allowed = self.max_rate or None
+        if self.link_rate is not None:
+            reserve = (self.playback_rate or 0) * self.settings.headroom_percent / 100
+            spare = max(PROBE_RATE, self.link_rate - reserve)
+            allowed = spare if allowed is None else min(allowed, spare)
+        self.allowed_rate = allowed
+        self.bucket.set_rate(allowed, (allowed or 0) / 2)
+        if allowed is None:
+            self._decide('run', 'без ограничения')
+        else:
+            self._decide('run' if allowed >= (self.max_rate or allowed) else 'throttle',
+                          f"{allowed / KB:.0f} КБ/с")
+
+    def _decide(self, decision: str, reason: str) -> None:
+        if decision != self.decision or decision == 'pause':
+            self.decisions.append((time.time(), decision, reason))
+        self.decision = decision
+
+    # ------------------------------------------------------------------
+    # Задания (рабочие потоки)
+    # ------------------------------------------------------------------
+
+    def paused(self) -> bool:
+        return self._clock() < self.paused_until
+
+    def acquire(self, job: str, nbytes: int, stop: threading.Event) -> bool:
+        """Ждать разрешения на чтение nbytes; False - задание остановлено"""
+        start = self._clock()
+        while not stop.is_set():
+            with self._lock:
+                if self._clock() < self.paused_until:
+                    delay = min(WAIT_STEP, self.paused_until - self._clock())
+                else:
+                    delay = self.bucket.delay()
+                    if delay <= 0:
+                        self.bucket.take(nbytes)
+                        self.job_bytes[job] = self.job_bytes.get(job, 0) + nbytes
+                        self.waited += self._clock() - start
+                        return True
+            stop.wait(min(delay, WAIT_STEP))
+        return False
+
+    def record(self, nbytes: int, seconds: float) -> None:
+        """Замер канала: nbytes прочитаны заданием за seconds
+
+        Задание делит канал с VLC - пропускная способность канала это
+        скорость задания плюс текущее потребление VLC.
+        """
+        if nbytes <= 0 or seconds < MIN_LINK_SAMPLE:
+            return
+        with self._lock:
+            self.link_rate = ewma(self.link_rate, nbytes / seconds + self.playback_now)
+
+    # ------------------------------------------------------------------
+    # Диагностика
+    # ------------------------------------------------------------------
+
+    def diagnostics(self) -> dict:
+        """Состояние, скорости (КБ/с) и последние решения"""
+        with self._lock:
+            def kb(rate):
+                return None if rate is None else round(rate / KB, 1)
+            return {
+                'decision': 'pause' if self.paused() else self.decision or 'run',
+                'pause_reason': self.pause_reason if self.paused() else '',
+                'link_kb': kb(self.link_rate),
+                'playback_kb': kb(self.playback_rate),
+                'playback_now_kb': kb(self.playback_now),
+                'allowed_kb': kb(self.allowed_rate),
+                'seeks': self.seeks,
+                'stalls': self.stalls,
+                'waited': round(self.waited, 2),
+                'job_bytes': dict(self.job_bytes),
+                'decisions': [list(item) for item in self.decisions],
+            }
+
+    def dump(self, path: Path = STATUS_FILE) -> None:
+        path = Path(path)
+        temp = path.with_suffix(path.suffix + '.tmp')
+        with open(temp, 'w', encoding='utf-8') as stream:
+            json.dump(self.diagnostics(), stream, ensure_ascii=False, indent=1)
+        temp.replace(path)
+
+
+def main() -> int:
+    """Главная функция CLI"""
+    if len(sys.argv) < 2 or sys.argv[1] != 'status':
+        print("Использование: io_scheduler.py status [файл]", file=sys.stderr)
+        return 1
+    path = Path(sys.argv[2]) if len(sys.argv) > 2 else STATUS_FILE
+    try:
+        with open(path, encoding='utf-8') as stream:
+            status = json.load(stream)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Решение: {status['decision']} {status['pause_reason']}".rstrip())
+    print(f"Канал: {status['link_kb']} КБ/с, VLC: {status['playback_kb']} КБ/с "
+          f"(сейчас {status['playback_now_kb']}), заданиям: {status['allowed_kb']} КБ/с")
+    print(f"Перемоток: {status['seeks']}, просадок: {status['stalls']}, "
+          f"ожидание заданий: {status['waited']} с")
+    for job, count in sorted(status['job_bytes'].items()):
+        print(f"  {job:<12}{count // KB:>10} КБ")
+    for stamp, decision, reason in status['decisions'][-10:]:
+        print(f"  {time.strftime('%H:%M:%S', time.localtime(stamp))} {decision:<9}{reason}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
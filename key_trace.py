@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+key_trace.py - Трассировка задержки: кнопка пульта -> действие VLC
+Версия: 1.0.0
+
+Для каждой кнопки, обработанной playback_supervisor.py, записываются отметки
+time.perf_counter():
+  received - строка cec-client с кадром прочитана супервизором
+  decoded  - кадр разобран в имя кнопки
+  sent     - первая команда VLC RC записана в сокет
+  acked    - получен ответ VLC на последнюю команду
+
+Отметки sent/acked ставит AsyncVlcRc через contextvars - команды, которые
+отправлены при обработке кнопки (в том числе из задач, созданных в этот
+момент), относятся к ней без передачи параметров. Записи хранятся в
+кольцевом буфере (deque с maxlen): несколько вызовов perf_counter на
+кнопку, трассировку можно не выключать. По окончании сеанса буфер
+дописывается в файл трассировки (последние TRACE_FILE_LIMIT записей).
+
+Использование:
+    key_trace.py report [файл]    - p50/p95/p99 по кнопкам и этапам (мс)
+    key_trace.py clear [файл]     - очистить файл трассировки
+"""
+
+import json
+import sys
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+# Константы
+SCRIPT_DIR = Path(__file__).parent
+TRACE_FILE = SCRIPT_DIR / "key_trace.jsonl"
+TRACE_CAPACITY = 512      # Записей в кольцевом буфере сеанса
+TRACE_FILE_LIMIT = 5000   # Записей в файле трассировки
+STAGES = ('decode', 'send', 'ack')  # Время от прихода кадра до этапа
+PERCENTILES = (50, 95, 99)
+
+# Трасса кнопки, которая сейчас обрабатывается (None - команда не от кнопки)
+_current: ContextVar[Optional['KeyTrace']] = ContextVar('key_trace', default=None)
+
+
+class KeyTrace:
+    """Отметки времени одной кнопки"""
+
+    __slots__ = ('key', 'received', 'decoded', 'sent', 'acked', 'error')
+
+    def __init__(self, key: str, received: float, decoded: float):
+        self.key = key
+        self.received = received
+        self.decoded = decoded
+        self.sent: Optional[float] = None
+        self.acked: Optional[float] = None
+        self.error = False
+
+    def stages(self) -> Dict[str, float]:
+        """Этап -> мс от прихода кадра (только пройденные этапы)"""
+        result = {'decode': 1000 * (self.decoded - self.received)}
+        if self.sent is not None:
+            result['send'] = 1000 * (self.sent - self.received)
+        if self.acked is not None:
+            result['ack'] = 1000 * (self.acked - self.received)
+        return result
+
+    def to_dict(self) -> dict:
+        record = {'key': self.key}
+        record.update({stage: round(ms, 3) for stage, ms in self.stages().items()})
+        if self.error:
+            record['error'] = True
+        return record
+
+
+def mark_sent(now: float) -> None:
+    """Команда VLC RC отправлена (отмечается первая команда кнопки)"""
+    trace = _current.get()
+    if trace is not None and trace.sent is None:
+        trace.sent = now
+
+
+def mark_acked(now: float) -> None:
+    """Получен ответ VLC RC (отмечается последний ответ)"""
+    trace = _current.get()
+    if trace is not None:
+        trace.acked = now
+
+
+class KeyTracer:
+    """Кольцевой буфер трасс кнопок сеанса"""
+
+    def __init__(self, capacity: int = TRACE_CAPACITY):
+        self.buffer: Deque[KeyTrace] = deque(maxlen=capacity)
+        self.total = 0
+
+    @contextmanager
+    def trace(self, key: str, received: float, decoded: float) -> Iterator[KeyTrace]:
+        """Трасса кнопки на время обработки её действия"""
+        record = KeyTrace(key, received, decoded)
+        token = _current.set(record)
+        try:
+            yield record
+        finally:
+            _current.reset(token)
+            self.buffer.append(record)
+            self.total += 1
+
+    def records(self) -> List[dict]:
+        return [trace.to_dict() for trace in self.buffer]
+
+    def dump(self, path: Path = TRACE_FILE, limit: int = TRACE_FILE_LIMIT) -> int:
+        """Дописать буфер в файл трассировки; возвращает число записей"""
+        records = self.records()
+        if not records:
+            return 0
+        records = (load_records(path) + records)[-limit:]
+        path = Path(path)
+        temp = path.with_suffix(path.suffix + '.tmp')
+        with open(temp, 'w', encoding='utf-8') as stream:
+            for record in records:
+                stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        temp.replace(path)
+        return len(self.buffer)
+
+
+def load_records(path: Path = TRACE_FILE) -> List[dict]:
+    """Записи файла трассировки (повреждённые строки пропускаются)"""
+    records = []
+    try:
+        with open(path, encoding='utf-8') as stream:
+            for line in stream:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """Перцентиль методом ближайшего ранга (values отсортированы)"""
+    rank = max(1, -(-len(values) * percent // 100))
+    return values[int(rank) - 1]
+
+
+def summarize(records: List[dict]) -> Dict[str, Dict[str, Tuple[int, ...]]]:
+    """Кнопка -> этап -> (число, p50, p95, p99)"""
+    samples: Dict[str, Dict[str, List[float]]] = {}
+    for record in records:
+        stages = samples.setdefault(record.get('key', '?'), {})
+        for stage in STAGES:
+            if stage in record:
+                stages.setdefault(stage, []).append(record[stage])
+
+    summary: Dict[str, Dict[str, Tuple[int, ...]]] = {}
+    for key, stages in samples.items():
+        summary[key] = {}
+        for stage, values in stages.items():
+            values.sort()
+            summary[key][stage] = (len(values),) + tuple(percentile(values, p) for p in PERCENTILES)
+    return summary
+
+
+def format_report(summary: Dict[str, Dict[str, Tuple[int, ...]]]) -> List[str]:
+    """Таблица отчёта: по строке на кнопку и этап"""
+    lines = [f"{'Кнопка':<14}{'Этап':<8}{'N':>6}" + "".join(f"{'p' + str(p):>10}" for p in PERCENTILES)]
+    for key in sorted(summary):
+        for stage in STAGES:
+            if stage not in summary[key]:
+                continue
+            count, *values = summary[key][stage]
+            lines.append(f"{key:<14}{stage:<8}{count:>6}" + "".join(f"{v:>10.2f}" for v in values))
+    return lines
+
+
+def main() -> int:
+    """Главная функция CLI"""
+    if len(sys.argv) < 2 or sys.argv[1] not in ('report', 'clear'):
+        print("Использование: key_trace.py report|clear [файл]", file=sys.stderr)
+        return 1
+
+    path = Path(sys.argv[2]) if len(sys.argv) > 2 else TRACE_FILE
+    if sys.argv[1] == 'clear':
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        print("OK")
+        return 0
+
+    records = load_records(path)
+    if not records:
+        print(f"ERROR: нет записей трассировки в {path}", file=sys.stderr)
+        return 1
+    print(f"Записей: {len(records)} ({path}), мс от прихода кадра CEC")
+    for line in format_report(summarize(records)):
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
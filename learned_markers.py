@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+learned_markers.py - Маркеры заставки и титров по поведению зрителя
+Версия: 1.0.0
+
+Вручную маркеры ставятся кнопкой RED с фиксированной поправкой на реакцию
+(REACTION_DELAY). За сезон перемотки вперёд в начале серии и выходы в
+конце группируются вокруг настоящих границ заставки и титров. По событиям
+истории просмотра (watch_history.py) для каждого (series_prefix,
+series_suffix) копятся три гистограммы с фиксированными корзинами по
+BIN_SECONDS - память на сериал не зависит от числа серий:
+
+  - intro_from - откуда перематывали вперёд (первые INTRO_WINDOW сек);
+  - intro_to   - куда перематывали (подряд идущие перемотки - одна);
+  - credits    - сколько оставалось до конца при выходе (CREDITS_WINDOW).
+
+Пик гистограммы (± CLUSTER_BINS корзин) даёт предложение: intro_start -
+ранние из пика (первые заметившие заставку), intro_end - медиана цели,
+credits_duration - поздние из пика выходов. Уверенность - доля наблюдений
+в пике, пока наблюдений меньше MIN_OBSERVATIONS - пропорционально меньше.
+При переполнении счётчики делятся пополам (старые сезоны забываются).
+
+Предложение записывается в series_settings, только если уверенность не
+ниже learned_markers_confidence (%) и маркеры не поставлены вручную
+(пусто или совпадают с ранее выученными). Сеансы с автоматическим
+пропуском заставки/паузой на титрах не учитываются - иначе маркеры
+подкрепляли бы сами себя.
+
+Использование:
+    learned_markers.py show [series_prefix series_suffix]  - предложения и уверенность
+    learned_markers.py rebuild                             - пересчёт по истории просмотра
+"""
+
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from Py.config.config_manager import load_value
+from vlc_db import VlcDatabase
+
+# Константы
+BIN_SECONDS = 5
+INTRO_WINDOW = 900        # Заставка ищется в начале серии (сек)
+CREDITS_WINDOW = 600      # Титры - в конце (сек)
+INTRO_BINS = INTRO_WINDOW // BIN_SECONDS
+CREDITS_BINS = CREDITS_WINDOW // BIN_SECONDS
+MIN_SKIP = 15             # Перемотка короче - не пропуск заставки (сек)
+MAX_SKIP = 300            # ... длиннее - не пропуск заставки
+SEEK_CHAIN_GAP = 5.0      # Перемотки с меньшим интервалом - одна (сек)
+END_MARGIN = 5            # Выход ближе к концу - досмотрено, не выход на титрах
+CLUSTER_BINS = 2          # Пик: корзина максимума ± CLUSTER_BINS
+MIN_OBSERVATIONS = 4      # Меньше наблюдений - уверенность пропорционально ниже
+DECAY_TOTAL = 2000        # Больше наблюдений - счётчики делятся пополам
+DEFAULT_CONFIDENCE = 60   # Порог применения (%)
+
+
+class StreamingHistogram:
+    """Гистограмма с фиксированными корзинами (значения за границами отбрасываются)"""
+
+    def __init__(self, bins: int, counts: Optional[array] = None):
+        self.counts = counts if counts is not None else array('I', [0] * bins)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def add(self, value: float) -> bool:
+        index = int(value // BIN_SECONDS)
+        if not 0 <= index < len(self.counts):
+            return False
+        self.counts[index] += 1
+        if self.total > DECAY_TOTAL:
+            for i, count in enumerate(self.counts):
+                self.counts[i] = count // 2
+        return True
+
+    def peak(self) -> Tuple[int, int, int]:
+        """(первая корзина, последняя корзина, наблюдений) пика"""
+        counts = self.counts
+
+        def mass(i: int) -> Tuple[int, int]:
+            return sum(counts[max(0, i - CLUSTER_BINS):i + CLUSTER_BINS + 1]), -i
+
+        best = max(range(len(counts)), key=mass)
+        first = max(0, best - CLUSTER_BINS)
+        last = min(len(counts) - 1, best + CLUSTER_BINS)
+        return first, last, sum(counts[first:last + 1])
+
+    def quantile(self, first: int, last: int, fraction: float) -> int:
+        """Граница (сек) корзины, до которой доля fraction наблюдений пика"""
+        cluster = self.counts[first:last + 1]
+        need = fraction * sum(cluster)
+        seen = 0
+        for offset, count in enumerate(cluster):
+            seen += count
+            if count and seen >= need:
+                return (first + offset) * BIN_SECONDS + BIN_SECONDS // 2
+        return last * BIN_SECONDS
+
+    def confidence(self) -> float:
+        total = self.total
+        if not total:
+            return 0.0
+        return self.peak()[2] / total * min(1.0, total / MIN_OBSERVATIONS)
+
+
+class Proposal(NamedTuple):
+    intro_start: Optional[int]
+    intro_end: Optional[int]
+    intro_confidence: float
+    credits_duration: Optional[int]
+    credits_confidence: float
+
+
+class SeriesMarkers:
+    """Гистограммы одного сериала"""
+
+    def __init__(self, data: bytes = b''):
+        counts = array('I')
+        if len(data) == (2 * INTRO_BINS + CREDITS_BINS) * counts.itemsize:
+            counts.frombytes(data)
+        else:
+            counts = array('I', [0] * (2 * INTRO_BINS + CREDITS_BINS))  # Пусто или другая разметка
+        self.intro_from = StreamingHistogram(INTRO_BINS, counts[:INTRO_BINS])
+        self.intro_to = StreamingHistogram(INTRO_BINS, counts[INTRO_BINS:2 * INTRO_BINS])
+        self.credits = StreamingHistogram(CREDITS_BINS, counts[2 * INTRO_BINS:])
+
+    def to_bytes(self) -> bytes:
+        return (self.intro_from.counts + self.intro_to.counts + self.credits.counts).tobytes()
+
+    def observe_skip(self, origin: int, target: int) -> bool:
+        """Перемотка вперёд origin -> target в начале серии"""
+        if not MIN_SKIP <= target - origin <= MAX_SKIP or origin >= INTRO_WINDOW:
+            return False
+        if not 0 <= target < INTRO_WINDOW:
+            return False
+        self.intro_from.add(origin)
+        self.intro_to.add(target)
+        return True
+
+    def observe_exit(self, position: int, duration: int) -> bool:
+        """Выход за remaining секунд до конца"""
+        remaining = duration - position
+        if remaining <= END_MARGIN:
+            return False
+        return self.credits.add(remaining)
+
+    def propose(self) -> Proposal:
+        intro_start = intro_end = credits = None
+        intro_confidence = min(self.intro_from.confidence(), self.intro_to.confidence())
+        if intro_confidence > 0:
+            first, last, _ = self.intro_from.peak()
+            intro_start = self.intro_from.quantile(first, last, 0.1)
+            first, last, _ = self.intro_to.peak()
+            intro_end = self.intro_to.quantile(first, last, 0.5)
+            if intro_end <= intro_start:
+                intro_start = intro_end = None
+                intro_confidence = 0.0
+        credits_confidence = self.credits.confidence()
+        if credits_confidence > 0:
+            first, last, _ = self.credits.peak()
+            credits = self.credits.quantile(first, last, 0.9)
+        return Proposal(intro_start, intro_end, intro_confidence, credits, credits_confidence)
+
+
+def session_observations(events: Iterable[Tuple], duration: Optional[int]
+                         ) -> Tuple[List[Tuple[int, int]], Optional[int]]:
+    """Перемотки вперёд (origin, target) и позиция выхода по событиям сеанса
+
+    Сеанс с автоматическим skip_intro/outro - ([], None): пользователь не
+    выбирал, где пропускать.
+    """
+    events = list(events)
+    if any(event[1] in ('skip_intro', 'outro') for event in events):
+        return [], None
+
+    skips: List[Tuple[int, int]] = []
+    chain: Optional[List] = None      # [origin, target, ts последней перемотки]
+    exit_position = None
+    for ts, kind, position, value in events:
+        if kind == 'seek' and position is not None and value is not None:
+            # Продолжение: вскоре после предыдущей и оттуда, куда она привела
+            if (chain is not None and ts - chain[2] <= SEEK_CHAIN_GAP
+                    and abs(position - chain[1]) <= SEEK_CHAIN_GAP + 1):
+                chain[1], chain[2] = value, ts
+                continue
+            if chain is not None:
+                skips.append((chain[0], chain[1]))
+            chain = [position, value, ts]
+        elif kind == 'end':
+            exit_position = position
+    if chain is not None:
+        skips.append((chain[0], chain[1]))
+    skips = [(origin, target) for origin, target in skips if target > origin]
+    if exit_position is None or not duration:
+        exit_position = None
+    return skips, exit_position
+
+
+def load_confidence(db_path: Optional[Path] = None) -> int:
+    """Порог learned_markers_confidence (%) из таблицы config"""
+    return load_value('learned_markers_confidence', DEFAULT_CONFIDENCE, db_path,
+                      "Порог выученных маркеров")
+
+
+def learn_session(series_prefix: str, series_suffix: str, events: Iterable[Tuple],
+                  duration: Optional[int], threshold: int = DEFAULT_CONFIDENCE
+                  ) -> Tuple[Proposal, List[str]]:
+    """Учесть сеанс и применить уверенные предложения; (предложение, применённое)"""
+    skips, exit_position = session_observations(events, duration)
+    with VlcDatabase() as db:
+        stored = db.get_learned_markers(series_prefix, series_suffix)
+        markers = SeriesMarkers(stored[0] if stored else b'')
+        applied = list(stored[1:]) if stored else [None, None, None]
+
+        changed = False
+        for origin, target in skips:
+            changed |= markers.observe_skip(origin, target)
+        if exit_position is not None:
+            changed |= markers.observe_exit(exit_position, duration)
+
+        proposal = markers.propose()
+        done = []
+        current = db.get_skip_markers(series_prefix, series_suffix) or {}
+        limit = threshold / 100
+
+        # Маркеры не трогаем, если их поставили вручную (не совпадают с выученными)
+        intro = (current.get('intro_start'), current.get('intro_end'))
+        if (proposal.intro_start is not None and proposal.intro_confidence >= limit
+                and intro in ((None, None), tuple(applied[:2]))
+                and (proposal.intro_start, proposal.intro_end) != intro):
+            if db.set_intro_markers(series_prefix, series_suffix,
+                                    proposal.intro_start, proposal.intro_end):
+                applied[:2] = [proposal.intro_start, proposal.intro_end]
+                done.append('intro')
+        credits = current.get('credits_duration')
+        if (proposal.credits_duration is not None and proposal.credits_confidence >= limit
+                and credits in (None, applied[2]) and proposal.credits_duration != credits):
+            if db.set_credits_duration(series_prefix, series_suffix, proposal.credits_duration):
+                applied[2] = proposal.credits_duration
+                done.append('credits')
+
+        if changed or done:
+            db.save_learned_markers(series_prefix, series_suffix, markers.to_bytes(),
+                                    applied[0], applied[1], applied[2], time.time())
+    return proposal, done
+
+
+def format_proposal(proposal: Proposal) -> str:
+    intro = (f"{proposal.intro_start}s - {proposal.intro_end}s"
+             if proposal.intro_start is not None else "-")
+    credits = f"{proposal.credits_duration}s" if proposal.credits_duration is not None else "-"
+    return (f"intro {intro} ({proposal.intro_confidence:.0%}), "
+            f"credits {credits} ({proposal.credits_confidence:.0%})")
+
+
+def main() -> int:
+    """Главная функция CLI"""
+    if len(sys.argv) < 2 or sys.argv[1] not in ('show', 'rebuild'):
+        print("Использование: learned_markers.py show [series_prefix series_suffix] | rebuild",
+              file=sys.stderr)
+        return 1
+
+    with VlcDatabase() as db:
+        db.init_db()
+
+    if sys.argv[1] == 'rebuild':
+        # Гистограммы заново по всей истории просмотра (старые сеансы первыми)
+        threshold = load_confidence()
+        with VlcDatabase() as db:
+            series = db.get_session_series()
+            for prefix, suffix in series:
+                stored = db.get_learned_markers(prefix, suffix)
+                applied = stored[1:] if stored else (None, None, None)
+                db.save_learned_markers(prefix, suffix, b'', *applied, time.time())
+        for prefix, suffix in series:
+            with VlcDatabase() as db:
+                sessions = db.get_series_sessions(prefix, suffix)
+            proposal = SeriesMarkers().propose()
+            for session_id, duration in sessions:
+                with VlcDatabase() as db:
+                    events = db.get_playback_events(session_id)
+                proposal, _ = learn_session(prefix, suffix, events, duration, threshold)
+            print(f"{prefix} [{suffix}]: {len(sessions)} сеансов, {format_proposal(proposal)}")
+        print(f"OK {len(series)}")
+        return 0
+
+    with VlcDatabase() as db:
+        series = ([tuple(sys.argv[2:4])] if len(sys.argv) > 3 else db.get_learned_series())
+        rows = [(prefix, suffix, db.get_learned_markers(prefix, suffix)) for prefix, suffix in series]
+    if not rows:
+        print("ERROR: выученных маркеров нет", file=sys.stderr)
+        return 1
+    for prefix, suffix, stored in rows:
+        if stored is None:
+            print(f"{prefix} [{suffix}]: нет наблюдений")
+            continue
+        markers = SeriesMarkers(stored[0])
+        print(f"{prefix} [{suffix}]: {format_proposal(markers.propose())}, "
+              f"наблюдений: {markers.intro_from.total} перемоток, {markers.credits.total} выходов")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
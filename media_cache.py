@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+media_cache.py - Локальный кэш удалённых серий (SD/USB) с LRU вытеснением
+Версия: 1.1.0
+
+По sshfs через WiFi серия может остановиться посреди просмотра. Если кэш
+включён (cache_enabled в таблице config), супервизор в фоне копирует
+текущую серию и следующие cache_ahead серий в cache_dir:
+
+  - копирование кусками в <файл>.part с записью прогресса в таблицу
+    media_cache - после обрыва связи или перезапуска докачивается с места
+    остановки;
+  - бюджет cache_budget_mb: перед копированием освобождается место -
+    сначала просмотренные (status 'watched'), затем давно не открытые (LRU);
+    текущая серия и очередь не вытесняются;
+  - cvlc.sh открывает локальную копию (`media_cache.py lookup` - только при
+    cache_enabled, проверка одним запросом sqlite3), если она скопирована полностью; ключ прогресса и настройки сериала остаются по
+    имени исходного файла.
+
+В супервизоре копирование идёт через планировщик io_scheduler.py - с
+оставшейся от VLC скоростью канала и паузами после перемотки.
+
+Использование:
+    media_cache.py lookup <файл>        - путь локальной копии (код 1 - копии нет)
+    media_cache.py fill <файл> [K]      - скопировать серию и K следующих
+    media_cache.py status               - содержимое кэша
+    media_cache.py evict                - освободить место до бюджета
+"""
+
+import hashlib
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Optional, Set
+
+from autoplay import next_episode
+from io_scheduler import IoScheduler
+from Py.config.config_manager import load_prefixed_settings
+from vlc_db import SCRIPT_DIR, VlcDatabase
+
+# Константы
+MB = 1024 * 1024
+CHUNK_SIZE = 4 * MB             # Кусок копирования
+PROGRESS_EVERY = 8              # Запись прогресса в БД каждые N кусков
+PART_SUFFIX = ".part"
+DEFAULT_CACHE_DIR = SCRIPT_DIR / "cache"
+
+
+class CacheSettings(NamedTuple):
+    """Настройки из таблицы config (категория media)"""
+    enabled: bool = False
+    directory: str = ""            # Пусто - DEFAULT_CACHE_DIR
+    budget_mb: int = 8192
+    ahead: int = 2                 # Сколько следующих серий держать в кэше
+
+
+def load_settings(db_path: Optional[Path] = None) -> CacheSettings:
+    """Настройки cache_* из таблицы config, при ошибке - по умолчанию (выключено)"""
+    return load_prefixed_settings(CacheSettings(), 'cache_', db_path, "Кэш (выключен)",
+                                  keys={'directory': 'cache_dir'})
+
+
+class CopyCancelled(Exception):
+    """Копирование остановлено (cancel)"""
+
+
+class MediaCache:
+    """Каталог локальных копий с бюджетом и записями в таблице media_cache"""
+
+    def __init__(self, directory: Path, budget: int, chunk_size: int = CHUNK_SIZE,
+                 clock: Callable[[], float] = time.time,
+                 scheduler: Optional[IoScheduler] = None):
+        self.directory = Path(directory)
+        self.budget = budget
+        self.chunk_size = chunk_size
+        self.scheduler = scheduler    # Канал sshfs делится с VLC (io_scheduler.py)
+        self._clock = clock
+        self._stop = threading.Event()
+        self.bytes_copied = 0
+        self.evicted: List[str] = []
+        with VlcDatabase() as db:
+            db.init_db()
+
+    @classmethod
+    def from_settings(cls, settings: CacheSettings,
+                      scheduler: Optional[IoScheduler] = None) -> 'MediaCache':
+        return cls(Path(settings.directory) if settings.directory else DEFAULT_CACHE_DIR,
+                   settings.budget_mb * MB, scheduler=scheduler)
+
+    def cancel(self) -> None:
+        self._stop.set()
+
+    @staticmethod
+    def _key(source: Path) -> str:
+        return str(Path(source).resolve())
+
+    def cache_path(self, source: Path) -> Path:
+        """Путь копии: хэш полного пути (одинаковые имена в разных папках) + имя"""
+        key = self._key(source)
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+        return self.directory / f"{digest}_{Path(key).name}"
+
+    # ------------------------------------------------------------------
+    # Поиск
+    # ------------------------------------------------------------------
+
+    def lookup(self, source: Path) -> Optional[Path]:
+        """Полная локальная копия source (с отметкой открытия) или None"""
+        key = self._key(source)
+        with VlcDatabase() as db:
+            entry = db.get_cache_entry(key)
+            if not entry or not entry[3]:
+                return None
+            path = Path(entry[0])
+            try:
+                if path.stat().st_size != entry[1]:
+                    return None
+            except OSError:
+                return None
+            db.touch_cache_entry(key, self._clock())
+        return path
+
+    # ------------------------------------------------------------------
+    # Бюджет
+    # ------------------------------------------------------------------
+
+    def used(self) -> int:
+        """Занято копиями и недокачанными частями (байт)"""
+        with VlcDatabase() as db:
+            return sum(entry[3] for entry in db.get_cache_entries())
+
+    def evict(self, needed: int = 0, protect: Optional[Set[str]] = None) -> bool:
+        """Освободить место под needed байт; False - бюджета не хватит
+
+        Порядок: просмотренные, затем по давности открытия; protect - пути
+        источников, которые вытеснять нельзя (текущая серия и очередь).
+        """
+        protect = protect or set()
+        with VlcDatabase() as db:
+            entries = db.get_cache_entries()
+        used = sum(entry[3] for entry in entries)
+        if used + needed <= self.budget:
+            return True
+
+        candidates = sorted((entry for entry in entries if entry[0] not in protect),
+                            key=lambda entry: (entry[6] != 'watched', entry[5]))
+        for source, cache_path, _, copied, complete, _, _ in candidates:
+            self._remove(source, cache_path, complete)
+            used -= copied
+            if used + needed <= self.budget:
+                return True
+        return False
+
+    def _remove(self, source: str, cache_path: str, complete: int) -> None:
+        path = Path(cache_path)
+        for candidate in (path, path.with_name(path.name + PART_SUFFIX)):
+            try:
+                candidate.unlink()
+            except FileNotFoundError:
+                pass
+        with VlcDatabase() as db:
+            db.delete_cache_entry(source)
+        self.evicted.append(source)
+
+    # ------------------------------------------------------------------
+    # Копирование
+    # ------------------------------------------------------------------
+
+    def copy(self, source: Path, protect: Optional[Set[str]] = None) -> bool:
+        """Скопировать source в кэш (с докачкой); True - копия полная"""
+        key = self._key(source)
+        target = self.cache_path(source)
+        part = target.with_name(target.name + PART_SUFFIX)
+        size = os.stat(key).st_size
+
+        with VlcDatabase() as db:
+            entry = db.get_cache_entry(key)
+        if entry and entry[3] and entry[1] == size and target.exists():
+            return True
+
+        # Докачка: доверяем меньшему из размера .part и записанного прогресса
+        copied = 0
+        if entry and entry[1] == size and part.exists():
+            copied = min(part.stat().st_size, entry[2])
+
+        if not self.evict(size - copied, (protect or set()) | {key}):
+            print(f"⚠️  Кэш: нет места под {Path(key).name}", file=sys.stderr)
+            return False
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        now = self._clock()
+        with VlcDatabase() as db:
+            db.save_cache_entry(key, str(target), size, copied, False, now)
+
+        chunks = 0
+        with open(key, 'rb') as src, open(part, 'r+b' if copied else 'wb') as dst:
+            src.seek(copied)
+            dst.seek(copied)
+            dst.truncate()
+            while copied < size:
+                if self._stop.is_set() or (
+                        self.scheduler is not None
+                        and not self.scheduler.acquire('cache', self.chunk_size, self._stop)):
+                    dst.flush()
+                    self._save_progress(key, target, size, copied, now)
+                    raise CopyCancelled(key)
+                started = time.monotonic()
+                data = src.read(self.chunk_size)
+                if not data:
+                    break
+                if self.scheduler is not None:
+                    self.scheduler.record(len(data), time.monotonic() - started)
+                dst.write(data)
+                copied += len(data)
+                self.bytes_copied += len(data)
+                chunks += 1
+                if chunks % PROGRESS_EVERY == 0:
+                    dst.flush()
+                    self._save_progress(key, target, size, copied, now)
+
+        if copied != size:
+            self._save_progress(key, target, size, copied, now)
+            return False
+        part.replace(target)
+        with VlcDatabase() as db:
+            db.save_cache_entry(key, str(target), size, size, True, now)
+        return True
+
+    @staticmethod
+    def _save_progress(key: str, target: Path, size: int, copied: int, now: float) -> None:
+        with VlcDatabase() as db:
+            db.save_cache_entry(key, str(target), size, copied, False, now)
+
+    def fill(self, current: Path, ahead: int,
+             resolve: Callable[[str], Optional[Path]] = next_episode) -> List[Path]:
+        """Текущая серия и ahead следующих - в кэш; возвращает полные копии"""
+        queue = [Path(current)]
+        while len(queue) <= ahead:
+            following = resolve(str(queue[-1]))
+            if following is None:
+                break
+            queue.append(following)
+
+        protect = {self._key(path) for path in queue}
+        done = []
+        for path in queue:
+            if self._stop.is_set():
+                break
+            try:
+                if self.copy(path, protect):
+                    done.append(self.cache_path(path))
+            except CopyCancelled:
+                break
+            except OSError as e:
+                # Обрыв sshfs: прогресс сохранён, следующий fill докачает
+                print(f"⚠️  Кэш: {Path(path).name}: {e}", file=sys.stderr)
+                break
+        return done
+
+
+def main() -> int:
+    """Главная функция CLI"""
+    if len(sys.argv) < 2 or sys.argv[1] not in ('lookup', 'fill', 'status', 'evict'):
+        print("Использование: media_cache.py lookup|fill <файл> [K] | status | evict", file=sys.stderr)
+        return 1
+
+    command = sys.argv[1]
+    settings = load_settings()
+    if command == 'lookup':
+        # cvlc.sh: при выключенном кэше - сразу "нет копии"
+        if not settings.enabled or len(sys.argv) < 3:
+            return 1
+        path = MediaCache.from_settings(settings).lookup(Path(sys.argv[2]))
+        if path is None:
+            return 1
+        print(path)
+        return 0
+
+    cache = MediaCache.from_settings(settings)
+    if command == 'fill':
+        if len(sys.argv) < 3:
+            print("ERROR: укажите файл", file=sys.stderr)
+            return 1
+        ahead = int(sys.argv[3]) if len(sys.argv) > 3 else settings.ahead
+        done = cache.fill(Path(sys.argv[2]), ahead)
+        print(f"OK {len(done)} {cache.bytes_copied}")
+        return 0
+    if command == 'evict':
+        ok = cache.evict()
+        print(f"{'OK' if ok else 'ERROR'} {cache.used() // MB} MB / {cache.budget // MB} MB")
+        return 0 if ok else 1
+
+    with VlcDatabase() as db:
+        entries = db.get_cache_entries()
+    for source, _, size, copied, complete, last_access, status in sorted(entries, key=lambda e: -e[5]):
+        state = "OK " if complete else f"{100 * copied // size if size else 0:>2}%"
+        print(f"{state} {size // MB:>6} MB  {status or '-':<8} {source}")
+    print(f"Итого: {cache.used() // MB} MB / {cache.budget // MB} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,14 @@
 #!/bin/bash
 # playback-tracker.sh - Библиотека отслеживания прогресса воспроизведения
-# Версия: 0.4.0
+# Версия: 0.4.2
 # Changelog:
 #   0.1.0 - Первая версия
 #   0.2.0 - Добавлен автомониторинг VLC (29.11.2025)
 #   0.3.0 - Переход на SQLite БД (29.11.2025)
 #   0.3.1 - Добавлено кеширование процентов (02.12.2025)
 #   0.4.0 - Threshold 90%, basename consistency, защита от перезаписи (05.12.2025)
+#   0.4.1 - Опрос позиции через vlc-rc.sh вместо nc (19.10.2026)
+#   0.4.2 - monitor_vlc_playback/finalize_playback удалены - позицию сохраняет playback_supervisor.py (19.10.2026)
 #
 # Использование: source "$SCRIPT_DIR/playback-tracker.sh"
 
@@ -50,9 +52,6 @@ SERIES_PATTERN='S[0-9][0-9][-_. ]*E[0-9][0-9]'
 WATCHED_THRESHOLD=90     # Процент для [X] - просмотрено (до начала титров)
 PARTIAL_THRESHOLD=1      # Минимальный процент для [T] - частично
 
-# Интервал мониторинга в секундах
-MONITOR_INTERVAL=60
-
 # Кеш статусов просмотра (ассоциативный массив)
 declare -A PLAYBACK_STATUS_CACHE
 
@@ -189,8 +188,8 @@ save_progress() {
     local series_prefix=$(extract_series_prefix "$filename")
     local series_suffix=$(extract_series_suffix "$filename")
     
-    # Сохраняем в БД
-    db_save_playback "$filename" "$seconds" "$total" "$percent" "$series_prefix" "$series_suffix"
+    # Сохраняем в БД (dir - для агрегатов прогресса папок, может быть пустым)
+    db_save_playback "$filename" "$seconds" "$total" "$percent" "$series_prefix" "$series_suffix" "$dir"
     
     # DEBUG: Отключено - вызывало SQL injection с апострофами в именах файлов
     # db_save_debug_info "$filename" "updated_at:$(date +%s)"
@@ -248,68 +247,3 @@ get_progress_percent() {
     echo "$progress" | cut -d: -f3
     return 0
 }
-
-# ============================================================
-# МОНИТОРИНГ VLC ВОСПРОИЗВЕДЕНИЯ
-# ============================================================
-
-# Мониторинг прогресса воспроизведения VLC в фоне
-# Использование: monitor_vlc_playback "video_basename.mkv" VLC_PID
-# Возвращает: PID процесса мониторинга
-# 
-# ВАЖНО: Принимает basename файла (не полный путь) для консистентности с БД
-monitor_vlc_playback() {
-    local filename="$1"  # Basename файла
-    local vlc_pid="$2"
-    
-    (
-        while true; do
-            sleep "$MONITOR_INTERVAL"  # Используем настройку из начала файла (60 сек)
-            
-            # Проверяем что VLC ещё работает
-            if ! kill -0 "$vlc_pid" 2>/dev/null; then
-                break
-            fi
-            
-            # Получаем позицию через VLC RC (timeout 1 сек)
-            local current=$(echo "get_time" | nc -w 1 localhost 4212 2>&1 | grep -oE '[0-9]+' | tail -1)
-            local total=$(echo "get_length" | nc -w 1 localhost 4212 2>&1 | grep -oE '[0-9]+' | tail -1)
-            
-            # Если получили данные - сохраняем
-            if [ -n "$current" ] && [ -n "$total" ] && [ "$total" -gt 0 ]; then
-                local percent=$((current * 100 / total))
-                # Передаём пустую строку для dir (не используется), filename уже basename
-                save_progress "" "$filename" "$current" "$total" "$percent"
-            fi
-        done
-    ) &
-    
-    echo $!  # Возвращаем PID процесса мониторинга
-}
-
-# Финальное сохранение позиции при выходе
-# Использование: finalize_playback "video_basename.mkv"
-# 
-# ВАЖНО: Принимает basename файла (не полный путь) для консистентности с БД
-finalize_playback() {
-    local filename="$1"  # Basename файла
-    
-    # Проверяем: если outro уже сработал, НЕ перезаписываем 100%
-    if [ -n "${OUTRO_TRIGGERED:-}" ] && [ "$OUTRO_TRIGGERED" -eq 1 ]; then
-        echo "✓ Outro уже сработал - финальное сохранение пропущено"
-        return 0
-    fi
-    
-    # Получаем позицию (timeout 2 сек - дольше т.к. это финальное)
-    local current=$(echo "get_time" | nc -w 2 localhost 4212 2>&1 | grep -oE '[0-9]+' | tail -1)
-    local total=$(echo "get_length" | nc -w 2 localhost 4212 2>&1 | grep -oE '[0-9]+' | tail -1)
-    
-    if [ -n "$current" ] && [ -n "$total" ] && [ "$total" -gt 0 ]; then
-        local percent=$((current * 100 / total))
-        # Передаём пустую строку для dir (не используется), filename уже basename
-        save_progress "" "$filename" "$current" "$total" "$percent"
-        return 0
-    fi
-    
-    return 1
-}
@@ -0,0 +1,1222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+playback_supervisor.py - Единый asyncio супервизор сеанса воспроизведения
+Версия: 1.13.0
+
+Заменяет три независимых фоновых цикла vlc-cec.sh (удалены):
+  - cec-client | while read   (кнопки пульта)
+  - monitor_vlc_playback       (сохранение позиции раз в 60 сек, playback-tracker.sh)
+  - monitor_skip_markers       (intro/outro раз в 2 сек)
+
+Один процесс владеет одним соединением с VLC RC, потоком событий CEC,
+сохранением прогресса и логикой intro/outro. Состояние (OUTRO_TRIGGERED,
+маркеры, позиция) общее, а не копии переменных в разных подоболочках bash.
+Bash скрипты обращаются к VLC через shim (vlc-rc.sh) на том же соединении;
+shim запускает только супервизор.
+
+Позиция для intro/outro опрашивается не каждые 2 сек, а по расписанию:
+супервизор знает ближайшую границу (intro_start, начало титров, конец) и
+скорость воспроизведения, спит до момента чуть раньше границы и у неё
+опрашивает часто. После seek/pause расписание пересчитывается.
+
+Между замерами позиция берётся из PlaybackClock (монотонные часы + команды
+seek/pause, которые отправил сам супервизор): INFO, цифры и RED обычно
+обходятся без запросов к VLC.
+
+Удержание кнопки перемотки (UP/DOWN/LEFT/RIGHT, CH+/CH-) даёт поток
+повторов CEC. Нажатия одного жеста накапливаются, шаг растёт с числом
+повторов (cec_seek_acceleration, не больше чем в SEEK_MAX_FACTOR раз), и по отпусканию кнопки (или паузе SEEK_WINDOW) в VLC уходит одна
+абсолютная перемотка. Нажатия за началом/концом файла отбрасываются.
+
+Автопродолжение (autoplay в series_settings): следующая серия ставится в
+плейлист VLC (enqueue) и на титрах/в конце включается командой next; в
+супервизоре меняется только состояние серии (маркеры, флаг outro, ключ
+прогресса) - VLC, cec-client и супервизор не перезапускаются.
+
+Когда серия досмотрена до readahead_percent, начало и конец следующей
+серии читаются в фоне (readahead.py) - по sshfs она откроется без ожидания.
+Если включён локальный кэш (media_cache.py), текущая и cache_ahead следующих
+серий копируются в фоне на SD/USB; автопродолжение ставит в плейлист копию.
+Фоновое чтение идёт через планировщик io_scheduler.py: скорость - остаток
+канала после потребления VLC (/proc/<pid>/io), пауза после перемотки и при
+просадке чтения VLC. Состояние планировщика - `io_scheduler.py status`.
+
+История сеанса (watch_history.py): события start/seek/pause/resume/
+skip_intro/outro/end и шкала позиций пишутся в БД пакетами. По окончании
+сеанса перемотки и выход учитываются в выученных маркерах сериала
+(learned_markers.py) - уверенные предложения записываются в series_settings.
+
+Маркеры и флаги серии (episode_markers: титры из credits_detect.py, intro
+и флаги - вручную) важнее значений сериала; действующие значения и флаг
+outro читаются одним запросом (resolve_markers). RED на серии со своими
+маркерами исправляет их, а не маркеры сериала.
+
+Каждая кнопка трассируется (key_trace.py): приход кадра, разбор, отправка
+команды VLC и ответ VLC. Буфер сеанса дописывается в файл трассировки при
+завершении, отчёт: `key_trace.py report`.
+
+Использование:
+    playback_supervisor.py <видеофайл> [vlc_pid] [cec_device]
+"""
+
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from autoplay import Autoplay, next_episode
+from cec_decoder import CecDecoder, RELEASE_KEY, load_keymap
+from io_scheduler import (IoScheduler, IoSettings, STATUS_FILE, load_settings as load_io_settings,
+                          vlc_read_bytes)
+from key_trace import KeyTracer, TRACE_FILE
+from learned_markers import format_proposal, learn_session, load_confidence
+from media_cache import CacheSettings, MediaCache, load_settings as load_cache_settings
+from Py.config.config_manager import load_value
+from readahead import Readahead, ReadaheadSettings, load_settings
+from vlc_db import VlcDatabase, extract_series_prefix, extract_series_suffix
+from vlc_rc import AsyncVlcRc, VlcRcError, SHIM_PORT, start_async_shim
+from watch_history import WatchHistory
+
+# Константы
+CEC_DEVICE = "/dev/cec1"
+PROGRESS_INTERVAL = 60    # Сохранение позиции (сек), как прежний monitor_vlc_playback
+POLL_MAX_INTERVAL = 30    # Максимальный интервал опроса позиции для intro/outro (сек)
+POLL_LEAD = 1.5           # За сколько секунд до границы переходить на частый опрос
+POLL_TIGHT = 0.25         # Интервал частого опроса у границы (сек)
+POLL_PAUSED = 5           # Интервал опроса на паузе (сек)
+RATE_WINDOW = 2.0         # Минимальное окно оценки скорости (get_time - целые секунды)
+MAX_RATE = 4.0            # Скорость больше - это перемотка, а не воспроизведение
+CLOCK_MAX_AGE = 60        # Показания часов без RC запроса, если замер не старше (сек)
+DRIFT_WARN = 2.0          # Расхождение часов с VLC, о котором сообщаем (сек)
+VLC_WATCH_INTERVAL = 1    # Проверка что VLC жив (сек)
+END_MARGIN = 5            # За сколько секунд до конца считать видео завершённым
+REACTION_DELAY = 5        # Коррекция времени реакции для RED кнопки (сек)
+IO_SAMPLE_INTERVAL = 1    # Замер чтения VLC для планировщика I/O (сек)
+IO_STATUS_INTERVAL = 10   # Не чаще - запись io_status.json при новом решении (сек)
+SWITCH_TIMEOUT = 10       # Ожидание открытия следующей серии после next (сек)
+SEEK_WINDOW = 0.3         # Пауза между повторами, после которой жест seek завершён (сек)
+SEEK_ACCELERATION = ((10, 4), (5, 2))  # (с какого повтора, множитель шага), cec_seek_acceleration
+SEEK_MAX_FACTOR = 4       # Потолок множителя: удержание ~2 с (20 повторов RIGHT) - не больше 20 x 40 с
+
+
+def next_poll_delay(position: int, rate: float, boundaries: List[int],
+                    max_interval: float = POLL_MAX_INTERVAL) -> float:
+    """Пауза до следующего опроса позиции
+
+    Спим до момента за POLL_LEAD до ближайшей границы (с учётом скорости
+    воспроизведения), дальше опрашиваем каждые POLL_TIGHT.
+    """
+    if rate <= 0:
+        return min(POLL_PAUSED, max_interval)
+    ahead = [b for b in boundaries if b > position]
+    if not ahead:
+        return max_interval
+    until = (min(ahead) - position) / rate
+    if until <= POLL_LEAD:
+        return POLL_TIGHT
+    return min(until - POLL_LEAD, max_interval)
+
+
+def seek_step(step: int, repeat: int,
+              acceleration: Tuple[Tuple[int, int], ...] = SEEK_ACCELERATION) -> int:
+    """Шаг перемотки для repeat-го повтора кнопки в жесте (0 - первое нажатие)"""
+    for threshold, factor in acceleration:
+        if repeat >= threshold:
+            return step * min(factor, SEEK_MAX_FACTOR)
+    return step
+
+
+def parse_seek_acceleration(text: str) -> Tuple[Tuple[int, int], ...]:
+    """'5:2,10:4' (с какого повтора:множитель) -> ((10, 4), (5, 2)); множитель до SEEK_MAX_FACTOR"""
+    table = []
+    for item in text.split(','):
+        if not item.strip():
+            continue
+        repeat, factor = (int(part) for part in item.split(':'))
+        if repeat < 1 or factor < 1:
+            raise ValueError(f"'{item.strip()}': повтор и множитель - не меньше 1")
+        table.append((repeat, min(factor, SEEK_MAX_FACTOR)))
+    return tuple(sorted(table, reverse=True))
+
+
+def load_seek_acceleration(db_path: Optional[Path] = None) -> Tuple[Tuple[int, int], ...]:
+    """Ускорение перемотки cec_seek_acceleration из таблицы config, при ошибке - по умолчанию"""
+    text = load_value('cec_seek_acceleration', '', db_path, "Ускорение перемотки")
+    try:
+        return parse_seek_acceleration(text) if text else SEEK_ACCELERATION
+    except ValueError as e:
+        print(f"⚠️  Ускорение перемотки по умолчанию: {e}", file=sys.stderr)
+        return SEEK_ACCELERATION
+
+
+def format_hms(seconds: int) -> str:
+    """Секунды -> HH:MM:SS"""
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+async def cec_client_lines(device: str) -> AsyncIterator[str]:
+    """Строки cec-client -d 8 -t r <device> (пустой поток если cec-client недоступен)"""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            'cec-client', '-d', '8', '-t', 'r', device,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT
+        )
+    except (FileNotFoundError, PermissionError) as e:
+        print(f"⚠️  cec-client не запущен: {e}", flush=True)
+        return
+
+    try:
+        while True:
+            raw = await process.stdout.readline()
+            if not raw:
+                break
+            yield raw.decode('utf-8', 'replace').rstrip('\n')
+    finally:
+        if process.returncode is None:
+            process.terminate()
+            try:
+                await asyncio.wait_for(process.wait(), 2)
+            except asyncio.TimeoutError:
+                process.kill()
+
+
+class PlaybackClock:
+    """Модель позиции воспроизведения по монотонным часам
+
+    Позиция = точка привязки + прошедшее время * скорость. Привязка
+    переносится командами, которые отправляет супервизор (seek, pause), и
+    корректируется замерами get_time. get_time округляет вниз до секунды,
+    поэтому замер p означает позицию в [p, p+1): если модель в этом
+    интервале - она точнее замера и не меняется, иначе расхождение
+    записывается в drift и привязка сдвигается к ближайшей границе.
+    """
+
+    def __init__(self, now: Callable[[], float] = time.monotonic):
+        self._now = now
+        self.anchor_position: Optional[float] = None
+        self.anchor_time = 0.0
+        self.rate = 1.0
+        self._rate_anchor: Optional[tuple] = None  # (позиция, время) начала окна оценки скорости
+        self.last_sample_time: Optional[float] = None
+
+        # Статистика
+        self.samples = 0
+        self.last_drift = 0.0
+        self.max_drift = 0.0
+
+    @property
+    def known(self) -> bool:
+        return self.anchor_position is not None
+
+    def age(self) -> float:
+        """Секунд с последнего замера у VLC"""
+        if self.last_sample_time is None:
+            return float('inf')
+        return self._now() - self.last_sample_time
+
+    def fresh(self, max_age: float = CLOCK_MAX_AGE) -> bool:
+        """Можно ли отвечать по модели без запроса к VLC"""
+        return self.known and self.age() <= max_age
+
+    def _predict(self, now: float) -> float:
+        return max(0.0, self.anchor_position + (now - self.anchor_time) * self.rate)
+
+    def position(self) -> Optional[float]:
+        """Текущая позиция по модели (сек) или None до первого замера"""
+        if not self.known:
+            return None
+        return self._predict(self._now())
+
+    def _anchor(self, position: float, now: float) -> None:
+        self.anchor_position = max(0.0, position)
+        self.anchor_time = now
+
+    def sample(self, position: int) -> float:
+        """Коррекция по get_time; возвращает расхождение модели (сек)"""
+        now = self._now()
+        self.samples += 1
+        self.last_sample_time = now
+
+        if not self.known:
+            self._anchor(position + 0.5, now)
+            self._rate_anchor = (position, now)
+            return 0.0
+
+        predicted = self._predict(now)
+        drift = 0.0
+        if predicted < position:
+            drift = predicted - position
+            self._anchor(position, now)
+        elif predicted >= position + 1:
+            drift = predicted - (position + 1)
+            self._anchor(position + 0.999, now)
+        self.last_drift = drift
+        self.max_drift = max(self.max_drift, abs(drift))
+
+        # Скорость от начала окна: пока окно меньше RATE_WINDOW, оставляем
+        # прежнюю - целочисленный get_time на коротком окне дал бы 0 или 2
+        if self._rate_anchor is None:
+            self._rate_anchor = (position, now)
+        else:
+            window_position, window_time = self._rate_anchor
+            elapsed = now - window_time
+            if elapsed >= RATE_WINDOW:
+                rate = (position - window_position) / elapsed
+                if 0 <= rate <= MAX_RATE:
+                    self._set_rate(rate, now)
+                else:
+                    # Скачок - перемотка мимо супервизора
+                    self._rate_anchor = (position, now)
+                    self._set_rate(1.0, now)
+                    self._anchor(position + 0.5, now)
+        return drift
+
+    def _set_rate(self, rate: float, now: float) -> None:
+        """Смена скорости без скачка позиции"""
+        self._anchor(self._predict(now), now)
+        self.rate = rate
+
+    def seek(self, position: float) -> None:
+        """Абсолютная перемотка отправлена в VLC"""
+        now = self._now()
+        self._anchor(position, now)
+        self._rate_anchor = None
+
+    def seek_relative(self, delta: float) -> None:
+        """Относительная перемотка отправлена в VLC"""
+        if self.known:
+            self.seek(self._predict(self._now()) + delta)
+
+    def toggle_pause(self) -> None:
+        """Команда pause (переключает воспроизведение/паузу)"""
+        now = self._now()
+        if self.known:
+            self._set_rate(0.0 if self.rate > 0 else 1.0, now)
+        self._rate_anchor = None
+
+
+class SeekGesture:
+    """Нажатия кнопок перемотки до отпускания: одна команда seek на жест
+
+    origin - позиция по часам в начале жеста; цель = origin + offset в
+    пределах [0, duration]. Одиночное нажатие и жест без origin (часы ещё не
+    знают позицию) уходят относительной перемоткой, как раньше: она не
+    зависит от точности часов.
+    """
+
+    def __init__(self, origin: Optional[float], duration: Optional[int],
+                 acceleration: Tuple[Tuple[int, int], ...] = SEEK_ACCELERATION):
+        self.origin = origin
+        self.duration = duration
+        self.acceleration = acceleration
+        self.offset = 0.0
+        self.key: Optional[str] = None
+        self.repeat = 0           # Повторов текущей кнопки подряд (ускорение)
+        self.presses = 0          # Нажатий, сдвинувших цель
+        self.clamped = False      # Цель упёрлась в начало/конец файла
+        self.dropped = 0          # ... и отброшенных (цель уже на границе)
+
+    def press(self, key: str, step: int) -> bool:
+        """Нажатие кнопки с шагом step; False - отброшено"""
+        if key != self.key:
+            self.key = key
+            self.repeat = 0
+        delta = seek_step(abs(step), self.repeat, self.acceleration) * (1 if step > 0 else -1)
+        self.repeat += 1
+
+        offset = self.offset + delta
+        if self.origin is not None:
+            target = max(0.0, self.origin + offset)
+            if self.duration:
+                target = min(target, float(self.duration))
+            if target - self.origin != offset:
+                self.clamped = True
+                offset = target - self.origin
+        if offset == self.offset:
+            self.dropped += 1
+            return False
+        self.offset = offset
+        self.presses += 1
+        return True
+
+    def target(self) -> Optional[int]:
+        """Абсолютная цель (сек) или None - перемотка относительная"""
+        if self.origin is None or (self.presses == 1 and not self.clamped):
+            return None
+        return int(self.origin + self.offset)
+
+
+class PlaybackState:
+    """Общее состояние сеанса воспроизведения"""
+
+    def __init__(self, video_file: str):
+        path = Path(video_file)
+        self.filename = path.name
+        self.directory = str(path.absolute().parent)
+        self.series_prefix = extract_series_prefix(self.filename)
+        self.series_suffix = extract_series_suffix(self.filename)
+
+        # Последние известные значения из VLC
+        self.position: Optional[int] = None
+        self.duration: Optional[int] = None
+        self.prev_position = 0
+
+        # Позиция между запросами к VLC
+        self.clock = PlaybackClock()
+
+        # Skip markers и настройки сериала
+        self.intro_start: Optional[int] = None
+        self.intro_end: Optional[int] = None
+        self.credits_duration: Optional[int] = None
+        self.episode_intro = False    # intro - своё у серии (episode_markers)
+        self.episode_credits = False  # credits_duration - своё у серии
+        self.skip_intro = False
+        self.skip_outro = False
+        self.autoplay = False
+
+        # Флаги сеанса
+        self.intro_skipped = False
+        self.outro_triggered = False
+        self.setup_mode = 0          # RED: 0 - ждём intro start, 1 - ждём intro end
+        self.setup_intro_start = 0
+
+    @property
+    def outro_start(self) -> Optional[int]:
+        """Начало титров: длительность - credits_duration"""
+        if self.credits_duration is None or not self.duration:
+            return None
+        return self.duration - self.credits_duration
+
+
+class PlaybackSupervisor:
+    """Супервизор: CEC + прогресс + intro/outro в одном event loop"""
+
+    def __init__(self, video_file: str, vlc_pid: Optional[int] = None,
+                 rc: Optional[AsyncVlcRc] = None,
+                 cec_lines: Optional[AsyncIterator[str]] = None,
+                 cec_device: str = CEC_DEVICE,
+                 keymap: Optional[Dict[int, str]] = None,
+                 progress_interval: float = PROGRESS_INTERVAL,
+                 max_poll_interval: float = POLL_MAX_INTERVAL,
+                 shim_port: Optional[int] = SHIM_PORT,
+                 seek_window: float = SEEK_WINDOW,
+                 seek_acceleration: Optional[Tuple[Tuple[int, int], ...]] = None,
+                 trace_file: Optional[Path] = TRACE_FILE,
+                 readahead: Optional[ReadaheadSettings] = None,
+                 cache: Optional[CacheSettings] = None,
+                 io: Optional[IoSettings] = None,
+                 io_status_file: Optional[Path] = STATUS_FILE,
+                 markers_confidence: Optional[int] = None,
+                 output: Callable[[str], None] = None):
+        self.state = PlaybackState(video_file)
+        self.vlc_pid = vlc_pid
+        self.rc = rc or AsyncVlcRc()
+        self.cec_lines = cec_lines if cec_lines is not None else cec_client_lines(cec_device)
+        self.decoder = CecDecoder(keymap if keymap is not None else load_keymap(), releases=True)
+        self.progress_interval = progress_interval
+        self.max_poll_interval = max_poll_interval
+        self.shim_port = shim_port
+        self.seek_window = seek_window
+        self.seek_acceleration = (seek_acceleration if seek_acceleration is not None
+                                  else load_seek_acceleration())
+        self.trace_file = trace_file
+        self.readahead_settings = readahead if readahead is not None else load_settings()
+        self.cache_settings = cache if cache is not None else load_cache_settings()
+        self.io = IoScheduler(io if io is not None else load_io_settings())
+        self.io_status_file = io_status_file
+        self.markers_confidence = (markers_confidence if markers_confidence is not None
+                                   else load_confidence())
+        self.output = output or (lambda text: print(text, flush=True))
+
+        self._stop: Optional[asyncio.Event] = None
+        self._stopping = False   # stop() до создания event loop/события в run()
+        self._quit_vlc = False
+        self._resync: Optional[asyncio.Event] = None  # seek/pause - пересчитать расписание опроса
+        self.position_polls = 0
+        self.clock_reads = 0      # Позиция для кнопок/прогресса по часам (без I/O)
+        self.rc_reads = 0         # ... и с запросом к VLC
+        self.key_latencies: List[float] = []  # Строка cec-client -> ответ VLC на команду (сек)
+        self.tracer = KeyTracer()
+        self.history = WatchHistory()
+
+        # Локальный кэш: одно фоновое копирование за раз (lock), новое - после
+        # переключения серии, предыдущее отменяется
+        self._cache: Optional[MediaCache] = None
+        self._cache_lock = threading.Lock()
+        self.cache_bytes = 0
+        locate = None
+        if self.cache_settings.enabled:
+            locate = MediaCache.from_settings(self.cache_settings, self.io).lookup
+        self.autoplay = Autoplay(self.rc, locate=locate)
+
+        # Упреждающее чтение следующей серии: одно на серию, в потоке
+        self._readahead: Optional[Readahead] = None
+        self._readahead_state: Optional[PlaybackState] = None
+        self._readahead_future: Optional[asyncio.Future] = None
+        self.readahead_bytes = 0
+
+        # Жест перемотки: накопленные повторы до отпускания кнопки
+        self._gesture: Optional[SeekGesture] = None
+        self._gesture_timer: Optional[asyncio.TimerHandle] = None
+        self._gesture_flush: Optional[asyncio.Task] = None
+        self.seek_presses = 0
+        self.seek_commands = 0
+        self.seek_dropped = 0
+
+        # Кнопки перемотки: имя -> (шаг, сообщение в начале жеста)
+        self.seek_keys: Dict[str, Tuple[int, str]] = {
+            'up': (30, "⏩⏩ +30 sec"),
+            'down': (-30, "⏪⏪ -30 sec"),
+            'left': (-10, "⏪ -10 sec"),
+            'right': (10, "⏩ +10 sec"),
+            'channel_up': (60, "⏩⏩⏩ +60 sec"),
+            'channel_down': (-60, "⏪⏪⏪ -60 sec"),
+        }
+
+        # Кнопки пульта: имя (cec_key_<имя> в таблице config) -> действие
+        self.key_actions: Dict[str, Callable] = {
+            'play': lambda: self._play_pause(),
+            'pause': lambda: self._play_pause(),
+            'back': lambda: self.exit_playback("⏹️  Exit"),
+            'info': lambda: self._show_time(),
+            'red': lambda: self._red_button(),
+            'green': lambda: self._next_subtitle(),
+            'yellow': lambda: self._volume(+1),
+            'blue': lambda: self._volume(-1),
+            '0': lambda: self._seek_start(),
+        }
+        for digit in range(1, 10):
+            self.key_actions[str(digit)] = (lambda d=digit: self._seek_percent(d * 10))
+        for name, (step, message) in self.seek_keys.items():
+            self.key_actions[name] = (lambda n=name, s=step, m=message: self._seek_press(n, s, m))
+
+    def _start_history(self) -> None:
+        state = self.state
+        self.history.start(state.filename, state.series_prefix, state.series_suffix,
+                           state.position, state.duration)
+
+    def _end_history(self, position: Optional[int]) -> None:
+        """Завершить сеанс истории и учесть его в выученных маркерах сериала"""
+        state = self.state
+        events = self.history.session_events()
+        self.history.end(position, state.duration)
+        if not state.series_prefix:
+            return
+        proposal, applied = learn_session(state.series_prefix, state.series_suffix, events,
+                                          state.duration, self.markers_confidence)
+        if applied:
+            self.output(f"🎓 Выученные маркеры ({', '.join(applied)}): {format_proposal(proposal)}")
+
+    # ------------------------------------------------------------------
+    # Жизненный цикл
+    # ------------------------------------------------------------------
+
+    def load(self) -> None:
+        """Маркеры и флаги серии (с наследованием от сериала) и outro_triggered - один запрос"""
+        state = self.state
+        with VlcDatabase() as db:
+            markers = db.resolve_markers(state.filename)
+        if markers:
+            state.autoplay = markers['autoplay']
+            state.skip_intro = markers['skip_intro']
+            state.skip_outro = markers['skip_outro']
+            state.intro_start = markers['intro_start']
+            state.intro_end = markers['intro_end']
+            state.credits_duration = markers['credits_duration']
+            state.episode_intro = markers['intro_episode']
+            state.episode_credits = markers['credits_episode']
+            state.outro_triggered = markers['outro_triggered']
+
+        if state.intro_start is not None and state.intro_end is not None:
+            episode = ' (серия)' if state.episode_intro else ''
+            self.output(f"✓ Intro: {state.intro_start}s - {state.intro_end}s{episode} "
+                        f"(skip: {'ON' if state.skip_intro else 'OFF'})")
+        if state.credits_duration is not None:
+            episode = ' (серия)' if state.episode_credits else ''
+            self.output(f"✓ Credits: {state.credits_duration}s{episode} "
+                        f"(skip: {'ON' if state.skip_outro else 'OFF'})")
+
+    def stop(self) -> None:
+        """Завершить сеанс (сигнал, VLC завершился, BACK)"""
+        self._stopping = True
+        if self._stop is not None:
+            self._stop.set()
+
+    async def exit_playback(self, message: str) -> None:
+        """Выход из VLC: сохранить позицию, затем quit"""
+        self.output(message)
+        self._quit_vlc = True
+        self.stop()
+
+    async def run(self) -> int:
+        """Главный цикл до завершения сеанса"""
+        self._stop = asyncio.Event()
+        self._resync = asyncio.Event()
+        if self._stopping:
+            self._stop.set()
+        self.load()
+        self._start_history()
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        # Shim для bash (vlc-rc.sh) на соединении супервизора: VLC RC
+        # обслуживает одного клиента, второе соединение ждало бы в очереди
+        shim = None
+        if self.shim_port is not None:
+            try:
+                shim = await start_async_shim(self.rc, port=self.shim_port)
+            except OSError as e:
+                self.output(f"⚠️  RC shim не запущен: {e}")
+
+        try:
+            await self._prepare_next()
+        except VlcRcError as e:
+            self.output(f"⚠️  Автопродолжение: {e}")
+        self._start_cache_fill()
+
+        tasks = [
+            asyncio.create_task(self._cec_loop()),
+            asyncio.create_task(self._progress_loop()),
+            asyncio.create_task(self._skip_loop()),
+            asyncio.create_task(self._vlc_watch()),
+            asyncio.create_task(self._io_loop()),
+        ]
+
+        await self._stop.wait()
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if shim is not None:
+            shim.close()
+
+        self._cancel_readahead()
+        self._cancel_cache_fill()
+
+        # Недосланный жест перемотки - до финального сохранения позиции
+        if self._gesture_flush is not None:
+            await asyncio.gather(self._gesture_flush, return_exceptions=True)
+        try:
+            await self.flush_seek()
+        except VlcRcError:
+            pass
+
+        await self.finalize()
+        self._end_history(self.state.position)
+        history = self.history.stats()
+        if history['history_batches']:
+            self.output(f"✓ История: {history['history_events']} событий, шкала "
+                        f"x{self.history.session_ratios[-1]:.1f}, {history['history_batches']} записей "
+                        f"по {history['history_write_ms']:.1f} мс")
+        if self._quit_vlc:
+            await self.rc.quit()
+        await self.rc.close()
+        self._dump_trace()
+        self._dump_io_status()
+        return 0
+
+    async def finalize(self) -> None:
+        """Финальное сохранение позиции при выходе (бывший finalize_playback)"""
+        state = self.state
+        if state.outro_triggered:
+            self.output("✓ Outro уже сработал - финальное сохранение пропущено")
+            return
+        try:
+            await self._sample_position()
+        except VlcRcError:
+            # VLC уже закрыт - позиция по часам точнее последнего замера
+            if state.clock.fresh() and state.duration:
+                state.position = min(int(state.clock.position()), state.duration)
+        self._save_progress()
+        clock = state.clock
+        self.output(f"✓ Часы: {clock.samples} замеров, макс. расхождение {clock.max_drift:.2f}s")
+
+    # ------------------------------------------------------------------
+    # Прогресс
+    # ------------------------------------------------------------------
+
+    async def _sample_position(self) -> None:
+        """Запрос позиции (и длительности, если неизвестна) у VLC"""
+        state = self.state
+        if not state.duration:
+            state.duration = await self.rc.get_length() or None
+        position = await self.rc.get_time()
+        if position is not None:
+            self._clock_sample(position)
+
+    def _clock_sample(self, position: int) -> None:
+        """Замер get_time: позиция состояния и коррекция часов"""
+        self.state.position = position
+        self.history.sample(position)
+        drift = self.state.clock.sample(position)
+        if abs(drift) >= DRIFT_WARN:
+            self.output(f"⚠️  Часы воспроизведения разошлись с VLC на {drift:+.1f}s")
+
+    async def playback_position(self) -> Tuple[Optional[int], Optional[int]]:
+        """(позиция, длительность): по часам, если замер свежий, иначе запрос к VLC"""
+        state = self.state
+        clock = state.clock
+        if clock.fresh() and state.duration:
+            self.clock_reads += 1
+            return min(int(clock.position()), state.duration), state.duration
+        self.rc_reads += 1
+        await self._sample_position()
+        return state.position, state.duration
+
+    def _save_progress(self) -> None:
+        """Сохранение позиции в БД (не перезаписывает 100% после outro)"""
+        state = self.state
+        if state.outro_triggered or state.position is None or not state.duration:
+            return
+        percent = state.position * 100 // state.duration
+        with VlcDatabase() as db:
+            db.save_playback(state.filename, state.position, state.duration, percent,
+                             state.series_prefix or None, state.series_suffix or None,
+                             state.directory)
+
+    async def _progress_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            try:
+                position, _ = await self.playback_position()
+            except VlcRcError:
+                continue
+            if position is not None:
+                self.state.position = position
+                self.history.sample(position)
+                self._maybe_readahead(position)
+            self._save_progress()
+            self.history.flush()
+
+    # ------------------------------------------------------------------
+    # Intro/Outro
+    # ------------------------------------------------------------------
+
+    def _boundaries(self) -> List[int]:
+        """Позиции, на которых должна сработать логика intro/outro/конца"""
+        state = self.state
+        points = []
+        if (state.skip_intro and not state.intro_skipped
+                and state.intro_start is not None and state.intro_end is not None):
+            points.append(state.intro_start)
+        if state.skip_outro and not state.outro_triggered and state.outro_start is not None:
+            points.append(state.outro_start)
+        if state.duration:
+            points.append(state.duration - END_MARGIN)
+        return points
+
+    async def _skip_loop(self) -> None:
+        """Опрос позиции по расписанию: редко в середине серии, часто у границ"""
+        announced = None    # Серия, для которой выведена граница outro
+        delay = 0.0
+        while True:
+            state = self.state
+            try:
+                await asyncio.wait_for(self._resync.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            if self._resync.is_set():
+                # Команда seek/pause: часы уже сдвинуты, замер уточняет позицию
+                self._resync.clear()
+                await asyncio.sleep(POLL_TIGHT)
+
+            try:
+                if not state.duration:
+                    state.duration = await self.rc.get_length() or None
+                position = await self.rc.get_time()
+            except VlcRcError:
+                delay = self.max_poll_interval
+                continue
+            self.position_polls += 1
+            if position is None:
+                delay = POLL_PAUSED
+                continue
+            self._clock_sample(position)
+
+            if announced is not state and state.outro_start is not None:
+                self.output(f"📺 Видео: {state.duration}s, титры: {state.credits_duration}s "
+                            f"→ outro: {state.outro_start}s")
+                announced = state
+
+            await self.check_markers(position)
+            if self._stop.is_set():
+                return
+            self._maybe_readahead(position)
+
+            clock = self.state.clock
+            delay = next_poll_delay(clock.position(), clock.rate, self._boundaries(),
+                                    self.max_poll_interval)
+
+    async def check_markers(self, position: int) -> None:
+        """Логика monitor_skip_markers для очередной позиции"""
+        state = self.state
+
+        # === INTRO CHECK ===
+        if (state.intro_start is not None and state.intro_end is not None
+                and state.skip_intro and not state.intro_skipped
+                and state.intro_start <= position < state.intro_end):
+            self.output(f"⏩ Пропуск заставки: {state.intro_start}s → {state.intro_end}s")
+            state.intro_skipped = True
+            state.position = state.intro_end
+            state.clock.seek(state.intro_end)
+            await self._vlc_seek(state.intro_end, position, 'skip_intro')
+
+        # === OUTRO CHECK ===
+        outro_start = state.outro_start
+        if outro_start is not None and state.skip_outro:
+            # Сброс флага при перемотке назад
+            if position < outro_start <= state.prev_position and state.outro_triggered:
+                self.output("⏪ Сброс outro флага")
+                state.outro_triggered = False
+                with VlcDatabase() as db:
+                    db.set_outro_triggered(state.filename, 0)
+
+            # Pause на outro
+            if position >= outro_start and not state.outro_triggered:
+                self.output(f"⏸️  Outro - PAUSE ({outro_start}s)")
+                # Флаг и статус [X] - в БД до команды: завершение сеанса во время
+                # pause не должно оставить finalize() без флага
+                state.outro_triggered = True
+                self.history.event('outro', position)
+                with VlcDatabase() as db:
+                    db.set_outro_triggered(state.filename, 1)
+                    db.save_playback(state.filename, state.duration, state.duration, 100,
+                                     state.series_prefix or None, state.series_suffix or None,
+                                     state.directory)
+                if self.autoplay.queued is not None:
+                    await self._next_episode("⏭️  Outro - следующая серия")
+                    return
+                state.clock.toggle_pause()
+                await self.rc.pause()
+
+        # Проверка окончания видео (после outro)
+        if state.duration and position >= state.duration - END_MARGIN:
+            if self.autoplay.queued is not None:
+                await self._next_episode("⏭️  Видео завершено - следующая серия")
+                return
+            await self.exit_playback("🏁 Видео завершено - выход в меню")
+
+        state.prev_position = position
+
+    # ------------------------------------------------------------------
+    # Автопродолжение
+    # ------------------------------------------------------------------
+
+    async def _prepare_next(self) -> None:
+        """Следующая серия - в плейлист VLC, если для сериала включён autoplay"""
+        state = self.state
+        if not state.autoplay:
+            return
+        path = await self.autoplay.prepare(str(Path(state.directory) / state.filename))
+        if path is not None:
+            self.output(f"⏭️  Следующая серия: {path.name}")
+
+    async def _next_episode(self, message: str) -> None:
+        """Переход на поставленную серию без перезапуска: новое состояние серии"""
+        state = self.state
+        previous = state.position or 0
+        self.output(message)
+        if not state.outro_triggered and state.duration:
+            # Досмотрено до конца без outro - 100%, как после outro
+            state.position = state.duration
+            self._save_progress()
+
+        path = await self.autoplay.advance()
+        if path is None:
+            return
+        self._end_history(previous)
+        await self._wait_switched(previous)
+        self._gesture = None
+        if self._gesture_timer is not None:
+            self._gesture_timer.cancel()
+            self._gesture_timer = None
+
+        # Чтение следующей серии, которая теперь играет, только мешает VLC
+        self._cancel_readahead()
+        self.state = PlaybackState(str(path))
+        self.load()
+        self._start_history()
+        self.output(f"▶️  {self.state.filename}")
+        await self._prepare_next()
+        self._start_cache_fill()
+        if self._resync is not None:
+            self._resync.set()
+
+    def _maybe_readahead(self, position: int) -> None:
+        """Фоновое чтение следующей серии, когда текущая досмотрена до percent"""
+        state = self.state
+        percent = self.readahead_settings.percent
+        if (percent <= 0 or self._readahead_state is state or not state.duration
+                or position * 100 < percent * state.duration):
+            return
+        self._readahead_state = state
+        path = self.autoplay.queued or next_episode(str(Path(state.directory) / state.filename))
+        if path is None:
+            return
+        job = self._readahead = Readahead.from_settings(path, self.readahead_settings, self.io)
+        self.output(f"📥 Упреждающее чтение: {path.name}")
+        self._readahead_future = asyncio.get_running_loop().run_in_executor(None, self._run_readahead, job)
+
+    def _run_readahead(self, job: Readahead) -> None:
+        job.run()
+        self.readahead_bytes += job.bytes_read
+
+    def _cancel_readahead(self) -> None:
+        if self._readahead is not None:
+            self._readahead.cancel()
+
+    def _start_cache_fill(self) -> None:
+        """Фоновое копирование текущей и следующих серий в локальный кэш"""
+        if not self.cache_settings.enabled:
+            return
+        self._cancel_cache_fill()
+        job = self._cache = MediaCache.from_settings(self.cache_settings, self.io)
+        current = Path(self.state.directory) / self.state.filename
+        asyncio.get_running_loop().run_in_executor(None, self._run_cache_fill, job, current)
+
+    def _run_cache_fill(self, job: MediaCache, current: Path) -> None:
+        # Отменённое копирование дописывает текущий кусок - ждём его
+        with self._cache_lock:
+            job.fill(current, self.cache_settings.ahead)
+        self.cache_bytes += job.bytes_copied
+
+    def _cancel_cache_fill(self) -> None:
+        if self._cache is not None:
+            self._cache.cancel()
+
+    async def _io_loop(self) -> None:
+        """Замер чтения VLC для планировщика I/O; новое решение - в io_status.json"""
+        dumped = None             # Последнее решение, записанное в файл
+        written = 0.0
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(IO_SAMPLE_INTERVAL)
+            read_bytes = vlc_read_bytes(self.vlc_pid) if self.vlc_pid else None
+            self.io.sample(read_bytes, self.state.clock.rate > 0)
+            latest = self.io.decisions[-1] if self.io.decisions else None
+            if latest is not dumped and loop.time() - written >= IO_STATUS_INTERVAL:
+                dumped = latest
+                written = loop.time()
+                self._dump_io_status()
+
+    def _dump_io_status(self) -> None:
+        if self.io_status_file is None:
+            return
+        try:
+            self.io.dump(self.io_status_file)
+        except OSError as e:
+            self.output(f"⚠️  Состояние планировщика I/O не сохранено: {e}")
+
+    async def _wait_switched(self, previous: int) -> None:
+        """Ждать, пока VLC откроет следующую серию
+
+        До этого get_time может вернуть позицию предыдущей - проверка конца
+        сработала бы второй раз и пропустила серию.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + SWITCH_TIMEOUT
+        while loop.time() < deadline:
+            position = await self.rc.get_time()
+            if position is not None and position + END_MARGIN < previous:
+                return
+            await asyncio.sleep(POLL_TIGHT)
+
+    # ------------------------------------------------------------------
+    # VLC и CEC
+    # ------------------------------------------------------------------
+
+    async def _vlc_watch(self) -> None:
+        """Завершение сеанса, когда процесс VLC завершился"""
+        if not self.vlc_pid:
+            return
+        while True:
+            try:
+                os.kill(self.vlc_pid, 0)
+            except ProcessLookupError:
+                self.output("VLC завершён")
+                self.stop()
+                return
+            except PermissionError:
+                pass
+            await asyncio.sleep(VLC_WATCH_INTERVAL)
+
+    async def _cec_loop(self) -> None:
+        async for line in self.cec_lines:
+            await self.handle_cec_line(line)
+
+    async def handle_cec_line(self, line: str) -> None:
+        """Обработка строки cec-client"""
+        start = time.perf_counter()
+        key = self.decoder.decode(line)
+        if key is None:
+            return
+        action = self.key_actions.get(key)
+        if action is None and key != RELEASE_KEY:
+            return
+        seek_key = key in self.seek_keys
+        with self.tracer.trace(key, start, time.perf_counter()) as trace:
+            try:
+                # Отпускание или другая кнопка завершает жест перемотки
+                if not seek_key:
+                    await self.flush_seek()
+                if action is not None:
+                    await action()
+            except VlcRcError as e:
+                trace.error = True
+                self.output(f"⚠️  VLC: {e}")
+        if action is None:
+            return
+        self.key_latencies.append(time.perf_counter() - start)
+        if not seek_key and self._resync is not None:
+            self._resync.set()
+
+    # ------------------------------------------------------------------
+    # Действия кнопок
+    # ------------------------------------------------------------------
+
+    async def _play_pause(self) -> None:
+        self.output("▶️  Play/Pause")
+        clock = self.state.clock
+        clock.toggle_pause()
+        if clock.known:
+            self.history.event('resume' if clock.rate > 0 else 'pause', int(clock.position()))
+        else:
+            self.history.event('pause_toggle')   # До первого замера состояние неизвестно
+        await self.rc.pause()
+
+    async def _seek_press(self, key: str, step: int, message: str) -> None:
+        """Нажатие/повтор кнопки перемотки: накопление жеста без команды VLC"""
+        state = self.state
+        gesture = self._gesture
+        if gesture is None:
+            clock = state.clock
+            origin = clock.position() if clock.fresh() else None
+            gesture = self._gesture = SeekGesture(origin, state.duration, self.seek_acceleration)
+            self.output(message)
+        self.seek_presses += 1
+        if not gesture.press(key, step):
+            self.seek_dropped += 1
+
+        # Повтор продлевает жест; пауза SEEK_WINDOW без повторов - отправка
+        if self._gesture_timer is not None:
+            self._gesture_timer.cancel()
+        self._gesture_timer = asyncio.get_running_loop().call_later(
+            self.seek_window, self._gesture_timeout)
+
+    def _gesture_timeout(self) -> None:
+        self._gesture_timer = None
+        self._gesture_flush = asyncio.ensure_future(self._flush_pending())
+
+    async def _flush_pending(self) -> None:
+        try:
+            await self.flush_seek()
+        except VlcRcError as e:
+            self.output(f"⚠️  VLC: {e}")
+
+    async def flush_seek(self) -> None:
+        """Отправить накопленный жест перемотки одной командой seek"""
+        gesture = self._gesture
+        if gesture is None:
+            return
+        self._gesture = None
+        if self._gesture_timer is not None:
+            self._gesture_timer.cancel()
+            self._gesture_timer = None
+        if not gesture.presses:
+            return
+
+        clock = self.state.clock
+        target = gesture.target()
+        if target is None:
+            delta = int(gesture.offset)
+            clock.seek_relative(delta)
+            command = f"{delta:+d}"
+        else:
+            clock.seek(target)
+            command = target
+        if gesture.presses > 1 or gesture.dropped:
+            self.output(f"   → seek {command} ({gesture.presses + gesture.dropped} нажатий)")
+        self.seek_commands += 1
+        await self._vlc_seek(command, gesture.origin)
+        if self._resync is not None:
+            self._resync.set()
+
+    async def _vlc_seek(self, command, origin: Optional[float], kind: str = 'seek') -> None:
+        """seek в VLC (часы уже переставлены); событие истории origin -> цель
+
+        Фоновое чтение уступает канал, пока VLC заполняет буфер.
+        """
+        self.io.on_seek()
+        target = self.state.clock.position()
+        self.history.event(kind, None if origin is None else int(origin),
+                           None if target is None else int(target))
+        await self.rc.seek(command)
+
+    async def _seek_start(self) -> None:
+        self.output("⏮️  To start")
+        origin = self.state.clock.position()
+        self.state.clock.seek(0)
+        await self._vlc_seek(0, origin)
+
+    async def _seek_percent(self, percent: int) -> None:
+        state = self.state
+        if not state.duration:
+            self.rc_reads += 1
+            state.duration = await self.rc.get_length() or None
+        else:
+            self.clock_reads += 1
+        if state.duration:
+            target = state.duration * percent // 100
+            self.output(f"🎯 Jump to {percent}%")
+            origin = state.clock.position()
+            state.clock.seek(target)
+            await self._vlc_seek(target, origin)
+
+    async def _volume(self, direction: int) -> None:
+        if direction > 0:
+            self.output("🔊 Volume +")
+            await self.rc.volup(1)
+        else:
+            self.output("🔉 Volume -")
+            await self.rc.voldown(1)
+
+    async def _next_subtitle(self) -> None:
+        self.output("📝 Subtitles switch")
+        track = await self.rc.next_subtitle()
+        if track is not None:
+            self.output("   → Subtitles: OFF" if track == -1 else f"   → Subtitles: track {track}")
+
+    async def _show_time(self) -> None:
+        self.output("⏱️  Запрос времени...")
+        current, total = await self.playback_position()
+        if current is None or not total:
+            self.output("⏱️  Ошибка получения времени")
+            return
+        self.output(f"⏱️  {format_hms(current)} / {format_hms(total)} "
+                    f"(осталось: {format_hms(total - current)})")
+
+    async def _red_button(self) -> None:
+        """RED: установка intro маркеров (<20%) или длительности титров (>80%)"""
+        state = self.state
+        if not state.series_prefix:
+            self.output("⚠️  Не сериал - skip markers недоступны")
+            return
+
+        current, total = await self.playback_position()
+        if current is None or not total:
+            self.output("⚠️  Ошибка получения времени")
+            return
+
+        position_percent = current * 100 // total
+
+        if position_percent < 20:
+            if state.setup_mode == 0:
+                state.setup_intro_start = max(0, current - REACTION_DELAY)
+                state.setup_mode = 1
+                self.output(f"📍 Intro Start: {state.setup_intro_start}s (коррекция -{REACTION_DELAY}s)")
+            else:
+                intro_end = current - REACTION_DELAY
+                if intro_end <= state.setup_intro_start:
+                    intro_end = state.setup_intro_start + 1
+                state.setup_mode = 0
+                with VlcDatabase() as db:
+                    if state.episode_intro:
+                        saved = db.set_episode_intro(state.filename, state.setup_intro_start,
+                                                     intro_end, time.time())
+                    else:
+                        saved = db.set_intro_markers(state.series_prefix, state.series_suffix,
+                                                     state.setup_intro_start, intro_end)
+                if saved:
+                    self.output(f"✓ Intro: {state.setup_intro_start}s - {intro_end}s")
+                    state.intro_start = state.setup_intro_start
+                    state.intro_end = intro_end
+                else:
+                    self.output("✗ Ошибка сохранения intro")
+
+        elif position_percent > 80:
+            credits_duration = total - current - REACTION_DELAY
+            with VlcDatabase() as db:
+                # У серии свои титры - исправляются они, иначе значение сериала
+                if state.episode_credits:
+                    saved = db.set_episode_credits(state.filename, credits_duration, 'manual', time.time())
+                else:
+                    saved = db.set_credits_duration(state.series_prefix, state.series_suffix,
+                                                    credits_duration)
+            if saved:
+                self.output(f"✓ Credits: {credits_duration}s (коррекция -{REACTION_DELAY}s)")
+                state.credits_duration = credits_duration
+                state.setup_mode = 0
+            else:
+                self.output("✗ Ошибка сохранения credits")
+
+        else:
+            self.output("⚠️  Нажмите RED в начале (<20%) для Intro или в конце (>80%) для Credits")
+
+    # ------------------------------------------------------------------
+    # Диагностика
+    # ------------------------------------------------------------------
+
+    def _dump_trace(self) -> None:
+        """Трассы кнопок сеанса - в файл трассировки"""
+        if self.trace_file is None:
+            return
+        try:
+            self.tracer.dump(self.trace_file)
+        except OSError as e:
+            self.output(f"⚠️  Трассировка не сохранена: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        """Счётчики сеанса: команды RC и задержка обработки кнопок"""
+        latencies = self.key_latencies
+        return {
+            'rc_commands': self.rc.commands,
+            'rc_connects': self.rc.connects,
+            'position_polls': self.position_polls,
+            'clock_reads': self.clock_reads,
+            'rc_reads': self.rc_reads,
+            'clock_samples': self.state.clock.samples,
+            'clock_max_drift': self.state.clock.max_drift,
+            'keys': len(latencies),
+            'seek_presses': self.seek_presses,
+            'seek_commands': self.seek_commands,
+            'seek_dropped': self.seek_dropped,
+            'episodes_switched': self.autoplay.switches,
+            'readahead_bytes': self.readahead_bytes,
+            'cache_bytes': self.cache_bytes,
+            'io_seeks': self.io.seeks,
+            'io_stalls': self.io.stalls,
+            'io_waited': self.io.waited,
+            **self.history.stats(),
+            'key_latency_avg_ms': 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+            'key_latency_max_ms': 1000 * max(latencies) if latencies else 0.0,
+        }
+
+
+def main() -> int:
+    """Главная функция CLI"""
+    if len(sys.argv) < 2:
+        print("Использование: playback_supervisor.py <видеофайл> [vlc_pid] [cec_device]",
+              file=sys.stderr)
+        return 1
+
+    video_file = sys.argv[1]
+    vlc_pid = int(sys.argv[2]) if len(sys.argv) > 2 and sys.argv[2] else None
+    cec_device = sys.argv[3] if len(sys.argv) > 3 else CEC_DEVICE
+
+    supervisor = PlaybackSupervisor(video_file, vlc_pid=vlc_pid, cec_device=cec_device)
+    return asyncio.run(supervisor.run())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+readahead.py - Упреждающее чтение следующей серии (sshfs по WiFi)
+Версия: 1.1.0
+
+Открытие файла по sshfs начинается с чтения заголовка контейнера и индекса
+(MKV Cues, MP4 moov часто в конце файла) - на WiFi это секунды паузы. Когда
+текущая серия досмотрена до readahead_percent, супервизор в фоне читает
+начало (readahead_head_mb) и конец (readahead_tail_mb) предсказанной
+следующей серии: страницы оказываются в page cache (и в кэше sshfs), и VLC
+открывает файл без ожидания сети.
+
+Для локальных дисков достаточно posix_fadvise(WILLNEED); FUSE (sshfs) его
+обычно не выполняет, поэтому после подсказки идёт потоковое чтение с
+ограничением скорости (readahead_rate_kb), чтобы не отнимать канал у
+текущей серии. В супервизоре чтение дополнительно идёт через планировщик
+io_scheduler.py: он уступает канал VLC после перемотки и при просадке.
+
+Использование:
+    readahead.py <файл> [head_mb] [tail_mb] [rate_kb]   - прочитать вручную
+"""
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from io_scheduler import IoScheduler
+from Py.config.config_manager import load_prefixed_settings
+
+# Константы
+MB = 1024 * 1024
+CHUNK_SIZE = 256 * 1024   # Размер одного чтения (байт)
+
+
+class ReadaheadSettings(NamedTuple):
+    """Настройки из таблицы config (категория media)"""
+    percent: int = 80     # С какого % просмотра текущей серии (0 - выключено)
+    head_mb: int = 32
+    tail_mb: int = 4
+    rate_kb: int = 2048   # КБ/с, 0 - без ограничения
+
+
+def load_settings(db_path: Optional[Path] = None) -> ReadaheadSettings:
+    """Настройки readahead_* из таблицы config, при ошибке - по умолчанию"""
+    return load_prefixed_settings(ReadaheadSettings(), 'readahead_', db_path, "Readahead")
+
+
+def readahead_ranges(size: int, head: int, tail: int) -> List[Tuple[int, int]]:
+    """(смещение, длина): начало файла, затем конец; пересечение - одним диапазоном"""
+    head = min(head, size)
+    tail_start = max(head, size - tail)
+    ranges = [(0, head)] if head else []
+    if tail_start < size:
+        if ranges and tail_start == head:
+            ranges[0] = (0, size)
+        else:
+            ranges.append((tail_start, size - tail_start))
+    return ranges
+
+
+class Readahead:
+    """Одно фоновое упреждающее чтение файла (run() - в отдельном потоке)"""
+
+    def __init__(self, path: Path, head_bytes: int, tail_bytes: int, rate: int = 0,
+                 chunk_size: int = CHUNK_SIZE, clock: Callable[[], float] = time.monotonic,
+                 scheduler: Optional[IoScheduler] = None):
+        self.path = Path(path)
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.rate = rate              # Байт/с, 0 - без ограничения
+        self.scheduler = scheduler
+        self.chunk_size = chunk_size
+        self._clock = clock
+        self._stop = threading.Event()
+
+        self.bytes_read = 0
+        self.elapsed = 0.0
+        self.advised = False          # posix_fadvise выполнен
+        self.done = False
+        self.error: Optional[str] = None
+
+    @classmethod
+    def from_settings(cls, path: Path, settings: ReadaheadSettings,
+                      scheduler: Optional[IoScheduler] = None) -> 'Readahead':
+        return cls(path, settings.head_mb * MB, settings.tail_mb * MB, settings.rate_kb * 1024,
+                   scheduler=scheduler)
+
+    def cancel(self) -> None:
+        self._stop.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._stop.is_set()
+
+    def run(self) -> int:
+        """Чтение диапазонов с ограничением скорости; возвращает прочитанные байты"""
+        start = self._clock()
+        try:
+            with open(self.path, 'rb', buffering=0) as stream:
+                fd = stream.fileno()
+                ranges = readahead_ranges(os.fstat(fd).st_size, self.head_bytes, self.tail_bytes)
+                self._advise(fd, ranges)
+                for offset, length in ranges:
+                    stream.seek(offset)
+                    remaining = length
+                    while remaining > 0 and not self._stop.is_set():
+                        size = min(self.chunk_size, remaining)
+                        if (self.scheduler is not None
+                                and not self.scheduler.acquire('readahead', size, self._stop)):
+                            break
+                        started = self._clock()
+                        data = stream.read(size)
+                        if not data:
+                            break
+                        if self.scheduler is not None:
+                            self.scheduler.record(len(data), self._clock() - started)
+                        remaining -= len(data)
+                        self.bytes_read += len(data)
+                        self._throttle(start)
+            self.done = not self._stop.is_set()
+        except OSError as e:
+            self.error = str(e)
+        self.elapsed = self._clock() - start
+        return self.bytes_read
+
+    def _advise(self, fd: int, ranges: List[Tuple[int, int]]) -> None:
+        if not hasattr(os, 'posix_fadvise'):
+            return
+        try:
+            for offset, length in ranges:
+                os.posix_fadvise(fd, offset, length, os.POSIX_FADV_WILLNEED)
+            self.advised = True
+        except OSError:
+            pass
+
+    def _throttle(self, start: float) -> None:
+        """Пауза, если чтение опережает заданную скорость"""
+        if self.rate <= 0:
+            return
+        ahead = self.bytes_read / self.rate - (self._clock() - start)
+        if ahead > 0:
+            self._stop.wait(ahead)
+
+
+def main() -> int:
+    """Главная функция CLI"""
+    if len(sys.argv) < 2:
+        print("Использование: readahead.py <файл> [head_mb] [tail_mb] [rate_kb]", file=sys.stderr)
+        return 1
+    defaults = ReadaheadSettings()
+    try:
+        head_mb = int(sys.argv[2]) if len(sys.argv) > 2 else defaults.head_mb
+        tail_mb = int(sys.argv[3]) if len(sys.argv) > 3 else defaults.tail_mb
+        rate_kb = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+
+    job = Readahead(Path(sys.argv[1]), head_mb * MB, tail_mb * MB, rate_kb * 1024)
+    job.run()
+    if job.error:
+        print(f"ERROR: {job.error}", file=sys.stderr)
+        return 1
+    print(f"OK {job.bytes_read} {job.elapsed:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 #!/usr/bin/env bash
 # video-menu.sh - Меню выбора видеофайлов для VLC
-# Версия: 0.8.0
-# Дата: 16.12.2025
+# Версия: 0.9.0
+# Дата: 19.10.2026
 
 
 # Проверка версии bash (требуется 4.0+)
@@ -83,10 +83,11 @@ show_menu() {
         items+=(".." "Назад")
     fi
     
-    # Добавляем директории (только реальные папки, скрываем начинающиеся с точки)
+    # Собираем директории (только реальные папки, скрываем начинающиеся с точки)
+    local dir_names=()
     while IFS= read -r dir; do
         if [ -d "$current_dir/$dir" ] && [[ "$dir" != .* ]]; then
-            items+=("$dir" "DIR")
+            dir_names+=("$dir")
         fi
     done < <(ls -1 "$current_dir" 2>/dev/null | sort)
     
@@ -102,6 +103,23 @@ show_menu() {
         cache_playback_statuses "$current_dir" "${video_filenames[@]}"
     fi
     
+    # Агрегаты прогресса подпапок (1 вызов: обновление file_count + чтение по PRIMARY KEY)
+    local -A dir_progress=()
+    while IFS='|' read -r dir_name watched partial total; do
+        [ -z "$dir_name" ] && continue
+        if [ "$watched" -gt 0 ] || [ "$partial" -gt 0 ] || [ "$total" -gt 0 ]; then
+            # total известен только для посещённых папок - не меньше просмотренных
+            [ "$total" -lt $((watched + partial)) ] && total=$((watched + partial))
+            local progress="${watched}/${total}"
+            [ "$partial" -gt 0 ] && progress="$progress T:${partial}"
+            dir_progress["$dir_name"]="$progress"
+        fi
+    done < <(db_get_dir_progress "$current_dir" "${#video_filenames[@]}" "${dir_names[@]}" 2>/dev/null)
+    
+    for dir in "${dir_names[@]}"; do
+        items+=("$dir" "DIR${dir_progress[$dir]:+ ${dir_progress[$dir]}}")
+    done
+    
     # Логируем время построения списка
     local end_build=$(platform_timestamp)
     local build_time=$(platform_time_diff "$start_build" "$end_build")
@@ -197,12 +215,12 @@ show_menu() {
     local total_time=$(platform_time_diff "$start_total" "$end_total")
     timing_log "TOTAL" "Time: ${total_time}s"
     
-    # Обработка выбора
+    # Обработка выбора: только задаём следующее состояние, цикл - в main_loop
     if [ $exit_code -eq 3 ]; then
         # Нажата кнопка "Настройки"
         show_series_settings "$current_dir"
         # Вернуться в меню на тот же элемент
-        show_menu "$current_dir" "$default_item"
+        menu_goto "$current_dir" "$default_item"
     elif [ $exit_code -eq 0 ] && [ -n "$choice" ]; then
         # choice уже содержит чистое имя файла (без иконок)
         
@@ -212,47 +230,102 @@ show_menu() {
             local folder_name=$(basename "$current_dir")  # Название текущей папки
             timing_log "EXIT" "$current_dir -> $parent_dir"
             if [ "$parent_dir" != "/" ]; then
-                show_menu "$parent_dir" "$folder_name"
+                menu_goto "$parent_dir" "$folder_name"
             else
-                show_menu "$START_DIR"
+                menu_goto "$START_DIR"
             fi
         elif [ -d "$current_dir/$choice" ]; then
             # Переход в директорию
             timing_log "EXIT" "$current_dir -> $current_dir/$choice"
-            show_menu "$current_dir/$choice"
+            menu_goto "$current_dir/$choice"
         elif [ -f "$current_dir/$choice" ]; then
             # Запуск видео
-            clear
-            echo "Запуск: $choice"
-            echo ""
-            
-            # Проверяем есть ли сохранённая позиция для видеофайла
-            local progress=$(load_progress "$current_dir" "$choice")
-            if [ -n "$progress" ]; then
-                local saved_seconds=$(echo "$progress" | cut -d: -f1)
-                local saved_percent=$(echo "$progress" | cut -d: -f3)
-                
-                # Показываем информацию о сохранённой позиции
-                echo "Найдена сохранённая позиция: ${saved_percent}% ($(($saved_seconds / 60)) мин $(($saved_seconds % 60)) сек)"
-                echo ""
-                
-                # Запуск VLC с сохранённой позиции (передаём секунды отдельным параметром)
-                "$VLC_SCRIPT" "$saved_seconds" "$current_dir/$choice"
-            else
-                # Запуск с начала
-                "$VLC_SCRIPT" "$current_dir/$choice"
-            fi
-            
-	    # Автоматический возврат в меню - курсор на только что просмотренном видео
-            show_menu "$current_dir" "$choice"
+            MENU_STATE="play"
+            MENU_PLAY_FILE="$choice"
+            menu_goto "$current_dir" "$choice"
         fi
-    elif [ $exit_code -eq 1 ]; then
-        # Отмена - выход
-        clear
-        exit 0
+    else
+        # Отмена/Esc - выход
+        MENU_STATE="exit"
+    fi
+    return 0
+}
+
+# ============================================================================
+# МАШИНА СОСТОЯНИЙ МЕНЮ
+# ============================================================================
+# Один цикл вместо рекурсии show_menu: после каждой навигации и каждого
+# просмотра стек функций и память bash не растут.
+#   browse - показать папку MENU_DIR (курсор на MENU_ITEM)
+#   play   - запустить MENU_PLAY_FILE, затем browse с курсором на нём
+#   exit   - выход
+
+MENU_STATE="browse"
+MENU_DIR=""
+MENU_ITEM=""
+MENU_PLAY_FILE=""
+
+# Следующая папка и элемент под курсором
+menu_goto() {
+    MENU_DIR="$1"
+    MENU_ITEM="$2"
+}
+
+# Запуск видео с сохранённой позиции (или с начала)
+play_video() {
+    local current_dir="$1"
+    local choice="$2"
+    
+    clear
+    echo "Запуск: $choice"
+    echo ""
+    
+    # Проверяем есть ли сохранённая позиция для видеофайла
+    local progress=$(load_progress "$current_dir" "$choice")
+    if [ -n "$progress" ]; then
+        local saved_seconds=$(echo "$progress" | cut -d: -f1)
+        local saved_percent=$(echo "$progress" | cut -d: -f3)
+        
+        # Показываем информацию о сохранённой позиции
+        echo "Найдена сохранённая позиция: ${saved_percent}% ($(($saved_seconds / 60)) мин $(($saved_seconds % 60)) сек)"
+        echo ""
+        
+        # Запуск VLC с сохранённой позиции (передаём секунды отдельным параметром)
+        "$VLC_SCRIPT" "$saved_seconds" "$current_dir/$choice"
+    else
+        # Запуск с начала
+        "$VLC_SCRIPT" "$current_dir/$choice"
     fi
 }
 
+main_loop() {
+    menu_goto "$START_DIR"
+    MENU_STATE="browse"
+    
+    while [ "$MENU_STATE" != "exit" ]; do
+        case "$MENU_STATE" in
+            browse)
+                if ! show_menu "$MENU_DIR" "$MENU_ITEM"; then
+                    # Пустая папка - назад к родителю, курсор на неё
+                    if [ "$MENU_DIR" != "$START_DIR" ]; then
+                        menu_goto "$(dirname "$MENU_DIR")" "$(basename "$MENU_DIR")"
+                    else
+                        MENU_STATE="exit"
+                    fi
+                fi
+                ;;
+            play)
+                play_video "$MENU_DIR" "$MENU_PLAY_FILE"
+                # Автоматический возврат в меню - курсор на только что просмотренном видео
+                MENU_STATE="browse"
+                ;;
+            *)
+                MENU_STATE="exit"
+                ;;
+        esac
+    done
+}
+
 # Проверка что установлен dialog
 if ! command -v dialog &> /dev/null; then
     echo "Ошибка: Необходимо установить dialog"
@@ -262,5 +335,5 @@ fi
 
 # Запуск меню
 clear
-show_menu "$START_DIR"
+main_loop
 clear
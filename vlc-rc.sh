@@ -0,0 +1,93 @@
+#!/bin/bash
+
+# vlc-rc.sh - Библиотека управления VLC через RC интерфейс (через Python vlc_rc.py)
+# Версия: 0.1.2
+# Дата: 19.10.2026
+# Изменения: Описание таймаута vlc_rc_request (shim, без него - nc)
+#   0.1.1 - shim запускает только playback_supervisor.py - vlc_rc_start_shim/vlc_rc_stop_shim удалены
+#   0.1.0 - Одно постоянное соединение с VLC в shim сервере вместо nc на каждую команду
+#
+# Использование: source "$SCRIPT_DIR/vlc-rc.sh"
+
+# Константы
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PYTHON_RC="${SCRIPT_DIR}/vlc_rc.py"
+VLC_RC_PORT=4212        # --rc-host VLC
+VLC_RC_SHIM_PORT=4213   # Shim сервер (держит playback_supervisor.py на своём соединении с VLC)
+
+# ============================================================================
+# SHIM СЕРВЕР
+# ============================================================================
+
+# Запрос к shim через /dev/tcp (без fork)
+# Параметры:
+#   $1 - команда
+#   $2 - timeout в секундах (опциональный, по умолчанию 2)
+# Возвращает: значение через stdout; 0 - OK, 1 - ошибка VLC, 2 - shim недоступен
+vlc_rc_shim_call() {
+    local request="$1"
+    local timeout="${2:-2}"
+    local fd reply
+
+    { exec {fd}<>"/dev/tcp/127.0.0.1/$VLC_RC_SHIM_PORT"; } 2>/dev/null || return 2
+    printf '%s\n' "$request" >&"$fd"
+    IFS= read -r -t "$timeout" reply <&"$fd"
+    exec {fd}>&-
+
+    case "$reply" in
+        OK)    return 0 ;;
+        "OK "*) printf '%s\n' "${reply#OK }"; return 0 ;;
+        "")    return 2 ;;
+        *)     return 1 ;;
+    esac
+}
+
+# ============================================================================
+# КОМАНДЫ VLC
+# ============================================================================
+
+# Отправка команды/запроса в VLC
+# Параметры:
+#   $1 - команда (get_time, get_length, strack, strack_next, seek +30, pause, ...)
+#   $2 - timeout ответа в секундах (опциональный, по умолчанию 1; shim ждём на 1 с дольше,
+#        без супервизора - nc -w к VLC напрямую)
+# Возвращает: ответ через stdout (для get_time/get_length - число)
+vlc_rc_request() {
+    local request="$1"
+    local timeout="${2:-1}"
+
+    vlc_rc_shim_call "$request" "$((timeout + 1))"
+    local result=$?
+    [ $result -ne 2 ] && return $result
+
+    # Fallback: shim не запущен - разовое подключение через nc
+    case "$request" in
+        get_time|get_length)
+            echo "$request" | nc -w "$timeout" localhost "$VLC_RC_PORT" 2>&1 | grep -oE '[0-9]+' | tail -1
+            ;;
+        strack)
+            echo "strack" | nc -w "$timeout" localhost "$VLC_RC_PORT" 2>&1 | grep -E '^\|.*\*' | grep -oE -- '-?[0-9]+' | head -1
+            ;;
+        strack_next)
+            # Следующая дорожка (-1 = выкл -> 0)
+            local current=$(vlc_rc_request "strack" "$timeout")
+            [ -z "$current" ] && return 1
+            local next=$((current == -1 ? 0 : current + 1))
+            echo "strack $next" | nc -w "$timeout" localhost "$VLC_RC_PORT" > /dev/null 2>&1
+            echo "$next"
+            ;;
+        *)
+            echo "$request" | nc -w "$timeout" localhost "$VLC_RC_PORT" 2>&1
+            ;;
+    esac
+}
+
+# Текущая позиция воспроизведения (секунды)
+vlc_rc_get_time() {
+    vlc_rc_request "get_time" "${1:-1}"
+}
+
+# Общая длина видео (секунды)
+vlc_rc_get_length() {
+    vlc_rc_request "get_length" "${1:-1}"
+}
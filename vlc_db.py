@@ -5,14 +5,17 @@ import sqlite3
 import sys
 import os
 import json
+import re
 import threading
+import time
 import queue
 from pathlib import Path
 from typing import Optional, Tuple, List, Dict, Any
 
 # Константы
 SCRIPT_DIR = Path(__file__).parent.resolve()
-DB_PATH = SCRIPT_DIR / "vlc_media.db"
+# VLC_DB_PATH - другая БД (тесты меню и db-manager.sh в дочерних процессах)
+DB_PATH = Path(os.environ.get('VLC_DB_PATH') or SCRIPT_DIR / "vlc_media.db")
 
 # Константы пула соединений
 MIN_CONNECTIONS = 2
@@ -155,6 +158,26 @@ class VlcDatabase:
                     ALTER TABLE playback ADD COLUMN outro_triggered INTEGER DEFAULT 0
                 """)
             
+            # Миграция: добавить directory если колонки нет
+            try:
+                self.cursor.execute("SELECT directory FROM playback LIMIT 1")
+            except sqlite3.OperationalError:
+                self.cursor.execute("""
+                    ALTER TABLE playback ADD COLUMN directory TEXT DEFAULT NULL
+                """)
+            
+            # Агрегаты прогресса по директориям (с учётом всех поддиректорий)
+            # watched/partial/total - суммы по поддереву, file_count - видеофайлы самой папки
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS dir_progress (
+                    directory TEXT PRIMARY KEY,
+                    watched INTEGER DEFAULT 0,
+                    partial INTEGER DEFAULT 0,
+                    total INTEGER DEFAULT 0,
+                    file_count INTEGER DEFAULT 0
+                )
+            """)
+            
             # Таблица настроек сериалов
             self.cursor.execute("""
                 CREATE TABLE IF NOT EXISTS series_settings (
@@ -191,6 +214,49 @@ class VlcDatabase:
                         ALTER TABLE series_settings ADD COLUMN credits_duration INTEGER DEFAULT NULL
                     """)
             
+            # Локальный кэш удалённых файлов (media_cache.py): копия, прогресс
+            # копирования (докачка после обрыва) и время последнего открытия (LRU)
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS media_cache (
+                    source_path TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    cache_path TEXT NOT NULL,
+                    size INTEGER DEFAULT 0,
+                    copied INTEGER DEFAULT 0,
+                    complete INTEGER DEFAULT 0,
+                    last_access REAL DEFAULT 0
+                )
+            """)
+            
+            # История просмотра (watch_history.py): сеансы с упакованной шкалой
+            # позиций и журнал событий (только дописывается)
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS playback_sessions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    filename TEXT NOT NULL,
+                    series_prefix TEXT,
+                    series_suffix TEXT,
+                    started REAL NOT NULL,
+                    ended REAL,
+                    start_position INTEGER,
+                    end_position INTEGER,
+                    duration INTEGER,
+                    samples INTEGER DEFAULT 0,
+                    timeline BLOB,
+                    raw_bytes INTEGER DEFAULT 0
+                )
+            """)
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS playback_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id INTEGER NOT NULL,
+                    ts REAL NOT NULL,
+                    kind TEXT NOT NULL,
+                    position INTEGER,
+                    value INTEGER
+                )
+            """)
+            
             # Создание индексов для оптимизации запросов
             # Индексы для таблицы playback
             self.cursor.execute("""
@@ -202,12 +268,89 @@ class VlcDatabase:
                 ON playback(series_prefix)
             """)
             
+            self.cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_playback_directory 
+                ON playback(directory)
+            """)
+            
             # Индексы для таблицы series_settings (композитный ключ уже есть, но создаём явный индекс)
             self.cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_series_settings_prefix_suffix 
                 ON series_settings(series_prefix, series_suffix)
             """)
             
+            # Выученные маркеры (learned_markers.py): гистограммы перемоток и
+            # выходов по сериалу и значения, записанные в series_settings
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS learned_markers (
+                    series_prefix TEXT NOT NULL,
+                    series_suffix TEXT NOT NULL,
+                    histograms BLOB,
+                    applied_intro_start INTEGER,
+                    applied_intro_end INTEGER,
+                    applied_credits INTEGER,
+                    updated REAL DEFAULT 0,
+                    PRIMARY KEY (series_prefix, series_suffix)
+                )
+            """)
+            
+            # Манифест хранилища отпечатков звука (fingerprint_store.py): серия,
+            # её кадры в frames.u32 и признаки актуальности (размер/время изменения)
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS fingerprint_manifest (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    path TEXT NOT NULL UNIQUE,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    seconds INTEGER NOT NULL,
+                    version INTEGER NOT NULL,
+                    series_prefix TEXT,
+                    series_suffix TEXT,
+                    start INTEGER NOT NULL,
+                    frames INTEGER NOT NULL,
+                    created REAL DEFAULT 0
+                )
+            """)
+            
+            # Маркеры отдельной серии: NULL - значение сериала из series_settings
+            # (титры - credits_detect.py, intro и флаги - вручную)
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS episode_markers (
+                    filename TEXT PRIMARY KEY,
+                    series_prefix TEXT,
+                    series_suffix TEXT,
+                    credits_duration INTEGER,
+                    credits_source TEXT,
+                    updated REAL DEFAULT 0,
+                    intro_start INTEGER DEFAULT NULL,
+                    intro_end INTEGER DEFAULT NULL,
+                    autoplay BOOLEAN DEFAULT NULL,
+                    skip_intro BOOLEAN DEFAULT NULL,
+                    skip_outro BOOLEAN DEFAULT NULL
+                )
+            """)
+            
+            # Миграция: episode_markers без intro и флагов (только титры)
+            self.cursor.execute("PRAGMA table_info(episode_markers)")
+            columns = {row[1] for row in self.cursor.fetchall()}
+            for column, column_type in (('intro_start', 'INTEGER'), ('intro_end', 'INTEGER'),
+                                        ('autoplay', 'BOOLEAN'), ('skip_intro', 'BOOLEAN'),
+                                        ('skip_outro', 'BOOLEAN')):
+                if column not in columns:
+                    self.cursor.execute(f"""
+                        ALTER TABLE episode_markers ADD COLUMN {column} {column_type} DEFAULT NULL
+                    """)
+            
+            # Индексы истории просмотра
+            self.cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_playback_sessions_filename 
+                ON playback_sessions(filename)
+            """)
+            self.cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_playback_events_session 
+                ON playback_events(session_id)
+            """)
+            
             self.conn.commit()
             return True
         except sqlite3.Error as e:
@@ -230,26 +373,126 @@ class VlcDatabase:
         else:
             return None
     
+    @staticmethod
+    def _canonical_dir(directory: str) -> str:
+        """Единый ключ директории для dir_progress и playback.directory - реальный путь
+        
+        Меню bash передаёт логические пути ($HOME/T7/...), curses-меню и супервизор -
+        через resolve(); на примонтированном по симлинку корне (~/T7 -> /media/...)
+        это разные строки для одной папки, поэтому симлинки раскрываются здесь.
+        """
+        return os.path.realpath(directory)
+    
+    @classmethod
+    def _dir_chain(cls, directory: str) -> List[str]:
+        """Цепочка директорий от указанной до корня (для roll-up агрегатов)
+        
+        Пример: '/home/pi/TV/Show' -> ['/home/pi/TV/Show', '/home/pi/TV', '/home/pi', '/home', '/']
+        """
+        path = cls._canonical_dir(directory)
+        chain = []
+        while True:
+            chain.append(path)
+            parent = os.path.dirname(path)
+            if not parent or parent == path:
+                break
+            path = parent
+        return chain
+    
+    def _get_progress_keys(self, filenames: List[str]) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        """Текущие (status, directory) для списка файлов - нужны для вычисления дельт агрегатов"""
+        placeholders = ','.join(['?'] * len(filenames))
+        self.cursor.execute(f"""
+            SELECT filename, status, directory FROM playback
+            WHERE filename IN ({placeholders})
+        """, filenames)
+        return {filename: (status, directory) for filename, status, directory in self.cursor.fetchall()}
+    
+    def _apply_dir_deltas(self, deltas: Dict[str, List[int]]) -> None:
+        """Применение дельт [watched, partial, total] к директориям и всем их предкам
+        
+        Все дельты сначала сворачиваются по цепочкам предков, затем пишутся одним executemany
+        """
+        rollup: Dict[str, List[int]] = {}
+        for directory, (d_watched, d_partial, d_total) in deltas.items():
+            for path in self._dir_chain(directory):
+                acc = rollup.setdefault(path, [0, 0, 0])
+                acc[0] += d_watched
+                acc[1] += d_partial
+                acc[2] += d_total
+        
+        rows = [(path, w, p, t) for path, (w, p, t) in rollup.items() if w or p or t]
+        if not rows:
+            return
+        
+        self.cursor.executemany("""
+            INSERT INTO dir_progress (directory, watched, partial, total)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(directory) DO UPDATE SET
+                watched = watched + excluded.watched,
+                partial = partial + excluded.partial,
+                total = total + excluded.total
+        """, rows)
+    
+    def _update_dir_progress(self, old: Dict[str, Tuple[Optional[str], Optional[str]]],
+                             new_rows: List[Tuple[str, Optional[str], Optional[str]]]) -> None:
+        """Инкрементальное обновление агрегатов директорий после записи playback
+        
+        Args:
+            old: {filename: (status, directory)} до записи
+            new_rows: список (filename, status, directory) - новые значения
+        """
+        deltas: Dict[str, List[int]] = {}
+        
+        def add(directory: Optional[str], status: Optional[str], sign: int) -> None:
+            if not directory or status not in ('watched', 'partial'):
+                return
+            acc = deltas.setdefault(self._canonical_dir(directory), [0, 0, 0])
+            acc[0 if status == 'watched' else 1] += sign
+        
+        for filename, status, directory in new_rows:
+            old_status, old_directory = old.get(filename, (None, None))
+            # Если директория не передана - запись остаётся в прежней
+            new_directory = directory or old_directory
+            if old_status == status and old_directory == new_directory:
+                continue
+            add(old_directory, old_status, -1)
+            add(new_directory, status, +1)
+            # Повторы одного файла внутри пакета считаются от последнего значения
+            old[filename] = (status, new_directory)
+        
+        self._apply_dir_deltas(deltas)
+    
     def save_playback(self, filename: str, position: int, duration: int, 
                      percent: int, series_prefix: Optional[str] = None, 
-                     series_suffix: Optional[str] = None) -> bool:
-        """Сохранение прогресса воспроизведения (защита от SQL injection)"""
+                     series_suffix: Optional[str] = None,
+                     directory: Optional[str] = None) -> bool:
+        """Сохранение прогресса воспроизведения (защита от SQL injection)
+        
+        directory - папка файла; если передана, обновляются агрегаты dir_progress
+        """
         try:
             # Автоматически вычисляем статус из процента
             status = self._calculate_status(percent)
+            if directory:
+                directory = self._canonical_dir(directory)
+            old = self._get_progress_keys([filename])
             
             self.cursor.execute("""
-                INSERT INTO playback (filename, position, duration, percent, status, series_prefix, series_suffix)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO playback (filename, position, duration, percent, status, series_prefix, series_suffix, directory)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 ON CONFLICT(filename) DO UPDATE SET
                     position = ?,
                     duration = ?,
                     percent = ?,
                     status = ?,
                     series_prefix = ?,
-                    series_suffix = ?
-            """, (filename, position, duration, percent, status, series_prefix, series_suffix,
-                  position, duration, percent, status, series_prefix, series_suffix))
+                    series_suffix = ?,
+                    directory = COALESCE(?, directory)
+            """, (filename, position, duration, percent, status, series_prefix, series_suffix, directory,
+                  position, duration, percent, status, series_prefix, series_suffix, directory))
+            
+            self._update_dir_progress(old, [(filename, status, directory)])
             
             self.conn.commit()
             return True
@@ -268,6 +511,7 @@ class VlcDatabase:
                 - percent (int): процент
                 - series_prefix (str, optional): префикс сериала
                 - series_suffix (str, optional): суффикс сериала
+                - directory (str, optional): папка файла (для агрегатов dir_progress)
         
         Возвращает: True при успехе, False при ошибке
         """
@@ -275,10 +519,17 @@ class VlcDatabase:
             return True
         
         try:
+            old = self._get_progress_keys(list({record['filename'] for record in records}))
+            
             # Подготавливаем данные для пакетной вставки
             data = []
+            new_rows = []
             for record in records:
                 status = self._calculate_status(record['percent'])
+                directory = record.get('directory')
+                if directory:
+                    directory = self._canonical_dir(directory)
+                new_rows.append((record['filename'], status, directory))
                 data.append((
                     record['filename'],
                     record['position'],
@@ -287,27 +538,32 @@ class VlcDatabase:
                     status,
                     record.get('series_prefix'),
                     record.get('series_suffix'),
+                    directory,
                     record['position'],
                     record['duration'],
                     record['percent'],
                     status,
                     record.get('series_prefix'),
-                    record.get('series_suffix')
+                    record.get('series_suffix'),
+                    directory
                 ))
             
             # Выполняем пакетную вставку с использованием executemany
             self.cursor.executemany("""
-                INSERT INTO playback (filename, position, duration, percent, status, series_prefix, series_suffix)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO playback (filename, position, duration, percent, status, series_prefix, series_suffix, directory)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 ON CONFLICT(filename) DO UPDATE SET
                     position = ?,
                     duration = ?,
                     percent = ?,
                     status = ?,
                     series_prefix = ?,
-                    series_suffix = ?
+                    series_suffix = ?,
+                    directory = COALESCE(?, directory)
             """, data)
             
+            self._update_dir_progress(old, new_rows)
+            
             self.conn.commit()
             return True
         except sqlite3.Error as e:
@@ -684,6 +940,448 @@ class VlcDatabase:
             print(f"Ошибка очистки skip markers: {e}", file=sys.stderr)
             return False
     
+    def get_cache_entry(self, source_path: str) -> Optional[Tuple[str, int, int, int, float]]:
+        """Запись локального кэша
+        
+        Возвращает: (cache_path, size, copied, complete, last_access)
+        """
+        try:
+            self.cursor.execute("""
+                SELECT cache_path, size, copied, complete, last_access
+                FROM media_cache WHERE source_path = ?
+            """, (source_path,))
+            return self.cursor.fetchone()
+        except sqlite3.Error as e:
+            print(f"Ошибка получения записи кэша: {e}", file=sys.stderr)
+            return None
+    
+    def save_cache_entry(self, source_path: str, cache_path: str, size: int,
+                         copied: int, complete: bool, last_access: float) -> bool:
+        """Сохранение записи локального кэша (прогресс копирования)"""
+        try:
+            self.cursor.execute("""
+                INSERT INTO media_cache
+                (source_path, filename, cache_path, size, copied, complete, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(source_path) DO UPDATE SET
+                    cache_path = excluded.cache_path,
+                    size = excluded.size,
+                    copied = excluded.copied,
+                    complete = excluded.complete,
+                    last_access = excluded.last_access
+            """, (source_path, os.path.basename(source_path), cache_path, size, copied,
+                  int(complete), last_access))
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка сохранения записи кэша: {e}", file=sys.stderr)
+            return False
+    
+    def touch_cache_entry(self, source_path: str, last_access: float) -> bool:
+        """Отметка открытия копии (LRU)"""
+        try:
+            self.cursor.execute("""
+                UPDATE media_cache SET last_access = ? WHERE source_path = ?
+            """, (last_access, source_path))
+            self.conn.commit()
+            return self.cursor.rowcount > 0
+        except sqlite3.Error as e:
+            print(f"Ошибка обновления записи кэша: {e}", file=sys.stderr)
+            return False
+    
+    def delete_cache_entry(self, source_path: str) -> bool:
+        """Удаление записи локального кэша"""
+        try:
+            self.cursor.execute("DELETE FROM media_cache WHERE source_path = ?", (source_path,))
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка удаления записи кэша: {e}", file=sys.stderr)
+            return False
+    
+    def get_cache_entries(self) -> List[Tuple[str, str, int, int, int, float, Optional[str]]]:
+        """Все записи кэша со статусом просмотра
+        
+        Возвращает: [(source_path, cache_path, size, copied, complete, last_access, status)]
+        """
+        try:
+            self.cursor.execute("""
+                SELECT c.source_path, c.cache_path, c.size, c.copied, c.complete,
+                       c.last_access, p.status
+                FROM media_cache c
+                LEFT JOIN playback p ON p.filename = c.filename
+            """)
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Ошибка получения записей кэша: {e}", file=sys.stderr)
+            return []
+    
+    def start_playback_session(self, filename: str, series_prefix: Optional[str],
+                               series_suffix: Optional[str], started: float,
+                               position: Optional[int], duration: Optional[int]) -> Optional[int]:
+        """Новый сеанс просмотра; возвращает id сеанса или None"""
+        try:
+            self.cursor.execute("""
+                INSERT INTO playback_sessions
+                (filename, series_prefix, series_suffix, started, start_position, duration)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (filename, series_prefix, series_suffix, started, position, duration))
+            self.conn.commit()
+            return self.cursor.lastrowid
+        except sqlite3.Error as e:
+            print(f"Ошибка создания сеанса просмотра: {e}", file=sys.stderr)
+            return None
+    
+    def save_playback_history(self, session_id: int, events: List[Tuple[float, str, Optional[int], Optional[int]]],
+                              end_position: Optional[int], duration: Optional[int],
+                              samples: int, timeline: bytes, raw_bytes: int,
+                              ended: Optional[float] = None) -> bool:
+        """Пакетная запись событий сеанса и его шкалы позиций (одна транзакция)
+        
+        Args:
+            events: [(ts, kind, position, value)]
+            ended: время окончания сеанса (None - сеанс продолжается)
+        """
+        try:
+            self.cursor.executemany("""
+                INSERT INTO playback_events (session_id, ts, kind, position, value)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(session_id,) + tuple(event) for event in events])
+            self.cursor.execute("""
+                UPDATE playback_sessions
+                SET end_position = ?, duration = COALESCE(?, duration), samples = ?,
+                    timeline = ?, raw_bytes = ?, ended = COALESCE(?, ended)
+                WHERE id = ?
+            """, (end_position, duration, samples, sqlite3.Binary(timeline), raw_bytes,
+                  ended, session_id))
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print(f"Ошибка записи истории просмотра: {e}", file=sys.stderr)
+            return False
+    
+    def get_playback_sessions(self, filename: Optional[str] = None,
+                              limit: int = 20) -> List[Tuple]:
+        """Последние сеансы просмотра (новые первыми)
+        
+        Возвращает: [(id, filename, started, ended, start_position, end_position,
+                      duration, samples, timeline_bytes, raw_bytes, events)]
+        """
+        try:
+            where = "WHERE s.filename = ?" if filename else ""
+            params = (filename, limit) if filename else (limit,)
+            self.cursor.execute(f"""
+                SELECT s.id, s.filename, s.started, s.ended, s.start_position,
+                       s.end_position, s.duration, s.samples,
+                       COALESCE(LENGTH(s.timeline), 0), s.raw_bytes,
+                       (SELECT COUNT(*) FROM playback_events e WHERE e.session_id = s.id)
+                FROM playback_sessions s
+                {where}
+                ORDER BY s.started DESC, s.id DESC
+                LIMIT ?
+            """, params)
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Ошибка получения сеансов просмотра: {e}", file=sys.stderr)
+            return []
+    
+    def get_session_timeline(self, session_id: int) -> Optional[bytes]:
+        """Упакованная шкала позиций сеанса"""
+        try:
+            self.cursor.execute("SELECT timeline FROM playback_sessions WHERE id = ?", (session_id,))
+            row = self.cursor.fetchone()
+            return bytes(row[0]) if row and row[0] is not None else None
+        except sqlite3.Error as e:
+            print(f"Ошибка получения шкалы сеанса: {e}", file=sys.stderr)
+            return None
+    
+    def get_playback_events(self, session_id: int) -> List[Tuple[float, str, Optional[int], Optional[int]]]:
+        """События сеанса по времени: [(ts, kind, position, value)]"""
+        try:
+            self.cursor.execute("""
+                SELECT ts, kind, position, value FROM playback_events
+                WHERE session_id = ? ORDER BY id
+            """, (session_id,))
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Ошибка получения событий сеанса: {e}", file=sys.stderr)
+            return []
+    
+    def get_learned_markers(self, series_prefix: str, series_suffix: str
+                            ) -> Optional[Tuple[bytes, Optional[int], Optional[int], Optional[int]]]:
+        """Выученные маркеры сериала
+        
+        Возвращает: (histograms, applied_intro_start, applied_intro_end, applied_credits)
+        """
+        try:
+            self.cursor.execute("""
+                SELECT histograms, applied_intro_start, applied_intro_end, applied_credits
+                FROM learned_markers WHERE series_prefix = ? AND series_suffix = ?
+            """, (series_prefix, series_suffix))
+            row = self.cursor.fetchone()
+            if not row:
+                return None
+            return (bytes(row[0] or b''),) + tuple(row[1:])
+        except sqlite3.Error as e:
+            print(f"Ошибка получения выученных маркеров: {e}", file=sys.stderr)
+            return None
+    
+    def save_learned_markers(self, series_prefix: str, series_suffix: str, histograms: bytes,
+                             applied_intro_start: Optional[int], applied_intro_end: Optional[int],
+                             applied_credits: Optional[int], updated: float) -> bool:
+        """Сохранение гистограмм и применённых значений сериала"""
+        try:
+            self.cursor.execute("""
+                INSERT OR REPLACE INTO learned_markers
+                (series_prefix, series_suffix, histograms, applied_intro_start,
+                 applied_intro_end, applied_credits, updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (series_prefix, series_suffix, sqlite3.Binary(histograms), applied_intro_start,
+                  applied_intro_end, applied_credits, updated))
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка сохранения выученных маркеров: {e}", file=sys.stderr)
+            return False
+    
+    def get_learned_series(self) -> List[Tuple[str, str]]:
+        """Сериалы с выученными маркерами"""
+        try:
+            self.cursor.execute("""
+                SELECT series_prefix, series_suffix FROM learned_markers
+                ORDER BY updated DESC
+            """)
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Ошибка получения выученных маркеров: {e}", file=sys.stderr)
+            return []
+    
+    def get_session_series(self) -> List[Tuple[str, str]]:
+        """Сериалы, по которым есть история просмотра"""
+        try:
+            self.cursor.execute("""
+                SELECT DISTINCT series_prefix, series_suffix FROM playback_sessions
+                WHERE series_prefix IS NOT NULL AND series_suffix IS NOT NULL
+            """)
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Ошибка получения сериалов истории: {e}", file=sys.stderr)
+            return []
+    
+    def get_series_sessions(self, series_prefix: str, series_suffix: str) -> List[Tuple[int, Optional[int]]]:
+        """Завершённые сеансы сериала: [(id, duration)] (старые первыми)"""
+        try:
+            self.cursor.execute("""
+                SELECT id, duration FROM playback_sessions
+                WHERE series_prefix = ? AND series_suffix = ? AND ended IS NOT NULL
+                ORDER BY started, id
+            """, (series_prefix, series_suffix))
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Ошибка получения сеансов сериала: {e}", file=sys.stderr)
+            return []
+    
+    def get_fingerprint_entry(self, path: str
+                              ) -> Optional[Tuple[int, int, float, int, int, int, int]]:
+        """Серия в хранилище отпечатков
+        
+        Возвращает: (id, size, mtime, seconds, version, start, frames)
+        """
+        try:
+            self.cursor.execute("""
+                SELECT id, size, mtime, seconds, version, start, frames
+                FROM fingerprint_manifest WHERE path = ?
+            """, (path,))
+            return self.cursor.fetchone()
+        except sqlite3.Error as e:
+            print(f"Ошибка получения отпечатка: {e}", file=sys.stderr)
+            return None
+    
+    def add_fingerprint_entry(self, path: str, size: int, mtime: float, seconds: int,
+                              version: int, series_prefix: str, series_suffix: str,
+                              start: int, frames: int, created: float) -> Optional[int]:
+        """Добавление серии в манифест (прежняя запись файла заменяется); id"""
+        try:
+            self.cursor.execute("""
+                INSERT OR REPLACE INTO fingerprint_manifest
+                (path, size, mtime, seconds, version, series_prefix, series_suffix,
+                 start, frames, created)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (path, size, mtime, seconds, version, series_prefix or None,
+                  series_suffix or None, start, frames, created))
+            self.conn.commit()
+            return self.cursor.lastrowid
+        except sqlite3.Error as e:
+            print(f"Ошибка сохранения отпечатка: {e}", file=sys.stderr)
+            return None
+    
+    def get_fingerprint_entries(self) -> List[Tuple[int, str, int, int, str, str]]:
+        """Серии хранилища отпечатков: [(id, path, start, frames, series_prefix, series_suffix)]"""
+        try:
+            self.cursor.execute("""
+                SELECT id, path, start, frames, COALESCE(series_prefix, ''),
+                       COALESCE(series_suffix, '')
+                FROM fingerprint_manifest ORDER BY start
+            """)
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Ошибка получения манифеста отпечатков: {e}", file=sys.stderr)
+            return []
+    
+    def update_fingerprint_start(self, entry_id: int, start: int) -> bool:
+        """Новое начало кадров серии (после сжатия хранилища)"""
+        try:
+            self.cursor.execute("""
+                UPDATE fingerprint_manifest SET start = ? WHERE id = ?
+            """, (start, entry_id))
+            self.conn.commit()
+            return self.cursor.rowcount > 0
+        except sqlite3.Error as e:
+            print(f"Ошибка обновления манифеста отпечатков: {e}", file=sys.stderr)
+            return False
+    
+    def get_episode_credits(self, filename: str) -> Optional[Tuple[int, str]]:
+        """Титры серии (перекрывают credits_duration сериала)
+        
+        Возвращает: (credits_duration, credits_source) или None
+        """
+        try:
+            self.cursor.execute("""
+                SELECT credits_duration, COALESCE(credits_source, '')
+                FROM episode_markers
+                WHERE filename = ? AND credits_duration IS NOT NULL
+            """, (filename,))
+            return self.cursor.fetchone()
+        except sqlite3.Error as e:
+            print(f"Ошибка получения титров серии: {e}", file=sys.stderr)
+            return None
+    
+    def set_episode_credits(self, filename: str, duration: int, source: str,
+                            updated: float) -> bool:
+        """Титры серии: source - 'detected' (credits_detect.py) или 'manual' (RED)"""
+        try:
+            if duration < 0:
+                print("ERROR: Отрицательная длительность недопустима", file=sys.stderr)
+                return False
+            self._upsert_episode_markers(filename, {'credits_duration': duration,
+                                                    'credits_source': source, 'updated': updated})
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка сохранения титров серии: {e}", file=sys.stderr)
+            return False
+    
+    def _upsert_episode_markers(self, filename: str, values: Dict[str, Any]) -> None:
+        """Запись колонок серии в episode_markers (остальные колонки не меняются)"""
+        columns = list(values)
+        self.cursor.execute(f"""
+            INSERT INTO episode_markers (filename, series_prefix, series_suffix, {', '.join(columns)})
+            VALUES (?, ?, ?, {', '.join('?' * len(columns))})
+            ON CONFLICT(filename) DO UPDATE SET
+                {', '.join(f'{column} = excluded.{column}' for column in columns)}
+        """, (filename, extract_series_prefix(filename) or None,
+              extract_series_suffix(filename) or None, *values.values()))
+    
+    def set_episode_intro(self, filename: str, start: Optional[int], end: Optional[int],
+                          updated: float) -> bool:
+        """Intro серии; None, None - снова intro сериала"""
+        try:
+            if start is not None and (end is None or start < 0 or end <= start):
+                print("ERROR: Некорректные маркеры intro", file=sys.stderr)
+                return False
+            self._upsert_episode_markers(filename, {'intro_start': start, 'intro_end': end,
+                                                    'updated': updated})
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка сохранения intro серии: {e}", file=sys.stderr)
+            return False
+    
+    def set_episode_flags(self, filename: str, autoplay: Optional[bool], skip_intro: Optional[bool],
+                          skip_outro: Optional[bool], updated: float) -> bool:
+        """Флаги серии; None - флаг сериала"""
+        try:
+            self._upsert_episode_markers(filename, {'autoplay': autoplay, 'skip_intro': skip_intro,
+                                                    'skip_outro': skip_outro, 'updated': updated})
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка сохранения флагов серии: {e}", file=sys.stderr)
+            return False
+    
+    def clear_episode_markers(self, filename: str) -> bool:
+        """Удаление маркеров серии - всё снова берётся у сериала"""
+        try:
+            self.cursor.execute("DELETE FROM episode_markers WHERE filename = ?", (filename,))
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка удаления маркеров серии: {e}", file=sys.stderr)
+            return False
+    
+    def resolve_markers(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Действующие маркеры и флаги серии одним запросом
+        
+        Значение серии (episode_markers) важнее значения сериала (series_settings);
+        intro наследуется парой (start и end из одного уровня).
+        
+        Возвращает: dict {
+            'autoplay', 'skip_intro', 'skip_outro': bool,
+            'intro_start', 'intro_end', 'credits_duration': int | None,
+            'intro_episode', 'credits_episode': bool  # значение задано у серии
+            'outro_triggered': bool
+        }
+        """
+        try:
+            self.cursor.execute("""
+                SELECT COALESCE(e.autoplay, s.autoplay, 0),
+                       COALESCE(e.skip_intro, s.skip_intro, 0),
+                       COALESCE(e.skip_outro, s.skip_outro, 0),
+                       CASE WHEN e.intro_start IS NOT NULL THEN e.intro_start ELSE s.intro_start END,
+                       CASE WHEN e.intro_start IS NOT NULL THEN e.intro_end ELSE s.intro_end END,
+                       COALESCE(e.credits_duration, s.credits_duration),
+                       e.intro_start IS NOT NULL,
+                       e.credits_duration IS NOT NULL,
+                       COALESCE(p.outro_triggered, 0)
+                FROM (SELECT ? AS filename, ? AS series_prefix, ? AS series_suffix) f
+                LEFT JOIN series_settings s
+                    ON s.series_prefix = f.series_prefix AND s.series_suffix = f.series_suffix
+                LEFT JOIN episode_markers e ON e.filename = f.filename
+                LEFT JOIN playback p ON p.filename = f.filename
+            """, (filename, extract_series_prefix(filename), extract_series_suffix(filename)))
+            
+            row = self.cursor.fetchone()
+            return {
+                'autoplay': bool(row[0]),
+                'skip_intro': bool(row[1]),
+                'skip_outro': bool(row[2]),
+                'intro_start': row[3],
+                'intro_end': row[4],
+                'credits_duration': row[5],
+                'intro_episode': bool(row[6]),
+                'credits_episode': bool(row[7]),
+                'outro_triggered': bool(row[8]),
+            }
+        except sqlite3.Error as e:
+            print(f"Ошибка получения маркеров серии: {e}", file=sys.stderr)
+            return None
+    
+    def get_series_episode_credits(self, series_prefix: str, series_suffix: str
+                                   ) -> List[Tuple[str, int, str]]:
+        """Титры серий сериала: [(filename, credits_duration, credits_source)]"""
+        try:
+            self.cursor.execute("""
+                SELECT filename, credits_duration, COALESCE(credits_source, '')
+                FROM episode_markers
+                WHERE series_prefix = ? AND series_suffix = ? AND credits_duration IS NOT NULL
+                ORDER BY filename
+            """, (series_prefix, series_suffix))
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Ошибка получения титров серий: {e}", file=sys.stderr)
+            return []
+    
     def find_other_versions(self, series_prefix: str, current_suffix: str) -> List[Tuple[str, str, int]]:
         """Поиск других версий сериала с тем же prefix, но другим suffix
         
@@ -749,6 +1447,186 @@ class VlcDatabase:
             print(f"Ошибка пакетного получения: {e}", file=sys.stderr)
             return {filename: 0 for filename in filenames}
 
+    
+    def set_dir_file_count(self, directory: str, file_count: int) -> bool:
+        """Обновление количества видеофайлов в директории (вызывается меню при листинге)
+        
+        Разница с прошлым значением добавляется в total директории и всех её предков.
+        Если количество не изменилось - запись не выполняется.
+        """
+        try:
+            directory = self._canonical_dir(directory)
+            self.cursor.execute("""
+                SELECT file_count FROM dir_progress WHERE directory = ?
+            """, (directory,))
+            
+            result = self.cursor.fetchone()
+            old_count = result[0] if result and result[0] else 0
+            if old_count == file_count:
+                return True
+            
+            self.cursor.execute("""
+                INSERT INTO dir_progress (directory, file_count)
+                VALUES (?, ?)
+                ON CONFLICT(directory) DO UPDATE SET
+                    file_count = excluded.file_count
+            """, (directory, file_count))
+            self._apply_dir_deltas({directory: [0, 0, file_count - old_count]})
+            
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка обновления file_count: {e}", file=sys.stderr)
+            return False
+    
+    def get_dir_progress_batch(self, directory: str, dirnames: List[str]) -> Dict[str, Tuple[int, int, int]]:
+        """Пакетное получение агрегатов для подпапок
+        
+        Возвращает: словарь {dirname: (watched, partial, total)}
+        Оптимизация: один индексированный запрос по PRIMARY KEY на всю папку;
+        realpath - один раз для папки (по sshfs это lstat на каждый компонент
+        пути), подпапка раскрывается отдельно, только если она сама симлинк
+        """
+        if not dirnames:
+            return {}
+        
+        result = {dirname: (0, 0, 0) for dirname in dirnames}
+        
+        try:
+            base = self._canonical_dir(directory)
+            full_paths: Dict[str, List[str]] = {}
+            for dirname in dirnames:
+                path = os.path.join(base, dirname)
+                if os.path.islink(path):
+                    path = self._canonical_dir(path)
+                full_paths.setdefault(path, []).append(dirname)
+            placeholders = ','.join(['?'] * len(full_paths))
+            
+            self.cursor.execute(f"""
+                SELECT directory, watched, partial, total
+                FROM dir_progress
+                WHERE directory IN ({placeholders})
+            """, list(full_paths))
+            
+            for path, watched, partial, total in self.cursor.fetchall():
+                for dirname in full_paths[path]:
+                    result[dirname] = (watched or 0, partial or 0, total or 0)
+            
+            return result
+        except sqlite3.Error as e:
+            print(f"Ошибка получения агрегатов директорий: {e}", file=sys.stderr)
+            return result
+    
+    def rebuild_dir_progress(self) -> bool:
+        """Полный пересчёт dir_progress из playback (миграция старых данных / восстановление)
+        
+        file_count сохраняется, watched/partial/total пересчитываются с нуля
+        """
+        try:
+            deltas: Dict[str, List[int]] = {}
+            
+            self.cursor.execute("""
+                SELECT directory, status, COUNT(*) FROM playback
+                WHERE directory IS NOT NULL AND status IN ('watched', 'partial')
+                GROUP BY directory, status
+            """)
+            for directory, status, count in self.cursor.fetchall():
+                acc = deltas.setdefault(self._canonical_dir(directory), [0, 0, 0])
+                acc[0 if status == 'watched' else 1] += count
+            
+            self.cursor.execute("""
+                SELECT directory, file_count FROM dir_progress WHERE file_count > 0
+            """)
+            # Старые строки с логическим путём и строка с реальным - одна папка
+            file_counts: Dict[str, int] = {}
+            for directory, file_count in self.cursor.fetchall():
+                directory = self._canonical_dir(directory)
+                file_counts[directory] = max(file_counts.get(directory, 0), file_count)
+            for directory, file_count in file_counts.items():
+                deltas.setdefault(directory, [0, 0, 0])[2] += file_count
+            
+            self.cursor.execute("""
+                UPDATE dir_progress SET watched = 0, partial = 0, total = 0
+            """)
+            self._apply_dir_deltas(deltas)
+            
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка пересчёта dir_progress: {e}", file=sys.stderr)
+            self.conn.rollback()
+            return False
+
+
+def format_dir_progress(watched: int, partial: int, total: int) -> str:
+    """Форматирование агрегата папки для меню
+    
+    Возвращает: '7/10', '7/10 T:2' (есть частично просмотренные) или '' если данных нет
+    """
+    if not (watched or partial or total):
+        return ''
+    # total известен только для посещённых папок - не даём ему быть меньше просмотренных
+    total = max(total, watched + partial)
+    text = f"{watched}/{total}"
+    if partial:
+        text += f" T:{partial}"
+    return text
+
+
+# Паттерн S##E## (как в extract_series_prefix/suffix из db-manager.sh)
+_SERIES_RE = re.compile(r'[._ ][Ss](\d{1,2})[._ ]?[Ee](\d{1,2})')
+
+
+def extract_series_prefix(filename: str) -> str:
+    """series_prefix из имени файла: 'Show.S01E05.1080p.mkv' -> 'Show.S01' ('' если не сериал)
+    
+    Python-аналог extract_series_prefix из db-manager.sh (без fork bash/sed)
+    """
+    match = _SERIES_RE.search(filename)
+    if not match:
+        return ''
+    return f"{filename[:match.start()]}.S{int(match.group(1)):02d}"
+
+
+def extract_episode(filename: str) -> Optional[Tuple[str, int, int]]:
+    """(название, сезон, серия) из имени файла: 'Show.S01E05.1080p.mkv' -> ('Show', 1, 5)"""
+    match = _SERIES_RE.search(filename)
+    if not match:
+        return None
+    return filename[:match.start()], int(match.group(1)), int(match.group(2))
+
+
+def extract_series_suffix(filename: str) -> str:
+    """series_suffix из имени файла: 'Show.S01E05.1080p.mkv' -> '1080p.mkv' ('' если не сериал)"""
+    matches = list(_SERIES_RE.finditer(filename))
+    if not matches:
+        return ''
+    rest = filename[matches[-1].end():]
+    return rest.lstrip('._ ')
+
+
+def split_jobs_option(argv: List[str]) -> Tuple[List[str], Optional[int]]:
+    """Аргументы без флагов --* и число процессов из '--jobs N' ('--jobs=N', None - нет)
+    
+    Значение --jobs убирается по позиции, а не по тексту ('--jobs 02' - не '2');
+    ValueError - значения нет или это не целое >= 1 (intro_detect.py, credits_detect.py)
+    """
+    args, jobs = [], None
+    tokens = iter(argv)
+    for token in tokens:
+        name, equals, value = token.partition('=')
+        if name == '--jobs':
+            value = value if equals else next(tokens, None)
+            try:
+                jobs = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"--jobs: нужно число процессов, получено {value!r}") from None
+            if jobs < 1:
+                raise ValueError(f"--jobs: нужно число процессов >= 1, получено {jobs}")
+        elif not token.startswith('--'):
+            args.append(token)
+    return args, jobs
+
 
 # ============================================================================
 # CLI ИНТЕРФЕЙС
@@ -765,7 +1643,7 @@ def cli_init_db() -> int:
 def cli_save_playback(args: List[str]) -> int:
     """CLI: Сохранение прогресса воспроизведения
     
-    Аргументы: filename position duration percent [series_prefix] [series_suffix]
+    Аргументы: filename position duration percent [series_prefix] [series_suffix] [directory]
     """
     if len(args) < 4:
         print("ERROR: Недостаточно аргументов", file=sys.stderr)
@@ -777,10 +1655,11 @@ def cli_save_playback(args: List[str]) -> int:
     percent = int(args[3])
     series_prefix = args[4] if len(args) > 4 and args[4] else None
     series_suffix = args[5] if len(args) > 5 and args[5] else None
+    directory = args[6] if len(args) > 6 and args[6] else None
     
     with VlcDatabase() as db:
         success = db.save_playback(filename, position, duration, percent, 
-                                   series_prefix, series_suffix)
+                                   series_prefix, series_suffix, directory)
         print("OK" if success else "ERROR")
         return 0 if success else 1
 
@@ -970,6 +1849,42 @@ def cli_get_playback_batch(args: List[str]) -> int:
         return 0
 
 
+def cli_dir_progress(args: List[str]) -> int:
+    """CLI: Агрегаты прогресса для подпапок (+ обновление file_count текущей папки)
+    
+    Аргументы: directory file_count [dirname1] [dirname2] ...
+    file_count = '-' - не обновлять количество файлов
+    Вывод: dirname|watched|partial|total (по строке на подпапку)
+    """
+    if len(args) < 2:
+        print("ERROR: Укажите directory и file_count", file=sys.stderr)
+        return 1
+    
+    directory = args[0]
+    dirnames = args[2:]
+    
+    with VlcDatabase() as db:
+        if args[1] != '-':
+            try:
+                db.set_dir_file_count(directory, int(args[1]))
+            except ValueError:
+                print("ERROR: file_count должен быть числом", file=sys.stderr)
+                return 1
+        
+        results = db.get_dir_progress_batch(directory, dirnames)
+        for dirname, (watched, partial, total) in results.items():
+            print(f"{dirname}|{watched}|{partial}|{total}")
+        return 0
+
+
+def cli_rebuild_dir_progress() -> int:
+    """CLI: Полный пересчёт агрегатов директорий"""
+    with VlcDatabase() as db:
+        success = db.rebuild_dir_progress()
+        print("OK" if success else "ERROR")
+        return 0 if success else 1
+
+
 def cli_get_skip_markers(args: List[str]) -> int:
     """CLI: Получение skip markers
     
@@ -1126,6 +2041,75 @@ def cli_set_credits_duration(args: List[str]) -> int:
         return 0 if success else 1
 
 
+def cli_resolve_markers(args: List[str]) -> int:
+    """CLI: Действующие маркеры серии (серия важнее сериала) - одно чтение
+    
+    Аргументы: filename
+    Вывод: autoplay|skip_intro|skip_outro|intro_start|intro_end|credits_duration|outro_triggered
+    """
+    if len(args) < 1:
+        print("ERROR: Укажите filename", file=sys.stderr)
+        return 1
+    
+    with VlcDatabase() as db:
+        markers = db.resolve_markers(os.path.basename(args[0]))
+    if markers is None:
+        return 1
+    values = [int(markers['autoplay']), int(markers['skip_intro']), int(markers['skip_outro']),
+              markers['intro_start'], markers['intro_end'], markers['credits_duration'],
+              int(markers['outro_triggered'])]
+    print("|".join('' if value is None else str(value) for value in values))
+    return 0
+
+
+def cli_set_episode_intro(args: List[str]) -> int:
+    """CLI: Intro серии (- - снова intro сериала)"""
+    if len(args) < 3:
+        print("ERROR: Укажите filename start end", file=sys.stderr)
+        return 1
+    
+    try:
+        start, end = (None if value == '-' else int(value) for value in args[1:3])
+    except ValueError:
+        print("ERROR: start и end должны быть числами или -", file=sys.stderr)
+        return 1
+    
+    with VlcDatabase() as db:
+        success = db.set_episode_intro(os.path.basename(args[0]), start, end, time.time())
+        print("OK" if success else "ERROR")
+        return 0 if success else 1
+
+
+def cli_set_episode_flags(args: List[str]) -> int:
+    """CLI: Флаги серии autoplay skip_intro skip_outro (0/1, - - флаг сериала)"""
+    if len(args) < 4:
+        print("ERROR: Укажите filename autoplay skip_intro skip_outro", file=sys.stderr)
+        return 1
+    
+    if any(value not in ('0', '1', '-') for value in args[1:4]):
+        print("ERROR: Флаги: 0, 1 или -", file=sys.stderr)
+        return 1
+    autoplay, skip_intro, skip_outro = (None if value == '-' else value == '1' for value in args[1:4])
+    
+    with VlcDatabase() as db:
+        success = db.set_episode_flags(os.path.basename(args[0]), autoplay, skip_intro, skip_outro,
+                                       time.time())
+        print("OK" if success else "ERROR")
+        return 0 if success else 1
+
+
+def cli_clear_episode(args: List[str]) -> int:
+    """CLI: Удаление маркеров серии"""
+    if len(args) < 1:
+        print("ERROR: Укажите filename", file=sys.stderr)
+        return 1
+    
+    with VlcDatabase() as db:
+        success = db.clear_episode_markers(os.path.basename(args[0]))
+        print("OK" if success else "ERROR")
+        return 0 if success else 1
+
+
 def print_usage() -> None:
     """Вывод справки по использованию"""
     print("""
@@ -1133,12 +2117,14 @@ def print_usage() -> None:
 
 Команды:
   init                                    - Инициализация БД
-  save_playback <file> <pos> <dur> <%> [prefix] [suffix] - Сохранить прогресс
+  save_playback <file> <pos> <dur> <%> [prefix] [suffix] [dir] - Сохранить прогресс
   get_playback <file>                     - Получить прогресс
   get_percent <file>                      - Получить процент
   get_status <file>                       - Получить статус
   get_batch <dir> <file1> [file2] ...     - Пакетное получение процентов
   get_batch_status <dir> <file1> [file2] ... - Пакетное получение статусов
+  dir_progress <dir> <count|-> [sub1] ...  - Агрегаты подпапок (watched|partial|total)
+  rebuild_dir_progress                    - Пересчитать агрегаты директорий
   save_settings <prefix> <suffix> <auto> <intro> <outro> [i_start] [i_end] [o_start]
   get_settings <prefix> <suffix>          - Получить настройки
   settings_exist <prefix> <suffix>        - Проверить настройки
@@ -1147,6 +2133,11 @@ def print_usage() -> None:
   set-intro <prefix> <suffix> <start> <end> - Установить intro markers
   set-outro <prefix> <suffix> <start>     - Установить outro marker
   clear-skip <prefix> <suffix> [type]     - Очистить markers (intro/outro/all)
+  resolve-markers <file>                  - Маркеры серии с наследованием от сериала
+                                            (auto|intro|outro|i_start|i_end|credits|outro_triggered)
+  set-episode-intro <file> <start|-> <end|-> - Intro серии (- - как у сериала)
+  set-episode-flags <file> <auto> <intro> <outro> - Флаги серии (0/1, - - как у сериала)
+  clear-episode <file>                    - Удалить маркеры серии
 
 Примеры:
   vlc_db.py init
@@ -1154,10 +2145,13 @@ def print_usage() -> None:
   vlc_db.py get_playback "video.mkv"
   vlc_db.py get_percent "video.mkv"
   vlc_db.py get_batch "/path/to/dir" "video1.mkv" "video2.mkv" "video3.mkv"
+  vlc_db.py dir_progress "/path/to/dir" 12 "Season 1" "Season 2"
   vlc_db.py get-skip-markers "Euphoria" "S02"
   vlc_db.py set-intro "Euphoria" "S02" 30 90
   vlc_db.py set-outro "Euphoria" "S02" 3300
   vlc_db.py clear-skip "Euphoria" "S02" intro
+  vlc_db.py resolve-markers "Euphoria.S02E03.1080p.mkv"
+  vlc_db.py set-episode-intro "Euphoria.S02E03.1080p.mkv" 95 160
 """)
 
 
@@ -1178,6 +2172,8 @@ def main() -> int:
         'get_status': lambda: cli_get_playback_status(args),
         'get_batch': lambda: cli_get_playback_batch(args),
         'get_batch_status': lambda: cli_get_playback_batch_status(args),
+        'dir_progress': lambda: cli_dir_progress(args),
+        'rebuild_dir_progress': lambda: cli_rebuild_dir_progress(),
         'save_settings': lambda: cli_save_series_settings(args),
         'get_settings': lambda: cli_get_series_settings(args),
         'settings_exist': lambda: cli_series_settings_exist(args),
@@ -1190,6 +2186,10 @@ def main() -> int:
         'set-outro-triggered': lambda: cli_set_outro_triggered(args),
         'get-credits-duration': lambda: cli_get_credits_duration(args),
         'set-credits-duration': lambda: cli_set_credits_duration(args),
+        'resolve-markers': lambda: cli_resolve_markers(args),
+        'set-episode-intro': lambda: cli_set_episode_intro(args),
+        'set-episode-flags': lambda: cli_set_episode_flags(args),
+        'clear-episode': lambda: cli_clear_episode(args),
     }
     
     if command in commands:
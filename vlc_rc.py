@@ -0,0 +1,638 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+vlc_rc.py - Клиент VLC RC интерфейса с одним долгоживущим TCP соединением
+Версия: 1.5.0
+
+Вместо `echo cmd | nc -w N localhost 4212` на каждую команду (fork + connect +
+таймаут до 1-2 сек) держит одно соединение с VLC, разбирает ответы по
+приглашению "> " и переподключается автоматически.
+
+VLC RC обслуживает одного клиента, и это соединение держит
+playback_supervisor.py. Разовые команды извне супервизора идут через его shim
+сервер (start_async_shim): vlc-rc.sh подключается к нему через /dev/tcp без
+fork, `vlc_rc.py <команда>` - через shim_request; shim пересылает команды в
+VLC по соединению супервизора и отвечает одной строкой:
+    OK [значение]
+    ERROR <сообщение>
+Без супервизора (shim не запущен) оба подключаются к VLC напрямую.
+
+`vlc_rc.py wait` - проба готовности после запуска VLC (вместо sleep 3):
+RC принимает соединение и get_length > 0, т.е. файл открыт.
+"""
+
+import asyncio
+import os
+import re
+import socket
+import sys
+import threading
+import time
+from typing import List, Optional, Tuple, Union
+
+from key_trace import mark_acked, mark_sent
+
+# Константы
+RC_HOST = "localhost"
+RC_PORT = 4212           # --rc-host VLC (см. vlc-cec.sh)
+RC_TIMEOUT = 2.0         # Таймаут ответа на команду (сек)
+RC_CONNECT_TIMEOUT = 1.0
+RC_PROMPT = b"> "        # Приглашение RC интерфейса: признак конца ответа
+RC_MAX_REPLY = 64 * 1024
+
+READY_TIMEOUT = 30.0     # Ожидание готовности VLC после запуска (сек)
+READY_BACKOFF = (0.05, 0.25)  # Пауза между пробами: начальная и максимальная (сек)
+LEGACY_START_DELAY = 3   # Прежний sleep 3 в vlc-cec.sh (для отчёта о выигрыше)
+
+SHIM_HOST = "127.0.0.1"
+SHIM_PORT = 4213         # Порт shim сервера (vlc-rc.sh через /dev/tcp, vlc_rc.py <команда>)
+
+CLI_COMMANDS = ('get_time', 'get_length', 'seek', 'pause', 'strack', 'volup', 'voldown', 'raw')
+
+_INT_RE = re.compile(r'-?\d+')
+_TRACK_RE = re.compile(r'^\|\s*(-?\d+)\s+-\s+.*?(\*)?\s*$')
+
+
+def _parse_strack(reply: str) -> Tuple[Optional[int], List[int]]:
+    """Разбор ответа strack: (текущая дорожка, [все id])
+
+    Формат ответа VLC:
+        +----[ spu-es ]
+        | -1 - Disable *
+        | 2 - Track 1 - [English]
+        +----[ end of spu-es ]
+    """
+    current = None
+    tracks = []
+    for line in reply.splitlines():
+        match = _TRACK_RE.match(line.strip())
+        if match:
+            track = int(match.group(1))
+            tracks.append(track)
+            if match.group(2):
+                current = track
+    return current, tracks
+
+
+class VlcRcError(Exception):
+    """Ошибка обмена с VLC RC (нет соединения, таймаут, обрыв)"""
+
+
+class VlcRc:
+    """Клиент VLC RC с постоянным соединением
+
+    Потокобезопасен: команды сериализуются блокировкой, так что один объект
+    можно использовать из нескольких потоков (например в shim сервере).
+    """
+
+    def __init__(self, host: str = RC_HOST, port: int = RC_PORT,
+                 timeout: float = RC_TIMEOUT, retries: int = 1):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.retries = retries
+        self._sock: Optional[socket.socket] = None
+        self._buffer = b""
+        self._lock = threading.Lock()
+        self.connects = 0  # Количество установленных соединений (диагностика)
+
+    def __enter__(self) -> 'VlcRc':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Соединение и разбор ответов
+    # ------------------------------------------------------------------
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def connect(self) -> None:
+        """Подключение к VLC и чтение приветствия до первого приглашения"""
+        self.close()
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=RC_CONNECT_TIMEOUT)
+        except OSError as e:
+            raise VlcRcError(f"нет соединения с VLC {self.host}:{self.port}: {e}") from e
+
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.timeout)
+        self._sock = sock
+        self._buffer = b""
+        self.connects += 1
+
+        try:
+            self._read_reply()
+        except VlcRcError:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """Закрытие соединения"""
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._buffer = b""
+
+    def _read_reply(self) -> str:
+        """Чтение ответа до приглашения "> " (приглашение не входит в ответ)"""
+        deadline = time.monotonic() + self.timeout
+        while not self._buffer.endswith(RC_PROMPT):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise VlcRcError("таймаут ответа VLC")
+            try:
+                self._sock.settimeout(remaining)
+                chunk = self._sock.recv(4096)
+            except socket.timeout as e:
+                raise VlcRcError("таймаут ответа VLC") from e
+            except OSError as e:
+                raise VlcRcError(f"обрыв соединения с VLC: {e}") from e
+            if not chunk:
+                raise VlcRcError("VLC закрыл соединение")
+            self._buffer += chunk
+            if len(self._buffer) > RC_MAX_REPLY:
+                raise VlcRcError("слишком длинный ответ VLC")
+
+        reply = self._buffer[:-len(RC_PROMPT)]
+        self._buffer = b""
+        return reply.decode('utf-8', 'replace').replace('\r', '')
+
+    def command(self, cmd: str, retry: bool = True) -> str:
+        """Отправить команду и вернуть текст ответа
+
+        При обрыве соединения переподключается; повторно команда отправляется
+        всегда, если она не успела уйти; если ушла, но ответ потерян - только
+        при retry=True (запросы и абсолютные команды). Относительные команды
+        (seek +30, pause) не повторяются, чтобы не выполнить их дважды.
+        """
+        line = cmd.strip().replace('\n', ' ') + '\n'
+        with self._lock:
+            last_error = None
+            for _ in range(1 + self.retries):
+                sent = False
+                try:
+                    if self._sock is None:
+                        self.connect()
+                    self._sock.sendall(line.encode('utf-8'))
+                    sent = True
+                    return self._read_reply()
+                except (VlcRcError, OSError) as e:
+                    last_error = e
+                    self.close()
+                    if sent and not retry:
+                        break
+            if isinstance(last_error, VlcRcError):
+                raise last_error
+            raise VlcRcError(f"ошибка отправки команды '{cmd}': {last_error}")
+
+    @staticmethod
+    def _parse_int(reply: str) -> Optional[int]:
+        """Последнее целое число в ответе (аналог grep -oE '[0-9]+' | tail -1)"""
+        numbers = _INT_RE.findall(reply)
+        return int(numbers[-1]) if numbers else None
+
+    # ------------------------------------------------------------------
+    # Типизированные команды
+    # ------------------------------------------------------------------
+
+    def get_time(self) -> Optional[int]:
+        """Текущая позиция (сек) или None если ничего не играет"""
+        return self._parse_int(self.command("get_time"))
+
+    def get_length(self) -> Optional[int]:
+        """Длительность (сек) или None"""
+        return self._parse_int(self.command("get_length"))
+
+    def is_playing(self) -> bool:
+        """Идёт ли воспроизведение"""
+        return self._parse_int(self.command("is_playing")) == 1
+
+    def seek(self, position: Union[int, str]) -> None:
+        """Перемотка: абсолютная (120) или относительная ('+30', '-10')"""
+        value = str(position)
+        self.command(f"seek {value}", retry=not value.startswith(('+', '-')))
+
+    def pause(self) -> None:
+        """Переключение паузы"""
+        self.command("pause", retry=False)
+
+    def volup(self, steps: int = 1) -> None:
+        self.command(f"volup {steps}", retry=False)
+
+    def voldown(self, steps: int = 1) -> None:
+        self.command(f"voldown {steps}", retry=False)
+
+    def quit(self) -> None:
+        """Выход из VLC (ответа может не быть - соединение закрывается)"""
+        try:
+            self.command("quit", retry=False)
+        except VlcRcError:
+            pass
+        self.close()
+
+    def strack_list(self) -> Tuple[Optional[int], List[int]]:
+        """Дорожки субтитров: (текущая, [все id]); -1 - выключены"""
+        return _parse_strack(self.command("strack"))
+
+    def strack(self, track: Optional[int] = None) -> Optional[int]:
+        """Без аргумента - текущая дорожка субтитров, с аргументом - выбор дорожки"""
+        if track is None:
+            return self.strack_list()[0]
+        self.command(f"strack {track}")
+        return track
+
+    def next_subtitle(self) -> Optional[int]:
+        """Следующая дорожка субтитров по кругу (включая "выкл" = -1)"""
+        current, tracks = self.strack_list()
+        if not tracks:
+            return None
+        idx = tracks.index(current) + 1 if current in tracks else 0
+        return self.strack(tracks[idx % len(tracks)])
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def wait_ready(rc: VlcRc, timeout: float = READY_TIMEOUT, pid: Optional[int] = None,
+               sleep=time.sleep, clock=time.monotonic) -> Tuple[float, int]:
+    """Ожидание готовности VLC: соединение с RC и get_length > 0
+
+    Пробы с растущей паузой (READY_BACKOFF). Возвращает (секунд ожидания,
+    длительность); VlcRcError - таймаут или процесс pid завершился.
+    """
+    start = clock()
+    delay = READY_BACKOFF[0]
+    while True:
+        try:
+            length = rc.get_length()
+            if length:
+                return clock() - start, length
+        except VlcRcError:
+            pass
+        if pid and not _process_alive(pid):
+            raise VlcRcError("процесс VLC завершился")
+        remaining = timeout - (clock() - start)
+        if remaining <= 0:
+            raise VlcRcError(f"VLC не готов за {timeout:.0f} с")
+        sleep(min(delay, remaining))
+        delay = min(delay * 2, READY_BACKOFF[1])
+
+
+class AsyncVlcRc:
+    """Асинхронный клиент VLC RC (asyncio) с тем же протоколом, что и VlcRc
+
+    Для playback_supervisor.py: одно соединение на весь сеанс, команды из
+    разных задач сериализуются asyncio.Lock. Отправка и ответ отмечаются в
+    трассе кнопки (key_trace), если команда отправлена при её обработке.
+    """
+
+    def __init__(self, host: str = RC_HOST, port: int = RC_PORT,
+                 timeout: float = RC_TIMEOUT, retries: int = 1):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.retries = retries
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+        self.connects = 0
+        self.commands = 0  # Количество отправленных команд (диагностика)
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None
+
+    async def connect(self) -> None:
+        """Подключение и чтение приветствия"""
+        await self.close()
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), RC_CONNECT_TIMEOUT)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise VlcRcError(f"нет соединения с VLC {self.host}:{self.port}: {e}") from e
+        self.connects += 1
+        try:
+            await self._read_reply()
+        except VlcRcError:
+            await self.close()
+            raise
+
+    async def close(self) -> None:
+        """Закрытие соединения"""
+        if self._writer is not None:
+            try:
+                self._writer.close()
+                await self._writer.wait_closed()
+            except (OSError, ConnectionError):
+                pass
+        self._reader = None
+        self._writer = None
+
+    async def _read_reply(self) -> str:
+        """Чтение ответа до приглашения RC_PROMPT"""
+        try:
+            data = await asyncio.wait_for(self._reader.readuntil(RC_PROMPT), self.timeout)
+        except asyncio.TimeoutError as e:
+            raise VlcRcError("таймаут ответа VLC") from e
+        except asyncio.IncompleteReadError as e:
+            raise VlcRcError("VLC закрыл соединение") from e
+        except (asyncio.LimitOverrunError, OSError) as e:
+            raise VlcRcError(f"обрыв соединения с VLC: {e}") from e
+        return data[:-len(RC_PROMPT)].decode('utf-8', 'replace').replace('\r', '')
+
+    async def command(self, cmd: str, retry: bool = True) -> str:
+        """Отправить команду и вернуть текст ответа (правила повтора - как у VlcRc.command)
+
+        Отмена вызывающей задачи не прерывает обмен: иначе ответ VLC остался бы
+        в потоке и был бы прочитан следующей командой.
+        """
+        return await asyncio.shield(self._command(cmd, retry))
+
+    async def _command(self, cmd: str, retry: bool) -> str:
+        line = (cmd.strip().replace('\n', ' ') + '\n').encode('utf-8')
+        async with self._lock:
+            last_error = None
+            for _ in range(1 + self.retries):
+                sent = False
+                try:
+                    if self._writer is None:
+                        await self.connect()
+                    self._writer.write(line)
+                    await self._writer.drain()
+                    sent = True
+                    self.commands += 1
+                    mark_sent(time.perf_counter())
+                    reply = await self._read_reply()
+                    mark_acked(time.perf_counter())
+                    return reply
+                except (VlcRcError, OSError) as e:
+                    last_error = e
+                    await self.close()
+                    if sent and not retry:
+                        break
+            if isinstance(last_error, VlcRcError):
+                raise last_error
+            raise VlcRcError(f"ошибка отправки команды '{cmd}': {last_error}")
+
+    async def get_time(self) -> Optional[int]:
+        return VlcRc._parse_int(await self.command("get_time"))
+
+    async def get_length(self) -> Optional[int]:
+        return VlcRc._parse_int(await self.command("get_length"))
+
+    async def is_playing(self) -> bool:
+        return VlcRc._parse_int(await self.command("is_playing")) == 1
+
+    async def seek(self, position: Union[int, str]) -> None:
+        value = str(position)
+        await self.command(f"seek {value}", retry=not value.startswith(('+', '-')))
+
+    async def pause(self) -> None:
+        await self.command("pause", retry=False)
+
+    async def volup(self, steps: int = 1) -> None:
+        await self.command(f"volup {steps}", retry=False)
+
+    async def enqueue(self, path: str) -> None:
+        """Добавить файл в конец плейлиста VLC"""
+        await self.command(f"enqueue {path}", retry=False)
+
+    async def next(self) -> None:
+        """Следующий элемент плейлиста"""
+        await self.command("next", retry=False)
+
+    async def voldown(self, steps: int = 1) -> None:
+        await self.command(f"voldown {steps}", retry=False)
+
+    async def quit(self) -> None:
+        try:
+            await self.command("quit", retry=False)
+        except VlcRcError:
+            pass
+        await self.close()
+
+    async def strack_list(self) -> Tuple[Optional[int], List[int]]:
+        return _parse_strack(await self.command("strack"))
+
+    async def strack(self, track: Optional[int] = None) -> Optional[int]:
+        if track is None:
+            return (await self.strack_list())[0]
+        await self.command(f"strack {track}")
+        return track
+
+    async def next_subtitle(self) -> Optional[int]:
+        current, tracks = await self.strack_list()
+        if not tracks:
+            return None
+        idx = tracks.index(current) + 1 if current in tracks else 0
+        return await self.strack(tracks[idx % len(tracks)])
+
+
+# ============================================================================
+# SHIM СЕРВЕР
+# ============================================================================
+
+# Типизированные запросы shim: запрос -> метод AsyncVlcRc
+_SHIM_METHODS = {
+    'get_time': 'get_time',
+    'get_length': 'get_length',
+    'is_playing': 'is_playing',
+    'strack': 'strack',
+    'strack_next': 'next_subtitle',
+    'quit': 'quit',
+}
+
+
+def _shim_route(request: str) -> Tuple[Optional[str], bool]:
+    """Запрос shim -> (метод клиента или None для сырой команды, можно ли повторять)"""
+    if request in _SHIM_METHODS:
+        return _SHIM_METHODS[request], True
+    parts = request.split()
+    relative = parts[0] in ('pause', 'volup', 'voldown') or \
+        (parts[0] == 'seek' and parts[-1].startswith(('+', '-')))
+    return None, not relative
+
+
+def _shim_reply(value) -> str:
+    """Значение -> строка ответа shim"""
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, str):
+        # Многострочный ответ VLC - одной строкой
+        value = ' | '.join(line.strip() for line in value.splitlines() if line.strip())
+    return "OK" if value is None or value == '' else f"OK {value}"
+
+
+async def async_shim_dispatch(rc: AsyncVlcRc, request: str) -> str:
+    """Выполнение запроса shim: типизированные команды возвращают значение, остальные - текст"""
+    if request == 'ping':
+        return "OK pong"
+    method, retry = _shim_route(request)
+    try:
+        if method:
+            value = await getattr(rc, method)()
+        else:
+            value = await rc.command(request, retry=retry)
+    except VlcRcError as e:
+        return f"ERROR {e}"
+    return _shim_reply(value)
+
+
+async def start_async_shim(rc: AsyncVlcRc, host: str = SHIM_HOST,
+                           port: int = SHIM_PORT) -> asyncio.AbstractServer:
+    """Shim сервер внутри event loop (playback_supervisor): bash использует то же соединение"""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                request = raw.decode('utf-8', 'replace').strip()
+                if not request:
+                    continue
+                writer.write((await async_shim_dispatch(rc, request) + '\n').encode('utf-8'))
+                await writer.drain()
+        except (OSError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port, reuse_address=True)
+
+
+def shim_request(request: str, timeout: float = RC_TIMEOUT,
+                 port: int = SHIM_PORT) -> Optional[str]:
+    """Запрос к shim супервизора -> значение ответа ('' - OK без значения)
+
+    None - shim не запущен (супервизора нет); VlcRcError - ошибка VLC или нет ответа.
+    """
+    try:
+        sock = socket.create_connection((SHIM_HOST, port), timeout=RC_CONNECT_TIMEOUT)
+    except OSError:
+        return None
+    with sock:
+        sock.settimeout(timeout)
+        try:
+            sock.sendall(request.encode('utf-8') + b'\n')
+            reply = sock.makefile('r', encoding='utf-8', errors='replace').readline().strip()
+        except OSError as e:
+            raise VlcRcError(f"shim: {e}") from e
+    if reply == 'OK' or reply.startswith('OK '):
+        return reply[3:]
+    if reply.startswith('ERROR '):
+        raise VlcRcError(reply[6:])
+    raise VlcRcError(f"shim: нет ответа на '{request}'")
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def print_usage() -> None:
+    """Вывод справки по использованию"""
+    print("""
+Использование: vlc_rc.py <команда> [аргументы]
+
+Команды идут через shim супервизора (localhost:4213), без него - в VLC напрямую.
+
+Команды:
+  wait [timeout] [pid] [rc_port] - Ждать готовности VLC (OK <секунд> <длительность>)
+  get_time                   - Текущая позиция (сек)
+  get_length                 - Длительность (сек)
+  seek <сек|+N|-N>           - Перемотка
+  pause                      - Пауза/продолжение
+  strack [track]             - Текущая дорожка субтитров / выбор дорожки
+  volup [N] / voldown [N]    - Громкость
+  raw <команда ...>          - Произвольная команда RC
+
+Примеры:
+  vlc_rc.py get_time
+  vlc_rc.py seek +30
+""")
+
+
+def main() -> int:
+    """Главная функция CLI (разовые команды - через shim супервизора, если он запущен)"""
+    if len(sys.argv) < 2:
+        print_usage()
+        return 1
+
+    command = sys.argv[1]
+    args = sys.argv[2:]
+
+    if command == 'wait':
+        try:
+            timeout = float(args[0]) if len(args) > 0 else READY_TIMEOUT
+            pid = int(args[1]) if len(args) > 1 and args[1] else None
+            rc_port = int(args[2]) if len(args) > 2 else RC_PORT
+        except ValueError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            return 1
+        with VlcRc(port=rc_port) as rc:
+            try:
+                waited, length = wait_ready(rc, timeout, pid)
+            except VlcRcError as e:
+                print(f"ERROR: {e}", file=sys.stderr)
+                return 1
+        print(f"OK {waited:.2f} {length}")
+        return 0
+
+    if command not in CLI_COMMANDS:
+        print(f"ERROR: Неизвестная команда '{command}'", file=sys.stderr)
+        print_usage()
+        return 1
+    if command in ('seek', 'raw') and not args:
+        print(f"ERROR: {command}: нужен аргумент", file=sys.stderr)
+        return 1
+
+    # Соединение с VLC держит супервизор - прямое подключение ждало бы его
+    try:
+        result = shim_request(' '.join(args) if command == 'raw' else ' '.join([command] + args))
+    except VlcRcError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    if result is not None:
+        if result:
+            print(result)
+        return 0
+
+    with VlcRc() as rc:
+        commands = {
+            'get_time': lambda: rc.get_time(),
+            'get_length': lambda: rc.get_length(),
+            'seek': lambda: rc.seek(args[0]),
+            'pause': lambda: rc.pause(),
+            'strack': lambda: rc.strack(int(args[0]) if args else None),
+            'volup': lambda: rc.volup(int(args[0]) if args else 1),
+            'voldown': lambda: rc.voldown(int(args[0]) if args else 1),
+            'raw': lambda: rc.command(' '.join(args)),
+        }
+
+        try:
+            result = commands[command]()
+        except (VlcRcError, IndexError, ValueError) as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            return 1
+
+        if result is not None:
+            print(result)
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
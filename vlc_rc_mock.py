@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+vlc_rc_mock.py - Заглушка RC интерфейса VLC для тестов и замеров
+Версия: 1.1.0
+
+TCP сервер с протоколом `vlc --intf rc` (приветствие, приглашение "> "
+после каждого ответа) и моделью воспроизведения по монотонным часам.
+Позволяет запускать vlc-cec.sh, playback-tracker.sh, vlc_rc.py и
+playback_supervisor.py без VLC и дисплея.
+
+Команды: get_time, get_length, is_playing, seek N|+N|-N, pause, play, stop,
+strack [N], volup/voldown [N], volume, enqueue <файл>, next, quit.
+Плейлист - очередь enqueue: next переключает на первый файл очереди
+(длительность из item_lengths), позиция 0.
+
+Отказы: задержка ответа (reply_delay, slow_commands), обрыв соединения
+после N-й команды (drop_after) или на командах из drop_commands.
+Журнал: received - команды по порядку, log - (время, команда, позиция до команды).
+
+Использование:
+    vlc_rc_mock.py [порт] [длина_сек] [скорость]   - по умолчанию 4212 3600 1
+"""
+
+import socketserver
+import sys
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+# Константы
+RC_HOST = "127.0.0.1"
+RC_PORT = 4212
+RC_PROMPT = b"> "
+GREETING = (b"VLC media player 3.0.18 Vetinari\r\n"
+            b"Command Line Interface initialized. Type `help' for help.\r\n")
+VOLUME_STEP = 12          # Шаг volup/voldown в VLC (256 = 100%)
+SUBTITLE_TRACKS = {-1: "Disable", 2: "Track 1 - [English]", 3: "Track 2 - [Russian]"}
+
+
+class CommandRecord(NamedTuple):
+    """Запись журнала команд"""
+    time: float               # time.monotonic()
+    command: str
+    position: float           # Позиция воспроизведения до выполнения команды
+
+
+class MockVlc(socketserver.ThreadingTCPServer):
+    """RC сервер с моделью воспроизведения"""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, host: str = RC_HOST, port: int = RC_PORT, length: int = 3600,
+                 position: float = 0.0, speed: float = 1.0, playing: bool = True):
+        # Модель воспроизведения: speed=0 - позиция стоит на месте (меняется только seek)
+        self._lock = threading.Lock()
+        self.length = length
+        self.speed = speed
+        self.playing = playing
+        self._base = float(position)
+        self._since = time.monotonic()
+        self.volume = 256
+        self.strack = -1
+        self.subtitle_tracks: Dict[int, str] = dict(SUBTITLE_TRACKS)
+        self.playlist: List[str] = []             # Очередь enqueue
+        self.item_lengths: Dict[str, int] = {}    # Длительность файлов очереди
+        self.current_item: Optional[str] = None
+
+        # Отказы
+        self.reply_delay = 0.0                    # Задержка каждого ответа (сек)
+        self.slow_commands: Dict[str, float] = {}  # Задержка по имени команды
+        self.drop_after: Optional[int] = None     # Закрыть соединение на N-й команде (без ответа)
+        self.drop_commands: Set[str] = set()      # ... или на этих командах
+        self.exit_on_quit = False                 # quit останавливает сервер (режим CLI)
+
+        # Журнал
+        self.received: List[str] = []
+        self.log: List[CommandRecord] = []
+        self.connections = 0
+        self.quit_requested = False
+
+        super().__init__((host, port), MockVlcHandler)
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    # ------------------------------------------------------------------
+    # Модель воспроизведения
+    # ------------------------------------------------------------------
+
+    def position(self) -> float:
+        """Точная позиция (сек)"""
+        position = self._base
+        if self.playing:
+            position += (time.monotonic() - self._since) * self.speed
+        return min(max(0.0, position), float(self.length))
+
+    def set_position(self, position: float) -> None:
+        """Перемотка (в том числе мимо RC - имитация действий пользователя)"""
+        self._base = min(max(0.0, float(position)), float(self.length))
+        self._since = time.monotonic()
+
+    @property
+    def time(self) -> int:
+        """Ответ get_time - целые секунды, округление вниз"""
+        return int(self.position())
+
+    @time.setter
+    def time(self, value: float) -> None:
+        self.set_position(value)
+
+    def set_playing(self, playing: bool) -> None:
+        self.set_position(self.position())
+        self.playing = playing
+
+    def commands(self, prefix: str = "") -> List[str]:
+        """Полученные команды, начинающиеся с prefix"""
+        return [cmd for cmd in self.received if cmd.startswith(prefix)]
+
+    def seeks(self) -> List[Tuple[str, float]]:
+        """(аргумент seek, позиция в момент команды)"""
+        return [(record.command.split(None, 1)[1], record.position)
+                for record in self.log if record.command.startswith('seek ')]
+
+    # ------------------------------------------------------------------
+    # Команды
+    # ------------------------------------------------------------------
+
+    def execute(self, cmd: str) -> str:
+        """Ответ на команду (без приглашения)"""
+        name, _, arg = cmd.partition(' ')
+        arg = arg.strip()
+
+        if name == 'get_time':
+            return f"{self.time}\r\n"
+        if name == 'get_length':
+            return f"{self.length}\r\n"
+        if name == 'is_playing':
+            return f"{int(self.playing and self.position() < self.length)}\r\n"
+        if name == 'seek':
+            try:
+                value = int(arg)
+            except ValueError:
+                return "Error in `seek'\r\n"
+            self.set_position(self.position() + value if arg[0] in '+-' else value)
+            return ""
+        if name == 'pause':
+            self.set_playing(not self.playing)
+            return ""
+        if name == 'play':
+            self.set_playing(True)
+            return ""
+        if name == 'stop':
+            self.set_playing(False)
+            self.set_position(0)
+            return ""
+        if name == 'strack':
+            if arg:
+                try:
+                    track = int(arg)
+                except ValueError:
+                    return "Error in `strack'\r\n"
+                if track not in self.subtitle_tracks:
+                    return "Error in `strack'\r\n"
+                self.strack = track
+                return ""
+            lines = ["+----[ spu-es ]"]
+            for track, title in self.subtitle_tracks.items():
+                lines.append(f"| {track} - {title}{' *' if track == self.strack else ''}")
+            lines.append("+----[ end of spu-es ]")
+            return "\r\n".join(lines) + "\r\n"
+        if name in ('volup', 'voldown'):
+            try:
+                steps = int(arg) if arg else 1
+            except ValueError:
+                return f"Error in `{name}'\r\n"
+            delta = VOLUME_STEP * steps * (1 if name == 'volup' else -1)
+            self.volume = min(max(0, self.volume + delta), 512)
+            return f"( audio volume: {self.volume} )\r\n"
+        if name == 'volume':
+            return f"{self.volume}\r\n"
+        if name == 'enqueue':
+            if not arg:
+                return "Error in `enqueue'\r\n"
+            self.playlist.append(arg)
+            return ""
+        if name == 'next':
+            if self.playlist:
+                self.current_item = self.playlist.pop(0)
+                self.length = self.item_lengths.get(self.current_item, self.length)
+                self.playing = True
+                self.set_position(0)
+            return ""
+        if name == 'quit':
+            self.quit_requested = True
+            return "Shutting down.\r\n"
+        return f"Unknown command `{name}'. Type `help' for help.\r\n"
+
+
+class MockVlcHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.wfile.write(GREETING + RC_PROMPT)
+        for raw in self.rfile:
+            cmd = raw.decode('utf-8', 'replace').strip()
+            if not cmd:
+                self.wfile.write(RC_PROMPT)
+                continue
+            name = cmd.split(None, 1)[0]
+
+            with server._lock:
+                server.received.append(cmd)
+                server.log.append(CommandRecord(time.monotonic(), cmd, server.position()))
+                drop = name in server.drop_commands
+                if server.drop_after is not None and len(server.received) >= server.drop_after:
+                    server.drop_after = None
+                    drop = True
+                if drop:
+                    return
+                reply = server.execute(cmd)
+
+            delay = server.reply_delay + server.slow_commands.get(name, 0.0)
+            if delay:
+                time.sleep(delay)
+
+            if name == 'quit':
+                self.wfile.write(reply.encode('utf-8'))
+                if server.exit_on_quit:
+                    threading.Thread(target=server.shutdown, daemon=True).start()
+                return
+            self.wfile.write(reply.encode('utf-8') + RC_PROMPT)
+
+
+def main() -> int:
+    """Главная функция CLI"""
+    try:
+        port = int(sys.argv[1]) if len(sys.argv) > 1 else RC_PORT
+        length = int(sys.argv[2]) if len(sys.argv) > 2 else 3600
+        speed = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    except ValueError:
+        print("Использование: vlc_rc_mock.py [порт] [длина_сек] [скорость]", file=sys.stderr)
+        return 1
+
+    try:
+        server = MockVlc(port=port, length=length, speed=speed)
+    except OSError as e:
+        print(f"ERROR: не удалось открыть порт {port}: {e}", file=sys.stderr)
+        return 1
+    server.exit_on_quit = True
+
+    print(f"OK mock VLC RC на {RC_HOST}:{server.port} (длина {length}s, скорость {speed})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
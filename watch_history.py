@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+watch_history.py - История просмотра: сеансы, события и шкала позиций
+Версия: 1.1.0
+
+Таблица playback хранит только последнюю позицию. Супервизор дополнительно
+пишет историю каждого сеанса (для статистики, "где я уснул" и обучения
+маркеров заставки):
+  - playback_sessions - сеанс: файл, начало/конец, позиции, шкала позиций;
+  - playback_events   - журнал событий (только дописывается): start, seek,
+                        pause, resume (pause_toggle - до первого замера
+                        позиции), skip_intro, outro, end. У seek и
+                        skip_intro position - откуда, value - куда.
+
+Шкала позиций - замеры (время от начала сеанса, позиция) в BLOB с
+дельта-кодированием: для каждого замера varint приращения времени (0.1 с)
+и zigzag varint отклонения позиции от ожидаемой при воспроизведении
+(приращение времени). Обычный просмотр - 2 байта на замер вместо 16
+(REAL + INTEGER в отдельной строке).
+
+События копятся в кольцевом буфере (HISTORY_RING последних - для запросов
+в сеансе) и пишутся в БД пакетами: по FLUSH_BATCH событий, при сохранении
+прогресса и в конце сеанса.
+
+Использование:
+    watch_history.py report [N]       - последние сеансы: замеры, сжатие, события
+    watch_history.py events <id>      - события и шкала сеанса
+"""
+
+import sys
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from vlc_db import VlcDatabase
+
+# Константы
+HISTORY_RING = 256        # Событий в памяти (недописанные сверх - теряются)
+FLUSH_BATCH = 32          # Событий в одном пакете записи
+TICKS = 10                # Единиц времени шкалы в секунде (0.1 с)
+RAW_SAMPLE_BYTES = 16     # Замер без упаковки: REAL время + INTEGER позиция
+EVENT_BYTES = 32          # Оценка строки playback_events для скорости записи
+
+Event = Tuple[float, str, Optional[int], Optional[int]]  # (ts, kind, position, value)
+
+
+def _varint(value: int, out: bytearray) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class TimelineEncoder:
+    """Дельта-кодирование замеров (секунды от начала, позиция) по мере поступления"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.samples = 0
+        self._ticks: Optional[int] = None
+        self._position = 0
+
+    def add(self, elapsed: float, position: int) -> bool:
+        """Добавить замер; False - тот же момент времени (замер пропущен)"""
+        ticks = max(0, round(elapsed * TICKS))
+        if self._ticks is None:
+            _varint(ticks, self.data)
+            _varint(_zigzag(position), self.data)
+        else:
+            delta = ticks - self._ticks
+            if delta <= 0:
+                return False
+            # Ожидаемая позиция при воспроизведении - сдвиг на прошедшее время
+            _varint(delta, self.data)
+            _varint(_zigzag(position - self._position - round(delta / TICKS)), self.data)
+        self._ticks = ticks
+        self._position = position
+        self.samples += 1
+        return True
+
+    @property
+    def raw_bytes(self) -> int:
+        return self.samples * RAW_SAMPLE_BYTES
+
+    def ratio(self) -> float:
+        return self.raw_bytes / len(self.data) if self.data else 0.0
+
+
+def encode_timeline(samples: List[Tuple[float, int]]) -> bytes:
+    encoder = TimelineEncoder()
+    for elapsed, position in samples:
+        encoder.add(elapsed, position)
+    return bytes(encoder.data)
+
+
+def decode_timeline(data: bytes) -> List[Tuple[float, int]]:
+    """Замеры (секунды от начала сеанса, позиция) из BLOB шкалы"""
+    samples: List[Tuple[float, int]] = []
+    offset = 0
+    ticks = position = 0
+    while offset < len(data):
+        value, offset = _read_varint(data, offset)
+        residual, offset = _read_varint(data, offset)
+        residual = (residual >> 1) ^ -(residual & 1)
+        if samples:
+            ticks += value
+            position += round(value / TICKS) + residual
+        else:
+            ticks, position = value, residual
+        samples.append((ticks / TICKS, position))
+    return samples
+
+
+class WatchHistory:
+    """История сеанса для PlaybackSupervisor: события в кольце, запись пакетами"""
+
+    def __init__(self, clock: Callable[[], float] = time.time,
+                 ring: int = HISTORY_RING, batch: int = FLUSH_BATCH):
+        self._clock = clock
+        self.batch = batch
+        self.ring: Deque[Event] = deque(maxlen=ring)
+        self.pending = 0                 # Недописанные события в конце ring
+        self.session_id: Optional[int] = None
+        self.started = 0.0
+        self.timeline = TimelineEncoder()
+        self.position: Optional[int] = None
+        self.duration: Optional[int] = None
+        self._flushed_samples = 0
+        self._session_events = 0         # Событий текущего сеанса (конец ring)
+
+        # Счётчики записи (все сеансы супервизора)
+        self.sessions = 0
+        self.events_written = 0
+        self.bytes_written = 0
+        self.batches = 0
+        self.write_seconds = 0.0
+        self.dropped = 0
+        self.session_ratios: List[float] = []
+
+    @property
+    def active(self) -> bool:
+        return self.session_id is not None
+
+    def start(self, filename: str, series_prefix: Optional[str], series_suffix: Optional[str],
+              position: Optional[int], duration: Optional[int]) -> Optional[int]:
+        """Новый сеанс (предыдущий должен быть завершён end())"""
+        self.started = self._clock()
+        with VlcDatabase() as db:
+            self.session_id = db.start_playback_session(
+                filename, series_prefix or None, series_suffix or None,
+                self.started, position, duration)
+        if self.session_id is None:
+            return None
+        self.sessions += 1
+        self.timeline = TimelineEncoder()
+        self._flushed_samples = 0
+        self._session_events = 0
+        self.position = position
+        self.duration = duration
+        self.event('start', position)
+        if position is not None:
+            self.sample(position)
+        return self.session_id
+
+    def sample(self, position: int) -> None:
+        """Замер позиции (get_time или часы воспроизведения)"""
+        if not self.active:
+            return
+        self.position = position
+        self.timeline.add(self._clock() - self.started, position)
+
+    def event(self, kind: str, position: Optional[int] = None, value: Optional[int] = None) -> None:
+        if not self.active:
+            return
+        if position is not None:
+            self.position = position
+        if self.pending == self.ring.maxlen:
+            self.dropped += 1            # Запись в БД не успевает - теряем старейшее
+        else:
+            self.pending += 1
+        self._session_events += 1
+        self.ring.append((self._clock(), kind, position, value))
+        if self.pending >= self.batch:
+            self.flush()
+
+    def recent(self, kind: Optional[str] = None) -> List[Event]:
+        """События сеансов из кольцевого буфера (старые первыми)"""
+        return [event for event in self.ring if kind is None or event[1] == kind]
+
+    def session_events(self) -> List[Event]:
+        """События текущего (или только что завершённого) сеанса из кольцевого буфера"""
+        count = min(self._session_events, len(self.ring))
+        return list(self.ring)[len(self.ring) - count:]
+
+    def flush(self, ended: Optional[float] = None) -> bool:
+        """Дописать накопленные события и шкалу позиций одной транзакцией"""
+        if not self.active:
+            return True
+        if not self.pending and self.timeline.samples == self._flushed_samples and ended is None:
+            return True
+        events = list(self.ring)[len(self.ring) - self.pending:] if self.pending else []
+        start = time.perf_counter()
+        with VlcDatabase() as db:
+            ok = db.save_playback_history(
+                self.session_id, events, self.position, self.duration,
+                self.timeline.samples, bytes(self.timeline.data), self.timeline.raw_bytes, ended)
+        self.write_seconds += time.perf_counter() - start
+        if not ok:
+            return False
+        self.batches += 1
+        self.events_written += len(events)
+        self.bytes_written += len(events) * EVENT_BYTES + len(self.timeline.data)
+        self.pending = 0
+        self._flushed_samples = self.timeline.samples
+        return True
+
+    def end(self, position: Optional[int], duration: Optional[int] = None) -> None:
+        """Завершить сеанс: событие end и финальная запись"""
+        if not self.active:
+            return
+        if duration:
+            self.duration = duration
+        self.event('end', position)
+        if position is not None:
+            self.sample(position)
+        self.flush(ended=self._clock())
+        self.session_ratios.append(self.timeline.ratio())
+        self.session_id = None
+
+    def stats(self) -> Dict[str, float]:
+        """Сжатие шкалы и скорость записи истории"""
+        return {
+            'history_sessions': self.sessions,
+            'history_events': self.events_written,
+            'history_samples': self.timeline.samples,
+            'history_ratio': self.timeline.ratio(),
+            'history_batches': self.batches,
+            'history_dropped': self.dropped,
+            'history_write_ms': 1000 * self.write_seconds / self.batches if self.batches else 0.0,
+        }
+
+
+def format_session(row: Tuple) -> str:
+    (session_id, filename, started, ended, start_position, end_position,
+     duration, samples, timeline_bytes, raw_bytes, events) = row
+    length = (ended or started) - started
+    ratio = raw_bytes / timeline_bytes if timeline_bytes else 0.0
+    when = time.strftime('%d.%m %H:%M', time.localtime(started))
+    span = f"{start_position or 0}s → {end_position if end_position is not None else '?'}s"
+    return (f"#{session_id:<5}{when}  {length / 60:>5.0f} мин  {span:<17}"
+            f"замеров {samples:>4}, {timeline_bytes:>5} Б (x{ratio:.1f}), событий {events:>3}  {filename}")
+
+
+def main() -> int:
+    """Главная функция CLI"""
+    if len(sys.argv) < 2 or sys.argv[1] not in ('report', 'events'):
+        print("Использование: watch_history.py report [N] | events <id>", file=sys.stderr)
+        return 1
+
+    try:
+        number = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+
+    with VlcDatabase() as db:
+        db.init_db()
+        if sys.argv[1] == 'report':
+            rows = db.get_playback_sessions(limit=number)
+            if not rows:
+                print("ERROR: история просмотра пуста", file=sys.stderr)
+                return 1
+            for row in rows:
+                print(format_session(row))
+            samples = sum(row[7] for row in rows)
+            packed = sum(row[8] for row in rows)
+            raw = sum(row[9] for row in rows)
+            print(f"Итого: {len(rows)} сеансов, {samples} замеров, {packed} Б вместо {raw} Б"
+                  f" (x{raw / packed if packed else 0:.1f})")
+            return 0
+
+        events = db.get_playback_events(number)
+        timeline = decode_timeline(db.get_session_timeline(number) or b'')
+    if not events:
+        print(f"ERROR: сеанс {number} не найден", file=sys.stderr)
+        return 1
+    start = events[0][0]
+    for ts, kind, position, value in events:
+        extra = f" ({value})" if value is not None else ""
+        print(f"{ts - start:>8.1f}s  {kind:<11}{'' if position is None else position}{extra}")
+    print(f"Шкала: {len(timeline)} замеров")
+    for elapsed, position in timeline:
+        print(f"{elapsed:>8.1f}s  {position}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())